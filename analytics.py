@@ -1,19 +1,23 @@
 import os
+import sys
+import math
+from array import array
 import subprocess
 
-from pydriller import Repository
+from functools import partial
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait
+
+import numpy as np
 
 # Python Metrics
 import radon.metrics as metrics
 import radon.complexity as complexity
 from radon.complexity import cc_visit
+from radon.visitors import ComplexityVisitor
 import radon.raw as raw
 
-# TODO: Implementar cálculo de métricas para C++ 
-# import lizard
-
-# TODO: Obter hashes dos marcos temporais
-# import releasy
+# Multi-language Metrics (JavaScript, TypeScript, C, C++)
+import lizard
 
 import ast
 import json
@@ -21,9 +25,49 @@ from collections import defaultdict
 
 # Importação de módulos internos da ferramenta
 from data import repos
+from discovery import iter_source_files
+import profiling
+import budgets
+import scheduling
+import sharedblobs
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
+# Extensões de arquivo por linguagem suportada
+LANGUAGE_EXTENSIONS = {
+    'python': ('.py',),
+    'javascript': ('.js', '.jsx', '.mjs', '.cjs'),
+    'typescript': ('.ts', '.tsx'),
+    'c': ('.c', '.h'),
+    'cpp': ('.cpp', '.cc', '.cxx', '.hpp', '.hh', '.hxx'),
+}
+
+EXTENSION_LANGUAGE = {
+    ext: language
+    for language, extensions in LANGUAGE_EXTENSIONS.items()
+    for ext in extensions
+}
+
+# Métricas de Halstead por arquivo: coluna -> campo do HalsteadReport do radon
+HALSTEAD_FIELDS = {
+    'halstead_h1': 'h1',
+    'halstead_h2': 'h2',
+    'halstead_N1': 'N1',
+    'halstead_N2': 'N2',
+    'halstead_vocabulary': 'vocabulary',
+    'halstead_length': 'length',
+    'halstead_volume': 'volume',
+    'halstead_difficulty': 'difficulty',
+    'halstead_effort': 'effort',
+    'halstead_time': 'time',
+    'halstead_bugs': 'bugs',
+}
+
+# Métricas de Halstead somadas nas estatísticas do projeto (total_<coluna>);
+# as demais (operadores/operandos distintos e dificuldade) entram como média (mean_<coluna>)
+HALSTEAD_ADDITIVE = ('halstead_N1', 'halstead_N2', 'halstead_length', 'halstead_volume',
+                     'halstead_effort', 'halstead_time', 'halstead_bugs')
+
 # =============================================================================
 # Chidamber & Kemerer Metrics Analysis
 # =============================================================================
@@ -32,16 +76,21 @@ class ClassInfo:
     """
     Armazena informações sobre uma classe para análise de métricas C&K.
     
+    Representação compacta: usa __slots__ (sem __dict__ por instância), nomes
+    internados com sys.intern e, após freeze(), tuplas no lugar de listas e
+    conjuntos, compartilhando uma única tupla vazia entre todas as instâncias.
+    
     Attributes:
         name (str): Nome da classe
-        methods (list): Lista de métodos da classe
-        attributes (set): Conjunto de atributos da classe
-        base_classes (list): Lista de classes base (herança)
-        children (list): Lista de classes filhas
-        calls (set): Conjunto de chamadas feitas pela classe
-        called_by (set): Conjunto de classes que chamam esta classe
+        methods (list | tuple): Métodos da classe (com repetições, para o WMC)
+        attributes (set | tuple): Atributos da classe, sem repetições
+        base_classes (list | tuple): Classes base (herança)
+        children (list | tuple): Classes filhas
+        calls (set | tuple): Chamadas feitas pela classe, sem repetições
     """
     
+    __slots__ = ('name', 'methods', 'attributes', 'base_classes', 'children', 'calls')
+    
     def __init__(self, name: str):
         """
         Inicializa uma nova instância de ClassInfo.
@@ -49,13 +98,41 @@ class ClassInfo:
         Args:
             name: Nome da classe
         """
-        self.name = name
+        self.name = sys.intern(name)
         self.methods = []
         self.attributes = set()
         self.base_classes = []
         self.children = []
         self.calls = set()
-        self.called_by = set()
+    
+    def freeze(self) -> None:
+        """
+        Converte os contêineres mutáveis em tuplas de identificadores internados.
+        
+        Chamado ao final da análise (CKAnalyzer.build_hierarchy); tuplas ocupam
+        uma fração de listas e conjuntos e contêineres vazios viram _EMPTY.
+        """
+        self.methods = _freeze_names(self.methods)
+        self.attributes = _freeze_names(self.attributes)
+        self.base_classes = _freeze_names(self.base_classes)
+        self.children = _freeze_names(self.children)
+        self.calls = _freeze_names(self.calls)
+
+_EMPTY = ()
+
+def _freeze_names(names) -> tuple:
+    """
+    Converte uma coleção de identificadores em tupla de strings internadas.
+    
+    Args:
+        names: Lista, conjunto ou tupla de nomes
+        
+    Returns:
+        tuple: Tupla com os nomes (a tupla vazia compartilhada se não houver nomes)
+    """
+    if not names:
+        return _EMPTY
+    return tuple(sys.intern(n) for n in names)
 
 class CKAnalyzer(ast.NodeVisitor):
     """
@@ -75,6 +152,7 @@ class CKAnalyzer(ast.NodeVisitor):
         """
         self.classes = {}
         self.current_class = None
+        self._method_owners = None
 
     def visit_ClassDef(self, node):
         """
@@ -84,7 +162,9 @@ class CKAnalyzer(ast.NodeVisitor):
             node (ast.ClassDef): Nó da AST representando uma classe
         """
         class_name = node.name
-        class_info = self.classes.setdefault(class_name, ClassInfo(class_name))
+        class_info = self.classes.get(class_name)
+        if class_info is None:
+            class_info = self.classes[class_name] = ClassInfo(class_name)
         class_info.base_classes = [b.id for b in node.bases if isinstance(b, ast.Name)]
 
         parent_class = self.current_class
@@ -127,12 +207,16 @@ class CKAnalyzer(ast.NodeVisitor):
         """
         Constrói a hierarquia de herança entre as classes.
         
-        Popula a lista 'children' de cada classe com suas classes filhas.
+        Popula a lista 'children' de cada classe com suas classes filhas e
+        compacta os registros (ClassInfo.freeze), pois a análise está completa.
         """
         for cls in self.classes.values():
             for base in cls.base_classes:
                 if base in self.classes:
                     self.classes[base].children.append(cls.name)
+        for cls in self.classes.values():
+            cls.freeze()
+        self._method_owners = None
 
     def compute_metrics(self):
         """
@@ -196,12 +280,19 @@ class CKAnalyzer(ast.NodeVisitor):
         Returns:
             int: Número de acoplamentos externos
         """
+        if self._method_owners is None:
+            # Índice método -> classes que o definem, construído uma única vez
+            owners = defaultdict(set)
+            for other_cls in self.classes.values():
+                for method in other_cls.methods:
+                    owners[method].add(other_cls.name)
+            self._method_owners = owners
+        
         external_calls = 0
         for call in cls.calls:
-            for other_cls in self.classes.values():
-                if other_cls.name != cls.name and call in other_cls.methods:
-                    external_calls += 1
-                    break
+            call_owners = self._method_owners.get(call)
+            if call_owners and (len(call_owners) > 1 or cls.name not in call_owners):
+                external_calls += 1
         return external_calls
 
     def _compute_lcom(self, cls):
@@ -225,12 +316,13 @@ class CKAnalyzer(ast.NodeVisitor):
         no_shared = sum(1 for a, b in pairs if a.isdisjoint(b))
         return no_shared
 
-def do_ck_analysis_file(filepath: str) -> dict:
+def do_ck_analysis_file(filepath: str, code: str = None) -> dict:
     """
     Realiza análise de métricas C&K em um arquivo Python.
     
     Args:
         filepath: Caminho para o arquivo Python a ser analisado
+        code: Conteúdo já carregado do arquivo; se None, o arquivo é lido
         
     Returns:
         dict: Métricas C&K para todas as classes encontradas no arquivo
@@ -239,52 +331,250 @@ def do_ck_analysis_file(filepath: str) -> dict:
         FileNotFoundError: Se o arquivo não for encontrado
         SyntaxError: Se o arquivo contém código Python inválido
     """
-    with open(filepath, 'r', encoding='utf-8') as f:
-        code = f.read()
+    if code is None:
+        with open(filepath, 'r', encoding='utf-8') as f:
+            code = f.read()
 
-    tree = ast.parse(code)
-    analyzer = CKAnalyzer()
-    analyzer.visit(tree)
-    analyzer.build_hierarchy()
-    metrics = analyzer.compute_metrics()
+    with profiling.stage('ck'):
+        tree = ast.parse(code)
+        analyzer = CKAnalyzer()
+        analyzer.visit(tree)
+        analyzer.build_hierarchy()
+        metrics = analyzer.compute_metrics()
     return metrics
 
-def get_ck_metrics(path: str) -> dict:
+def _ck_analysis_worker(filepath):
+    """
+    Executa do_ck_analysis_file() capturando erros, para uso no pipeline de arquivos.
+    
+    Args:
+        filepath: Caminho para o arquivo Python ou sharedblobs.BlobRef
+        
+    Returns:
+        tuple: (filepath, métricas) — métricas é None em caso de erro
+    """
+    filepath, code = sharedblobs.source_of(filepath)
+    try:
+        return filepath, do_ck_analysis_file(filepath, code)
+    except Exception as e:
+        print(f"Error in {filepath}: {e}")
+        return filepath, None
+
+def _budgeted_ck_worker(budget, filepath):
+    """
+    Executa _ck_analysis_worker() dentro do orçamento de tamanho e CPU.
+    
+    Args:
+        budget: budgets.FileBudget aplicado ao arquivo
+        filepath: Caminho para o arquivo Python ou sharedblobs.BlobRef
+        
+    Returns:
+        tuple: (filepath, métricas, evento) — evento é None se o arquivo
+               ficou dentro do orçamento. Sem métricas raw para classes,
+               arquivos acima do orçamento são sempre ignorados
+    """
+    path, n_bytes = sharedblobs.item_size(filepath)
+    too_large, n_bytes = budget.exceeds_size(path, n_bytes)
+    if too_large:
+        return path, None, budget.event(path, n_bytes, 'ck', 'tamanho', 'skip')
+    try:
+        with budgets.cpu_limit(budget.cpu_seconds):
+            return _ck_analysis_worker(filepath) + (None,)
+    except budgets.BudgetExceeded:
+        return path, None, budget.event(path, n_bytes, 'ck', 'cpu', 'skip')
+
+def _iter_budgeted(func, file_paths, workers: int, budget, budget_report, cost_model=None):
+    """
+    Executa o pipeline de arquivos com orçamento por arquivo, registrando no
+    relatório os arquivos que o atingiram.
+    
+    Args:
+        func: Worker com assinatura func(budget, caminho) -> (caminho, métricas, ..., evento)
+        file_paths: Iterável com os caminhos dos arquivos
+        workers: Número de processos
+        budget: budgets.FileBudget ou None
+        budget_report: budgets.BudgetReport opcional
+        cost_model: scheduling.CostModel opcional (ver _iter_file_pipeline)
+        
+    Yields:
+        tuple: O resultado do worker sem o evento, ex: (caminho, métricas)
+    """
+    isolate = bool(budget.cpu_seconds)
+    for result in _iter_file_pipeline(partial(func, budget), file_paths, workers, isolate=isolate,
+                                      cost_model=cost_model):
+        event = result[-1]
+        if event is not None and budget_report is not None:
+            budget_report.write(event)
+        yield result[:-1]
+
+def iter_class_metrics(path: str, include: list = None, exclude: list = None,
+                       use_git: bool = False, workers: int = None,
+                       budget: budgets.FileBudget = None,
+                       budget_report: budgets.BudgetReport = None,
+                       cost_model: scheduling.CostModel = None):
+    """
+    Gera as métricas Chidamber & Kemerer arquivo a arquivo, à medida que cada
+    análise termina.
+    
+    Args:
+        path: Caminho para o diretório a ser analisado
+        include: Globs (formato .gitignore) de arquivos a incluir
+        exclude: Globs (formato .gitignore) de arquivos/diretórios a excluir
+        use_git: Se True, descobre os arquivos via 'git ls-files'
+        workers: Número de processos para a análise. None ou 1 executa sequencialmente
+        budget: Limites de tamanho e CPU por arquivo (budgets.FileBudget)
+        budget_report: budgets.BudgetReport que recebe os arquivos ignorados por orçamento
+        cost_model: scheduling.CostModel opcional; despacha os arquivos do maior
+                    para o menor custo estimado e registra os tempos medidos
+        
+    Yields:
+        tuple: (caminho_arquivo, {classe: {métrica: valor}})
+        
+    Note:
+        Arquivos com erros de sintaxe são ignorados e o erro é reportado.
+        A memória usada não cresce com o tamanho do projeto.
+    """
+    file_paths = iter_source_files(path, include=include, exclude=exclude, use_git=use_git)
+    
+    if budget is not None:
+        results = _iter_budgeted(_budgeted_ck_worker, file_paths, workers, budget, budget_report,
+                                 cost_model)
+    else:
+        results = _iter_file_pipeline(_ck_analysis_worker, file_paths, workers, cost_model=cost_model)
+    for fullpath, metrics in results:
+        if metrics is not None:
+            yield fullpath, metrics
+
+def iter_blob_class_metrics(blobs: dict, workers: int = None,
+                            budget: budgets.FileBudget = None,
+                            budget_report: budgets.BudgetReport = None,
+                            cost_model: scheduling.CostModel = None):
+    """
+    Gera as métricas Chidamber & Kemerer de conteúdos já carregados em memória,
+    ex: blobs lidos de uma revisão sem checkout.
+    
+    Args:
+        blobs: {caminho: bytes}, ex: utils.read_blobs(); apenas arquivos .py são analisados
+        workers: Número de processos para a análise. None ou 1 executa sequencialmente
+        budget: Limites de tamanho e CPU por arquivo (budgets.FileBudget)
+        budget_report: budgets.BudgetReport que recebe os arquivos ignorados por orçamento
+        cost_model: scheduling.CostModel opcional; despacha os arquivos do maior
+                    para o menor custo estimado e registra os tempos medidos
+        
+    Yields:
+        tuple: (caminho_arquivo, {classe: {métrica: valor}})
+        
+    Note:
+        Os conteúdos vão para os workers em um único segmento de memória
+        compartilhada (sharedblobs.SharedBlobBatch), liberado ao fim da geração.
+    """
+    blobs = {path: content for path, content in blobs.items() if path.endswith('.py')}
+    with sharedblobs.SharedBlobBatch(blobs) as batch:
+        if budget is not None:
+            results = _iter_budgeted(_budgeted_ck_worker, batch.refs(), workers, budget, budget_report,
+                                     cost_model)
+        else:
+            results = _iter_file_pipeline(_ck_analysis_worker, batch.refs(), workers,
+                                          cost_model=cost_model)
+        for fullpath, metrics in results:
+            if metrics is not None:
+                yield fullpath, metrics
+
+def get_ck_metrics(path: str, include: list = None, exclude: list = None,
+                   use_git: bool = False, workers: int = None,
+                   budget: budgets.FileBudget = None,
+                   budget_report: budgets.BudgetReport = None,
+                   cost_model: scheduling.CostModel = None) -> dict:
     """
     Calcula métricas Chidamber & Kemerer para todos os arquivos Python em um diretório.
     
     Args:
         path: Caminho para o diretório a ser analisado
+        include: Globs (formato .gitignore) de arquivos a incluir
+        exclude: Globs (formato .gitignore) de arquivos/diretórios a excluir
+        use_git: Se True, descobre os arquivos via 'git ls-files'
+        workers: Número de processos para a análise. None ou 1 executa sequencialmente
+        budget: Limites de tamanho e CPU por arquivo (budgets.FileBudget)
+        budget_report: budgets.BudgetReport que recebe os arquivos ignorados por orçamento
+        cost_model: scheduling.CostModel opcional; despacha os arquivos do maior
+                    para o menor custo estimado e registra os tempos medidos
         
     Returns:
         dict: Métricas C&K organizadas por arquivo e classe
               Formato: {arquivo: {classe: {métrica: valor}}}
               
     Note:
-        Arquivos com erros de sintaxe são ignorados e o erro é reportado
-    """
-    results = {}
-    for root, _, files in os.walk(path):
-        for file in files:
-            if file.endswith('.py'):
-                fullpath = os.path.join(root, file)
-                try:
-                    metrics = do_ck_analysis_file(fullpath)
-                    results[fullpath] = metrics
-                except Exception as e:
-                    print(f"Error in {fullpath}: {e}")
-    return results
+        Arquivos com erros de sintaxe são ignorados e o erro é reportado.
+        A descoberta de arquivos é feita por discovery.iter_source_files().
+        Para projetos grandes prefira iter_class_metrics().
+    """
+    return dict(iter_class_metrics(path, include=include, exclude=exclude,
+                                   use_git=use_git, workers=workers,
+                                   budget=budget, budget_report=budget_report,
+                                   cost_model=cost_model))
 
 # =============================================================================
 # Raw and Halstead Metrics Analysis
 # =============================================================================
 
-def get_code_metrics(file_path: str) -> dict:
+def _python_function_rows(cc_visitor, hal_metrics) -> list:
+    """
+    Monta as linhas por função a partir dos resultados já calculados de CC e Halstead.
+    
+    Args:
+        cc_visitor: ComplexityVisitor aplicado à árvore do arquivo
+        hal_metrics: Resultado de radon.metrics.h_visit_ast() para a mesma árvore
+        
+    Returns:
+        list: Dicionários com classe, funcao, tipo, linha_inicio, linha_fim, loc,
+              complexity, halstead_volume e halstead_effort
+              
+    Note:
+        Inclui funções de módulo e métodos (também de classes aninhadas, com a
+        classe qualificada como 'Externa.Interna'). Funções aninhadas em outras
+        funções não geram linhas, como no Halstead do radon, que as soma à externa.
+    """
+    # Halstead por nome, na ordem do código: nomes repetidos são casados em ordem
+    halstead_by_name = defaultdict(list)
+    for name, report in hal_metrics.functions:
+        halstead_by_name[name].append(report)
+    for reports in halstead_by_name.values():
+        reports.reverse()
+    
+    blocks = [(None, function) for function in cc_visitor.functions]
+    pending_classes = [(cls.name, cls) for cls in cc_visitor.classes]
+    while pending_classes:
+        qualified_name, cls = pending_classes.pop()
+        blocks.extend((qualified_name, method) for method in cls.methods)
+        pending_classes.extend((f"{qualified_name}.{inner.name}", inner) for inner in cls.inner_classes)
+    blocks.sort(key=lambda item: item[1].lineno)
+    
+    rows = []
+    for class_name, function in blocks:
+        reports = halstead_by_name.get(function.name)
+        report = reports.pop() if reports else None
+        rows.append({
+            'classe': class_name,
+            'funcao': function.name,
+            'tipo': 'method' if class_name else 'function',
+            'linha_inicio': function.lineno,
+            'linha_fim': function.endline,
+            'loc': function.endline - function.lineno + 1,
+            'complexity': function.complexity,
+            'halstead_volume': report.volume if report else None,
+            'halstead_effort': report.effort if report else None,
+        })
+    return rows
+
+def get_code_metrics(file_path: str, with_functions: bool = False, code: str = None):
     """
     Calcula várias métricas de qualidade de software (RAW e Halstead) para um arquivo Python.
     
     Args:
         file_path: Caminho para o arquivo Python a ser analisado
+        with_functions: Se True, retorna também as métricas por função,
+                        extraídas do mesmo parse
+        code: Conteúdo já carregado do arquivo; se None, o arquivo é lido
         
     Returns:
         dict: Dicionário com métricas do arquivo:
@@ -296,23 +586,44 @@ def get_code_metrics(file_path: str) -> dict:
             - blank: Número de linhas em branco
             - average_complexity: Complexidade ciclomática média
             - maintainability_index: Índice de manutenibilidade
+            - language: Linguagem do arquivo ('python')
+            - halstead_*: Totais de Halstead do arquivo (ver HALSTEAD_FIELDS):
+              h1, h2, N1, N2, vocabulary, length, volume, difficulty,
+              effort, time e bugs
+        tuple: (métricas, linhas por função) se with_functions for True
+               (ver _python_function_rows)
             
     Returns:
         None: Em caso de erro na análise
     """
     try:
-        with open(file_path, 'r') as file:
-            code = file.read()
+        if code is None:
+            with open(file_path, 'r') as file:
+                code = file.read()
             
+        # Parse único, compartilhado por CC, Halstead e MI
+        with profiling.stage('parse'):
+            tree = ast.parse(code)
+        
         # Calculate raw metrics
-        raw_metrics = raw.analyze(code)
+        with profiling.stage('raw'):
+            raw_metrics = raw.analyze(code)
         
         # Calculate cyclomatic complexity
-        cc = complexity.cc_visit(code)
-        avg_cc = sum(item.complexity for item in cc) / len(cc) if cc else 0
+        with profiling.stage('cc'):
+            cc_visitor = ComplexityVisitor.from_ast(tree)
+            cc = cc_visitor.blocks
+            avg_cc = sum(item.complexity for item in cc) / len(cc) if cc else 0
         
-        # Calculate Halstead metrics
-        hal_metrics = metrics.h_visit(code)
+        # Calculate Halstead metrics and maintainability index
+        # (equivalente a metrics.mi_visit(code, multi=True), sem novos parses)
+        with profiling.stage('mi'):
+            hal_metrics = metrics.h_visit_ast(tree)
+            comments_lines = raw_metrics.comments + raw_metrics.multi
+            comments_percent = comments_lines / float(raw_metrics.sloc) * 100 if raw_metrics.sloc != 0 else 0
+            maintainability_index = metrics.mi_compute(hal_metrics.total.volume,
+                                                       cc_visitor.total_complexity,
+                                                       raw_metrics.lloc, comments_percent)
         
         metrics_report = {
             'loc': raw_metrics.loc,  # Lines of code
@@ -322,43 +633,663 @@ def get_code_metrics(file_path: str) -> dict:
             'multi': raw_metrics.multi,  # Number of multi-line strings
             'blank': raw_metrics.blank,  # Number of blank lines
             'average_complexity': avg_cc,  # Average cyclomatic complexity
-            'maintainability_index': metrics.mi_visit(code, multi=True),  # Maintainability index
+            'maintainability_index': maintainability_index,  # Maintainability index
+            'language': 'python',
+        }
+        # Halstead do mesmo h_visit_ast usado no índice de manutenibilidade
+        halstead_total = hal_metrics.total
+        for column, field in HALSTEAD_FIELDS.items():
+            metrics_report[column] = getattr(halstead_total, field)
+        
+        if with_functions:
+            with profiling.stage('functions'):
+                return metrics_report, _python_function_rows(cc_visitor, hal_metrics)
+        return metrics_report
+        
+    except Exception as e:
+        print(f"Error calculating metrics: {str(e)}")
+        return None
+
+def get_lizard_metrics(file_path: str, with_functions: bool = False, code: str = None):
+    """
+    Calcula métricas de tamanho e complexidade via lizard para arquivos
+    JavaScript, TypeScript, C e C++.
+    
+    Args:
+        file_path: Caminho para o arquivo a ser analisado
+        with_functions: Se True, retorna também as métricas por função
+                        (sem Halstead, que o lizard não calcula)
+        code: Conteúdo já carregado do arquivo; se None, o arquivo é lido
+        
+    Returns:
+        dict: Dicionário no mesmo formato de get_code_metrics():
+            - loc: Total de linhas do arquivo
+            - lloc: Linhas de código sem comentários e brancos (NLOC do lizard)
+            - sloc: Linhas de código sem comentários e brancos (NLOC do lizard)
+            - comments: Linhas que não são código nem branco
+            - multi: Sempre 0 (não se aplica)
+            - blank: Número de linhas em branco
+            - average_complexity: Complexidade ciclomática média das funções
+            - maintainability_index: None (não calculado para estas linguagens)
+            - language: Linguagem do arquivo
+            - halstead_*: None (não calculado para estas linguagens)
+        tuple: (métricas, linhas por função) se with_functions for True
+            
+    Returns:
+        None: Em caso de erro na análise ou extensão não suportada
+    """
+    language = EXTENSION_LANGUAGE.get(os.path.splitext(file_path)[1])
+    if language is None or language == 'python':
+        return None
+    
+    try:
+        if code is None:
+            with open(file_path, 'r', encoding='utf-8', errors='replace') as file:
+                code = file.read()
+        
+        info = lizard.analyze_file.analyze_source_code(file_path, code)
+        
+        lines = code.splitlines()
+        loc = len(lines)
+        blank = sum(1 for line in lines if not line.strip())
+        
+        metrics_report = {
+            'loc': loc,
+            'lloc': info.nloc,
+            'sloc': info.nloc,
+            'comments': max(loc - info.nloc - blank, 0),
+            'multi': 0,
+            'blank': blank,
+            'average_complexity': info.average_cyclomatic_complexity,
+            'maintainability_index': None,
+            'language': language,
         }
+        metrics_report.update(dict.fromkeys(HALSTEAD_FIELDS))
+        
+        if with_functions:
+            functions = []
+            for function in info.function_list:
+                # O nome inclui o escopo (ex: 'Classe::metodo' em C++)
+                scope, _, _ = function.name.rpartition('::')
+                functions.append({
+                    'classe': scope or None,
+                    'funcao': function.name.rpartition('::')[2],
+                    'tipo': 'method' if scope else 'function',
+                    'linha_inicio': function.start_line,
+                    'linha_fim': function.end_line,
+                    'loc': function.end_line - function.start_line + 1,
+                    'complexity': function.cyclomatic_complexity,
+                    'halstead_volume': None,
+                    'halstead_effort': None,
+                })
+            return metrics_report, functions
+        return metrics_report
+        
+    except Exception as e:
+        print(f"Error calculating metrics: {str(e)}")
+        return None
+
+# Backend de análise por linguagem. Novas linguagens são adicionadas aqui e em
+# LANGUAGE_EXTENSIONS.
+LANGUAGE_ANALYZERS = {
+    'python': get_code_metrics,
+    'javascript': get_lizard_metrics,
+    'typescript': get_lizard_metrics,
+    'c': get_lizard_metrics,
+    'cpp': get_lizard_metrics,
+}
+
+def analyze_source_file(file_path, with_functions: bool = False):
+    """
+    Calcula as métricas de um arquivo usando o backend da sua linguagem.
+    
+    Args:
+        file_path: Caminho para o arquivo, ou sharedblobs.BlobRef com o
+                   conteúdo em memória compartilhada
+        with_functions: Se True, inclui as linhas por função no resultado
+        
+    Returns:
+        tuple: (file_path, métricas) — métricas é None se a extensão não for
+               suportada ou a análise falhar. Com with_functions,
+               (file_path, métricas, linhas por função). file_path é sempre o caminho
+    """
+    file_path, code = sharedblobs.source_of(file_path)
+    language = EXTENSION_LANGUAGE.get(os.path.splitext(file_path)[1])
+    analyzer = LANGUAGE_ANALYZERS.get(language)
+    if not with_functions:
+        return file_path, analyzer(file_path, code=code) if analyzer else None
+    result = analyzer(file_path, with_functions=True, code=code) if analyzer else None
+    if result is None:
+        return file_path, None, []
+    return (file_path,) + result
+
+def get_raw_metrics(file_path: str, code: str = None) -> dict:
+    """
+    Calcula apenas as métricas de linhas de um arquivo, sem complexidade,
+    Halstead ou índice de manutenibilidade. Usada para arquivos acima do orçamento.
+    
+    Args:
+        file_path: Caminho para o arquivo
+        code: Conteúdo já carregado do arquivo; se None, o arquivo é lido
+        
+    Returns:
+        dict: Dicionário no formato de get_code_metrics(), com
+              average_complexity, maintainability_index e Halstead iguais a None.
+              Fora de Python apenas loc e blank são calculados (os demais são None)
+              
+    Returns:
+        None: Em caso de erro na leitura ou extensão não suportada
+    """
+    language = EXTENSION_LANGUAGE.get(os.path.splitext(file_path)[1])
+    if language is None:
+        return None
+    
+    try:
+        if code is None:
+            with open(file_path, 'r', encoding='utf-8', errors='replace') as file:
+                code = file.read()
         
+        if language == 'python':
+            with profiling.stage('raw'):
+                raw_metrics = raw.analyze(code)
+            loc, lloc, sloc = raw_metrics.loc, raw_metrics.lloc, raw_metrics.sloc
+            comments, multi, blank = raw_metrics.comments, raw_metrics.multi, raw_metrics.blank
+        else:
+            lines = code.splitlines()
+            loc = len(lines)
+            blank = sum(1 for line in lines if not line.strip())
+            lloc = sloc = comments = multi = None
+        
+        metrics_report = {
+            'loc': loc,
+            'lloc': lloc,
+            'sloc': sloc,
+            'comments': comments,
+            'multi': multi,
+            'blank': blank,
+            'average_complexity': None,
+            'maintainability_index': None,
+            'language': language,
+        }
+        metrics_report.update(dict.fromkeys(HALSTEAD_FIELDS))
         return metrics_report
         
     except Exception as e:
         print(f"Error calculating metrics: {str(e)}")
         return None
 
-def get_project_metrics(project_path: str) -> dict:
+def _budgeted_file_worker(budget, file_path, with_functions: bool = False):
+    """
+    Executa analyze_source_file() dentro do orçamento de tamanho e CPU.
+    
+    Args:
+        budget: budgets.FileBudget aplicado ao arquivo
+        file_path: Caminho para o arquivo ou sharedblobs.BlobRef
+        with_functions: Repassado a analyze_source_file()
+        
+    Returns:
+        tuple: Resultado de analyze_source_file() seguido do evento de orçamento
+               (None se o arquivo ficou dentro do orçamento). Acima do orçamento,
+               as métricas são as de get_raw_metrics() (on_exceed='raw') ou
+               None (on_exceed='skip'), sem linhas por função
+    """
+    item = file_path
+    file_path, n_bytes = sharedblobs.item_size(item)
+    too_large, n_bytes = budget.exceeds_size(file_path, n_bytes)
+    reason = 'tamanho' if too_large else None
+    if not too_large:
+        try:
+            with budgets.cpu_limit(budget.cpu_seconds):
+                return analyze_source_file(item, with_functions) + (None,)
+        except budgets.BudgetExceeded:
+            reason = 'cpu'
+    
+    functions = ([],) if with_functions else ()
+    if budget.on_exceed == 'skip':
+        return (file_path, None) + functions + (
+            budget.event(file_path, n_bytes, 'metricas', reason, 'skip'),)
+    
+    # A contagem de linhas tem o mesmo limite de CPU; se também estourar, o arquivo é ignorado
+    try:
+        with budgets.cpu_limit(budget.cpu_seconds):
+            metrics = get_raw_metrics(*sharedblobs.source_of(item))
+    except budgets.BudgetExceeded:
+        return (file_path, None) + functions + (
+            budget.event(file_path, n_bytes, 'metricas', reason, 'skip'),)
+    return (file_path, metrics) + functions + (
+        budget.event(file_path, n_bytes, 'metricas', reason, 'raw'),)
+
+def _iter_file_pipeline(func, file_paths, workers: int = None, isolate: bool = False,
+                        cost_model=None):
+    """
+    Aplica uma função de análise sobre uma sequência de arquivos, entregando
+    cada resultado assim que ele fica pronto.
+    
+    Args:
+        func: Função de nível de módulo (serializável) que recebe um caminho
+        file_paths: Iterável com os caminhos dos arquivos (consumido sob demanda)
+        workers: Número de processos. None ou 1 executa no processo atual
+        isolate: Se True, mesmo com workers None ou 1 a análise roda em um
+                 processo worker (necessário para os limites de CPU de budgets)
+        cost_model: scheduling.CostModel opcional. Os arquivos são despachados
+                    do maior para o menor custo estimado e o tempo de cada um
+                    é registrado no modelo
+        
+    Yields:
+        Resultados de func. Com workers > 1 a ordem é a de conclusão
+        
+    Note:
+        No modo paralelo no máximo workers * 4 arquivos ficam pendentes, de forma
+        que nem a lista de caminhos nem os resultados se acumulam em memória.
+        Com um profiling.RunProfile ativo, a descoberta é medida como estágio
+        'discover' e cada arquivo tem tempo, bytes, estágios e worker registrados.
+        
+        Os processos do pool retiram as tarefas de uma fila única à medida que
+        ficam livres; com cost_model, a ordem maior-primeiro faz com que os
+        arquivos caros comecem cedo e os pequenos preencham os workers ociosos
+        no fim, em vez de um worker terminar sozinho um arquivo grande.
+    """
+    profiled = profiling.current() is not None
+    if profiled:
+        file_paths = profiling.timed_iter(file_paths, 'discover')
+    if cost_model is not None:
+        file_paths = cost_model.order(file_paths)
+    measured = profiled or cost_model is not None
+    if measured:
+        func = partial(profiling.profiled_call, func)
+    
+    sequential = (not workers or workers <= 1) and not isolate
+    pool = profiling.start_pool(1 if sequential else max(workers or 1, 1)) if profiled else None
+    
+    def unwrap(result):
+        if measured:
+            result, timing = result
+            profiling.record_timing(timing, pool)
+            if cost_model is not None:
+                cost_model.observe(timing)
+        return result
+    
+    if sequential:
+        for file_path in file_paths:
+            yield unwrap(func(file_path))
+        return
+    
+    workers = max(workers or 1, 1)
+    max_pending = workers * 4
+    file_paths = iter(file_paths)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = set()
+        for file_path in file_paths:
+            pending.add(executor.submit(func, file_path))
+            if len(pending) >= max_pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield unwrap(future.result())
+        for future in as_completed(pending):
+            yield unwrap(future.result())
+
+def iter_file_metrics(project_path: str, include: list = None, exclude: list = None,
+                      use_git: bool = False, languages: tuple = ('python',),
+                      workers: int = None, budget: budgets.FileBudget = None,
+                      budget_report: budgets.BudgetReport = None,
+                      with_functions: bool = False, cost_model: scheduling.CostModel = None):
     """
-    Analisa métricas para todos os arquivos Python em um projeto.
+    Gera as métricas por arquivo de um projeto à medida que cada análise termina.
     
     Args:
         project_path: Caminho para o diretório do projeto
+        include: Globs (formato .gitignore) de arquivos a incluir
+        exclude: Globs (formato .gitignore) de arquivos/diretórios a excluir
+        use_git: Se True, descobre os arquivos via 'git ls-files'
+        languages: Linguagens analisadas (chaves de LANGUAGE_EXTENSIONS)
+        workers: Número de processos para a análise. None ou 1 executa sequencialmente
+        budget: Limites de tamanho e CPU por arquivo (budgets.FileBudget)
+        budget_report: budgets.BudgetReport que recebe os arquivos que atingiram o orçamento
+        with_functions: Se True, cada registro traz também as linhas por função,
+                        calculadas no mesmo parse do arquivo
+        cost_model: scheduling.CostModel opcional; despacha os arquivos do maior
+                    para o menor custo estimado e registra os tempos medidos
+        
+    Yields:
+        tuple: (caminho_arquivo, {métrica: valor}), ou
+               (caminho_arquivo, {métrica: valor}, [linha por função]) com with_functions
+        
+    Note:
+        Arquivos com erro são ignorados. O gerador não acumula registros:
+        consumidores como os sinks de sinks.py processam cada arquivo e o
+        descartam (StatisticsAccumulator guarda apenas colunas de floats).
+        Com limite de CPU no orçamento, a análise sempre roda em processos workers.
+    """
+    extensions = tuple(ext for language in languages for ext in LANGUAGE_EXTENSIONS[language])
+    file_paths = iter_source_files(project_path, extensions=extensions,
+                                   include=include, exclude=exclude, use_git=use_git)
+    
+    if budget is not None:
+        worker = partial(_budgeted_file_worker, with_functions=with_functions)
+        results = _iter_budgeted(worker, file_paths, workers, budget, budget_report, cost_model)
+    else:
+        worker = partial(analyze_source_file, with_functions=with_functions)
+        results = _iter_file_pipeline(worker, file_paths, workers, cost_model=cost_model)
+    for result in results:
+        if result[1]:
+            yield result
+
+def iter_path_metrics(file_paths, workers: int = None, budget: budgets.FileBudget = None,
+                      budget_report: budgets.BudgetReport = None,
+                      cost_model: scheduling.CostModel = None):
+    """
+    Gera as métricas de uma lista de arquivos já selecionada, ex: uma amostra
+    (ver preview.py), sem descoberta de arquivos.
+    
+    Args:
+        file_paths: Iterável com os caminhos dos arquivos; a linguagem de cada
+                    um é escolhida pela extensão
+        workers: Número de processos para a análise. None ou 1 executa sequencialmente
+        budget: Limites de tamanho e CPU por arquivo (budgets.FileBudget)
+        budget_report: budgets.BudgetReport que recebe os arquivos que atingiram o orçamento
+        cost_model: scheduling.CostModel opcional; despacha os arquivos do maior
+                    para o menor custo estimado e registra os tempos medidos
+        
+    Yields:
+        tuple: (caminho_arquivo, {métrica: valor}), como iter_file_metrics()
+    """
+    if budget is not None:
+        results = _iter_budgeted(_budgeted_file_worker, file_paths, workers, budget, budget_report,
+                                 cost_model)
+    else:
+        results = _iter_file_pipeline(analyze_source_file, file_paths, workers, cost_model=cost_model)
+    for result in results:
+        if result[1]:
+            yield result
+
+def get_project_metrics(project_path: str, include: list = None, exclude: list = None,
+                        use_git: bool = False, languages: tuple = ('python',),
+                        workers: int = None, budget: budgets.FileBudget = None,
+                        budget_report: budgets.BudgetReport = None,
+                        cost_model: scheduling.CostModel = None) -> dict:
+    """
+    Analisa métricas para todos os arquivos de código de um projeto.
+    
+    Args:
+        project_path: Caminho para o diretório do projeto
+        include: Globs (formato .gitignore) de arquivos a incluir
+        exclude: Globs (formato .gitignore) de arquivos/diretórios a excluir,
+                 ex: ['tests/', 'docs/', '**/migrations/']
+        use_git: Se True, descobre os arquivos via 'git ls-files'
+        languages: Linguagens analisadas (chaves de LANGUAGE_EXTENSIONS).
+                   Python usa radon; JavaScript, TypeScript, C e C++ usam lizard
+        workers: Número de processos para a análise dos arquivos.
+                 None ou 1 executa sequencialmente
+        budget: Limites de tamanho e CPU por arquivo (budgets.FileBudget).
+                Arquivos acima do limite são degradados para métricas raw ou ignorados
+        budget_report: budgets.BudgetReport que recebe os arquivos que atingiram o orçamento
+        cost_model: scheduling.CostModel opcional; despacha os arquivos do maior
+                    para o menor custo estimado e registra os tempos medidos
         
     Returns:
         dict: Métricas organizadas por arquivo
               Formato: {caminho_arquivo: {métrica: valor}}
               
     Note:
-        Apenas arquivos .py são processados. Arquivos com erro são ignorados.
+        Por padrão apenas arquivos .py são processados. Arquivos com erro são ignorados.
+        Diretórios como .git, ambientes virtuais, build/ e node_modules, além
+        dos caminhos do .gitignore, não são percorridos.
+        Para projetos grandes prefira iter_file_metrics().
     """
-    all_metrics = {}
+    return dict(iter_file_metrics(project_path, include=include, exclude=exclude,
+                                  use_git=use_git, languages=languages, workers=workers,
+                                  budget=budget, budget_report=budget_report,
+                                  cost_model=cost_model))
+
+
+def iter_blob_metrics(blobs: dict, languages: tuple = ('python',), workers: int = None,
+                      budget: budgets.FileBudget = None,
+                      budget_report: budgets.BudgetReport = None,
+                      with_functions: bool = False, cost_model: scheduling.CostModel = None):
+    """
+    Gera as métricas por arquivo de conteúdos já carregados em memória, ex:
+    blobs lidos de uma revisão sem checkout.
     
-    for root, _, files in os.walk(project_path):
-        for file in files:
-            if file.endswith('.py'):
-                file_path = os.path.join(root, file)
-                metrics = get_code_metrics(file_path)
-                if metrics:
-                    all_metrics[file_path] = metrics
+    Args:
+        blobs: {caminho: bytes}, ex: utils.read_blobs(). Os caminhos só
+               precisam ter a extensão do arquivo; não são lidos do disco
+        languages: Linguagens analisadas (chaves de LANGUAGE_EXTENSIONS)
+        workers: Número de processos para a análise. None ou 1 executa sequencialmente
+        budget: Limites de tamanho e CPU por arquivo (budgets.FileBudget)
+        budget_report: budgets.BudgetReport que recebe os arquivos que atingiram o orçamento
+        with_functions: Se True, cada registro traz também as linhas por função
+        cost_model: scheduling.CostModel opcional; despacha os arquivos do maior
+                    para o menor custo estimado e registra os tempos medidos
+        
+    Yields:
+        tuple: Os mesmos registros de iter_file_metrics()
+        
+    Note:
+        Em vez de serializar o texto de cada arquivo para os workers, os
+        conteúdos são copiados uma vez para um segmento de memória
+        compartilhada (sharedblobs.SharedBlobBatch) e cada worker decodifica a
+        sua fatia. O segmento é liberado ao fim da geração.
+    """
+    extensions = tuple(ext for language in languages for ext in LANGUAGE_EXTENSIONS[language])
+    blobs = {path: content for path, content in blobs.items() if path.endswith(extensions)}
+    with sharedblobs.SharedBlobBatch(blobs) as batch:
+        if budget is not None:
+            worker = partial(_budgeted_file_worker, with_functions=with_functions)
+            results = _iter_budgeted(worker, batch.refs(), workers, budget, budget_report, cost_model)
+        else:
+            worker = partial(analyze_source_file, with_functions=with_functions)
+            results = _iter_file_pipeline(worker, batch.refs(), workers, cost_model=cost_model)
+        for result in results:
+            if result[1]:
+                yield result
+
+
+# Métricas numéricas por arquivo usadas nas estatísticas do projeto
+STATISTICS_METRICS = ('loc', 'lloc', 'sloc', 'comments', 'multi', 'blank',
+                      'average_complexity', 'maintainability_index') + tuple(HALSTEAD_FIELDS)
+
+# Métricas de contagem de linhas, somadas como inteiros (total_<métrica>)
+LINE_METRICS = ('loc', 'lloc', 'sloc', 'comments', 'multi', 'blank')
+
+# Percentis calculados para cada métrica (p<q>_<métrica>)
+STATISTICS_PERCENTILES = (50, 90, 99)
+
+
+def compute_statistics(values: np.ndarray, revision_id: str, paths: list = None,
+                       include_files: bool = False, threshold: float = None,
+                       threshold_metric: str = 'maintainability_index',
+                       weights: np.ndarray = None) -> dict:
+    """
+    Calcula as estatísticas do projeto sobre uma matriz arquivos x métricas.
     
-    return all_metrics
+    Args:
+        values: Matriz float (n_arquivos, len(STATISTICS_METRICS)) com NaN
+                onde a métrica não existe para o arquivo
+        revision_id: Identificador de revisão
+        paths: Caminhos dos arquivos, na ordem das linhas (necessário com include_files)
+        include_files: Se True, inclui os arquivos abaixo do limite
+        threshold: Limite de threshold_metric; None usa a média da métrica no projeto
+        threshold_metric: Métrica comparada com o limite
+        weights: Peso de cada arquivo (ex: inverso da probabilidade de
+                 amostragem, ver preview.py); None dá peso 1 a todos
+        
+    Returns:
+        dict: Estatísticas no formato de get_project_statistics()
+        
+    Note:
+        Todas as métricas são processadas de uma vez, coluna a coluna, com NumPy.
+        Valores ausentes (NaN) são ignorados em cada métrica.
+        Com weights, n_files, os totais e as médias são estimativas ponderadas
+        para a população; percentis, desvio padrão e extremos continuam
+        calculados sobre as linhas recebidas.
+    """
+    n_files = values.shape[0]
+    column = {metric: values[:, i] for i, metric in enumerate(STATISTICS_METRICS)}
+    valid = ~np.isnan(values)
+    n_valid = valid.sum(axis=0)
+    if weights is None:
+        totals = np.where(valid, values, 0.0).sum(axis=0)
+        counts = n_valid
+    else:
+        totals = np.where(valid, values * weights[:, None], 0.0).sum(axis=0)
+        counts = np.where(valid, weights[:, None], 0.0).sum(axis=0)
+        n_files = int(round(float(weights.sum())))
+    total = dict(zip(STATISTICS_METRICS, totals))
+    count = dict(zip(STATISTICS_METRICS, counts))
+    
+    def mean(metric):
+        return float(total[metric] / count[metric]) if count[metric] > 0 else 0
+    
+    statistics = {
+        'revision_id': revision_id,
+        'total_loc': int(round(total['loc'])),
+        'total_lloc': int(round(total['lloc'])),
+        'total_sloc': int(round(total['sloc'])),
+        'total_comments': int(round(total['comments'])),
+        'total_multi': int(round(total['multi'])),
+        'total_blank': int(round(total['blank'])),
+        'n_files': n_files,
+        'mean_maintainability_index': mean('maintainability_index'),
+        'mean_complexity': mean('average_complexity'),
+    }
+    
+    # Halstead: totais das métricas aditivas e médias por arquivo das demais
+    for metric in HALSTEAD_FIELDS:
+        if metric in HALSTEAD_ADDITIVE:
+            value = total[metric]
+            statistics[f'total_{metric}'] = int(round(value)) if metric in ('halstead_N1', 'halstead_N2', 'halstead_length') else float(value)
+        else:
+            statistics[f'mean_{metric}'] = mean(metric)
+    
+    # Distribuição de cada métrica: percentis, desvio padrão, extremos e
+    # média ponderada pelo SLOC (arquivos vazios não pesam na média)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        if values.shape[0]:
+            percentiles = np.nanpercentile(np.where(n_valid > 0, values, 0.0),
+                                           STATISTICS_PERCENTILES, axis=0)
+            std = np.nanstd(np.where(n_valid > 0, values, 0.0), axis=0)
+            minimum = np.nanmin(np.where(n_valid > 0, values, 0.0), axis=0)
+            maximum = np.nanmax(np.where(n_valid > 0, values, 0.0), axis=0)
+        sloc_weights = np.nan_to_num(column['sloc'])
+        if weights is not None:
+            sloc_weights = sloc_weights * weights
+        weighted_valid = valid & (sloc_weights[:, None] > 0)
+        weight_sums = np.where(weighted_valid, sloc_weights[:, None], 0.0).sum(axis=0)
+        weighted_sums = np.where(weighted_valid, values * sloc_weights[:, None], 0.0).sum(axis=0)
+    
+    for i, metric in enumerate(STATISTICS_METRICS):
+        has_data = n_valid[i] > 0
+        for j, q in enumerate(STATISTICS_PERCENTILES):
+            statistics[f'p{q}_{metric}'] = float(percentiles[j, i]) if has_data else None
+        statistics[f'std_{metric}'] = float(std[i]) if has_data else None
+        statistics[f'min_{metric}'] = float(minimum[i]) if has_data else None
+        statistics[f'max_{metric}'] = float(maximum[i]) if has_data else None
+        statistics[f'weighted_mean_{metric}'] = (float(weighted_sums[i] / weight_sums[i])
+                                                 if weight_sums[i] > 0 else None)
+    
+    if include_files:
+        metric_values = column[threshold_metric]
+        limit = threshold if threshold is not None else mean(threshold_metric)
+        with np.errstate(invalid='ignore'):
+            below = np.flatnonzero(metric_values < limit)
+        below = below[np.argsort(metric_values[below], kind='stable')]
+        statistics['file_threshold'] = limit
+        statistics['files_below_threshold'] = [paths[i] for i in below]
+    
+    return statistics
+
+
+class StatisticsAccumulator:
+    """
+    Acumula estatísticas do projeto incrementalmente, um arquivo por vez.
+    
+    Permite calcular as estatísticas de get_project_statistics() consumindo
+    iter_file_metrics() sem manter o relatório completo (dicionários por
+    arquivo) em memória: cada métrica é guardada em uma coluna compacta de
+    floats.
+    
+    Attributes:
+        columns (dict): {métrica: array('d')} com NaN para valores ausentes
+        paths (list): Caminhos dos arquivos acumulados (apenas com keep_paths)
+        n_files (int): Número de arquivos acumulados
+    
+    Note:
+        A memória cresce linearmente com o número de arquivos: 8 bytes por
+        métrica de STATISTICS_METRICS (~150 bytes por arquivo), o preço de
+        percentis e desvios exatos, iguais aos de get_project_statistics().
+        Os caminhos, necessários apenas para files_below_threshold, só são
+        guardados com keep_paths.
+        Métricas None (ex: arquivos degradados para métricas raw pelo orçamento)
+        não entram nas somas nem nas médias.
+    """
+    
+    def __init__(self, keep_paths: bool = False):
+        """
+        Inicializa as colunas vazias.
+        
+        Args:
+            keep_paths: Se True, guarda os caminhos dos arquivos para
+                        statistics(include_files=True)
+        """
+        self.columns = {metric: array('d') for metric in STATISTICS_METRICS}
+        self.paths = [] if keep_paths else None
+        self.n_files = 0
+    
+    def add(self, stat: dict, path: str = None) -> None:
+        """
+        Acumula as métricas de um arquivo.
+        
+        Args:
+            stat: Métricas do arquivo no formato de get_code_metrics()
+            path: Caminho do arquivo (guardado apenas com keep_paths)
+        """
+        nan = math.nan
+        for metric, values in self.columns.items():
+            value = stat.get(metric)
+            values.append(nan if value is None else value)
+        if self.paths is not None:
+            self.paths.append(path)
+        self.n_files += 1
+    
+    def write(self, row: dict) -> None:
+        """
+        Interface de sink (ver sinks.stream_to_sinks): acumula uma linha plana
+        produzida por sinks.file_metric_rows().
+        
+        Args:
+            row: Linha com a coluna 'arquivo' e as métricas do arquivo
+        """
+        self.add(row, row.get('arquivo'))
+    
+    def statistics(self, revision_id: str, include_files: bool = False, threshold: float = None,
+                   threshold_metric: str = 'maintainability_index') -> dict:
+        """
+        Monta o dicionário de estatísticas com os valores acumulados até agora.
+        
+        Args:
+            revision_id: Identificador de revisão
+            include_files: Se True, inclui os arquivos abaixo do limite
+            threshold: Limite de threshold_metric; None usa a média do projeto
+            threshold_metric: Métrica comparada com o limite
+            
+        Returns:
+            dict: Estatísticas no formato de get_project_statistics()
+            
+        Raises:
+            ValueError: Se include_files for pedido sem keep_paths
+        """
+        if include_files and self.paths is None:
+            raise ValueError("include_files requer StatisticsAccumulator(keep_paths=True)")
+        values = np.empty((self.n_files, len(STATISTICS_METRICS)))
+        for i, metric in enumerate(STATISTICS_METRICS):
+            values[:, i] = np.frombuffer(self.columns[metric], dtype=np.float64)
+        return compute_statistics(values, revision_id, self.paths, include_files,
+                                  threshold, threshold_metric)
 
 
-def get_project_statistics(metrics_report: dict, revision_id: str) -> dict:
+def get_project_statistics(metrics_report: dict, revision_id: str, include_files: bool = False,
+                           threshold: float = None,
+                           threshold_metric: str = 'maintainability_index') -> dict:
     """
     Gera estatísticas agregadas a partir de um relatório de métricas por arquivo.
 
@@ -372,8 +1303,16 @@ def get_project_statistics(metrics_report: dict, revision_id: str) -> dict:
                 - comments (int): linhas de comentário
                 - multi (int): linhas de comentário multilinha
                 - blank (int): linhas em branco
-                - average_complexity (float): complexidade ciclomática média
-                - maintainability_index (float): índice de manutenibilidade
+                - average_complexity (float | None): complexidade ciclomática média
+                  (None para arquivos degradados para métricas raw)
+                - maintainability_index (float | None): índice de manutenibilidade
+                  (None para linguagens analisadas via lizard)
+                - halstead_* (int | float | None): métricas de Halstead (opcionais;
+                  arquivos sem elas não entram nas somas e médias de Halstead)
+        revision_id: Identificador de revisão
+        include_files: Se True, lista os arquivos com threshold_metric abaixo do limite
+        threshold: Limite de threshold_metric; None usa a média da métrica no projeto
+        threshold_metric: Métrica usada na lista de arquivos (padrão: maintainability_index)
 
     Returns:
         dict[str, int | float]: Um dicionário com as estatísticas gerais do projeto:
@@ -385,53 +1324,25 @@ def get_project_statistics(metrics_report: dict, revision_id: str) -> dict:
             - total_multi (int): soma de todas as linhas de comentário multilinha
             - total_blank (int): soma de todas as linhas em branco
             - n_files (int): número de arquivos processados
-            - mean_maintainability_index (float): índice médio de manutenibilidade
-            - mean_complexity (float): complexidade média
-    """
-    include_files = False
-    # Inicialização de contadores
-    totals = {
-        'loc': 0, 'lloc': 0, 'sloc': 0, 'comments': 0,
-        'multi': 0, 'blank': 0, 'complexity': 0, 'maintainability_index': 0
-    }
-    n_files = 0
-
-    # Soma de todos os valores
-    for fname, stat in metrics_report.items():
-        totals['loc'] += stat['loc']
-        totals['lloc'] += stat['lloc']
-        totals['sloc'] += stat['sloc']
-        totals['comments'] += stat['comments']
-        totals['multi'] += stat['multi']
-        totals['blank'] += stat['blank']
-        totals['complexity'] += stat['average_complexity']
-        totals['maintainability_index'] += stat['maintainability_index']
-        n_files += 1
-
-    # Calcula médias (evita divisão por zero)
-    if n_files > 0:
-        mean_maintainability = totals['maintainability_index'] / n_files
-        mean_complexity = totals['complexity'] / n_files
-    else:
-        mean_maintainability = mean_complexity = 0
-
-    # Monta dicionário de estatísticas
-    statistics = {
-        'revision_id': revision_id,
-        'total_loc': totals['loc'],
-        'total_lloc': totals['lloc'],
-        'total_sloc': totals['sloc'],
-        'total_comments': totals['comments'],
-        'total_multi': totals['multi'],
-        'total_blank': totals['blank'],
-        'n_files': n_files,
-        'mean_maintainability_index': mean_maintainability,
-        'mean_complexity': mean_complexity,
-    }
-    
-    # Futura implementação: adicionar arquivos com qualidade abaixo da média
-    if include_files:
-        # TODO: Implementar lógica para identificar arquivos problemáticos
-        pass
-
-    return statistics     
\ No newline at end of file
+            - mean_maintainability_index (float): índice médio de manutenibilidade,
+              considerando apenas arquivos com índice calculado
+            - mean_complexity (float): complexidade média, considerando apenas
+              arquivos com complexidade calculada
+            - total_halstead_<N1|N2|length|volume|effort|time|bugs>: somas das
+              métricas de Halstead dos arquivos
+            - mean_halstead_<h1|h2|vocabulary|difficulty>: médias por arquivo das
+              métricas de Halstead não aditivas
+            - p50_<métrica>, p90_<métrica>, p99_<métrica>, std_<métrica>,
+              min_<métrica>, max_<métrica>: distribuição de cada métrica de
+              STATISTICS_METRICS (None se nenhum arquivo tiver a métrica)
+            - weighted_mean_<métrica>: média ponderada pelo SLOC, de modo que
+              arquivos vazios (ex: __init__.py) não dominem a média
+            - file_threshold, files_below_threshold: limite usado e arquivos
+              abaixo dele, do pior para o melhor (apenas com include_files)
+    """
+    paths = list(metrics_report)
+    values = np.array([[stat.get(metric) for metric in STATISTICS_METRICS]
+                       for stat in metrics_report.values()], dtype=np.float64)
+    values = values.reshape(len(paths), len(STATISTICS_METRICS))
+    return compute_statistics(values, revision_id, paths, include_files,
+                              threshold, threshold_metric)
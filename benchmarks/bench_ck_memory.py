@@ -0,0 +1,76 @@
+"""
+Benchmark de memória da representação C&K (ClassInfo / CKAnalyzer).
+
+Simula uma passada sobre um projeto grande mantendo os analisadores de todos
+os arquivos vivos e mede, com tracemalloc, a memória retida e o pico.
+
+Uso:
+    python -m benchmarks.bench_ck_memory --files 2000 --classes 10 --methods 10
+"""
+import argparse
+import ast
+import json
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analytics import CKAnalyzer
+from benchmarks.synthetic import generate_module_source
+
+
+def measure_ck_memory(n_files: int = 500, classes_per_file: int = 10,
+                      methods_per_class: int = 10, seed: int = 0) -> dict:
+    """
+    Mede a memória retida pelos registros de classe de um projeto sintético.
+
+    Args:
+        n_files: Número de módulos sintéticos
+        classes_per_file: Número de classes por módulo
+        methods_per_class: Número de métodos por classe
+        seed: Semente do gerador
+
+    Returns:
+        dict: n_classes, retained_bytes, peak_bytes e bytes_per_class
+    """
+    sources = [generate_module_source(i, classes_per_file, methods_per_class, seed)
+               for i in range(n_files)]
+
+    analyzers = []
+    tracemalloc.start()
+    try:
+        for source in sources:
+            tree = ast.parse(source)
+            analyzer = CKAnalyzer()
+            analyzer.visit(tree)
+            analyzer.build_hierarchy()
+            del tree
+            analyzers.append(analyzer)
+        retained, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    n_classes = sum(len(a.classes) for a in analyzers)
+    return {
+        'n_files': n_files,
+        'n_classes': n_classes,
+        'retained_bytes': retained,
+        'peak_bytes': peak,
+        'bytes_per_class': retained / n_classes if n_classes else 0,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--files', type=int, default=500)
+    parser.add_argument('--classes', type=int, default=10)
+    parser.add_argument('--methods', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+    result = measure_ck_memory(args.files, args.classes, args.methods, args.seed)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,366 @@
+"""
+Suíte de benchmarks do pipeline de análise sobre repositórios sintéticos.
+
+Gera um repositório git determinístico (benchmarks.synthetic), mede as
+funções principais do pipeline e compara os tempos com um baseline JSON,
+falhando quando a regressão passa do limite configurado. Tudo roda offline.
+
+Uso:
+    python -m benchmarks.suite --size small
+    python -m benchmarks.suite --size small --update-baseline
+    python -m benchmarks.suite --size medium --threshold 0.3 --output resultados.json
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+import analytics
+import churn
+import diffs
+import issues
+import sinks
+import utils
+from benchmarks.synthetic import generate_git_history, generate_issues_df
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+# Regressão relativa tolerada (0.5 = até 50% mais lento que o baseline)
+DEFAULT_THRESHOLD = 0.5
+
+# Diferenças absolutas abaixo deste valor (segundos) são tratadas como ruído
+NOISE_FLOOR_SECONDS = 0.01
+
+# Tamanhos dos repositórios sintéticos
+SIZES = {
+    'tiny': {'n_files': 10, 'classes_per_file': 2, 'methods_per_class': 3,
+             'n_commits': 5, 'churn': 0.2, 'n_issues': 200},
+    'small': {'n_files': 100, 'classes_per_file': 5, 'methods_per_class': 8,
+              'n_commits': 30, 'churn': 0.1, 'n_issues': 5000},
+    'medium': {'n_files': 1000, 'classes_per_file': 5, 'methods_per_class': 8,
+               'n_commits': 100, 'churn': 0.05, 'n_issues': 50000},
+}
+
+
+def _bench_project_metrics(ctx):
+    return analytics.get_project_metrics(ctx['repo'], workers=ctx['workers'])
+
+
+def _bench_ck_metrics(ctx):
+    return analytics.get_ck_metrics(ctx['repo'], workers=ctx['workers'])
+
+
+def _bench_project_statistics(ctx):
+    return analytics.get_project_statistics(ctx['report'], ctx['history'][-1][0])
+
+
+def _bench_commit_hash_by_date(ctx):
+    return [utils.get_commit_hash_by_date(ctx['repo'], date) for _, date in ctx['history']]
+
+
+def _bench_export(ctx):
+    # Mesmo caminho de exportação de visualization.exportar_dados_csv(),
+    # sem checkout e sem a consulta de issues à API
+    output_dir = os.path.join(ctx['workdir'], 'exports')
+    accumulator = analytics.StatisticsAccumulator()
+    with sinks.CSVSink(os.path.join(output_dir, 'metricas_arquivo.csv'),
+                       fieldnames=sinks.FILE_METRICS_SCHEMA.names) as csv_sink, \
+            sinks.ParquetSink(os.path.join(output_dir, 'metricas_arquivo.parquet'),
+                              schema=sinks.FILE_METRICS_SCHEMA) as parquet_sink:
+        records = analytics.iter_file_metrics(ctx['repo'], workers=ctx['workers'])
+        sinks.stream_to_sinks(sinks.file_metric_rows(records), csv_sink, parquet_sink, accumulator)
+    with sinks.CSVSink(os.path.join(output_dir, 'ck_metricas.csv'),
+                       fieldnames=sinks.CK_METRICS_SCHEMA.names) as ck_sink:
+        records = analytics.iter_class_metrics(ctx['repo'], workers=ctx['workers'])
+        sinks.stream_to_sinks(sinks.class_metric_rows(records), ck_sink)
+    return accumulator.statistics(ctx['history'][-1][0])
+
+
+def _bench_churn(ctx):
+    return churn.compute_window_churn(ctx['repo'], [commit for commit, _ in ctx['history']])
+
+
+def _bench_diff_tables(ctx):
+    before, after = ctx['class_tables']
+    return diffs.diff_tables(before, after, kind='classes', root_before=ctx['repo'])
+
+
+def _bench_issue_metrics(ctx):
+    return issues.compute_issue_metrics(ctx['issues_df'])
+
+
+# Nome do benchmark -> função que recebe o contexto preparado
+BENCHMARKS = {
+    'get_project_metrics': _bench_project_metrics,
+    'get_ck_metrics': _bench_ck_metrics,
+    'get_project_statistics': _bench_project_statistics,
+    'get_commit_hash_by_date': _bench_commit_hash_by_date,
+    'export': _bench_export,
+    'compute_window_churn': _bench_churn,
+    'diff_tables': _bench_diff_tables,
+    'compute_issue_metrics': _bench_issue_metrics,
+}
+
+
+def prepare_context(workdir: str, size: str = 'small', workers: int = 1, seed: int = 0) -> dict:
+    """
+    Cria o repositório sintético e os dados de entrada dos benchmarks.
+
+    Args:
+        workdir: Diretório de trabalho temporário
+        size: Chave de SIZES
+        workers: Número de processos repassado ao analytics
+        seed: Semente dos geradores
+
+    Returns:
+        dict: Contexto com repo, history, report, issues_df, workers e workdir
+    """
+    config = SIZES[size]
+    repo = os.path.join(workdir, 'repo')
+    history = generate_git_history(
+        repo, n_files=config['n_files'], classes_per_file=config['classes_per_file'],
+        methods_per_class=config['methods_per_class'], n_commits=config['n_commits'],
+        churn=config['churn'], seed=seed)
+    context = {
+        'workdir': workdir,
+        'repo': repo,
+        'history': history,
+        'workers': workers,
+        'issues_df': generate_issues_df(config['n_issues'], seed=seed),
+    }
+    context['report'] = analytics.get_project_metrics(repo, workers=workers)
+    context['class_tables'] = _class_tables(repo, workers)
+    return context
+
+
+def _class_tables(repo: str, workers: int) -> tuple:
+    # Tabela C&K da revisão atual e uma "revisão seguinte" com 10% das classes
+    # removidas e WMC/CBO alterados em parte das demais
+    rows = list(sinks.class_metric_rows(analytics.get_ck_metrics(repo, workers=workers).items()))
+    before = pa.Table.from_pylist(rows, schema=sinks.CK_METRICS_SCHEMA)
+    after = before.filter(pa.array(np.arange(before.num_rows) % 10 != 0))
+    shift = pa.array(np.arange(after.num_rows) % 3 - 1)
+    for metric in ('WMC', 'CBO'):
+        after = after.set_column(after.schema.get_field_index(metric), metric,
+                                 pc.add(after[metric], shift))
+    return before, after
+
+
+def run_benchmarks(size: str = 'small', repeat: int = 3, names: list = None,
+                   workers: int = 1, seed: int = 0) -> dict:
+    """
+    Executa os benchmarks e retorna os tempos medidos.
+
+    Args:
+        size: Chave de SIZES
+        repeat: Número de repetições de cada benchmark
+        names: Benchmarks a executar (padrão: todos de BENCHMARKS)
+        workers: Número de processos repassado ao analytics
+        seed: Semente dos geradores
+
+    Returns:
+        dict: {'meta': {...}, 'benchmarks': {nome: {'min_seconds', 'median_seconds', 'repeat'}}}
+
+    Note:
+        O mínimo das repetições é o valor comparado com o baseline, por ser
+        o menos sensível a interferências da máquina.
+    """
+    workdir = tempfile.mkdtemp(prefix='code_insights_bench_')
+    try:
+        context = prepare_context(workdir, size, workers, seed)
+        results = {}
+        for name in names or BENCHMARKS:
+            func = BENCHMARKS[name]
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                func(context)
+                timings.append(time.perf_counter() - start)
+            results[name] = {
+                'min_seconds': round(min(timings), 6),
+                'median_seconds': round(statistics.median(timings), 6),
+                'repeat': repeat,
+            }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        'meta': {
+            'size': size,
+            'config': SIZES[size],
+            'workers': workers,
+            'seed': seed,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+        },
+        'benchmarks': results,
+    }
+
+
+def load_baseline(path: str) -> dict:
+    """
+    Carrega um baseline salvo por save_baseline().
+
+    Args:
+        path: Caminho do arquivo JSON
+
+    Returns:
+        dict: Baseline, ou None se o arquivo não existir
+    """
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as handler:
+        return json.load(handler)
+
+
+def save_baseline(results: dict, path: str, threshold: float = DEFAULT_THRESHOLD) -> dict:
+    """
+    Grava os resultados como baseline, preservando limites por benchmark já configurados.
+
+    Args:
+        results: Retorno de run_benchmarks()
+        path: Caminho do arquivo JSON
+        threshold: Limite de regressão padrão gravado no baseline
+
+    Returns:
+        dict: Baseline gravado
+    """
+    previous = load_baseline(path) or {}
+    sizes = previous.get('sizes', {})
+    previous_size = sizes.get(results['meta']['size'], {})
+    benchmarks = {}
+    for name, timing in results['benchmarks'].items():
+        entry = {'min_seconds': timing['min_seconds']}
+        old_threshold = previous_size.get('benchmarks', {}).get(name, {}).get('threshold')
+        if old_threshold is not None:
+            entry['threshold'] = old_threshold
+        benchmarks[name] = entry
+    sizes[results['meta']['size']] = {'meta': results['meta'], 'benchmarks': benchmarks}
+    baseline = {'threshold': previous.get('threshold', threshold), 'sizes': sizes}
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as handler:
+        json.dump(baseline, handler, indent=2, ensure_ascii=False)
+        handler.write('\n')
+    return baseline
+
+
+def compare_to_baseline(results: dict, baseline: dict, threshold: float = None) -> list:
+    """
+    Compara os tempos medidos com o baseline do mesmo tamanho.
+
+    Args:
+        results: Retorno de run_benchmarks()
+        baseline: Retorno de load_baseline()
+        threshold: Limite de regressão relativa; se None, usa o limite do
+                   benchmark no baseline ou o limite global do baseline
+
+    Returns:
+        list: Dicionários com name, baseline_seconds, current_seconds, ratio,
+              threshold e regression (bool), um por benchmark presente nos dois
+
+    Note:
+        Uma regressão exige ratio > 1 + threshold e uma diferença absoluta
+        maior que NOISE_FLOOR_SECONDS.
+    """
+    size_baseline = (baseline or {}).get('sizes', {}).get(results['meta']['size'])
+    if not size_baseline:
+        return []
+    default_threshold = baseline.get('threshold', DEFAULT_THRESHOLD)
+
+    comparison = []
+    for name, timing in results['benchmarks'].items():
+        reference = size_baseline['benchmarks'].get(name)
+        if not reference:
+            continue
+        limit = threshold if threshold is not None else reference.get('threshold', default_threshold)
+        base_seconds = reference['min_seconds']
+        current_seconds = timing['min_seconds']
+        ratio = current_seconds / base_seconds if base_seconds > 0 else float('inf')
+        comparison.append({
+            'name': name,
+            'baseline_seconds': base_seconds,
+            'current_seconds': current_seconds,
+            'ratio': round(ratio, 3),
+            'threshold': limit,
+            'regression': ratio > 1 + limit and current_seconds - base_seconds > NOISE_FLOOR_SECONDS,
+        })
+    return comparison
+
+
+def format_comparison(comparison: list) -> str:
+    """
+    Formata a comparação com o baseline para o terminal.
+
+    Args:
+        comparison: Retorno de compare_to_baseline()
+
+    Returns:
+        str: Tabela em texto
+    """
+    lines = [f"{'Benchmark':<26} {'Baseline (s)':>12} {'Atual (s)':>10} {'Razão':>7}  Status"]
+    for item in comparison:
+        status = 'REGRESSÃO' if item['regression'] else 'ok'
+        lines.append(f"{item['name']:<26} {item['baseline_seconds']:>12.4f} "
+                     f"{item['current_seconds']:>10.4f} {item['ratio']:>7.2f}  {status}")
+    return "\n".join(lines)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--size', choices=sorted(SIZES), default='small')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--bench', action='append', choices=sorted(BENCHMARKS),
+                        help="Executa apenas este benchmark (pode ser repetido)")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--threshold', type=float, default=None,
+                        help="Regressão relativa tolerada (ex: 0.5 = 50%%)")
+    parser.add_argument('--update-baseline', action='store_true',
+                        help="Grava os tempos medidos como novo baseline")
+    parser.add_argument('--output', default=None, help="Grava os resultados neste arquivo JSON")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.size, args.repeat, args.bench, args.workers, args.seed)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as handler:
+            json.dump(results, handler, indent=2, ensure_ascii=False)
+
+    if args.update_baseline:
+        save_baseline(results, args.baseline,
+                      args.threshold if args.threshold is not None else DEFAULT_THRESHOLD)
+        print(f"Baseline atualizado: {args.baseline}")
+        print(json.dumps(results['benchmarks'], indent=2))
+        return 0
+
+    baseline = load_baseline(args.baseline)
+    comparison = compare_to_baseline(results, baseline, args.threshold)
+    if not comparison:
+        print(f"Sem baseline para o tamanho '{args.size}' em {args.baseline}")
+        print(json.dumps(results['benchmarks'], indent=2))
+        return 0
+
+    print(format_comparison(comparison))
+    regressions = [item['name'] for item in comparison if item['regression']]
+    if regressions:
+        print(f"\nRegressões acima do limite: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
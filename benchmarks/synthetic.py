@@ -0,0 +1,183 @@
+import os
+import random
+import subprocess
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+# Autores fictícios usados nos commits sintéticos
+SYNTHETIC_AUTHORS = (
+    ('Ana Souza', 'ana@example.com'),
+    ('Bruno Lima', 'bruno@example.com'),
+    ('Carla Dias', 'carla@example.com'),
+    ('Davi Rocha', 'davi@example.com'),
+)
+
+
+def generate_module_source(module_index: int, classes_per_file: int = 5,
+                           methods_per_class: int = 8, seed: int = 0) -> str:
+    """
+    Gera o código-fonte determinístico de um módulo Python sintético.
+
+    Args:
+        module_index: Índice do módulo (usado nos nomes das classes)
+        classes_per_file: Número de classes no módulo
+        methods_per_class: Número de métodos por classe
+        seed: Semente do gerador pseudoaleatório
+
+    Returns:
+        str: Código-fonte do módulo
+    """
+    rng = random.Random(seed * 1_000_003 + module_index)
+    lines = [f'"""Módulo sintético {module_index}."""', '']
+    for c in range(classes_per_file):
+        class_name = f"Class{module_index}_{c}"
+        base = f"(Class{module_index}_{c - 1})" if c and rng.random() < 0.3 else ""
+        lines.append(f"class {class_name}{base}:")
+        lines.append("    def __init__(self):")
+        for a in range(3):
+            lines.append(f"        self.attr_{a} = {a}")
+        for m in range(methods_per_class):
+            lines.append(f"    def method_{m}(self, value):")
+            lines.append(f"        if value > {rng.randint(0, 9)}:")
+            lines.append(f"            return self.method_{rng.randrange(methods_per_class)}(value - 1)")
+            lines.append(f"        for item in range(value):")
+            lines.append(f"            self.attr_{rng.randrange(3)} += item")
+            lines.append(f"        return helper_{rng.randrange(10)}(self.attr_{rng.randrange(3)})")
+        lines.append('')
+    for h in range(10):
+        lines.append(f"def helper_{h}(x):")
+        lines.append(f"    return x * {h}")
+    lines.append('')
+    return "\n".join(lines)
+
+
+def generate_python_project(root: str, n_files: int = 100, classes_per_file: int = 5,
+                            methods_per_class: int = 8, files_per_package: int = 20,
+                            seed: int = 0) -> list:
+    """
+    Gera um projeto Python sintético e determinístico em disco.
+
+    Args:
+        root: Diretório onde o projeto será criado
+        n_files: Número de módulos
+        classes_per_file: Número de classes por módulo
+        methods_per_class: Número de métodos por classe
+        files_per_package: Número de módulos por pacote (subdiretório)
+        seed: Semente do gerador pseudoaleatório
+
+    Returns:
+        list: Caminhos dos arquivos gerados
+    """
+    paths = []
+    for i in range(n_files):
+        package_dir = os.path.join(root, f"pkg_{i // files_per_package}")
+        os.makedirs(package_dir, exist_ok=True)
+        path = os.path.join(package_dir, f"module_{i}.py")
+        with open(path, 'w', encoding='utf-8') as handler:
+            handler.write(generate_module_source(i, classes_per_file, methods_per_class, seed))
+        paths.append(path)
+    return paths
+
+
+def _git(repo_path: str, *args, env: dict = None) -> str:
+    proc = subprocess.run(
+        ['git', '-C', repo_path, '-c', 'commit.gpgsign=false', *args],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=True,
+        env=env
+    )
+    return proc.stdout.strip()
+
+
+def _commit(repo_path: str, message: str, date: datetime, author: tuple) -> str:
+    date_str = date.strftime('%Y-%m-%dT%H:%M:%S+0000')
+    env = dict(os.environ)
+    env.update({
+        'GIT_AUTHOR_NAME': author[0], 'GIT_AUTHOR_EMAIL': author[1], 'GIT_AUTHOR_DATE': date_str,
+        'GIT_COMMITTER_NAME': author[0], 'GIT_COMMITTER_EMAIL': author[1], 'GIT_COMMITTER_DATE': date_str,
+    })
+    _git(repo_path, 'add', '-A', env=env)
+    _git(repo_path, 'commit', '-q', '--allow-empty', '-m', message, env=env)
+    return _git(repo_path, 'rev-parse', 'HEAD')
+
+
+def generate_git_history(root: str, n_files: int = 100, classes_per_file: int = 5,
+                         methods_per_class: int = 8, n_commits: int = 20, churn: float = 0.1,
+                         files_per_package: int = 20, n_authors: int = 3,
+                         start_date: str = '2024-01-01', interval_hours: int = 24,
+                         seed: int = 0) -> list:
+    """
+    Gera um repositório git sintético e determinístico com histórico de commits.
+
+    O primeiro commit cria o projeto (generate_python_project); cada commit
+    seguinte reescreve uma fração `churn` dos módulos com outra semente.
+    Datas e autores são fixos, de modo que os hashes se repetem entre execuções.
+
+    Args:
+        root: Diretório do repositório (criado se necessário)
+        n_files: Número de módulos
+        classes_per_file: Número de classes por módulo
+        methods_per_class: Número de métodos por classe
+        n_commits: Número total de commits
+        churn: Fração dos módulos alterada em cada commit
+        files_per_package: Número de módulos por pacote (subdiretório)
+        n_authors: Número de autores alternados entre os commits
+        start_date: Data do primeiro commit (YYYY-MM-DD)
+        interval_hours: Intervalo entre commits consecutivos, em horas
+        seed: Semente do gerador pseudoaleatório
+
+    Returns:
+        list: Tuplas (hash, data 'YYYY-MM-DD HH:MM:SS') na ordem dos commits
+
+    Note:
+        O branch criado se chama 'master', o padrão de get_commit_hash_by_date().
+    """
+    rng = random.Random(seed)
+    authors = SYNTHETIC_AUTHORS[:max(1, min(n_authors, len(SYNTHETIC_AUTHORS)))]
+    os.makedirs(root, exist_ok=True)
+    _git(root, 'init', '-q', '-b', 'master')
+
+    paths = generate_python_project(root, n_files, classes_per_file, methods_per_class,
+                                    files_per_package, seed)
+    date = datetime.strptime(start_date, '%Y-%m-%d')
+    history = [(_commit(root, 'Commit inicial', date, authors[0]), date.strftime('%Y-%m-%d %H:%M:%S'))]
+
+    n_changed = max(1, round(churn * n_files)) if n_files else 0
+    for k in range(1, n_commits):
+        date += timedelta(hours=interval_hours)
+        for i in sorted(rng.sample(range(n_files), n_changed)):
+            with open(paths[i], 'w', encoding='utf-8') as handler:
+                handler.write(generate_module_source(i, classes_per_file, methods_per_class,
+                                                     seed + k))
+        commit_hash = _commit(root, f"Commit {k}", date, authors[k % len(authors)])
+        history.append((commit_hash, date.strftime('%Y-%m-%d %H:%M:%S')))
+    return history
+
+
+def generate_issues_df(n_issues: int = 1000, n_repos: int = 2, start_date: str = '2020-01-01',
+                       seed: int = 0) -> pd.DataFrame:
+    """
+    Gera um DataFrame de issues sintético no formato de issues.get_issues_df().
+
+    Args:
+        n_issues: Número total de issues
+        n_repos: Número de repositórios
+        start_date: Data da primeira issue (YYYY-MM-DD)
+        seed: Semente do gerador pseudoaleatório
+
+    Returns:
+        pd.DataFrame: Colunas repo, number, title, created_at
+    """
+    rng = random.Random(seed)
+    start = datetime.strptime(start_date, '%Y-%m-%d')
+    rows = []
+    for number in range(1, n_issues + 1):
+        rows.append({
+            'repo': f"org/repo_{rng.randrange(n_repos)}",
+            'number': number,
+            'title': f"Issue {number}",
+            'created_at': start + timedelta(hours=rng.randrange(24 * 365 * 3)),
+        })
+    df = pd.DataFrame(rows, columns=['repo', 'number', 'title', 'created_at'])
+    df['created_at'] = pd.to_datetime(df['created_at'])
+    return df
@@ -0,0 +1,188 @@
+import os
+import signal
+import threading
+from contextlib import contextmanager
+
+import sinks
+
+# Ações possíveis para um arquivo acima do orçamento
+ON_EXCEED_ACTIONS = ('raw', 'skip')
+
+# Colunas do relatório de orçamento
+BUDGET_REPORT_FIELDS = ['arquivo', 'bytes', 'etapa', 'motivo', 'acao', 'limite']
+
+
+class BudgetExceeded(BaseException):
+    """
+    Sinaliza que a análise de um arquivo excedeu o orçamento de CPU.
+
+    Deriva de BaseException para não ser capturada pelos blocos
+    `except Exception` dos analisadores (ex: get_code_metrics).
+    """
+
+
+class FileBudget:
+    """
+    Limites aplicados à análise de cada arquivo.
+
+    Attributes:
+        max_bytes (int): Tamanho máximo do arquivo; None ou 0 desativa o limite
+        cpu_seconds (float): Tempo de CPU máximo por arquivo; None ou 0 desativa o limite
+        on_exceed (str): 'raw' degrada para métricas raw; 'skip' ignora o arquivo
+    """
+
+    __slots__ = ('max_bytes', 'cpu_seconds', 'on_exceed')
+
+    def __init__(self, max_bytes: int = None, cpu_seconds: float = None, on_exceed: str = 'raw'):
+        """
+        Args:
+            max_bytes: Tamanho máximo do arquivo em bytes
+            cpu_seconds: Tempo de CPU máximo por arquivo, em segundos
+            on_exceed: Ação para arquivos acima do orçamento ('raw' ou 'skip')
+
+        Raises:
+            ValueError: Se on_exceed não for uma ação conhecida
+        """
+        if on_exceed not in ON_EXCEED_ACTIONS:
+            raise ValueError(f"Ação inválida: {on_exceed} (use {', '.join(ON_EXCEED_ACTIONS)})")
+        self.max_bytes = max_bytes or None
+        self.cpu_seconds = cpu_seconds or None
+        self.on_exceed = on_exceed
+
+    def __repr__(self):
+        return (f"FileBudget(max_bytes={self.max_bytes}, cpu_seconds={self.cpu_seconds}, "
+                f"on_exceed={self.on_exceed!r})")
+
+    def exceeds_size(self, file_path: str, n_bytes: int = None) -> tuple:
+        """
+        Verifica o limite de tamanho de um arquivo.
+
+        Args:
+            file_path: Caminho do arquivo
+            n_bytes: Tamanho já conhecido (ex: conteúdo em memória); se None, lido do disco
+
+        Returns:
+            tuple: (excede: bool, tamanho em bytes)
+        """
+        if n_bytes is None:
+            try:
+                n_bytes = os.path.getsize(file_path)
+            except OSError:
+                n_bytes = 0
+        return bool(self.max_bytes and n_bytes > self.max_bytes), n_bytes
+
+    def event(self, file_path: str, n_bytes: int, stage: str, reason: str, action: str) -> dict:
+        """
+        Monta o registro de um arquivo que atingiu o orçamento.
+
+        Args:
+            file_path: Caminho do arquivo
+            n_bytes: Tamanho do arquivo em bytes
+            stage: Etapa da análise ('metricas' ou 'ck')
+            reason: 'tamanho' ou 'cpu'
+            action: 'raw' (degradado) ou 'skip' (ignorado)
+
+        Returns:
+            dict: Linha no formato de BUDGET_REPORT_FIELDS
+        """
+        return {
+            'arquivo': file_path,
+            'bytes': n_bytes,
+            'etapa': stage,
+            'motivo': reason,
+            'acao': action,
+            'limite': self.max_bytes if reason == 'tamanho' else self.cpu_seconds,
+        }
+
+
+def _raise_budget_exceeded(signum, frame):
+    raise BudgetExceeded()
+
+
+@contextmanager
+def cpu_limit(seconds: float):
+    """
+    Interrompe o bloco com BudgetExceeded quando o processo consome `seconds`
+    de CPU dentro dele.
+
+    Usa signal.setitimer(ITIMER_PROF), que conta tempo de CPU do processo.
+    Fora da thread principal, sem setitimer (Windows) ou com seconds vazio,
+    o bloco roda sem limite.
+
+    Args:
+        seconds: Tempo de CPU máximo, em segundos
+
+    Raises:
+        BudgetExceeded: Se o limite for atingido
+
+    Note:
+        O sinal só é tratado entre instruções Python; uma única chamada longa
+        em C (ex: ast.parse) termina antes da interrupção.
+    """
+    if (not seconds or not hasattr(signal, 'setitimer')
+            or threading.current_thread() is not threading.main_thread()):
+        yield
+        return
+
+    previous = signal.signal(signal.SIGPROF, _raise_budget_exceeded)
+    signal.setitimer(signal.ITIMER_PROF, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_PROF, 0)
+        signal.signal(signal.SIGPROF, previous)
+
+
+class BudgetReport:
+    """
+    Relatório dos arquivos que atingiram o orçamento durante uma execução.
+
+    Implementa a interface de sink (write), podendo ser combinado com os
+    sinks de sinks.py.
+
+    Attributes:
+        events (list): Linhas no formato de BUDGET_REPORT_FIELDS
+    """
+
+    def __init__(self):
+        self.events = []
+
+    def write(self, event: dict) -> None:
+        """
+        Registra um arquivo que atingiu o orçamento.
+
+        Args:
+            event: Linha retornada por FileBudget.event()
+        """
+        self.events.append(event)
+
+    def __len__(self):
+        return len(self.events)
+
+    def summary(self) -> dict:
+        """
+        Conta os eventos por etapa, motivo e ação.
+
+        Returns:
+            dict: {'etapa/motivo/acao': quantidade}
+        """
+        counts = {}
+        for event in self.events:
+            key = f"{event['etapa']}/{event['motivo']}/{event['acao']}"
+            counts[key] = counts.get(key, 0) + 1
+        return counts
+
+    def save_csv(self, path: str) -> str:
+        """
+        Grava o relatório em CSV.
+
+        Args:
+            path: Caminho do arquivo de saída
+
+        Returns:
+            str: Caminho do arquivo gravado
+        """
+        with sinks.CSVSink(path, fieldnames=BUDGET_REPORT_FIELDS) as sink:
+            for event in self.events:
+                sink.write(event)
+        return path
@@ -0,0 +1,283 @@
+import os
+import subprocess
+from array import array
+
+import numpy as np
+import pyarrow as pa
+
+import profiling
+import sinks
+
+# Colunas de churn por arquivo (mesma ordem de sinks.CHURN_SCHEMA, após 'arquivo')
+CHURN_FIELDS = ('linhas_adicionadas', 'linhas_removidas', 'commits', 'autores')
+
+# Separadores do formato de `git log` (não aparecem nas linhas de --numstat)
+_COMMIT_MARK = '\x1e'
+_FIELD_SEP = '\x1f'
+_LOG_FORMAT = f'--format={_COMMIT_MARK}%H{_FIELD_SEP}%ct{_FIELD_SEP}%aE'
+
+
+class ChurnTable:
+    """
+    Churn acumulado por arquivo em uma janela de commits.
+
+    Cada arquivo ocupa uma linha; as métricas ficam em colunas compactas
+    (array 'q', 8 bytes por arquivo) na ordem em que os arquivos aparecem.
+
+    Attributes:
+        paths (list): Caminhos relativos à raiz do repositório
+        index (dict): {caminho: linha}
+        added (array): Linhas adicionadas por arquivo
+        deleted (array): Linhas removidas por arquivo
+        commits (array): Commits que alteraram o arquivo
+        authors (array): Autores distintos do arquivo (preenchido por freeze())
+        n_commits (int): Commits processados na janela
+        n_authors (int): Autores distintos na janela (preenchido por freeze())
+    """
+
+    def __init__(self):
+        self.paths = []
+        self.index = {}
+        self.added = array('q')
+        self.deleted = array('q')
+        self.commits = array('q')
+        self.authors = array('q')
+        self.n_commits = 0
+        self.n_authors = 0
+        self._author_sets = []
+        self._author_ids = set()
+
+    def add(self, path: str, added: int, deleted: int, author_id: int) -> None:
+        """
+        Acumula a alteração de um arquivo em um commit.
+
+        Args:
+            path: Caminho relativo do arquivo
+            added: Linhas adicionadas (0 para arquivos binários)
+            deleted: Linhas removidas (0 para arquivos binários)
+            author_id: Identificador numérico do autor do commit
+        """
+        row = self.index.get(path)
+        if row is None:
+            row = self.index[path] = len(self.paths)
+            self.paths.append(path)
+            self.added.append(added)
+            self.deleted.append(deleted)
+            self.commits.append(1)
+            self._author_sets.append({author_id})
+            return
+        self.added[row] += added
+        self.deleted[row] += deleted
+        self.commits[row] += 1
+        self._author_sets[row].add(author_id)
+
+    def add_commit(self, author_id: int) -> None:
+        """
+        Conta um commit da janela.
+
+        Args:
+            author_id: Identificador numérico do autor do commit
+        """
+        self.n_commits += 1
+        self._author_ids.add(author_id)
+
+    def freeze(self) -> 'ChurnTable':
+        """
+        Converte os conjuntos de autores em contagens e libera os conjuntos.
+
+        Returns:
+            ChurnTable: A própria tabela
+        """
+        if self._author_sets:
+            self.authors = array('q', map(len, self._author_sets))
+            self._author_sets = []
+        self.n_authors = len(self._author_ids)
+        return self
+
+    def __len__(self):
+        return len(self.paths)
+
+    def __contains__(self, path):
+        return path in self.index
+
+    def get(self, path: str) -> dict:
+        """
+        Retorna o churn de um arquivo.
+
+        Args:
+            path: Caminho relativo do arquivo
+
+        Returns:
+            dict: {campo de CHURN_FIELDS: valor}, ou None se o arquivo não mudou na janela
+        """
+        row = self.index.get(path)
+        if row is None:
+            return None
+        return dict(zip(CHURN_FIELDS, (self.added[row], self.deleted[row],
+                                       self.commits[row], self.authors[row])))
+
+    def to_arrow(self, root: str = None) -> pa.Table:
+        """
+        Converte o churn em uma tabela no formato de sinks.CHURN_SCHEMA.
+
+        Args:
+            root: Prefixo dos caminhos. Use o mesmo caminho do projeto passado a
+                  analytics.iter_file_metrics() para que a coluna 'arquivo'
+                  case com a tabela de métricas por arquivo.
+
+        Returns:
+            pa.Table: Uma linha por arquivo alterado na janela
+        """
+        paths = self.paths if root is None else [os.path.join(root, path) for path in self.paths]
+        columns = [pa.array(paths, type=pa.string())]
+        for values in (self.added, self.deleted, self.commits, self.authors):
+            columns.append(pa.array(np.frombuffer(values, dtype=np.int64)
+                                    if len(values) else np.zeros(0, dtype=np.int64)))
+        return pa.Table.from_arrays(columns, schema=sinks.CHURN_SCHEMA)
+
+
+def iter_numstat(repo_path: str, revisions: list = ('HEAD',), since: str = None,
+                 until: str = None, lines: bool = True):
+    """
+    Percorre o histórico com uma única chamada a `git log --numstat`.
+
+    Args:
+        repo_path: Caminho do repositório
+        revisions: Revisões ou intervalos aceitos pelo git log (ex: ['a1b2..c3d4'])
+        since: Data mínima dos commits (--since)
+        until: Data máxima dos commits (--until)
+        lines: Se False, lista apenas os arquivos alterados (--name-only), com
+               0 linhas adicionadas e removidas. Não lê o conteúdo dos arquivos,
+               evitando buscar todos os blobs em clones parciais.
+
+    Yields:
+        tuple: (hash, timestamp do commit, e-mail do autor, [(adicionadas, removidas, caminho)])
+
+    Raises:
+        RuntimeError: Se o comando Git falhar
+
+    Note:
+        Renomeações são tratadas como remoção e criação (--no-renames), e
+        arquivos binários contam 0 linhas. Commits de merge não trazem arquivos.
+    """
+    cmd = ['git', '-C', repo_path, '-c', 'core.quotePath=false', 'log',
+           '--numstat' if lines else '--name-only', '--no-renames', _LOG_FORMAT]
+    if since:
+        cmd.append(f'--since={since}')
+    if until:
+        cmd.append(f'--until={until}')
+    cmd.extend(revisions)
+    cmd.append('--')
+
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                            text=True, encoding='utf-8', errors='replace')
+    commit = None
+    changes = []
+    try:
+        for line in proc.stdout:
+            if line[0] == _COMMIT_MARK:
+                if commit is not None:
+                    yield commit + (changes,)
+                commit_hash, timestamp, author = line[1:-1].split(_FIELD_SEP)
+                commit = (commit_hash, int(timestamp), author.lower())
+                changes = []
+            elif line == '\n':
+                continue
+            elif not lines:
+                changes.append((0, 0, line[:-1]))
+            else:
+                added, deleted, path = line[:-1].split('\t', 2)
+                changes.append((int(added) if added != '-' else 0,
+                                int(deleted) if deleted != '-' else 0, path))
+        if commit is not None:
+            yield commit + (changes,)
+    finally:
+        proc.stdout.close()
+        stderr = proc.stderr.read()
+        proc.stderr.close()
+        returncode = proc.wait()
+    if returncode != 0:
+        raise RuntimeError(f"Erro ao executar Git: {stderr.strip()}")
+
+
+def _accumulate(commits, tables: list, window_of) -> list:
+    authors = {}
+    for commit_hash, _, author, changes in commits:
+        table = tables[window_of(commit_hash)]
+        author_id = authors.setdefault(author, len(authors))
+        table.add_commit(author_id)
+        for added, deleted, path in changes:
+            table.add(path, added, deleted, author_id)
+    return [table.freeze() for table in tables]
+
+
+def compute_churn(repo_path: str, end: str = 'HEAD', start: str = None, since: str = None,
+                  until: str = None, lines: bool = True) -> ChurnTable:
+    """
+    Calcula o churn por arquivo entre duas revisões.
+
+    Args:
+        repo_path: Caminho do repositório
+        end: Revisão final (incluída)
+        start: Revisão inicial (excluída); None percorre todo o histórico até `end`
+        since: Data mínima dos commits (--since)
+        until: Data máxima dos commits (--until)
+        lines: Se False, conta apenas commits e autores (ver iter_numstat)
+
+    Returns:
+        ChurnTable: Churn dos arquivos alterados em start..end
+
+    Raises:
+        RuntimeError: Se o comando Git falhar
+    """
+    revisions = [f'{start}..{end}' if start else end]
+    with profiling.stage('churn'):
+        table, = _accumulate(iter_numstat(repo_path, revisions, since, until, lines),
+                             [ChurnTable()], lambda commit_hash: 0)
+    return table
+
+
+def compute_window_churn(repo_path: str, markers: list, lines: bool = True) -> list:
+    """
+    Calcula o churn por arquivo em cada janela entre marcos consecutivos.
+
+    O histórico de markers[0] (excluído) até markers[-1] é lido com uma única
+    chamada a `git log`, do commit mais recente para o mais antigo; ao passar
+    por markers[i], os commits seguintes vão para a janela (markers[i-1], markers[i]].
+
+    Args:
+        repo_path: Caminho do repositório
+        markers: Hashes completos dos marcos temporais, do mais antigo para o
+                 mais recente (ex: os retornados por utils.get_commit_hash_by_date)
+        lines: Se False, conta apenas commits e autores (ver iter_numstat)
+
+    Returns:
+        list: len(markers) - 1 objetos ChurnTable, um por janela (vazia se dois
+              marcos consecutivos forem o mesmo commit)
+
+    Raises:
+        ValueError: Se houver menos de dois marcos
+        RuntimeError: Se o comando Git falhar
+
+    Note:
+        Em históricos lineares cada commit cai exatamente na janela entre os
+        marcos; com branches, commits de um branch lateral seguem a ordem de
+        data do git log.
+    """
+    if len(markers) < 2:
+        raise ValueError("São necessários pelo menos dois marcos para definir uma janela")
+
+    # Marco -> janela que ele fecha (a primeira, se o marco se repetir)
+    closes = {}
+    for i, marker in enumerate(markers[1:]):
+        closes.setdefault(marker, i)
+    window = [len(markers) - 2]
+
+    def window_of(commit_hash):
+        if commit_hash in closes:
+            window[0] = closes[commit_hash]
+        return window[0]
+
+    with profiling.stage('churn'):
+        commits = iter_numstat(repo_path, [markers[-1], f'^{markers[0]}'], lines=lines)
+        return _accumulate(commits, [ChurnTable() for _ in markers[1:]], window_of)
@@ -0,0 +1,199 @@
+import os
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# Colunas que identificam uma linha de cada tabela do ResultStore
+DIFF_KEYS = {
+    'arquivos': ('arquivo',),
+    'classes': ('arquivo', 'classe'),
+}
+
+# Situação de cada linha na comparação entre duas revisões
+DIFF_STATUSES = ('adicionado', 'removido', 'alterado', 'inalterado')
+
+# Métricas em que um valor maior é melhor; nas demais, um aumento é uma regressão
+HIGHER_IS_BETTER = frozenset({'maintainability_index'})
+
+# Sufixos das colunas de cada métrica na tabela de diferenças
+BEFORE_SUFFIX, AFTER_SUFFIX, DELTA_SUFFIX = '_antes', '_depois', '_delta'
+
+# Coluna auxiliar que numera as linhas repetidas (ex: classes homônimas no mesmo arquivo)
+_OCCURRENCE = '_ocorrencia'
+
+
+def normalize_paths(paths, root: str = None) -> pa.ChunkedArray:
+    """
+    Converte caminhos de arquivo para caminhos relativos à raiz do repositório.
+
+    Args:
+        paths: Coluna (pa.Array/ChunkedArray) de caminhos
+        root: Raiz do clone ou do worktree em que a revisão foi analisada
+
+    Returns:
+        pa.ChunkedArray: Caminhos com '/' como separador, sem a raiz e sem './'
+                         ou '/' iniciais
+    """
+    paths = pc.replace_substring(paths, '\\', '/')
+    if root:
+        prefix = os.path.join(root, '').replace('\\', '/')
+        paths = pc.if_else(pc.starts_with(paths, prefix),
+                           pc.utf8_slice_codeunits(paths, len(prefix)), paths)
+    return pc.replace_substring_regex(paths, r'^(?:\./|/)+', '')
+
+
+def diff_metrics(before: pa.Table, after: pa.Table, kind: str = 'arquivos') -> list:
+    """
+    Lista as métricas numéricas comparáveis entre duas tabelas.
+
+    Args:
+        before: Tabela da revisão antiga
+        after: Tabela da revisão nova
+        kind: Tipo da tabela (chave de DIFF_KEYS)
+
+    Returns:
+        list: Colunas numéricas presentes nas duas tabelas, na ordem de `before`
+    """
+    keys = DIFF_KEYS[kind]
+    return [field.name for field in before.schema
+            if field.name not in keys and field.name in after.column_names
+            and (pa.types.is_integer(field.type) or pa.types.is_floating(field.type))]
+
+
+def _occurrences(table: pa.Table, keys: tuple) -> pa.Array:
+    # Posição de cada linha entre as linhas com as mesmas chaves (0, 1, ...)
+    if not table.num_rows:
+        return pa.array([], pa.int64())
+    order = pc.sort_indices(table, sort_keys=[(key, 'ascending') for key in keys]).to_numpy()
+    sorted_keys = table.select(list(keys)).take(order)
+    starts = np.zeros(table.num_rows, dtype=bool)
+    starts[0] = True
+    for key in keys:
+        column = sorted_keys[key].combine_chunks()
+        changed = pc.fill_null(pc.not_equal(column.slice(1), column.slice(0, len(column) - 1)), True)
+        starts[1:] |= changed.to_numpy(zero_copy_only=False)
+    positions = np.arange(table.num_rows)
+    group_start = np.maximum.accumulate(np.where(starts, positions, 0))
+    occurrence = np.empty(table.num_rows, dtype=np.int64)
+    occurrence[order] = positions - group_start
+    return pa.array(occurrence)
+
+
+def _prepare(table: pa.Table, keys: tuple, metrics: list, root: str, suffix: str) -> pa.Table:
+    columns = {key: table[key] for key in keys}
+    columns['arquivo'] = normalize_paths(table['arquivo'], root)
+    prepared = pa.table(columns)
+    columns[_OCCURRENCE] = _occurrences(prepared, keys)
+    columns.update((f"{metric}{suffix}", table[metric]) for metric in metrics)
+    columns[f"_presente{suffix}"] = pa.array(np.ones(table.num_rows, dtype=bool))
+    return pa.table(columns)
+
+
+def diff_tables(before: pa.Table, after: pa.Table, kind: str = 'arquivos',
+                root_before: str = None, root_after: str = None) -> pa.Table:
+    """
+    Compara as tabelas de duas revisões (métricas por arquivo ou por classe).
+
+    Args:
+        before: Tabela da revisão antiga (ex: ResultStore.read_table(..., 'arquivos'))
+        after: Tabela da revisão nova, do mesmo tipo
+        kind: Tipo das tabelas (chave de DIFF_KEYS)
+        root_before: Raiz em que a revisão antiga foi analisada, removida dos caminhos
+        root_after: Raiz em que a revisão nova foi analisada (padrão: root_before)
+
+    Returns:
+        pa.Table: Uma linha por chave (caminho relativo e, em 'classes', a classe),
+                  ordenada pelas chaves, com 'status' (ver DIFF_STATUSES) e, para
+                  cada métrica, <métrica>_antes, <métrica>_depois e <métrica>_delta
+                  (depois − antes; nulo em linhas adicionadas ou removidas)
+
+    Raises:
+        ValueError: Se kind for desconhecido
+
+    Note:
+        A junção, as diferenças e a classificação são operações do Arrow sobre
+        as colunas inteiras (sem laços por linha). Linhas com as mesmas chaves
+        em uma revisão (ex: classes homônimas no mesmo arquivo) são pareadas
+        pela ordem de ocorrência.
+    """
+    if kind not in DIFF_KEYS:
+        raise ValueError(f"Tabela inválida: {kind} (use {', '.join(DIFF_KEYS)})")
+    keys = DIFF_KEYS[kind]
+    metrics = diff_metrics(before, after, kind)
+    join_keys = [*keys, _OCCURRENCE]
+    joined = _prepare(before, keys, metrics, root_before, BEFORE_SUFFIX).join(
+        _prepare(after, keys, metrics, root_after or root_before, AFTER_SUFFIX),
+        keys=join_keys, join_type='full outer')
+    joined = joined.take(pc.sort_indices(joined, sort_keys=[(key, 'ascending') for key in join_keys]))
+
+    in_before = pc.is_valid(joined[f"_presente{BEFORE_SUFFIX}"])
+    in_after = pc.is_valid(joined[f"_presente{AFTER_SUFFIX}"])
+    columns = {key: joined[key] for key in keys}
+    changed = pa.array(np.zeros(joined.num_rows, dtype=bool))
+    deltas = {}
+    for metric in metrics:
+        old, new = joined[f"{metric}{BEFORE_SUFFIX}"], joined[f"{metric}{AFTER_SUFFIX}"]
+        deltas[metric] = pc.subtract(new, old)
+        # Mudou se os valores diferem ou se só um dos lados é nulo
+        differs = pc.fill_null(pc.not_equal(new, old), pc.xor(pc.is_valid(new), pc.is_valid(old)))
+        changed = pc.or_(changed, differs)
+
+    status = np.select([~in_before.to_numpy(zero_copy_only=False),
+                        ~in_after.to_numpy(zero_copy_only=False),
+                        changed.to_numpy(zero_copy_only=False)],
+                       ['adicionado', 'removido', 'alterado'], 'inalterado')
+    columns['status'] = pa.array(status, pa.string())
+    for metric in metrics:
+        columns[f"{metric}{BEFORE_SUFFIX}"] = joined[f"{metric}{BEFORE_SUFFIX}"]
+        columns[f"{metric}{AFTER_SUFFIX}"] = joined[f"{metric}{AFTER_SUFFIX}"]
+        columns[f"{metric}{DELTA_SUFFIX}"] = deltas[metric]
+    return pa.table(columns)
+
+
+def summarize_diff(diff: pa.Table) -> dict:
+    """
+    Conta as linhas de cada situação em uma tabela de diferenças.
+
+    Args:
+        diff: Retorno de diff_tables()
+
+    Returns:
+        dict: {situação: número de linhas}, com todas as chaves de DIFF_STATUSES
+    """
+    counts = dict.fromkeys(DIFF_STATUSES, 0)
+    for item in pc.value_counts(diff['status']).to_pylist():
+        counts[item['values']] = item['counts']
+    return counts
+
+
+def rank_changes(diff: pa.Table, metric: str, n: int = 10, regressions: bool = True) -> pa.Table:
+    """
+    Seleciona as maiores regressões ou melhorias de uma métrica.
+
+    Args:
+        diff: Retorno de diff_tables()
+        metric: Métrica (ex: 'average_complexity', 'maintainability_index', 'WMC')
+        n: Número de linhas
+        regressions: True para as piores variações; False para as melhores
+
+    Returns:
+        pa.Table: Até n linhas alteradas, da maior para a menor variação no
+                  sentido pedido (ver HIGHER_IS_BETTER)
+
+    Note:
+        Usa uma seleção parcial (select_k), sem ordenar a tabela inteira.
+        Linhas adicionadas ou removidas não têm delta e não entram no ranking.
+    """
+    delta = f"{metric}{DELTA_SUFFIX}"
+    # Em métricas "maior é melhor", regressão é o delta mais negativo
+    worse_is_higher = metric not in HIGHER_IS_BETTER
+    descending = worse_is_higher == regressions
+    values = diff[delta]
+    mask = pc.fill_null(pc.greater(values, 0) if descending else pc.less(values, 0), False)
+    candidates = diff.filter(mask)
+    if not candidates.num_rows:
+        return candidates
+    indices = pc.select_k_unstable(candidates, k=min(n, candidates.num_rows),
+                                   sort_keys=[(delta, 'descending' if descending else 'ascending')])
+    return candidates.take(indices)
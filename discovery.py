@@ -0,0 +1,323 @@
+import os
+import subprocess
+
+from typing import Iterable, Iterator, Optional
+
+import pathspec
+
+# Diretórios que nunca contêm código do projeto analisado (controle de versão,
+# ambientes virtuais, dependências vendorizadas e caches)
+DEFAULT_EXCLUDED_DIRS = frozenset({
+    '.git', '.hg', '.svn',
+    '.venv', 'venv', '.env', 'site-packages',
+    '.tox', '.nox', '.eggs', '.mypy_cache', '.pytest_cache', '.ruff_cache',
+    '__pycache__', 'node_modules', 'bower_components',
+})
+
+# Nomes ambíguos: artefatos de build e ambientes virtuais na raiz do projeto,
+# mas também nomes legítimos de subpacotes (ex: pip/_internal/operations/build/)
+ROOT_EXCLUDED_DIRS = frozenset({'build', 'dist', 'env'})
+
+
+def _is_excluded_dir(dirname: str, at_root: bool) -> bool:
+    """
+    Verifica se um diretório é podado pelas exclusões padrão.
+
+    Args:
+        dirname: Nome do diretório (sem caminho)
+        at_root: Se o diretório está na raiz do projeto
+
+    Returns:
+        bool: True se o diretório não deve ser percorrido
+    """
+    return (dirname in DEFAULT_EXCLUDED_DIRS or dirname.endswith('.egg-info')
+            or (at_root and dirname in ROOT_EXCLUDED_DIRS))
+
+
+def _compile_globs(patterns: Optional[Iterable[str]]) -> Optional[pathspec.PathSpec]:
+    """
+    Compila uma lista de globs no formato .gitignore.
+
+    Args:
+        patterns: Globs fornecidos pelo usuário (ex: ['tests/', '**/migrations/'])
+
+    Returns:
+        PathSpec compilado, ou None se nenhum padrão for informado
+    """
+    if not patterns:
+        return None
+    lines = [p.strip() for p in patterns if p and p.strip()]
+    if not lines:
+        return None
+    return pathspec.GitIgnoreSpec.from_lines(lines)
+
+
+def _read_gitignore(directory: str) -> Optional[pathspec.PathSpec]:
+    """
+    Lê o arquivo .gitignore de um diretório, se existir.
+
+    Args:
+        directory: Diretório onde procurar o .gitignore
+
+    Returns:
+        PathSpec com as regras do arquivo, ou None se não houver .gitignore
+    """
+    gitignore_path = os.path.join(directory, '.gitignore')
+    if not os.path.isfile(gitignore_path):
+        return None
+    try:
+        with open(gitignore_path, 'r', encoding='utf-8', errors='ignore') as handler:
+            return pathspec.GitIgnoreSpec.from_lines(handler.read().splitlines())
+    except OSError as e:
+        print(f"Erro ao ler {gitignore_path}: {e}")
+        return None
+
+
+def _is_ignored(rel_path: str, ignore_specs: list) -> bool:
+    """
+    Verifica se um caminho relativo é ignorado por algum .gitignore ativo.
+
+    Args:
+        rel_path: Caminho relativo à raiz (separador '/'; diretórios terminam em '/')
+        ignore_specs: Lista de tuplas (prefixo_do_gitignore, PathSpec)
+
+    Returns:
+        bool: True se o caminho deve ser ignorado
+    """
+    for base, spec in ignore_specs:
+        if base:
+            if not rel_path.startswith(base + '/'):
+                continue
+            candidate = rel_path[len(base) + 1:]
+        else:
+            candidate = rel_path
+        if spec.match_file(candidate):
+            return True
+    return False
+
+
+def _walk_source_files(root: str, extensions: tuple, include_spec, exclude_spec,
+                       respect_gitignore: bool) -> Iterator[str]:
+    """
+    Percorre o diretório podando subárvores ignoradas antes de descer nelas.
+
+    Args:
+        root: Diretório raiz da busca
+        extensions: Extensões de arquivo aceitas
+        include_spec: PathSpec de inclusão (ou None)
+        exclude_spec: PathSpec de exclusão (ou None)
+        respect_gitignore: Se True, aplica os .gitignore encontrados na árvore
+
+    Yields:
+        str: Caminho completo de cada arquivo selecionado
+    """
+    # Regras de .gitignore ativas por diretório (relativo à raiz)
+    specs_by_dir = {'': []}
+
+    for current, dirnames, filenames in os.walk(root):
+        rel_dir = os.path.relpath(current, root).replace(os.sep, '/')
+        if rel_dir == '.':
+            rel_dir = ''
+
+        ignore_specs = specs_by_dir.pop(rel_dir, [])
+        if respect_gitignore:
+            local_spec = _read_gitignore(current)
+            if local_spec is not None:
+                ignore_specs = ignore_specs + [(rel_dir, local_spec)]
+
+        prefix = f"{rel_dir}/" if rel_dir else ''
+
+        # Poda in-place: os.walk não desce nos diretórios removidos
+        kept = []
+        for dirname in sorted(dirnames):
+            if _is_excluded_dir(dirname, at_root=not rel_dir):
+                continue
+            rel_child = prefix + dirname
+            if exclude_spec is not None and exclude_spec.match_file(rel_child + '/'):
+                continue
+            if ignore_specs and _is_ignored(rel_child + '/', ignore_specs):
+                continue
+            kept.append(dirname)
+            specs_by_dir[rel_child] = ignore_specs
+        dirnames[:] = kept
+
+        for filename in sorted(filenames):
+            if not filename.endswith(extensions):
+                continue
+            rel_file = prefix + filename
+            if exclude_spec is not None and exclude_spec.match_file(rel_file):
+                continue
+            if include_spec is not None and not include_spec.match_file(rel_file):
+                continue
+            if ignore_specs and _is_ignored(rel_file, ignore_specs):
+                continue
+            yield os.path.join(current, filename)
+
+
+def _filter_tracked(rel_files, extensions: tuple, include_spec, exclude_spec) -> Iterator[str]:
+    """
+    Aplica as regras de descoberta a uma lista de caminhos vinda do git.
+
+    Args:
+        rel_files: Caminhos relativos (separador '/')
+        extensions: Extensões aceitas
+        include_spec: PathSpec de inclusão ou None
+        exclude_spec: PathSpec de exclusão ou None
+
+    Yields:
+        str: Caminhos relativos selecionados, na ordem recebida
+    """
+    for rel_file in rel_files:
+        if not rel_file.endswith(extensions):
+            continue
+        parts = rel_file.split('/')
+        if any(_is_excluded_dir(d, at_root=i == 0) for i, d in enumerate(parts[:-1])):
+            continue
+        if exclude_spec is not None and exclude_spec.match_file(rel_file):
+            continue
+        if include_spec is not None and not include_spec.match_file(rel_file):
+            continue
+        yield rel_file
+
+
+def git_ls_files(root: str) -> Optional[list]:
+    """
+    Lista os arquivos rastreados e não ignorados via 'git ls-files'.
+
+    Args:
+        root: Diretório do repositório git
+
+    Returns:
+        list: Caminhos relativos (separador '/'), ou None se o diretório
+              não for um repositório git ou o comando falhar
+
+    Note:
+        Inclui arquivos não rastreados que não são ignorados pelo .gitignore
+        (--others --exclude-standard), sem percorrer o sistema de arquivos.
+    """
+    try:
+        proc = subprocess.run(
+            ['git', '-C', root, 'ls-files', '-z', '--cached', '--others', '--exclude-standard'],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+    except OSError:
+        return None
+    if proc.returncode != 0:
+        return None
+    return [p for p in proc.stdout.decode('utf-8', errors='surrogateescape').split('\0') if p]
+
+
+def iter_source_files(root: str,
+                      extensions: Iterable[str] = ('.py',),
+                      include: Optional[Iterable[str]] = None,
+                      exclude: Optional[Iterable[str]] = None,
+                      use_git: bool = False,
+                      respect_gitignore: bool = True) -> Iterator[str]:
+    """
+    Descobre os arquivos de código-fonte de um projeto.
+
+    Camada de descoberta compartilhada pelos analisadores: ignora diretórios
+    padrão (.git, ambientes virtuais, node_modules, build/...), respeita os
+    .gitignore do projeto e aplica os globs de inclusão/exclusão do usuário.
+    Diretórios excluídos são podados antes da descida.
+
+    Args:
+        root: Diretório raiz do projeto
+        extensions: Extensões aceitas (ex: ('.py',))
+        include: Globs no formato .gitignore; se informado, apenas arquivos
+                 que casam com algum deles são retornados
+        exclude: Globs no formato .gitignore a excluir (ex: ['tests/', 'docs/',
+                 '**/migrations/'])
+        use_git: Se True, usa 'git ls-files' como caminho rápido, sem percorrer
+                 o diretório. Recorre ao os.walk se o git não estiver disponível
+        respect_gitignore: Se True, arquivos ignorados pelo .gitignore são descartados
+
+    Yields:
+        str: Caminho completo (root + caminho relativo) de cada arquivo
+    """
+    extensions = tuple(extensions)
+    include_spec = _compile_globs(include)
+    exclude_spec = _compile_globs(exclude)
+
+    if use_git:
+        tracked = git_ls_files(root)
+        if tracked is not None:
+            for rel_file in _filter_tracked(tracked, extensions, include_spec, exclude_spec):
+                yield os.path.join(root, *rel_file.split('/'))
+            return
+
+    if not os.path.isdir(root):
+        return
+
+    yield from _walk_source_files(root, extensions, include_spec, exclude_spec, respect_gitignore)
+
+
+def list_source_files(root: str, **kwargs) -> list:
+    """
+    Versão em lista de iter_source_files().
+
+    Args:
+        root: Diretório raiz do projeto
+        **kwargs: Mesmos parâmetros de iter_source_files()
+
+    Returns:
+        list: Caminhos completos dos arquivos selecionados
+    """
+    return list(iter_source_files(root, **kwargs))
+
+
+def git_tree_files(repo_path: str, revision: str) -> Optional[list]:
+    """
+    Lista os arquivos de uma revisão via 'git ls-tree', sem checkout.
+
+    Args:
+        repo_path: Diretório do repositório git
+        revision: Hash, branch ou tag
+
+    Returns:
+        list: Caminhos relativos (separador '/'), ou None se o comando falhar
+
+    Note:
+        Lê apenas as árvores: em clones parciais (sem blobs) não busca conteúdo.
+    """
+    try:
+        proc = subprocess.run(
+            ['git', '-C', repo_path, 'ls-tree', '-r', '-z', '--name-only', revision],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+    except OSError:
+        return None
+    if proc.returncode != 0:
+        return None
+    return [p for p in proc.stdout.decode('utf-8', errors='surrogateescape').split('\0') if p]
+
+
+def list_revision_files(repo_path: str, revision: str,
+                        extensions: Iterable[str] = ('.py',),
+                        include: Optional[Iterable[str]] = None,
+                        exclude: Optional[Iterable[str]] = None) -> list:
+    """
+    Descobre os arquivos de código-fonte de uma revisão sem checkout.
+
+    Aplica as mesmas regras de iter_source_files(use_git=True) à árvore da revisão.
+
+    Args:
+        repo_path: Diretório do repositório git
+        revision: Hash, branch ou tag
+        extensions: Extensões aceitas (ex: ('.py',))
+        include: Globs no formato .gitignore a incluir
+        exclude: Globs no formato .gitignore a excluir
+
+    Returns:
+        list: Caminhos relativos (separador '/') dos arquivos selecionados
+
+    Raises:
+        RuntimeError: Se a revisão não puder ser lida
+    """
+    tracked = git_tree_files(repo_path, revision)
+    if tracked is None:
+        raise RuntimeError(f"Não foi possível listar os arquivos da revisão {revision}")
+    return list(_filter_tracked(tracked, tuple(extensions), _compile_globs(include),
+                                _compile_globs(exclude)))
@@ -0,0 +1,327 @@
+import glob
+import math
+import os
+import re
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+
+import analytics
+import store
+import timeline
+
+# Métricas C&K resumidas por revisão: coluna da tabela 'classes' -> coluna da evolução
+# (mesmos nomes de visualization.resumir_ck_csv e do CSV agregado)
+CK_SUMMARY_COLUMNS = {metric: f"avg_{metric.lower()}" for metric in ('WMC', 'DIT', 'NOC', 'RFC', 'CBO', 'LCOM')}
+
+# Séries exibidas por padrão no painel de evolução: coluna -> rótulo
+EVOLUTION_METRICS = {
+    'mean_maintainability_index': 'Índice de manutenibilidade médio',
+    'mean_complexity': 'Complexidade ciclomática média',
+    'total_sloc': 'SLOC total',
+    'total_loc': 'LOC total',
+    'n_files': 'Arquivos',
+    'total_classes': 'Classes',
+    'avg_wmc': 'WMC médio',
+    'avg_cbo': 'CBO médio',
+    'avg_rfc': 'RFC médio',
+    'avg_lcom': 'LCOM médio',
+    'issues_na_janela': 'Issues abertas criadas desde a revisão anterior',
+    'issues_acumuladas': 'Issues abertas criadas até a revisão',
+}
+
+# CSVs de exportar_dados_csv(): <output_dir>/<projeto>_<hash[:8]>_<tipo>.csv
+_CSV_PATTERN = re.compile(r'^(?P<project>.+)_(?P<short>[0-9a-f]{8})_estatisticas\.csv$')
+
+# Diretórios de revisão do store.ResultStore: <output_dir>/<projeto>/<hash>/
+_REVISION_PATTERN = re.compile(r'^[0-9a-f]{40}$')
+
+
+def stored_projects(output_dir: str = "exports") -> list:
+    """
+    Lista os projetos com resultados gravados (CSVs ou tabelas do ResultStore).
+
+    Args:
+        output_dir: Diretório de saída de exportar_dados_csv()
+
+    Returns:
+        list: Nomes dos projetos (ex: 'django/django'), em ordem alfabética
+    """
+    projects = set()
+    for directory, subdirs, files in os.walk(output_dir):
+        relative = os.path.relpath(directory, output_dir)
+        if any(_REVISION_PATTERN.match(subdir) for subdir in subdirs):
+            projects.add(relative.replace(os.sep, '/'))
+            subdirs[:] = []
+            continue
+        for name in files:
+            match = _CSV_PATTERN.match(name)
+            if match:
+                prefix = '' if relative == '.' else f"{relative.replace(os.sep, '/')}/"
+                projects.add(prefix + match.group('project'))
+    return sorted(projects)
+
+
+def stored_revisions(output_dir: str, project: str) -> dict:
+    """
+    Localiza os resultados gravados de cada revisão de um projeto, sem lê-los.
+
+    Args:
+        output_dir: Diretório de saída de exportar_dados_csv()
+        project: Nome do projeto
+
+    Returns:
+        dict: {hash: {tipo: caminho}}, com os tipos 'estatisticas' e 'ck_metricas'
+              (CSVs) e 'arquivos', 'classes' e 'issues' (Parquet) encontrados
+    """
+    results = store.ResultStore(output_dir)
+    found = {}
+    for revision in results.revisions(project):
+        tables = {table: results.table_path(project, revision, table)
+                  for table in ('arquivos', 'classes', 'issues') if results.has(project, revision, table)}
+        if tables:
+            found[revision] = tables
+    # Os CSVs levam só 8 caracteres do hash no nome: o hash completo está na
+    # coluna revision_id das estatísticas
+    prefix = f"{os.path.join(output_dir, project)}_"
+    for stats_path in glob.glob(f"{glob.escape(prefix)}*_estatisticas.csv"):
+        short = stats_path[len(prefix):-len('_estatisticas.csv')]
+        revision = next((name for name in found if name.startswith(short)), None)
+        if revision is None:
+            revision = _read_statistics_csv(stats_path).get('revision_id') or short
+        paths = found.setdefault(revision, {})
+        paths['estatisticas'] = stats_path
+        ck_path = f"{prefix}{short}_ck_metricas.csv"
+        if os.path.exists(ck_path):
+            paths['ck_metricas'] = ck_path
+    return found
+
+
+def _read_statistics_csv(path: str) -> dict:
+    table = pacsv.read_csv(path, convert_options=pacsv.ConvertOptions(
+        column_types={'revision_id': pa.string()}))
+    return table.slice(0, 1).to_pylist()[0] if table.num_rows else {}
+
+
+def revision_statistics(paths: dict, revision: str) -> dict:
+    """
+    Obtém as estatísticas de uma revisão a partir dos resultados gravados.
+
+    Args:
+        paths: Caminhos da revisão (ver stored_revisions())
+        revision: Hash da revisão
+
+    Returns:
+        dict: Estatísticas no formato de analytics.get_project_statistics(),
+              ou {} se a revisão não tiver métricas por arquivo gravadas
+
+    Note:
+        Usa o CSV de estatísticas quando existe; senão, recalcula as
+        estatísticas sobre a tabela 'arquivos' (sem reanalisar os arquivos).
+    """
+    if 'estatisticas' in paths:
+        return _read_statistics_csv(paths['estatisticas'])
+    if 'arquivos' not in paths:
+        return {}
+    table = pq.read_table(paths['arquivos'], columns=list(analytics.STATISTICS_METRICS))
+    values = np.column_stack([
+        pc.fill_null(pc.cast(table[metric], pa.float64()), math.nan).to_numpy()
+        for metric in analytics.STATISTICS_METRICS
+    ]) if table.num_rows else np.empty((0, len(analytics.STATISTICS_METRICS)))
+    return analytics.compute_statistics(values, revision)
+
+
+def revision_ck_summary(paths: dict) -> dict:
+    """
+    Resume as métricas C&K de uma revisão a partir dos resultados gravados.
+
+    Args:
+        paths: Caminhos da revisão (ver stored_revisions())
+
+    Returns:
+        dict: total_classes e as médias de CK_SUMMARY_COLUMNS (0.0 sem classes),
+              ou {} se a revisão não tiver métricas C&K gravadas
+    """
+    if 'classes' in paths:
+        table = pq.read_table(paths['classes'], columns=list(CK_SUMMARY_COLUMNS))
+    elif 'ck_metricas' in paths:
+        table = pacsv.read_csv(paths['ck_metricas'], convert_options=pacsv.ConvertOptions(
+            include_columns=list(CK_SUMMARY_COLUMNS)))
+    else:
+        return {}
+    summary = {'total_classes': table.num_rows}
+    for metric, column in CK_SUMMARY_COLUMNS.items():
+        mean = pc.mean(table[metric]).as_py() if table.num_rows else None
+        summary[column] = 0.0 if mean is None else mean
+    return summary
+
+
+def issue_windows(created_at: np.ndarray, timestamps: np.ndarray) -> tuple:
+    """
+    Conta as issues criadas até cada revisão e entre revisões consecutivas.
+
+    Args:
+        created_at: Datas de criação das issues (timestamps Unix, em qualquer ordem)
+        timestamps: Datas das revisões (timestamps Unix, em ordem crescente)
+
+    Returns:
+        tuple: (acumuladas, na_janela), arrays int64 com o número de issues criadas
+               até cada revisão e desde a revisão anterior (para a primeira, desde o início)
+    """
+    cumulative = np.searchsorted(np.sort(created_at), timestamps, side='right').astype(np.int64)
+    return cumulative, np.diff(cumulative, prepend=0)
+
+
+def _issue_dates(found: dict) -> np.ndarray:
+    # A lista de issues é a do repositório inteiro: usa a gravada mais recentemente
+    paths = [paths['issues'] for paths in found.values() if 'issues' in paths]
+    if not paths:
+        return None
+    table = pq.read_table(max(paths, key=os.path.getmtime), columns=['created_at'])
+    created_at = pc.cast(table['created_at'], pa.timestamp('s', tz='UTC'))
+    return pc.cast(created_at, pa.int64()).to_numpy()
+
+
+def load_evolution(output_dir: str, project: str, repo_path: str = None) -> pd.DataFrame:
+    """
+    Monta a série de evolução de um projeto a partir dos resultados já gravados.
+
+    Args:
+        output_dir: Diretório de saída de exportar_dados_csv()
+        project: Nome do projeto
+        repo_path: Clone do projeto, usado apenas para obter as datas de commit
+                   (`git log --no-walk`, sem checkout)
+
+    Returns:
+        pd.DataFrame: Uma linha por revisão, em ordem de data de commit, com as
+                      colunas 'projeto', 'revisao', 'data', as estatísticas, o
+                      resumo C&K e as janelas de issues (issues_acumuladas,
+                      issues_na_janela); revisões sem data ficam por último, com NaT
+
+    Note:
+        Nenhuma revisão é analisada novamente: as estatísticas vêm dos CSVs
+        (ou da tabela 'arquivos'), o resumo C&K da tabela 'classes' (ou do CSV)
+        e as issues da tabela 'issues' gravada por exportar_dados_csv().
+    """
+    found = stored_revisions(output_dir, project)
+    dates = {}
+    if repo_path and os.path.isdir(repo_path) and found:
+        try:
+            dates = timeline.commit_timestamps(repo_path, list(found))
+        except RuntimeError:
+            dates = {}
+
+    rows = []
+    for revision, paths in found.items():
+        row = {'projeto': project, 'revisao': revision, 'timestamp': dates.get(revision)}
+        statistics = revision_statistics(paths, revision)
+        row.update((key, value) for key, value in statistics.items()
+                   if key != 'revision_id' and not isinstance(value, (list, dict)))
+        row.update(revision_ck_summary(paths))
+        rows.append(row)
+    if not rows:
+        return pd.DataFrame(columns=['projeto', 'revisao', 'data'])
+
+    evolution = pd.DataFrame(rows).sort_values(['timestamp', 'revisao'], na_position='last',
+                                               ignore_index=True)
+    evolution.insert(2, 'data', pd.to_datetime(evolution.pop('timestamp'), unit='s'))
+
+    created_at = _issue_dates(found)
+    dated = evolution['data'].notna().to_numpy()
+    if created_at is not None and dated.any():
+        timestamps = evolution.loc[dated, 'data'].to_numpy().astype('datetime64[s]').astype(np.int64)
+        cumulative, window = issue_windows(created_at, timestamps)
+        evolution.loc[dated, 'issues_acumuladas'] = cumulative
+        evolution.loc[dated, 'issues_na_janela'] = window
+    return evolution
+
+
+def load_projects_evolution(output_dir: str, projects: dict) -> pd.DataFrame:
+    """
+    Monta as séries de evolução de vários projetos.
+
+    Args:
+        output_dir: Diretório de saída de exportar_dados_csv()
+        projects: {projeto: caminho do clone (ou None)}
+
+    Returns:
+        pd.DataFrame: Linhas de load_evolution() de todos os projetos
+    """
+    frames = [load_evolution(output_dir, project, repo_path) for project, repo_path in projects.items()]
+    frames = [frame for frame in frames if not frame.empty]
+    if not frames:
+        return pd.DataFrame(columns=['projeto', 'revisao', 'data'])
+    return pd.concat(frames, ignore_index=True)
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Escolhe os pontos de uma série com o algoritmo Largest-Triangle-Three-Buckets.
+
+    Args:
+        x: Abscissas em ordem crescente
+        y: Ordenadas
+        n_out: Número de pontos mantidos
+
+    Returns:
+        np.ndarray: Índices dos pontos mantidos, em ordem crescente; o primeiro e
+                    o último ponto são sempre mantidos
+
+    Note:
+        Os pontos internos são divididos em n_out - 2 faixas e, de cada faixa, é
+        mantido o ponto que forma o maior triângulo com o ponto escolhido na
+        faixa anterior e a média da faixa seguinte, preservando picos e vales
+        que uma amostragem a intervalos fixos perderia.
+    """
+    n = len(x)
+    if n_out >= n:
+        return np.arange(n)
+    if n_out < 3:
+        return np.array([0, n - 1][:max(n_out, 0)])
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = (np.arange(n_out - 1) * ((n - 2) / (n_out - 2))).astype(np.int64) + 1
+    edges[-1] = n - 1
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for bucket in range(n_out - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_start, next_end = end, edges[bucket + 2] if bucket + 2 < len(edges) else n
+        mean_x = x[next_start:next_end].mean()
+        mean_y = y[next_start:next_end].mean()
+        areas = np.abs((x[previous] - mean_x) * (y[start:end] - y[previous])
+                       - (x[previous] - x[start:end]) * (mean_y - y[previous]))
+        previous = start + int(np.argmax(areas))
+        selected[bucket + 1] = previous
+    return selected
+
+
+def downsample(evolution: pd.DataFrame, column: str, max_points: int = 500,
+               x: str = 'data', by: str = 'projeto') -> pd.DataFrame:
+    """
+    Reduz a série de uma métrica, por projeto, para no máximo max_points pontos.
+
+    Args:
+        evolution: DataFrame de load_evolution() / load_projects_evolution()
+        column: Métrica plotada
+        max_points: Número máximo de pontos por projeto
+        x: Coluna do eixo x (datas ou números, em ordem crescente em cada grupo)
+        by: Coluna que separa as séries
+
+    Returns:
+        pd.DataFrame: Linhas mantidas (apenas as com x e métrica definidos)
+    """
+    valid = evolution.dropna(subset=[x, column])
+    parts = []
+    for _, group in valid.groupby(by, sort=False):
+        positions = group[x].to_numpy()
+        if np.issubdtype(positions.dtype, np.datetime64):
+            positions = positions.astype('datetime64[s]').astype(np.int64)
+        keep = lttb_indices(positions, group[column].to_numpy(dtype=np.float64), max_points)
+        parts.append(group.iloc[keep])
+    return pd.concat(parts) if parts else valid
@@ -0,0 +1,137 @@
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+import views
+
+# Medidas de churn disponíveis para o score (colunas da tabela de hotspots)
+CHURN_MEASURES = ('linhas_alteradas', 'commits', 'autores')
+
+
+def _score_complexity(churn, table):
+    return churn * table['average_complexity']
+
+
+def _score_maintainability(churn, table):
+    return churn * (100.0 - table['maintainability_index'])
+
+
+def _score_size(churn, table):
+    return churn * table['sloc']
+
+
+# Nome do score -> função (churn, colunas) -> score por arquivo
+HOTSPOT_SCORES = {
+    'complexidade': _score_complexity,        # churn × CC médio
+    'manutenibilidade': _score_maintainability,  # churn × (100 − MI)
+    'tamanho': _score_size,                   # churn × SLOC
+}
+
+# Colunas da tabela de métricas por arquivo usadas pelos scores
+_METRIC_COLUMNS = ['arquivo', 'sloc', 'average_complexity', 'maintainability_index']
+
+
+def _as_float(column) -> np.ndarray:
+    return column.to_numpy(zero_copy_only=False).astype(np.float64)
+
+
+# Nomes das colunas de group_by().aggregate() -> colunas da agregação por diretório
+_DIRECTORY_COLUMNS = {
+    'diretorio': 'diretorio',
+    'arquivo_count': 'arquivos',
+    'linhas_alteradas_sum': 'linhas_alteradas',
+    'commits_sum': 'commits',
+    'score_sum': 'score',
+    'score_max': 'score_max',
+}
+
+
+def compute_hotspots(file_metrics: pa.Table, churn: pa.Table, score='complexidade',
+                     churn_measure: str = 'linhas_alteradas', root: str = None) -> pa.Table:
+    """
+    Cruza as métricas por arquivo com o churn de uma janela e ordena os hotspots.
+
+    Args:
+        file_metrics: Tabela no formato de sinks.FILE_METRICS_SCHEMA
+        churn: Tabela no formato de sinks.CHURN_SCHEMA (churn.ChurnTable.to_arrow()),
+               com a coluna 'arquivo' no mesmo formato de file_metrics
+        score: Nome em HOTSPOT_SCORES ou função (churn, colunas) -> score, que recebe
+               arrays NumPy (colunas: {'sloc', 'average_complexity',
+               'maintainability_index'}) e retorna um array float
+        churn_measure: Medida de churn usada no score (ver CHURN_MEASURES)
+        root: Raiz do projeto, removida dos caminhos na coluna 'diretorio'
+
+    Returns:
+        pa.Table: Uma linha por arquivo presente nas duas tabelas, com arquivo,
+                  diretorio, linhas_alteradas, commits, autores, sloc,
+                  average_complexity, maintainability_index e score, em ordem
+                  decrescente de score (arquivos sem a métrica do score por último)
+
+    Raises:
+        ValueError: Se score ou churn_measure forem desconhecidos
+
+    Note:
+        A junção é feita pelo Arrow (hash join) e o score é calculado sobre as
+        colunas inteiras em NumPy; nada é feito arquivo a arquivo em Python.
+    """
+    if churn_measure not in CHURN_MEASURES:
+        raise ValueError(f"Medida de churn inválida: {churn_measure} (use {', '.join(CHURN_MEASURES)})")
+    if not callable(score):
+        if score not in HOTSPOT_SCORES:
+            raise ValueError(f"Score inválido: {score} (use {', '.join(HOTSPOT_SCORES)})")
+        score = HOTSPOT_SCORES[score]
+
+    churn = churn.append_column(
+        'linhas_alteradas', pc.add(churn['linhas_adicionadas'], churn['linhas_removidas']))
+    churn = churn.select(['arquivo', 'linhas_alteradas', 'commits', 'autores'])
+    joined = churn.join(file_metrics.select(_METRIC_COLUMNS), 'arquivo', join_type='inner')
+
+    columns = {name: _as_float(joined[name]) for name in _METRIC_COLUMNS[1:]}
+    scores = np.asarray(score(_as_float(joined[churn_measure]), columns), dtype=np.float64)
+
+    table = pa.table({
+        'arquivo': joined['arquivo'],
+        'diretorio': views.directory_column(joined['arquivo'], root),
+        'linhas_alteradas': joined['linhas_alteradas'],
+        'commits': joined['commits'],
+        'autores': joined['autores'],
+        'sloc': joined['sloc'],
+        'average_complexity': joined['average_complexity'],
+        'maintainability_index': joined['maintainability_index'],
+        'score': pa.array(scores, mask=np.isnan(scores)),
+    })
+    # Nulos (arquivos sem a métrica do score) ficam por último
+    order = pc.sort_indices(table, sort_keys=[('score', 'descending'), ('arquivo', 'ascending')])
+    return table.take(order)
+
+
+def aggregate_by_directory(hotspots: pa.Table, depth: int = None) -> pa.Table:
+    """
+    Agrega a tabela de hotspots por diretório.
+
+    Args:
+        hotspots: Tabela retornada por compute_hotspots()
+        depth: Número de níveis de diretório mantidos (None = diretório completo)
+
+    Returns:
+        pa.Table: diretorio, arquivos, linhas_alteradas, commits, score e
+                  score_max, em ordem decrescente de score (soma dos arquivos)
+    """
+    directories = views.truncate_directories(hotspots['diretorio'], depth)
+    grouped = pa.table({
+        'diretorio': directories,
+        'arquivo': hotspots['arquivo'],
+        'linhas_alteradas': hotspots['linhas_alteradas'],
+        'commits': hotspots['commits'],
+        'score': hotspots['score'],
+    }).group_by('diretorio').aggregate([
+        ('arquivo', 'count'),
+        ('linhas_alteradas', 'sum'),
+        ('commits', 'sum'),
+        ('score', 'sum'),
+        ('score', 'max'),
+    ])
+    grouped = grouped.rename_columns([_DIRECTORY_COLUMNS[name] for name in grouped.column_names])
+    grouped = grouped.select(list(_DIRECTORY_COLUMNS.values()))
+    order = pc.sort_indices(grouped, sort_keys=[('score', 'descending'), ('diretorio', 'ascending')])
+    return grouped.take(order)
@@ -4,6 +4,8 @@ from decouple import config
 import pandas as pd
 import datetime
 
+import profiling
+
 api_key = config('API_KEY')
 api_url = config('GITHUB_API_URL')
 
@@ -30,6 +32,20 @@ def get_issues_df(query_repos: dict) -> pd.DataFrame:
     Raises:
         requests.RequestException: Em caso de erro na requisição HTTP
     """
+    with profiling.stage('issues'):
+        return _fetch_issues_df(query_repos)
+
+
+def _fetch_issues_df(query_repos: dict) -> pd.DataFrame:
+    """
+    Implementação de get_issues_df(), medida como estágio 'issues'.
+    
+    Args:
+        query_repos: Dicionário {owner: repo}
+        
+    Returns:
+        pd.DataFrame: Issues abertas dos repositórios
+    """
     headers = {
         "Authorization": f"Bearer {api_key}",
         "Content-Type": "application/json"
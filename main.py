@@ -1,9 +1,20 @@
 import sys
 import os
+import argparse
 
 # Importação de variáveis e módulos internos da ferramenta
 import analytics
 import utils
+import profiling
+import budgets
+import releases
+import reports
+import evolution
+import workqueue
+import service
+import scheduling
+import preview
+from data import repos
 
 # Pipeline:
 # 1. Obtenção dos repositórios (Clone)
@@ -15,23 +26,39 @@ import utils
 # 7. Calcular Métricas Chidamber & Kemerer para cada revision
 # 8. Consolidar métricas e issues para cada revision
 
-def analyze_project(project_path: str, project_name: str):
+def analyze_project(project_path: str, project_name: str, budget: budgets.FileBudget = None,
+                    budget_report: budgets.BudgetReport = None, workers: int = None,
+                    cost_model: scheduling.CostModel = None):
     """
     Analisa um projeto e retorna métricas Raw/Halstead e Chidamber & Kemerer.
     
     Args:
         project_path: Caminho para o diretório do projeto
         project_name: Nome do projeto para identificação
+        budget: Limites de tamanho e CPU por arquivo (opcional)
+        budget_report: Relatório que recebe os arquivos que atingiram o orçamento
+        workers: Processos usados na análise dos arquivos (None: sequencial)
+        cost_model: Modelo de custo para escalonar os arquivos (opcional); os
+                    tempos medidos são gravados no histórico ao final
         
     Returns:
         dict: Dicionário com métricas do projeto
     """
+    options = {}
+    if budget is not None:
+        options = {'budget': budget, 'budget_report': budget_report}
+    if workers is not None:
+        options['workers'] = workers
+    if cost_model is not None:
+        options['cost_model'] = cost_model
     try:
-        raw_metrics = analytics.get_project_metrics(project_path)
-        ck_metrics = analytics.get_ck_metrics(project_path)
+        raw_metrics = analytics.get_project_metrics(project_path, **options)
+        ck_metrics = analytics.get_ck_metrics(project_path, **options)
         
         current_version = utils.get_project_checkout_version(project_name)
         stats = analytics.get_project_statistics(raw_metrics, current_version)
+        if cost_model is not None:
+            cost_model.save()
         
         return {
             'raw_metrics': raw_metrics,
@@ -43,7 +70,100 @@ def analyze_project(project_path: str, project_name: str):
         print(f"Erro ao analisar projeto {project_name}: {e}")
         return None
 
-def main():
+def parse_args(argv: list = None) -> argparse.Namespace:
+    """
+    Interpreta os argumentos de linha de comando.
+    
+    Args:
+        argv: Lista de argumentos (sem o nome do programa); None equivale a []
+        
+    Returns:
+        argparse.Namespace: Argumentos profile, max_bytes, cpu_seconds, on_exceed,
+                            releases, release_window, reports, exports_dir,
+                            report_workers, no_pdf, force_reports, queue_dir,
+                            enqueue, chunk_size, work, worker_processes, serve,
+                            host, service_pool, workers, schedule, preview e
+                            preview_tolerance
+    """
+    parser = argparse.ArgumentParser(description="Análise de código do code_insights")
+    parser.add_argument('--profile', metavar='ARQUIVO_JSON', default=None,
+                        help="Mede o tempo por estágio e por arquivo, imprime o relatório "
+                             "e grava o perfil neste arquivo JSON")
+    parser.add_argument('--max-bytes', type=int, default=None,
+                        help="Tamanho máximo por arquivo; arquivos maiores atingem o orçamento")
+    parser.add_argument('--cpu-seconds', type=float, default=None,
+                        help="Tempo de CPU máximo por arquivo, medido em processos workers")
+    parser.add_argument('--on-exceed', choices=budgets.ON_EXCEED_ACTIONS, default='raw',
+                        help="Arquivos acima do orçamento: 'raw' (apenas métricas raw) ou 'skip'")
+    parser.add_argument('--releases', nargs=2, metavar=('RELEASE_1', 'RELEASE_2'), default=None,
+                        help="Analisa os quatro marcos definidos por duas releases (tags): "
+                             "a janela antes da primeira e a janela depois da segunda")
+    parser.add_argument('--release-window', type=int, default=1,
+                        help="Tamanho da janela de análise, em releases (padrão: 1)")
+    parser.add_argument('--reports', metavar='DIRETORIO', default=None,
+                        help="Gera os relatórios HTML/PDF de todos os projetos com resultados "
+                             "gravados, sem nova análise, e termina")
+    parser.add_argument('--exports-dir', default='exports',
+                        help="Diretório dos resultados exportados (padrão: exports)")
+    parser.add_argument('--report-workers', type=int, default=None,
+                        help="Processos usados na geração dos relatórios (padrão: número de CPUs)")
+    parser.add_argument('--no-pdf', action='store_true',
+                        help="Gera apenas os relatórios HTML")
+    parser.add_argument('--force-reports', action='store_true',
+                        help="Regera também os relatórios cujas entradas não mudaram")
+    parser.add_argument('--queue-dir', default='fila',
+                        help="Diretório da fila de unidades de trabalho (workqueue.SpoolQueue); "
+                             "em um sistema de arquivos compartilhado, workers de outros hosts "
+                             "podem consumi-la (padrão: fila)")
+    parser.add_argument('--enqueue', type=int, metavar='N_REVISOES', default=None,
+                        help="Enfileira as últimas N revisões de cada projeto de data.repos, "
+                             "em blocos de arquivos, e termina (com --work, processa em seguida)")
+    parser.add_argument('--chunk-size', type=int, default=workqueue.DEFAULT_CHUNK_SIZE,
+                        help="Arquivos por unidade de trabalho (padrão: %(default)s)")
+    parser.add_argument('--work', action='store_true',
+                        help="Processa as unidades da fila, gravando em --exports-dir, até ela esvaziar")
+    parser.add_argument('--worker-processes', type=int, default=os.cpu_count() or 1,
+                        help="Workers locais que consomem a fila (padrão: número de CPUs)")
+    parser.add_argument('--serve', type=int, metavar='PORTA', default=None,
+                        help="Inicia o serviço HTTP de métricas por (projeto, revisão) nesta porta")
+    parser.add_argument('--host', default='127.0.0.1',
+                        help="Endereço do serviço HTTP (padrão: apenas local)")
+    parser.add_argument('--service-pool', type=int, default=2,
+                        help="Revisões analisadas ao mesmo tempo pelo serviço (padrão: 2)")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Processos usados na análise dos arquivos (padrão: sequencial)")
+    parser.add_argument('--schedule', action='store_true',
+                        help="Despacha os arquivos do maior para o menor custo estimado (tamanho "
+                             "e tempos de execuções anteriores, guardados no clone)")
+    parser.add_argument('--preview', type=int, metavar='N_ARQUIVOS', default=None,
+                        help="Estima as estatísticas do projeto com uma amostra estratificada "
+                             "de N arquivos, com intervalos de confiança, e termina")
+    parser.add_argument('--preview-tolerance', type=float, default=None,
+                        help="Com --preview, dobra a amostra até a largura relativa dos "
+                             "intervalos ficar abaixo deste valor (ex: 0.05)")
+    return parser.parse_args(argv or [])
+
+def resolve_release_markers(project_path: str, first: str, second: str, span: int = 1) -> list:
+    """
+    Resolve os quatro marcos temporais a partir de duas releases.
+    
+    Args:
+        project_path: Caminho para o repositório
+        first: Release (tag) do marco temporal 1
+        second: Release (tag) do marco temporal 2
+        span: Tamanho da janela, em releases estáveis
+        
+    Returns:
+        list: Tuplas (tag, hash_do_commit) dos quatro marcos
+        
+    Raises:
+        KeyError: Se uma das releases não existir
+    """
+    indice = releases.load_releases(project_path)
+    nomes = indice.markers(first, second, span=span, stable_only=True)
+    return [(nome, indice.commit(nome)) for nome in nomes]
+
+def main(argv: list = None):
     """
     Função principal para demonstração de análise de código.
     
@@ -51,17 +171,119 @@ def main():
     incluindo métricas Raw/Halstead, Chidamber & Kemerer e estatísticas gerais.
     Os resultados são exibidos no console.
     
+    Args:
+        argv: Argumentos de linha de comando (ver parse_args)
+    
     Raises:
         Exception: Se houver erro na análise do projeto
     """
     sys.stdout.reconfigure(encoding='utf-8')
+    args = parse_args(argv)
+    
+    if args.reports:
+        # Relatórios a partir dos resultados já gravados: nenhum checkout ou análise
+        projects = {project: os.path.join(utils.CLONE_BASE_PATH, project)
+                    for project in evolution.stored_projects(args.exports_dir)}
+        generated = reports.generate_reports(args.exports_dir, projects, args.reports,
+                                             workers=args.report_workers, pdf=not args.no_pdf,
+                                             force=args.force_reports)
+        for project, report in generated.items():
+            print(f"{project}: {report['status']} {report.get('pdf') or report.get('html') or report.get('erro')}")
+        return
+    
+    if args.serve is not None:
+        # Resultados gravados em --exports-dir; revisões ausentes são analisadas sob demanda
+        metricas = service.MetricsService(args.exports_dir, pool_size=args.service_pool,
+                                          analysis_workers=args.worker_processes,
+                                          chunk_size=args.chunk_size)
+        servidor = service.serve(metricas, args.host, args.serve)
+        print(f"Serviço de métricas em http://{args.host}:{servidor.server_address[1]} "
+              f"(/metricas/<owner>/<repo>/<revisao>[/<tabela>], /status)")
+        try:
+            servidor.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            servidor.server_close()
+            metricas.close()
+        return
+    
+    if args.enqueue or args.work:
+        # Execução distribuída: unidades (projeto, revisão, bloco de arquivos) em uma fila
+        fila = workqueue.SpoolQueue(args.queue_dir)
+        if args.enqueue:
+            for owner, repo in repos.items():
+                project = f"{owner}/{repo}"
+                repo_path = os.path.join(utils.CLONE_BASE_PATH, owner, repo)
+                if not os.path.isdir(repo_path):
+                    print(f"{project}: clone não encontrado em {repo_path}")
+                    continue
+                units = workqueue.plan_units(project, repo_path,
+                                             utils.get_git_revisions(repo_path, args.enqueue),
+                                             chunk_size=args.chunk_size)
+                print(f"{project}: {fila.put_many(units)} unidades enfileiradas")
+        if args.work:
+            counts = workqueue.run_workers(fila, args.exports_dir, processes=args.worker_processes)
+            print(f"Unidades processadas: {counts['processada']}, já gravadas: {counts['existente']}, "
+                  f"com falha: {counts['falha']}")
+        return
     
     # Demonstração para o Repositório django/django
     django_path = 'clones/django/django'
     project_name = 'django'
     
+    analyze_args = (django_path, project_name)
+    budget_report = None
+    if args.max_bytes or args.cpu_seconds:
+        budget_report = budgets.BudgetReport()
+        analyze_args += (budgets.FileBudget(args.max_bytes, args.cpu_seconds, args.on_exceed),
+                         budget_report)
+    analyze_options = {}
+    if args.workers is not None:
+        analyze_options['workers'] = args.workers
+    if args.schedule:
+        analyze_options['cost_model'] = scheduling.load_cost_model(django_path)
+    
+    if args.preview:
+        print(f"Prévia do projeto: {project_name}")
+        rounds = preview.iter_preview(django_path, utils.get_project_checkout_version(project_name),
+                                      sample_size=args.preview, tolerance=args.preview_tolerance,
+                                      workers=args.workers)
+        for estimate in rounds:
+            sampling = estimate['amostragem']
+            intervals = "; ".join(f"{key} = {estimate[key]:.3f} [{low:.3f}, {high:.3f}]"
+                                  for key, (low, high) in sampling['intervalos'].items()
+                                  if low is not None)
+            print(f"Rodada {sampling['rodada']}: {sampling['arquivos_analisados']} de "
+                  f"{sampling['arquivos_projeto']} arquivos ({sampling['segundos']:.1f}s) - {intervals}")
+        return
+    
+    if args.releases:
+        # Um resultado por marco, com checkout da release antes de cada análise
+        for tag, commit in resolve_release_markers(django_path, *args.releases, span=args.release_window):
+            print(f"Analisando projeto: {project_name} - release {tag} ({commit[:8]})")
+            utils.checkout_git_revision(django_path, commit)
+            results = analyze_project(*analyze_args, **analyze_options)
+            if results:
+                print(results['statistics'])
+            else:
+                print(f"Falha na análise da release {tag}.")
+        return
+    
     print(f"Analisando projeto: {project_name}")
-    results = analyze_project(django_path, project_name)
+    if args.profile:
+        perfil = profiling.RunProfile(name=project_name, trace_memory=True)
+        with perfil.activate():
+            results = analyze_project(*analyze_args, **analyze_options)
+        print(perfil.format_report())
+        print(f"\nPerfil salvo em: {perfil.save_json(args.profile)}\n")
+    else:
+        results = analyze_project(*analyze_args, **analyze_options)
+    
+    if budget_report:
+        print(f"Arquivos que atingiram o orçamento ({len(budget_report)}):")
+        for event in budget_report.events:
+            print(f"  [{event['etapa']}/{event['motivo']} -> {event['acao']}] {event['arquivo']}")
     
     if results:
         print("Métricas Chidamber & Kemerer:")
@@ -72,5 +294,5 @@ def main():
         print("Falha na análise do projeto.")
     
 if __name__ == "__main__":
-    main()
+    main(sys.argv[1:])
 
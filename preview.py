@@ -0,0 +1,297 @@
+import os
+import time
+
+import numpy as np
+
+import analytics
+from discovery import iter_source_files
+
+# Estimativas com intervalo de confiança: {chave das estatísticas: métrica por arquivo}
+PREVIEW_ESTIMATES = {
+    'mean_maintainability_index': 'maintainability_index',
+    'mean_complexity': 'average_complexity',
+}
+
+# Arquivos analisados na primeira rodada
+DEFAULT_SAMPLE_SIZE = 100
+
+# Estratificação: níveis de diretório e classes de tamanho (quantis dos bytes)
+DIRECTORY_DEPTH = 2
+SIZE_CLASSES = 4
+
+# Diretórios com menos arquivos que isso formam um único estrato ('*')
+MIN_DIRECTORY_FILES = 10
+
+# Reamostragens do bootstrap
+BOOTSTRAP_REPLICATES = 1000
+
+
+def directory_key(relative_path: str, depth: int = DIRECTORY_DEPTH) -> str:
+    """
+    Retorna o diretório de um arquivo truncado em `depth` níveis.
+
+    Args:
+        relative_path: Caminho relativo à raiz do projeto
+        depth: Número de níveis de diretório considerados
+
+    Returns:
+        str: Ex: 'src/transformers' para 'src/transformers/models/bert/x.py';
+             '.' para arquivos na raiz
+    """
+    parts = relative_path.replace(os.sep, '/').split('/')[:-1]
+    return '/'.join(parts[:depth]) or '.'
+
+
+class StratifiedSample:
+    """
+    Plano de amostragem aleatória estratificada dos arquivos de um projeto.
+
+    Os estratos combinam o diretório (directory_key) com a classe de tamanho
+    do arquivo. Cada estrato tem uma permutação aleatória própria e uma
+    amostra de n arquivos usa o início de cada permutação; assim amostras
+    maiores contêm as menores e o refinamento reaproveita o que já foi analisado.
+
+    Attributes:
+        paths (list): Caminhos dos arquivos do projeto
+        sizes (np.ndarray): Tamanho de cada arquivo em bytes (int64)
+        strata (np.ndarray): Estrato de cada arquivo (índice em labels)
+        labels (list): (diretório, classe de tamanho) de cada estrato
+        population (np.ndarray): Número de arquivos de cada estrato
+    """
+
+    def __init__(self, paths: list, root: str, depth: int = DIRECTORY_DEPTH,
+                 size_classes: int = SIZE_CLASSES, min_directory_files: int = MIN_DIRECTORY_FILES,
+                 seed: int = None):
+        """
+        Args:
+            paths: Caminhos dos arquivos
+            root: Raiz do projeto (os diretórios são relativos a ela)
+            depth: Níveis de diretório usados na estratificação
+            size_classes: Número de classes de tamanho
+            min_directory_files: Diretórios menores são agrupados em um só estrato
+            seed: Semente do gerador aleatório
+        """
+        self.paths = list(paths)
+        self.sizes = np.fromiter((os.path.getsize(path) for path in self.paths), dtype=np.int64,
+                                 count=len(self.paths))
+        directories = [directory_key(os.path.relpath(path, root), depth) for path in self.paths]
+        names, directory_ids, counts = np.unique(directories, return_inverse=True, return_counts=True)
+        names = np.where(counts < min_directory_files, '*', names)
+        directory_ids = np.unique(names, return_inverse=True)[1][directory_ids]
+        edges = np.quantile(self.sizes, np.arange(1, size_classes) / size_classes) if self.paths else []
+        size_ids = np.searchsorted(edges, self.sizes, side='right')
+        keys, self.strata = np.unique(np.stack([directory_ids, size_ids], axis=1), axis=0,
+                                      return_inverse=True)
+        self.strata = self.strata.reshape(-1)
+        directory_names = np.unique(names)
+        self.labels = [(str(directory_names[d]), int(s)) for d, s in keys]
+        self.population = np.bincount(self.strata, minlength=len(self.labels))
+        rng = np.random.default_rng(seed)
+        self._order = [rng.permutation(np.flatnonzero(self.strata == h)) for h in range(len(self.labels))]
+
+    def __len__(self):
+        return len(self.paths)
+
+    def allocate(self, n: int) -> np.ndarray:
+        """
+        Distribui n arquivos entre os estratos, proporcionalmente ao tamanho de cada um.
+
+        Args:
+            n: Tamanho desejado da amostra
+
+        Returns:
+            np.ndarray: Arquivos por estrato. Estratos com 2 ou mais arquivos
+                        recebem pelo menos 2, para que o bootstrap estime a
+                        variância; por isso o total pode passar um pouco de n
+        """
+        total = len(self.paths)
+        if n >= total:
+            return self.population.copy()
+        exact = n * self.population / total
+        counts = np.floor(exact).astype(np.int64)
+        remainder = n - int(counts.sum())
+        if remainder > 0:
+            counts[np.argsort(counts - exact, kind='stable')[:remainder]] += 1
+        counts = np.maximum(counts, np.minimum(2, self.population))
+        return np.minimum(counts, self.population)
+
+    def draw(self, n: int) -> tuple:
+        """
+        Seleciona a amostra de n arquivos.
+
+        Args:
+            n: Tamanho desejado da amostra (ver allocate)
+
+        Returns:
+            tuple: (índices dos arquivos, estrato de cada um, peso de cada um);
+                   o peso é o inverso da fração amostrada do estrato
+        """
+        counts = self.allocate(n)
+        indices = np.concatenate([order[:k] for order, k in zip(self._order, counts)]
+                                 or [np.empty(0, dtype=np.int64)]).astype(np.int64)
+        strata = self.strata[indices]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            weights = (self.population / counts)[strata]
+        return indices, strata, weights
+
+
+def bootstrap_intervals(values: np.ndarray, strata: np.ndarray, weights: np.ndarray,
+                        census: np.ndarray, replicates: int = BOOTSTRAP_REPLICATES,
+                        confidence: float = 0.95, seed: int = None) -> np.ndarray:
+    """
+    Intervalos de confiança das médias ponderadas por bootstrap estratificado.
+
+    Cada réplica reamostra, com reposição, os arquivos de cada estrato e
+    recalcula a média ponderada (soma dos pesos x valores / soma dos pesos
+    dos valores presentes) de cada coluna.
+
+    Args:
+        values: Matriz (n_arquivos, n_métricas) com NaN para valores ausentes
+        strata: Estrato de cada linha
+        weights: Peso de cada linha (constante dentro do estrato)
+        census: Por estrato, True se todos os seus arquivos estão na amostra
+                (o estrato não é reamostrado)
+        replicates: Número de réplicas
+        confidence: Nível de confiança
+        seed: Semente do gerador aleatório
+
+    Returns:
+        np.ndarray: (n_métricas, 2) com os limites inferior e superior; NaN
+                    para métricas sem valores
+    """
+    rng = np.random.default_rng(seed)
+    sums = np.zeros((replicates, values.shape[1]))
+    counts = np.zeros((replicates, values.shape[1]))
+    valid = ~np.isnan(values)
+    filled = np.where(valid, values, 0.0)
+    for stratum in np.unique(strata):
+        rows = np.flatnonzero(strata == stratum)
+        weight = weights[rows[0]]
+        if census[stratum] or len(rows) == 1:
+            sums += weight * filled[rows].sum(axis=0)
+            counts += weight * valid[rows].sum(axis=0)
+            continue
+        draws = rows[rng.integers(0, len(rows), size=(replicates, len(rows)))]
+        sums += weight * filled[draws].sum(axis=1)
+        counts += weight * valid[draws].sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = sums / counts
+    alpha = (1 - confidence) / 2
+    if not np.isfinite(means).any():
+        return np.full((values.shape[1], 2), np.nan)
+    with np.errstate(invalid='ignore'):
+        return np.nanpercentile(means, [100 * alpha, 100 * (1 - alpha)], axis=0).T
+
+
+def iter_preview(project_path: str, revision_id: str, sample_size: int = DEFAULT_SAMPLE_SIZE,
+                 tolerance: float = None, max_files: int = None, include: list = None,
+                 exclude: list = None, use_git: bool = False, languages: tuple = ('python',),
+                 workers: int = None, confidence: float = 0.95,
+                 replicates: int = BOOTSTRAP_REPLICATES, depth: int = DIRECTORY_DEPTH,
+                 size_classes: int = SIZE_CLASSES, seed: int = None):
+    """
+    Estima as estatísticas do projeto a partir de amostras crescentes de arquivos.
+
+    Args:
+        project_path: Caminho para o diretório do projeto
+        revision_id: Identificador de revisão
+        sample_size: Arquivos analisados na primeira rodada
+        tolerance: Largura relativa máxima dos intervalos ((sup - inf) / |estimativa|).
+                   None faz uma única rodada; senão a amostra dobra a cada rodada
+                   até todos os intervalos de PREVIEW_ESTIMATES ficarem abaixo dela
+        max_files: Limite de arquivos analisados no refinamento (None: o projeto todo)
+        include: Globs (formato .gitignore) de arquivos a incluir
+        exclude: Globs (formato .gitignore) de arquivos/diretórios a excluir
+        use_git: Se True, descobre os arquivos via 'git ls-files'
+        languages: Linguagens analisadas (chaves de analytics.LANGUAGE_EXTENSIONS)
+        workers: Número de processos para a análise. None ou 1 executa sequencialmente
+        confidence: Nível de confiança dos intervalos
+        replicates: Réplicas do bootstrap
+        depth: Níveis de diretório usados na estratificação
+        size_classes: Classes de tamanho usadas na estratificação
+        seed: Semente da amostragem e do bootstrap
+
+    Yields:
+        dict: Por rodada, estatísticas no formato de get_project_statistics()
+              estimadas para o projeto todo, mais a chave 'amostragem' com
+              'arquivos_analisados', 'arquivos_projeto', 'estratos', 'rodada',
+              'confianca', 'intervalos' ({estimativa: [inf, sup]}),
+              'largura_relativa', 'completa' e 'segundos'
+
+    Note:
+        Totais e médias usam o peso de cada arquivo (inverso da fração
+        amostrada do seu estrato); percentis, desvios e extremos são os da
+        amostra. Só os arquivos novos de cada rodada são analisados.
+    """
+    started = time.perf_counter()
+    extensions = tuple(ext for language in languages for ext in analytics.LANGUAGE_EXTENSIONS[language])
+    files = iter_source_files(project_path, extensions=extensions, include=include,
+                              exclude=exclude, use_git=use_git)
+    sample = StratifiedSample(files, project_path, depth=depth, size_classes=size_classes, seed=seed)
+    limit = len(sample) if max_files is None else min(max_files, len(sample))
+    nan_row = [np.nan] * len(analytics.STATISTICS_METRICS)
+    rows = {}
+    n = min(sample_size, limit)
+    round_number = 0
+    while True:
+        round_number += 1
+        indices, strata, weights = sample.draw(n)
+        pending = {sample.paths[i]: i for i in indices.tolist() if i not in rows}
+        for path, metrics in analytics.iter_path_metrics(list(pending), workers=workers):
+            rows[pending[path]] = [metrics.get(metric) for metric in analytics.STATISTICS_METRICS]
+        values = np.array([rows.get(i, nan_row) for i in indices.tolist()], dtype=np.float64)
+        values = values.reshape(len(indices), len(analytics.STATISTICS_METRICS))
+
+        # Arquivos com erro de análise não entram nas estatísticas, como na análise completa
+        analyzed = np.array([i in rows for i in indices.tolist()], dtype=bool)
+        statistics = analytics.compute_statistics(values[analyzed], revision_id,
+                                                  weights=weights[analyzed])
+        census = sample.allocate(n) == sample.population
+        columns = [analytics.STATISTICS_METRICS.index(metric) for metric in PREVIEW_ESTIMATES.values()]
+        intervals = bootstrap_intervals(values[:, columns], strata, weights, census,
+                                        replicates, confidence, seed)
+        widths = {}
+        for key, (low, high) in zip(PREVIEW_ESTIMATES, intervals.tolist()):
+            estimate = statistics[key]
+            widths[key] = (high - low) / abs(estimate) if estimate else high - low
+        complete = bool(census.all())
+        statistics['amostragem'] = {
+            'arquivos_analisados': int(len(indices)),
+            'arquivos_projeto': len(sample),
+            'estratos': len(sample.labels),
+            'rodada': round_number,
+            'confianca': confidence,
+            'intervalos': {key: [None if np.isnan(low) else low, None if np.isnan(high) else high]
+                           for key, (low, high) in zip(PREVIEW_ESTIMATES, intervals.tolist())},
+            'largura_relativa': {key: None if np.isnan(width) else width for key, width in widths.items()},
+            'completa': complete,
+            'segundos': round(time.perf_counter() - started, 3),
+        }
+        yield statistics
+
+        if tolerance is None or complete or len(indices) >= limit:
+            return
+        if all(not np.isnan(width) and width <= tolerance for width in widths.values()):
+            return
+        n = min(n * 2, limit)
+
+
+def preview_statistics(project_path: str, revision_id: str, sample_size: int = DEFAULT_SAMPLE_SIZE,
+                       tolerance: float = None, **options) -> dict:
+    """
+    Estima as estatísticas do projeto por amostragem, sem analisar todos os arquivos.
+
+    Args:
+        project_path: Caminho para o diretório do projeto
+        revision_id: Identificador de revisão
+        sample_size: Arquivos analisados na primeira rodada
+        tolerance: Largura relativa máxima dos intervalos; None faz uma única rodada
+        **options: Demais parâmetros de iter_preview()
+
+    Returns:
+        dict: Estatísticas da última rodada de iter_preview()
+    """
+    statistics = None
+    for statistics in iter_preview(project_path, revision_id, sample_size, tolerance, **options):
+        pass
+    return statistics
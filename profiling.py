@@ -0,0 +1,509 @@
+import os
+import json
+import threading
+import time
+import tracemalloc
+
+import numpy as np
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+
+import sharedblobs
+
+# Estágios do pipeline na ordem em que são exibidos nos relatórios
+PIPELINE_STAGES = (
+    'clone', 'fetch', 'resolve', 'checkout', 'discover', 'parse', 'raw', 'cc', 'mi', 'functions',
+    'ck', 'churn', 'issues', 'export',
+)
+
+# Coletor ativo no contexto atual (RunProfile no processo principal ou
+# _FileCollector dentro da análise de um arquivo)
+_current = ContextVar('code_insights_profile', default=None)
+
+
+class _StageStats:
+    """
+    Totais acumulados de um estágio.
+
+    Attributes:
+        calls (int): Número de execuções do estágio
+        wall_seconds (float): Tempo de relógio acumulado
+        cpu_seconds (float): Tempo de CPU do processo acumulado
+        peak_memory_bytes (int): Maior pico do tracemalloc observado no estágio
+    """
+
+    __slots__ = ('calls', 'wall_seconds', 'cpu_seconds', 'peak_memory_bytes')
+
+    def __init__(self):
+        self.calls = 0
+        self.wall_seconds = 0.0
+        self.cpu_seconds = 0.0
+        self.peak_memory_bytes = 0
+
+    def add(self, wall: float, cpu: float, calls: int = 1, peak: int = 0) -> None:
+        self.calls += calls
+        self.wall_seconds += wall
+        self.cpu_seconds += cpu
+        if peak > self.peak_memory_bytes:
+            self.peak_memory_bytes = peak
+
+    def to_dict(self) -> dict:
+        return {
+            'calls': self.calls,
+            'wall_seconds': round(self.wall_seconds, 6),
+            'cpu_seconds': round(self.cpu_seconds, 6),
+            'peak_memory_bytes': self.peak_memory_bytes,
+        }
+
+
+class _FileCollector:
+    """
+    Coletor leve usado durante a análise de um único arquivo, possivelmente
+    em um processo worker. Os tempos são devolvidos ao processo principal
+    junto com o resultado (ver profiled_call).
+    """
+
+    __slots__ = ('stages', 'trace_memory')
+
+    def __init__(self):
+        self.stages = {}
+        self.trace_memory = False
+
+    def add_stage(self, name: str, wall: float, cpu: float, peak: int = 0) -> None:
+        totals = self.stages.get(name)
+        if totals is None:
+            self.stages[name] = [wall, cpu]
+        else:
+            totals[0] += wall
+            totals[1] += cpu
+
+
+class RunProfile:
+    """
+    Perfil de execução de uma análise.
+
+    Registra tempo de relógio e de CPU por estágio do pipeline (clone, resolve,
+    checkout, discover, parse, raw, cc, mi, ck, issues, export), tempo e
+    tamanho de cada arquivo analisado, ocupação dos workers de cada pool,
+    picos do tracemalloc e taxas de acerto de caches. Ative com
+    `with profile.activate():`.
+
+    Attributes:
+        name (str): Identificação da execução
+        trace_memory (bool): Se True, mede picos de memória com tracemalloc
+        stages (dict): Estatísticas por estágio
+        files (list): Tuplas (caminho, wall, cpu, bytes) por arquivo analisado
+        caches (dict): {nome_cache: [acertos, falhas]}
+        pools (list): Por execução do pipeline de arquivos, {'workers': n,
+                      'spans': {worker: [arquivos, ocupado, início, fim]}}
+    """
+
+    def __init__(self, name: str = None, trace_memory: bool = False):
+        """
+        Args:
+            name: Identificação da execução (ex: projeto e revisão)
+            trace_memory: Se True, inicia o tracemalloc enquanto o perfil estiver ativo
+        """
+        self.name = name
+        self.trace_memory = trace_memory
+        self.stages = {}
+        self.files = []
+        self.caches = {}
+        self.pools = []
+        self.started_at = None
+        self._wall_start = None
+        self._wall_total = 0.0
+        # Estágios podem ser registrados por threads (ex: worktrees.WorktreePool.map)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def activate(self):
+        """
+        Torna este perfil o coletor ativo do contexto atual.
+
+        Yields:
+            RunProfile: O próprio perfil
+        """
+        token = _current.set(self)
+        started_tracemalloc = False
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            started_tracemalloc = True
+        if self.started_at is None:
+            self.started_at = datetime.now().isoformat(timespec='seconds')
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self._wall_total += time.perf_counter() - start
+            if started_tracemalloc:
+                tracemalloc.stop()
+            _current.reset(token)
+
+    def add_stage(self, name: str, wall: float, cpu: float, peak: int = 0) -> None:
+        """
+        Acumula uma medição de estágio.
+
+        Args:
+            name: Nome do estágio
+            wall: Tempo de relógio em segundos
+            cpu: Tempo de CPU em segundos
+            peak: Pico de memória em bytes (0 se não medido)
+        """
+        with self._lock:
+            stats = self.stages.get(name)
+            if stats is None:
+                stats = self.stages[name] = _StageStats()
+            stats.add(wall, cpu, peak=peak)
+
+    def start_pool(self, workers: int) -> int:
+        """
+        Registra o início de uma execução do pipeline de arquivos.
+
+        Args:
+            workers: Número de workers da execução
+
+        Returns:
+            int: Identificador da execução, passado a record_file()
+        """
+        with self._lock:
+            self.pools.append({'workers': workers, 'spans': {}})
+            return len(self.pools) - 1
+
+    def record_file(self, path: str, wall: float, cpu: float, n_bytes: int,
+                    stages: dict = None, worker: int = None, start: float = None,
+                    pool: int = None) -> None:
+        """
+        Registra a análise de um arquivo.
+
+        Args:
+            path: Caminho do arquivo
+            wall: Tempo de relógio da análise em segundos
+            cpu: Tempo de CPU da análise em segundos
+            n_bytes: Tamanho do arquivo em bytes
+            stages: Tempos por estágio medidos durante a análise {nome: [wall, cpu]}
+            worker: Identificador do worker que analisou o arquivo (pid)
+            start: Início da análise (time.time())
+            pool: Execução retornada por start_pool(); com worker e start,
+                  acumula a ocupação do worker
+        """
+        self.files.append((path, wall, cpu, n_bytes))
+        for name, (stage_wall, stage_cpu) in (stages or {}).items():
+            self.add_stage(name, stage_wall, stage_cpu)
+        if pool is not None and worker is not None and start is not None:
+            with self._lock:
+                span = self.pools[pool]['spans'].get(worker)
+                if span is None:
+                    self.pools[pool]['spans'][worker] = [1, wall, start, start + wall]
+                else:
+                    span[0] += 1
+                    span[1] += wall
+                    span[2] = min(span[2], start)
+                    span[3] = max(span[3], start + wall)
+
+    def record_cache(self, cache: str, hit: bool) -> None:
+        """
+        Registra um acerto ou falha de cache.
+
+        Args:
+            cache: Nome do cache
+            hit: True para acerto, False para falha
+        """
+        with self._lock:
+            counters = self.caches.setdefault(cache, [0, 0])
+            counters[0 if hit else 1] += 1
+
+    def slowest_files(self, n: int = 20) -> list:
+        """
+        Retorna os arquivos com maior tempo de análise.
+
+        Args:
+            n: Número de arquivos
+
+        Returns:
+            list: Dicionários com path, wall_seconds, cpu_seconds e bytes
+        """
+        ranked = sorted(self.files, key=lambda item: item[1], reverse=True)[:n]
+        return [
+            {'path': path, 'wall_seconds': round(wall, 6), 'cpu_seconds': round(cpu, 6), 'bytes': n_bytes}
+            for path, wall, cpu, n_bytes in ranked
+        ]
+
+    def worker_utilization(self) -> list:
+        """
+        Resume a ocupação dos workers em cada execução do pipeline de arquivos.
+
+        Returns:
+            list: Por execução, {'workers', 'arquivos', 'duracao_seconds',
+                  'utilizacao' (tempo ocupado / (workers * duração)),
+                  'cauda_seconds' (tempo entre o primeiro worker ficar ocioso
+                  e o fim da execução) e 'por_worker' ([{'arquivos',
+                  'ocupado_seconds', 'utilizacao'}])}
+        """
+        summary = []
+        for pool in self.pools:
+            spans = list(pool['spans'].values())
+            if not spans:
+                continue
+            first = min(span[2] for span in spans)
+            last = max(span[3] for span in spans)
+            duration = last - first
+            # Workers que não receberam arquivos ficaram ociosos desde o início
+            idle_from = first if len(spans) < pool['workers'] else min(span[3] for span in spans)
+            summary.append({
+                'workers': pool['workers'],
+                'arquivos': sum(span[0] for span in spans),
+                'duracao_seconds': round(duration, 6),
+                'utilizacao': (round(sum(span[1] for span in spans) / (pool['workers'] * duration), 4)
+                               if duration > 0 else 1.0),
+                'cauda_seconds': round(last - idle_from, 6),
+                'por_worker': [{'arquivos': files, 'ocupado_seconds': round(busy, 6),
+                                'utilizacao': round(busy / duration, 4) if duration > 0 else 1.0}
+                               for files, busy, _, _ in sorted(spans, key=lambda span: -span[1])],
+            })
+        return summary
+
+    def latency_quantiles(self) -> dict:
+        """
+        Calcula os quantis do tempo de análise por arquivo (latência de cauda).
+
+        Returns:
+            dict: {'p50', 'p90', 'p99', 'max'} em segundos; vazio sem arquivos
+        """
+        if not self.files:
+            return {}
+        walls = np.fromiter((f[1] for f in self.files), dtype=np.float64, count=len(self.files))
+        p50, p90, p99 = np.percentile(walls, (50, 90, 99)).tolist()
+        return {'p50': round(p50, 6), 'p90': round(p90, 6), 'p99': round(p99, 6),
+                'max': round(float(walls.max()), 6)}
+
+    def to_dict(self, include_files: bool = True) -> dict:
+        """
+        Converte o perfil em um dicionário serializável em JSON.
+
+        Args:
+            include_files: Se True, inclui a lista completa de arquivos
+
+        Returns:
+            dict: Perfil da execução
+        """
+        ordered = sorted(self.stages, key=lambda s: (PIPELINE_STAGES.index(s)
+                                                     if s in PIPELINE_STAGES else len(PIPELINE_STAGES), s))
+        profile = {
+            'name': self.name,
+            'started_at': self.started_at,
+            'wall_seconds': round(self._wall_total, 6),
+            'stages': {name: self.stages[name].to_dict() for name in ordered},
+            'files': {
+                'count': len(self.files),
+                'total_bytes': sum(f[3] for f in self.files),
+                'wall_seconds': round(sum(f[1] for f in self.files), 6),
+                'cpu_seconds': round(sum(f[2] for f in self.files), 6),
+            },
+            'latencies': self.latency_quantiles(),
+            'workers': self.worker_utilization(),
+            'slowest_files': self.slowest_files(20),
+            'caches': {
+                cache: {
+                    'hits': hits,
+                    'misses': misses,
+                    'hit_rate': hits / (hits + misses) if hits + misses else 0.0,
+                }
+                for cache, (hits, misses) in self.caches.items()
+            },
+        }
+        if include_files:
+            profile['file_timings'] = [
+                {'path': path, 'wall_seconds': round(wall, 6), 'cpu_seconds': round(cpu, 6), 'bytes': n_bytes}
+                for path, wall, cpu, n_bytes in self.files
+            ]
+        return profile
+
+    def save_json(self, path: str, include_files: bool = True) -> str:
+        """
+        Grava o perfil em JSON.
+
+        Args:
+            path: Caminho do arquivo de saída
+            include_files: Se True, inclui a lista completa de arquivos
+
+        Returns:
+            str: Caminho do arquivo gravado
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as handler:
+            json.dump(self.to_dict(include_files=include_files), handler, indent=2, ensure_ascii=False)
+        return path
+
+    def format_report(self, n: int = 20) -> str:
+        """
+        Gera um relatório em texto com os estágios e os arquivos mais lentos.
+
+        Args:
+            n: Número de arquivos no ranking
+
+        Returns:
+            str: Relatório para exibição no terminal
+        """
+        data = self.to_dict(include_files=False)
+        lines = [f"Perfil de execução: {self.name or '-'} ({data['wall_seconds']:.2f}s)", '',
+                 f"{'Estágio':<10} {'Chamadas':>9} {'Wall (s)':>10} {'CPU (s)':>10} {'Pico (MB)':>10}"]
+        for name, stats in data['stages'].items():
+            lines.append(f"{name:<10} {stats['calls']:>9} {stats['wall_seconds']:>10.3f} "
+                         f"{stats['cpu_seconds']:>10.3f} {stats['peak_memory_bytes'] / 2**20:>10.1f}")
+        files = data['files']
+        lines += ['', f"Arquivos: {files['count']} ({files['total_bytes'] / 2**20:.1f} MB, "
+                      f"{files['wall_seconds']:.2f}s de análise)"]
+        if data['latencies']:
+            lines.append("Latência por arquivo: " + ", ".join(
+                f"{name} {seconds:.3f}s" for name, seconds in data['latencies'].items()))
+        for pool in data['workers']:
+            lines.append(f"Pool de {pool['workers']} workers: {pool['arquivos']} arquivos em "
+                         f"{pool['duracao_seconds']:.2f}s, utilização {pool['utilizacao']:.0%}, "
+                         f"cauda {pool['cauda_seconds']:.2f}s")
+        for cache, stats in data['caches'].items():
+            lines.append(f"Cache {cache}: {stats['hits']} acertos, {stats['misses']} falhas "
+                         f"({stats['hit_rate']:.0%})")
+        lines += ['', f"Top {n} arquivos mais lentos:"]
+        for item in self.slowest_files(n):
+            lines.append(f"  {item['wall_seconds']:>8.3f}s {item['bytes']:>10} B  {item['path']}")
+        return "\n".join(lines)
+
+
+def current():
+    """
+    Retorna o coletor ativo no contexto atual.
+
+    Returns:
+        RunProfile | None: Perfil ativo, ou None se a instrumentação estiver desligada
+    """
+    return _current.get()
+
+
+@contextmanager
+def stage(name: str):
+    """
+    Mede um estágio do pipeline no coletor ativo.
+
+    Sem perfil ativo o custo é apenas uma consulta a uma ContextVar.
+    Os tempos de estágios aninhados são inclusivos.
+
+    Args:
+        name: Nome do estágio (ver PIPELINE_STAGES)
+    """
+    collector = _current.get()
+    if collector is None:
+        yield
+        return
+
+    measure_memory = collector.trace_memory and tracemalloc.is_tracing()
+    if measure_memory:
+        tracemalloc.reset_peak()
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    try:
+        yield
+    finally:
+        wall = time.perf_counter() - wall_start
+        cpu = time.process_time() - cpu_start
+        peak = tracemalloc.get_traced_memory()[1] if measure_memory else 0
+        collector.add_stage(name, wall, cpu, peak)
+
+
+def timed_iter(iterable, name: str):
+    """
+    Mede como um estágio o tempo gasto para produzir cada item de um iterável
+    preguiçoso (ex: a descoberta de arquivos intercalada com a análise).
+
+    Args:
+        iterable: Iterável a ser consumido
+        name: Nome do estágio
+
+    Yields:
+        Os itens do iterável, inalterados
+    """
+    iterator = iter(iterable)
+    while True:
+        with stage(name):
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        yield item
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    """
+    Registra um acerto ou falha de cache no perfil ativo, se houver.
+
+    Args:
+        cache: Nome do cache
+        hit: True para acerto, False para falha
+    """
+    collector = _current.get()
+    if isinstance(collector, RunProfile):
+        collector.record_cache(cache, hit)
+
+
+def start_pool(workers: int):
+    """
+    Registra no perfil ativo o início de uma execução do pipeline de arquivos.
+
+    Args:
+        workers: Número de workers da execução
+
+    Returns:
+        int | None: Identificador da execução, ou None sem perfil ativo
+    """
+    collector = _current.get()
+    if isinstance(collector, RunProfile):
+        return collector.start_pool(workers)
+    return None
+
+
+def profiled_call(func, path: str):
+    """
+    Executa func(path) medindo o arquivo e seus estágios internos.
+
+    Função de nível de módulo para poder ser enviada a processos workers
+    (via functools.partial). Os tempos voltam junto com o resultado e são
+    registrados no RunProfile do processo principal por record_timing().
+
+    Args:
+        func: Função de análise de um arquivo
+        path: Caminho do arquivo ou sharedblobs.BlobRef
+
+    Returns:
+        tuple: (resultado de func, (caminho, wall, cpu, bytes, estágios, pid do worker, início))
+    """
+    collector = _FileCollector()
+    token = _current.set(collector)
+    started = time.time()
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    try:
+        result = func(path)
+    finally:
+        wall = time.perf_counter() - wall_start
+        cpu = time.process_time() - cpu_start
+        _current.reset(token)
+    path, n_bytes = sharedblobs.item_size(path)
+    return result, (path, wall, cpu, n_bytes, collector.stages, os.getpid(), started)
+
+
+def record_timing(timing: tuple, pool: int = None) -> None:
+    """
+    Registra no perfil ativo a medição devolvida por profiled_call().
+
+    Args:
+        timing: Tupla (path, wall, cpu, bytes, estágios, worker, início)
+        pool: Execução retornada por start_pool(), para a ocupação dos workers
+    """
+    collector = _current.get()
+    if isinstance(collector, RunProfile):
+        path, wall, cpu, n_bytes, stages, worker, started = timing
+        collector.record_file(path, wall, cpu, n_bytes, stages, worker, started, pool)
@@ -0,0 +1,322 @@
+import datetime
+import hashlib
+import os
+import re
+import subprocess
+
+import numpy as np
+
+import profiling
+import timeline
+
+# Separador de campos do `git for-each-ref`
+_SEP = '\x1f'
+
+# Campos lidos de cada tag: nome, objeto, commit apontado (tags anotadas),
+# data do commit apontado (anotadas) e data do commit (tags leves)
+_TAG_FORMAT = _SEP.join([
+    '%(refname:strip=2)', '%(objectname)', '%(*objectname)',
+    '%(*committerdate:unix)', '%(committerdate:unix)',
+])
+
+# Versões no formato semântico, com prefixo opcional ('v1.2.3', 'release-4.0',
+# 'django-5.0rc1'); componentes ausentes valem 0
+_SEMVER_PATTERN = re.compile(
+    r'^(?:[A-Za-z][\w.]*?[-_/]?)?v?(\d+)(?:\.(\d+))?(?:\.(\d+))?(?:\.\d+)*'
+    r'(?:[-._]?((?:a|b|c|rc|alpha|beta|pre|preview|dev)[-.\w]*?))?(?:\+[-.\w]*)?$', re.IGNORECASE)
+
+
+def _git(repo_path: str, *args) -> str:
+    try:
+        proc = subprocess.run(['git', '-C', repo_path, *args], stdout=subprocess.PIPE,
+                              stderr=subprocess.PIPE, text=True, check=True)
+    except subprocess.CalledProcessError as e:
+        raise RuntimeError(f"Erro ao executar Git: {e.stderr.strip()}") from e
+    return proc.stdout
+
+
+def parse_semver(tag: str) -> tuple:
+    """
+    Interpreta o nome de uma tag como versão semântica.
+
+    Args:
+        tag: Nome da tag (ex: 'v1.2.3', '4.0', 'django-5.0rc1')
+
+    Returns:
+        tuple: (major, minor, patch, pre_release), com pre_release '' para
+               versões estáveis, ou None se o nome não for uma versão
+    """
+    match = _SEMVER_PATTERN.match(tag)
+    if not match:
+        return None
+    major, minor, patch, pre_release = match.groups()
+    return int(major), int(minor or 0), int(patch or 0), (pre_release or '').lower()
+
+
+class ReleaseIndex:
+    """
+    Índice das tags (releases) de um repositório, em ordem cronológica.
+
+    As tags anotadas são resolvidas para o commit apontado. A ordem é a da
+    data de commit, com desempate pela versão semântica e pelo nome; as
+    consultas por nome e por posição ("N releases antes/depois") são O(1).
+
+    Attributes:
+        names (list): Nomes das tags, da mais antiga para a mais recente
+        commits (np.ndarray): Hash do commit de cada tag (S40)
+        timestamps (np.ndarray): Data de commit de cada tag (int64)
+        prerelease (np.ndarray): True para versões de pré-lançamento (rc, beta, ...)
+        fingerprint (str): Resumo das referências em refs/tags usado para validar o cache
+    """
+
+    def __init__(self, names: list, commits: np.ndarray, timestamps: np.ndarray,
+                 prerelease: np.ndarray, fingerprint: str = ''):
+        self.names = list(names)
+        self.commits = commits
+        self.timestamps = timestamps
+        self.prerelease = prerelease
+        self.fingerprint = fingerprint
+        self._positions = {name: position for position, name in enumerate(self.names)}
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._positions
+
+    @classmethod
+    def from_git(cls, repo_path: str) -> 'ReleaseIndex':
+        """
+        Gera o índice com uma única chamada a `git for-each-ref refs/tags`.
+
+        Args:
+            repo_path: Caminho do repositório
+
+        Returns:
+            ReleaseIndex: Índice das tags que apontam (direta ou indiretamente) para commits
+
+        Raises:
+            RuntimeError: Se o comando Git falhar
+        """
+        output = _git(repo_path, 'for-each-ref', f'--format={_TAG_FORMAT}', 'refs/tags')
+        entries = []
+        for line in output.splitlines():
+            name, target, peeled, peeled_date, commit_date = line.split(_SEP)
+            commit, date = (peeled, peeled_date) if peeled else (target, commit_date)
+            if not date:
+                # Tag de árvore ou blob, ou tag anotada de outra tag
+                continue
+            version = parse_semver(name)
+            entries.append((int(date), version[:3] if version else (), name, commit,
+                            bool(version and version[3])))
+        entries.sort()
+        return cls([entry[2] for entry in entries],
+                   np.array([entry[3] for entry in entries], dtype='S40'),
+                   np.array([entry[0] for entry in entries], dtype=np.int64),
+                   np.array([entry[4] for entry in entries], dtype=bool),
+                   tags_fingerprint(repo_path))
+
+    def position(self, name: str) -> int:
+        """
+        Retorna a posição de uma tag na ordem cronológica.
+
+        Args:
+            name: Nome da tag
+
+        Returns:
+            int: Posição (0 = release mais antiga)
+
+        Raises:
+            KeyError: Se a tag não existir
+        """
+        try:
+            return self._positions[name]
+        except KeyError:
+            raise KeyError(f"Release não encontrada: {name}") from None
+
+    def commit(self, name: str) -> str:
+        """
+        Retorna o hash do commit de uma tag.
+
+        Args:
+            name: Nome da tag
+
+        Returns:
+            str: Hash do commit
+        """
+        return self.commits[self.position(name)].decode()
+
+    def date(self, name: str) -> datetime.datetime:
+        """
+        Retorna a data de commit de uma tag (horário local).
+
+        Args:
+            name: Nome da tag
+
+        Returns:
+            datetime.datetime: Data do commit
+        """
+        return datetime.datetime.fromtimestamp(int(self.timestamps[self.position(name)]))
+
+    def shift(self, name: str, offset: int, stable_only: bool = False) -> str:
+        """
+        Retorna a release N posições antes (offset < 0) ou depois (offset > 0).
+
+        Args:
+            name: Tag de referência
+            offset: Número de releases para trás (negativo) ou para frente (positivo)
+            stable_only: Ignora as versões de pré-lançamento na contagem
+
+        Returns:
+            str: Nome da tag, limitado à primeira/última release do índice
+        """
+        position = self.position(name)
+        if not stable_only:
+            return self.names[min(max(position + offset, 0), len(self.names) - 1)]
+        stable = np.flatnonzero(~self.prerelease)
+        if not len(stable) or offset == 0:
+            return name
+        # Número de releases estáveis antes da referência
+        rank = int(np.searchsorted(stable, position, side='left'))
+        if self.prerelease[position] and offset > 0:
+            # A primeira estável depois de uma pré-release já conta como +1
+            offset -= 1
+        rank = min(max(rank + offset, 0), len(stable) - 1)
+        return self.names[stable[rank]]
+
+    def latest_before(self, date) -> str:
+        """
+        Retorna a última release com data de commit anterior ou igual à data.
+
+        Args:
+            date: Data (ver timeline.to_timestamp)
+
+        Returns:
+            str: Nome da tag
+
+        Raises:
+            ValueError: Se não houver release até a data
+        """
+        position = np.searchsorted(self.timestamps, timeline.to_timestamp(date), side='right') - 1
+        if position < 0:
+            raise ValueError(f"Nenhuma release encontrada até {date}")
+        return self.names[position]
+
+    def markers(self, first: str, second: str, span: int = 1, stable_only: bool = False) -> list:
+        """
+        Monta os quatro marcos da análise a partir de duas releases.
+
+        Args:
+            first: Release do marco temporal 1
+            second: Release do marco temporal 2
+            span: Tamanho da janela, em releases, antes de `first` e depois de `second`
+            stable_only: Ignora as versões de pré-lançamento na janela
+
+        Returns:
+            list: Nomes das tags [first - span, first, second, second + span]
+        """
+        return [self.shift(first, -span, stable_only), first, second,
+                self.shift(second, span, stable_only)]
+
+    def save(self, path: str) -> str:
+        """
+        Grava o índice em um arquivo .npz.
+
+        Args:
+            path: Caminho do arquivo
+
+        Returns:
+            str: Caminho do arquivo gravado
+        """
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary = f"{path}.tmp.npz"
+        np.savez(temporary, names=np.array(self.names, dtype=str), commits=self.commits,
+                 timestamps=self.timestamps, prerelease=self.prerelease,
+                 fingerprint=self.fingerprint)
+        os.replace(temporary, path)
+        return path
+
+    @classmethod
+    def load(cls, path: str) -> 'ReleaseIndex':
+        """
+        Carrega um índice gravado por save().
+
+        Args:
+            path: Caminho do arquivo
+
+        Returns:
+            ReleaseIndex: Índice carregado
+        """
+        with np.load(path) as data:
+            return cls(data['names'].tolist(), data['commits'], data['timestamps'],
+                       data['prerelease'], str(data['fingerprint']))
+
+
+def tags_fingerprint(repo_path: str) -> str:
+    """
+    Resume as referências em refs/tags (nomes e objetos), sem ler os objetos.
+
+    Args:
+        repo_path: Caminho do repositório
+
+    Returns:
+        str: SHA-1 da listagem das tags
+    """
+    listing = _git(repo_path, 'for-each-ref', '--format=%(objectname) %(refname)', 'refs/tags')
+    return hashlib.sha1(listing.encode()).hexdigest()
+
+
+def releases_path(repo_path: str) -> str:
+    """
+    Retorna o caminho do índice de releases (junto aos índices de timeline.py).
+
+    Args:
+        repo_path: Caminho do repositório
+
+    Returns:
+        str: <git-common-dir>/code_insights/releases.npz
+    """
+    return os.path.join(timeline.index_dir(repo_path), 'releases.npz')
+
+
+def update_releases(repo_path: str) -> ReleaseIndex:
+    """
+    Regera e grava o índice de releases (ex: após um fetch).
+
+    Args:
+        repo_path: Caminho do repositório
+
+    Returns:
+        ReleaseIndex: Índice atualizado
+    """
+    index = ReleaseIndex.from_git(repo_path)
+    index.save(releases_path(repo_path))
+    return index
+
+
+def load_releases(repo_path: str) -> ReleaseIndex:
+    """
+    Carrega o índice de releases, regerando-o se as tags tiverem mudado.
+
+    Args:
+        repo_path: Caminho do repositório
+
+    Returns:
+        ReleaseIndex: Índice das releases
+
+    Raises:
+        RuntimeError: Se o comando Git falhar
+
+    Note:
+        A validade é conferida pelo resumo das referências (tags_fingerprint),
+        que não lê os objetos das tags; acertos e falhas são registrados no
+        perfil ativo (cache 'releases').
+    """
+    path = releases_path(repo_path)
+    if os.path.exists(path):
+        index = ReleaseIndex.load(path)
+        if index.fingerprint == tags_fingerprint(repo_path):
+            profiling.record_cache('releases', True)
+            return index
+    profiling.record_cache('releases', False)
+    return update_releases(repo_path)
@@ -0,0 +1,352 @@
+import base64
+import datetime
+import glob
+import hashlib
+import html
+import io
+import json
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+import pyarrow.parquet as pq
+from matplotlib.figure import Figure
+
+import diffs
+import evolution
+import store
+
+try:
+    import pdfkit
+except ImportError:  # PDF é opcional: sem pdfkit, apenas HTML
+    pdfkit = None
+
+# Versão do layout dos relatórios; faz parte do hash das entradas, de modo que
+# uma mudança no layout regera todos os relatórios
+REPORT_VERSION = 1
+
+# Arquivo de manifesto, no diretório dos relatórios
+MANIFEST_FILE = 'manifest.json'
+
+# Séries plotadas no relatório (ver evolution.EVOLUTION_METRICS)
+REPORT_METRICS = ('mean_maintainability_index', 'mean_complexity', 'total_sloc', 'avg_wmc',
+                  'avg_cbo', 'issues_na_janela')
+
+# Resumo da revisão mais recente
+REPORT_SUMMARY = ('data', 'n_files', 'total_loc', 'total_sloc', 'mean_maintainability_index',
+                  'mean_complexity', 'p90_average_complexity', 'total_classes', 'avg_wmc',
+                  'avg_cbo', 'avg_lcom', 'issues_acumuladas')
+
+# Métrica das maiores regressões de cada tabela comparada (ver diffs.rank_changes)
+REPORT_DIFF_METRICS = {'arquivos': 'average_complexity', 'classes': 'WMC'}
+
+_STYLE = """
+body { font-family: sans-serif; margin: 2em; color: #222; }
+h1 { border-bottom: 2px solid #444; }
+table { border-collapse: collapse; margin: 1em 0; font-size: 0.85em; }
+th, td { border: 1px solid #ccc; padding: 4px 8px; text-align: right; }
+th { background: #f0f0f0; }
+td:first-child, th:first-child { text-align: left; }
+img { max-width: 100%; page-break-inside: avoid; }
+.nota { color: #666; font-size: 0.85em; }
+"""
+
+
+def pdf_available() -> bool:
+    """
+    Verifica se é possível gerar PDF (pdfkit instalado e wkhtmltopdf no PATH).
+
+    Returns:
+        bool: True se o PDF puder ser gerado
+    """
+    return pdfkit is not None and shutil.which('wkhtmltopdf') is not None
+
+
+def report_inputs(output_dir: str, project: str) -> list:
+    """
+    Lista os arquivos gravados de um projeto que entram no relatório.
+
+    Args:
+        output_dir: Diretório de saída de exportar_dados_csv()
+        project: Nome do projeto
+
+    Returns:
+        list: Caminhos das tabelas do ResultStore (<output_dir>/<projeto>/...) e
+              dos CSVs <output_dir>/<projeto>_*, em ordem alfabética
+    """
+    project_dir = os.path.join(output_dir, project)
+    paths = glob.glob(os.path.join(glob.escape(project_dir), '**', '*.parquet'), recursive=True)
+    paths += glob.glob(f"{glob.escape(project_dir)}_*.csv")
+    return sorted(paths)
+
+
+def _file_digest(path: str, known: dict) -> list:
+    # [tamanho, mtime_ns, sha256]; reaproveita o hash do manifesto se o arquivo não mudou
+    info = os.stat(path)
+    previous = known.get(path)
+    if previous and previous[:2] == [info.st_size, info.st_mtime_ns]:
+        return previous
+    digest = hashlib.sha256()
+    with open(path, 'rb') as handler:
+        for block in iter(lambda: handler.read(1 << 20), b''):
+            digest.update(block)
+    return [info.st_size, info.st_mtime_ns, digest.hexdigest()]
+
+
+def inputs_hash(paths: list, known: dict = None, root: str = None) -> tuple:
+    """
+    Calcula o hash do conteúdo das entradas de um relatório.
+
+    Args:
+        paths: Arquivos de entrada (ver report_inputs())
+        known: {caminho: [tamanho, mtime_ns, sha256]} do manifesto anterior
+        root: Diretório base; o hash combinado usa os caminhos relativos a ele,
+              de modo que não depende de onde os resultados estão no disco
+
+    Returns:
+        tuple: (hash combinado, {caminho: [tamanho, mtime_ns, sha256]})
+
+    Note:
+        Só os arquivos com tamanho ou data de modificação diferentes dos do
+        manifesto são lidos; o hash combinado inclui REPORT_VERSION.
+    """
+    files = {path: _file_digest(path, known or {}) for path in paths}
+    combined = hashlib.sha256(f"v{REPORT_VERSION}".encode())
+    for path in sorted(files):
+        name = os.path.relpath(path, root) if root else path
+        combined.update(f"\0{name}\0{files[path][2]}".encode())
+    return combined.hexdigest(), files
+
+
+def load_manifest(report_dir: str) -> dict:
+    """
+    Carrega o manifesto dos relatórios.
+
+    Args:
+        report_dir: Diretório dos relatórios
+
+    Returns:
+        dict: {projeto: {'inputs_hash', 'files', 'html', 'pdf', 'generated_at'}}
+              ({} se não houver manifesto)
+    """
+    try:
+        with open(os.path.join(report_dir, MANIFEST_FILE), encoding='utf-8') as handler:
+            return json.load(handler)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(report_dir: str, manifest: dict) -> str:
+    """
+    Grava o manifesto dos relatórios (escrita atômica).
+
+    Args:
+        report_dir: Diretório dos relatórios
+        manifest: Manifesto (ver load_manifest())
+
+    Returns:
+        str: Caminho do manifesto
+    """
+    os.makedirs(report_dir, exist_ok=True)
+    path = os.path.join(report_dir, MANIFEST_FILE)
+    with open(f"{path}.tmp", 'w', encoding='utf-8') as handler:
+        json.dump(manifest, handler, indent=2, ensure_ascii=False)
+    os.replace(f"{path}.tmp", path)
+    return path
+
+
+def report_paths(report_dir: str, project: str) -> tuple:
+    """
+    Retorna os caminhos do relatório HTML e PDF de um projeto.
+
+    Args:
+        report_dir: Diretório dos relatórios
+        project: Nome do projeto (ex: 'django/django')
+
+    Returns:
+        tuple: (<report_dir>/<owner>__<repo>.html, <report_dir>/<owner>__<repo>.pdf)
+    """
+    base = os.path.join(report_dir, project.replace('/', '__'))
+    return f"{base}.html", f"{base}.pdf"
+
+
+def _chart(series, metric: str, max_points: int = 300) -> str:
+    # Gráfico PNG embutido (base64); Figure direto, sem o estado global do pyplot
+    reduced = evolution.downsample(series, metric, max_points=max_points)
+    figure = Figure(figsize=(9, 2.6))
+    axes = figure.subplots()
+    axes.plot(reduced['data'], reduced[metric], marker='o', markersize=3)
+    axes.set_title(evolution.EVOLUTION_METRICS.get(metric, metric))
+    axes.grid(alpha=0.3)
+    figure.autofmt_xdate()
+    figure.tight_layout()
+    buffer = io.BytesIO()
+    figure.savefig(buffer, format='png', dpi=90)
+    return f'<img alt="{html.escape(metric)}" src="data:image/png;base64,{base64.b64encode(buffer.getvalue()).decode()}">'
+
+
+def _format(value) -> str:
+    if isinstance(value, float):
+        return f"{value:,.2f}"
+    return html.escape(str(value))
+
+
+def render_report(output_dir: str, project: str, repo_path: str = None) -> str:
+    """
+    Monta o HTML do relatório de um projeto a partir dos resultados gravados.
+
+    Args:
+        output_dir: Diretório de saída de exportar_dados_csv()
+        project: Nome do projeto
+        repo_path: Clone do projeto, usado apenas para as datas de commit
+
+    Returns:
+        str: Documento HTML completo, com os gráficos embutidos (sem recursos externos)
+
+    Note:
+        O relatório traz as estatísticas da revisão mais recente, a evolução
+        das métricas (evolution.load_evolution), a última comparação gravada
+        por exportar_comparacao() e as funções mais complexas; nada é analisado.
+    """
+    series = evolution.load_evolution(output_dir, project, repo_path)
+    title = html.escape(project)
+    parts = [f"<!DOCTYPE html><html><head><meta charset='utf-8'><title>code_insights - {title}</title>",
+             f"<style>{_STYLE}</style></head><body>",
+             f"<h1>Relatório de Código - {title}</h1>",
+             f"<p class='nota'>Gerado em {datetime.datetime.now():%d/%m/%Y %H:%M} a partir de "
+             f"{len(series)} revisão(ões) exportada(s).</p>"]
+    if series.empty:
+        parts.append("<p>Nenhum resultado gravado para o projeto.</p></body></html>")
+        return ''.join(parts)
+
+    latest = series.iloc[-1]
+    parts.append(f"<h2>Revisão mais recente: {html.escape(latest['revisao'][:8])}</h2>")
+    rows = ''.join(f"<tr><th>{html.escape(evolution.EVOLUTION_METRICS.get(name, name))}</th>"
+                   f"<td>{_format(latest[name])}</td></tr>"
+                   for name in REPORT_SUMMARY if name in latest and not pd.isna(latest[name]))
+    parts.append(f"<table>{rows}</table>")
+
+    dated = series.dropna(subset=['data'])
+    if len(dated) > 1:
+        parts.append("<h2>Evolução</h2>")
+        parts.extend(_chart(dated, metric) for metric in REPORT_METRICS
+                     if metric in dated.columns and dated[metric].notna().any())
+    columns = ['revisao', 'data', *[metric for metric in REPORT_METRICS if metric in series.columns]]
+    table = series[columns].assign(revisao=series['revisao'].str[:8])
+    parts.append("<h2>Revisões</h2>")
+    parts.append(table.to_html(index=False, float_format=lambda value: f"{value:,.2f}", na_rep='-'))
+
+    # Comparação e funções da revisão mais recente com tabelas no ResultStore
+    results = store.ResultStore(output_dir)
+    revision = next((revision for revision in reversed(series['revisao'].tolist())
+                     if os.path.isdir(os.path.join(output_dir, project, revision))), None)
+    if revision:
+        for kind, metric in REPORT_DIFF_METRICS.items():
+            candidates = glob.glob(os.path.join(glob.escape(os.path.join(output_dir, project, revision)),
+                                                f"diff_{kind}_*.parquet"))
+            if not candidates:
+                continue
+            path = max(candidates, key=os.path.getmtime)
+            diff = pq.read_table(path)
+            base = os.path.basename(path)[len(f"diff_{kind}_"):-len('.parquet')]
+            counts = diffs.summarize_diff(diff)
+            parts.append(f"<h2>Comparação {html.escape(base)} → {html.escape(revision[:8])} ({kind})</h2>")
+            parts.append("<p>" + ', '.join(f"{count} {status}" for status, count in counts.items()) + "</p>")
+            if f"{metric}{diffs.DELTA_SUFFIX}" in diff.column_names:
+                ranked = diffs.rank_changes(diff, metric, n=10).select(
+                    [*diffs.DIFF_KEYS[kind], f"{metric}{diffs.BEFORE_SUFFIX}",
+                     f"{metric}{diffs.AFTER_SUFFIX}", f"{metric}{diffs.DELTA_SUFFIX}"])
+                parts.append(f"<h3>Maiores regressões ({html.escape(metric)})</h3>")
+                parts.append(ranked.to_pandas().to_html(index=False, float_format=lambda value: f"{value:,.2f}"))
+        if results.has(project, revision, 'funcoes'):
+            top = results.top_functions(project, revision, n=15)
+            parts.append("<h2>Funções mais complexas</h2>")
+            parts.append(top.select(['arquivo', 'classe', 'funcao', 'loc', 'complexity']).to_pandas().to_html(
+                index=False, na_rep='-'))
+    parts.append("</body></html>")
+    return ''.join(parts)
+
+
+def build_report(output_dir: str, project: str, report_dir: str, repo_path: str = None,
+                 pdf: bool = True) -> dict:
+    """
+    Gera o relatório HTML (e o PDF, se possível) de um projeto.
+
+    Args:
+        output_dir: Diretório de saída de exportar_dados_csv()
+        project: Nome do projeto
+        report_dir: Diretório dos relatórios
+        repo_path: Clone do projeto, usado apenas para as datas de commit
+        pdf: Gera também o PDF quando pdf_available()
+
+    Returns:
+        dict: {'html': caminho, 'pdf': caminho ou None}
+
+    Raises:
+        OSError: Se wkhtmltopdf falhar ao converter o HTML
+    """
+    html_path, pdf_path = report_paths(report_dir, project)
+    os.makedirs(report_dir, exist_ok=True)
+    with open(html_path, 'w', encoding='utf-8') as handler:
+        handler.write(render_report(output_dir, project, repo_path))
+    if pdf and pdf_available():
+        pdfkit.from_file(html_path, pdf_path, options={'encoding': 'UTF-8', 'quiet': ''})
+    else:
+        pdf_path = None
+    return {'html': html_path, 'pdf': pdf_path}
+
+
+def generate_reports(output_dir: str, projects: dict, report_dir: str = 'reports', workers: int = None,
+                     pdf: bool = True, force: bool = False) -> dict:
+    """
+    Gera os relatórios de vários projetos em um pool de processos.
+
+    Args:
+        output_dir: Diretório de saída de exportar_dados_csv()
+        projects: {projeto: caminho do clone (ou None)}
+        report_dir: Diretório dos relatórios
+        workers: Número de processos (padrão: os.cpu_count())
+        pdf: Gera também o PDF quando pdf_available()
+        force: Regera mesmo os relatórios cujas entradas não mudaram
+
+    Returns:
+        dict: {projeto: {'status', 'html', 'pdf'}}, com status 'gerado',
+              'inalterado' ou 'erro' (neste caso com a mensagem em 'erro')
+
+    Note:
+        O hash das entradas (inputs_hash) é comparado com o do manifesto antes
+        de despachar o projeto: relatórios inalterados não ocupam o pool. O
+        manifesto é gravado apenas pelo processo principal.
+    """
+    manifest = load_manifest(report_dir)
+    results, pending = {}, {}
+    for project in projects:
+        previous = manifest.get(project, {})
+        digest, files = inputs_hash(report_inputs(output_dir, project), previous.get('files'),
+                                    root=output_dir)
+        html_path = previous.get('html')
+        wants_pdf = pdf and pdf_available()
+        if (not force and previous.get('inputs_hash') == digest and html_path and os.path.exists(html_path)
+                and (not wants_pdf or (previous.get('pdf') and os.path.exists(previous['pdf'])))):
+            results[project] = {'status': 'inalterado', 'html': html_path, 'pdf': previous.get('pdf')}
+        else:
+            pending[project] = (digest, files)
+
+    if pending:
+        with ProcessPoolExecutor(max_workers=min(workers or os.cpu_count() or 1, len(pending))) as executor:
+            futures = {project: executor.submit(build_report, output_dir, project, report_dir,
+                                                projects[project], pdf)
+                       for project in pending}
+            for project, future in futures.items():
+                try:
+                    paths = future.result()
+                except Exception as e:
+                    results[project] = {'status': 'erro', 'html': None, 'pdf': None, 'erro': str(e)}
+                    continue
+                digest, files = pending[project]
+                manifest[project] = {'inputs_hash': digest, 'files': files,
+                                     'generated_at': datetime.datetime.now().isoformat(), **paths}
+                results[project] = {'status': 'gerado', **paths}
+        save_manifest(report_dir, manifest)
+    return {project: results[project] for project in projects}
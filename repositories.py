@@ -0,0 +1,186 @@
+import json
+import os
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Union
+
+import profiling
+import releases
+import timeline
+import utils
+
+# Situações possíveis de um repositório após RepositoryManager.sync()
+SYNC_STATUSES = ('clonado', 'atualizado', 'recente', 'erro')
+
+# Arquivo (em timeline.index_dir) com a data do último fetch
+FETCH_STATE_FILE = 'fetch.json'
+
+
+class RepositoryManager:
+    """
+    Clona ou atualiza (git fetch) os repositórios configurados em paralelo.
+
+    Repositórios ausentes são clonados com utils.clone_repo(); os já clonados
+    recebem um fetch em vez de um novo clone. Após cada clone ou fetch, o
+    índice de commits (timeline.CommitTimeline) dos branches e o índice de
+    releases (releases.ReleaseIndex) são regerados.
+
+    Attributes:
+        max_workers (int): Número máximo de clones/fetches simultâneos
+        ttl (float): Segundos durante os quais um fetch recente é reaproveitado
+        partial (bool): Clona novos repositórios sem blobs (ver utils.clone_repo)
+        shallow_since: Limita o histórico de novos clones a partir desta data
+                       (ex: o marco temporal mais antigo); None clona o histórico completo
+        base_url (str): Endereço base dos repositórios
+        branches (tuple): Branches indexados após cada fetch; None usa o branch
+                          padrão do remote
+    """
+
+    def __init__(self, max_workers: int = 4, ttl: float = 3600, partial: bool = False,
+                 base_url: str = "https://github.com", branches: tuple = None,
+                 shallow_since: Union[str, datetime] = None):
+        """
+        Args:
+            max_workers: Número máximo de clones/fetches simultâneos
+            ttl: Segundos durante os quais um fetch recente é reaproveitado (0 = sempre busca)
+            partial: Clona novos repositórios sem blobs
+            base_url: Endereço base dos repositórios
+            branches: Branches indexados após cada fetch (padrão: branch padrão do remote)
+            shallow_since: Limita o histórico de novos clones a partir desta data
+        """
+        self.max_workers = max_workers
+        self.ttl = ttl
+        self.partial = partial
+        self.base_url = base_url
+        self.branches = branches
+        self.shallow_since = shallow_since
+
+    def repo_path(self, owner: str, name: str) -> str:
+        """
+        Retorna o caminho do clone local.
+
+        Args:
+            owner: Dono do repositório
+            name: Nome do repositório
+
+        Returns:
+            str: <CLONE_BASE_PATH>/<owner>/<name>
+        """
+        return os.path.join(utils.CLONE_BASE_PATH, owner, name)
+
+    def last_fetch(self, owner: str, name: str) -> float:
+        """
+        Retorna a data do último clone ou fetch registrado.
+
+        Args:
+            owner: Dono do repositório
+            name: Nome do repositório
+
+        Returns:
+            float: Timestamp Unix, ou None se nunca registrado
+        """
+        path = self.repo_path(owner, name)
+        if not os.path.isdir(path):
+            return None
+        try:
+            with open(os.path.join(timeline.index_dir(path), FETCH_STATE_FILE), encoding='utf-8') as handler:
+                return json.load(handler)['fetched_at']
+        except (OSError, ValueError, KeyError, RuntimeError):
+            return None
+
+    def _record_fetch(self, path: str) -> None:
+        state_path = os.path.join(timeline.index_dir(path), FETCH_STATE_FILE)
+        with open(state_path, 'w', encoding='utf-8') as handler:
+            json.dump({'fetched_at': time.time()}, handler)
+
+    def _default_branch(self, path: str) -> str:
+        result = subprocess.run(['git', '-C', path, 'symbolic-ref', '--short', 'refs/remotes/origin/HEAD'],
+                                capture_output=True, text=True)
+        if result.returncode == 0:
+            return result.stdout.strip().split('/', 1)[-1]
+        result = subprocess.run(['git', '-C', path, 'symbolic-ref', '--short', 'HEAD'],
+                                capture_output=True, text=True)
+        return result.stdout.strip() or 'master'
+
+    def _fetch(self, path: str) -> None:
+        # Os clones de análise ficam em HEAD destacado (checkout de hashes); destacar
+        # antes do fetch permite atualizar também o branch local que estava em uso
+        if subprocess.run(['git', '-C', path, 'symbolic-ref', '-q', 'HEAD'],
+                          capture_output=True).returncode == 0:
+            subprocess.run(['git', '-C', path, 'update-ref', '--no-deref', 'HEAD', 'HEAD'],
+                           capture_output=True, check=True)
+        with profiling.stage('fetch'):
+            subprocess.run(['git', '-C', path, 'fetch', '--quiet', '--tags', 'origin',
+                            '+refs/heads/*:refs/heads/*'],
+                           capture_output=True, text=True, check=True)
+
+    def update_timelines(self, owner: str, name: str) -> dict:
+        """
+        Regera os índices de commits dos branches do repositório.
+
+        Args:
+            owner: Dono do repositório
+            name: Nome do repositório
+
+        Returns:
+            dict: {branch: timeline.CommitTimeline}
+        """
+        path = self.repo_path(owner, name)
+        branches = self.branches or (self._default_branch(path),)
+        return {branch: timeline.update_timeline(path, branch) for branch in branches}
+
+    def sync_repo(self, owner: str, name: str, force: bool = False) -> str:
+        """
+        Clona o repositório ou, se já existir, faz fetch.
+
+        Args:
+            owner: Dono do repositório
+            name: Nome do repositório
+            force: Ignora o TTL e sempre faz fetch
+
+        Returns:
+            str: Uma das situações de SYNC_STATUSES
+        """
+        path = self.repo_path(owner, name)
+        try:
+            if not os.path.isdir(path):
+                if not utils.clone_repo({owner: name}, partial=self.partial,
+                                        shallow_since=self.shallow_since, base_url=self.base_url):
+                    return 'erro'
+                status = 'clonado'
+            else:
+                fetched_at = self.last_fetch(owner, name)
+                if not force and fetched_at is not None and time.time() - fetched_at < self.ttl:
+                    return 'recente'
+                self._fetch(path)
+                status = 'atualizado'
+            self._record_fetch(path)
+            self.update_timelines(owner, name)
+            releases.update_releases(path)
+            return status
+        except (subprocess.CalledProcessError, RuntimeError, OSError) as e:
+            stderr = getattr(e, 'stderr', None)
+            print(f"Erro ao atualizar {owner}/{name}: {stderr.strip() if stderr else e}")
+            return 'erro'
+
+    def sync(self, repos: dict, force: bool = False) -> dict:
+        """
+        Clona ou atualiza todos os repositórios com um pool limitado de threads.
+
+        Args:
+            repos: Dict com formato {"owner": "repo_name"} (ex: data.repos)
+            force: Ignora o TTL e sempre faz fetch
+
+        Returns:
+            dict: {'owner/repo': situação}, na ordem de `repos`
+
+        Note:
+            Clone e fetch são limitados por rede e pelo processo git, por isso
+            threads bastam; cada repositório grava apenas o próprio estado.
+        """
+        with ThreadPoolExecutor(max_workers=max(1, self.max_workers)) as executor:
+            futures = {f"{owner}/{name}": executor.submit(self.sync_repo, owner, name, force)
+                       for owner, name in repos.items()}
+            return {key: future.result() for key, future in futures.items()}
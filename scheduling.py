@@ -0,0 +1,185 @@
+import os
+
+import numpy as np
+
+import sharedblobs
+import timeline
+
+# Arquivo do histórico de tempos, no diretório de índices do clone (timeline.index_dir)
+TIMINGS_FILE = 'timings.npz'
+
+# Custo por byte usado enquanto não há histórico (ordem de grandeza medida com radon)
+DEFAULT_SECONDS_PER_BYTE = 1e-5
+
+
+class CostModel:
+    """
+    Estimativa do custo de análise de cada arquivo, usada para escalonar o
+    pipeline de arquivos do maior para o menor custo.
+
+    O custo de um arquivo já analisado é o tempo medido na última execução,
+    proporcional à variação do tamanho; arquivos sem histórico usam o tamanho
+    em bytes vezes o custo médio por byte do histórico.
+
+    Attributes:
+        root (str): Diretório do projeto; o histórico é indexado por caminho relativo
+        path (str): Arquivo .npz do histórico, ou None para não persistir
+        history (dict): {caminho relativo: (segundos, bytes)} de execuções anteriores
+    """
+
+    def __init__(self, root: str, history: dict = None, path: str = None):
+        """
+        Args:
+            root: Diretório do projeto
+            history: Histórico inicial {caminho relativo: (segundos, bytes)}
+            path: Arquivo onde save() grava o histórico
+        """
+        self.root = root
+        self.path = path
+        self.history = dict(history or {})
+        # Tempos medidos nesta execução, somados entre os passes (métricas e C&K)
+        self._observed = {}
+
+    def __len__(self):
+        return len(self.history)
+
+    @property
+    def seconds_per_byte(self) -> float:
+        """float: Custo médio por byte no histórico (DEFAULT_SECONDS_PER_BYTE sem histórico)."""
+        total_bytes = sum(n_bytes for _, n_bytes in self.history.values())
+        if not total_bytes:
+            return DEFAULT_SECONDS_PER_BYTE
+        return sum(seconds for seconds, _ in self.history.values()) / total_bytes
+
+    def _key(self, path: str) -> str:
+        return os.path.relpath(path, self.root).replace(os.sep, '/')
+
+    def estimate(self, item, seconds_per_byte: float = None) -> float:
+        """
+        Estima o custo de análise de um arquivo.
+
+        Args:
+            item: Caminho do arquivo ou sharedblobs.BlobRef
+            seconds_per_byte: Custo por byte para arquivos sem histórico
+                              (padrão: seconds_per_byte do modelo)
+
+        Returns:
+            float: Custo estimado em segundos
+        """
+        path, n_bytes = sharedblobs.item_size(item)
+        known = self.history.get(self._key(path))
+        if known is not None:
+            seconds, old_bytes = known
+            return seconds * n_bytes / old_bytes if old_bytes else seconds
+        if seconds_per_byte is None:
+            seconds_per_byte = self.seconds_per_byte
+        return n_bytes * seconds_per_byte
+
+    def order(self, items) -> list:
+        """
+        Ordena os arquivos do maior para o menor custo estimado.
+
+        Args:
+            items: Iterável de caminhos ou sharedblobs.BlobRef
+
+        Returns:
+            list: Os itens em ordem decrescente de custo (estável para custos iguais)
+
+        Note:
+            Materializa a lista de arquivos: a descoberta termina antes do
+            primeiro arquivo ser analisado.
+        """
+        rate = self.seconds_per_byte
+        costed = [(self.estimate(item, rate), item) for item in items]
+        costed.sort(key=lambda pair: pair[0], reverse=True)
+        return [item for _, item in costed]
+
+    def observe(self, timing: tuple) -> None:
+        """
+        Registra o tempo medido de um arquivo nesta execução.
+
+        Args:
+            timing: Tupla devolvida por profiling.profiled_call()
+                    (caminho, wall, cpu, bytes, ...)
+        """
+        path, wall, _, n_bytes = timing[:4]
+        key = self._key(path)
+        seconds, _ = self._observed.get(key, (0.0, n_bytes))
+        self._observed[key] = (seconds + wall, n_bytes)
+
+    def save(self, path: str = None) -> str:
+        """
+        Incorpora os tempos desta execução ao histórico e grava-o em .npz.
+
+        Args:
+            path: Arquivo de saída (padrão: self.path)
+
+        Returns:
+            str: Caminho gravado, ou None se o modelo não tiver arquivo
+        """
+        self.history.update(self._observed)
+        self._observed = {}
+        path = path or self.path
+        if path is None:
+            return None
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        keys = list(self.history)
+        temporary = f"{path}.tmp.npz"
+        np.savez(temporary, paths=np.array(keys, dtype=str),
+                 seconds=np.array([self.history[key][0] for key in keys], dtype=np.float64),
+                 bytes=np.array([self.history[key][1] for key in keys], dtype=np.int64))
+        os.replace(temporary, path)
+        return path
+
+    @classmethod
+    def load(cls, root: str, path: str) -> 'CostModel':
+        """
+        Carrega um histórico gravado por save().
+
+        Args:
+            root: Diretório do projeto
+            path: Arquivo .npz; se não existir, o modelo começa sem histórico
+
+        Returns:
+            CostModel: Modelo que grava em path
+        """
+        if not os.path.exists(path):
+            return cls(root, path=path)
+        with np.load(path) as data:
+            history = dict(zip(data['paths'].tolist(),
+                               zip(data['seconds'].tolist(), data['bytes'].tolist())))
+        return cls(root, history, path=path)
+
+
+def timings_path(repo_path: str) -> str:
+    """
+    Retorna o caminho do histórico de tempos de um clone.
+
+    Args:
+        repo_path: Caminho do repositório
+
+    Returns:
+        str: <git-common-dir>/code_insights/timings.npz
+
+    Raises:
+        RuntimeError: Se repo_path não for um repositório git
+    """
+    return os.path.join(timeline.index_dir(repo_path), TIMINGS_FILE)
+
+
+def load_cost_model(project_path: str) -> CostModel:
+    """
+    Carrega o modelo de custo de um projeto a partir do histórico do clone.
+
+    Args:
+        project_path: Caminho do projeto
+
+    Returns:
+        CostModel: Modelo com o histórico de execuções anteriores; fora de um
+                   repositório git, um modelo só por tamanho, sem persistência
+    """
+    try:
+        path = timings_path(project_path)
+    except RuntimeError:
+        return CostModel(project_path)
+    return CostModel.load(project_path, path)
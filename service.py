@@ -0,0 +1,407 @@
+import json
+import math
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import pyarrow as pa
+
+import evolution
+import store
+import utils
+import workqueue
+
+# Limites superiores (em segundos) dos intervalos dos histogramas de latência
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+# Tabelas servidas por revisão: as do ResultStore e as estatísticas calculadas sobre 'arquivos'
+SERVICE_TABLES = ('estatisticas',) + tuple(workqueue.UNIT_TABLES)
+
+# Formatos de resposta e seus content-types
+PAYLOAD_FORMATS = {
+    'json': 'application/json; charset=utf-8',
+    'arrow': 'application/vnd.apache.arrow.stream',
+}
+
+_FULL_HASH = re.compile(r'[0-9a-f]{40}')
+_PATH_SEGMENT = re.compile(r'[\w.-]+')
+
+
+class LatencyHistogram:
+    """
+    Histograma de latências com intervalos fixos (LATENCY_BUCKETS).
+
+    Attributes:
+        counts (list): Contagem por intervalo; o último é acima do maior limite
+        total (float): Soma das latências, em segundos
+    """
+
+    __slots__ = ('counts', 'total', '_lock')
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.total = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        """
+        Registra uma latência.
+
+        Args:
+            seconds: Latência em segundos
+        """
+        index = next((i for i, bound in enumerate(LATENCY_BUCKETS) if seconds <= bound), len(LATENCY_BUCKETS))
+        with self._lock:
+            self.counts[index] += 1
+            self.total += seconds
+
+    def quantile(self, q: float) -> float:
+        """
+        Estima um quantil pelo limite superior do intervalo que o contém.
+
+        Args:
+            q: Quantil entre 0 e 1 (ex: 0.95)
+
+        Returns:
+            float: Limite do intervalo em segundos (inf acima do maior limite), ou None sem registros
+        """
+        with self._lock:
+            counts = list(self.counts)
+        n = sum(counts)
+        if not n:
+            return None
+        target = q * n
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS + (math.inf,), counts):
+            cumulative += count
+            if cumulative >= target:
+                return bound
+        return math.inf
+
+    def to_dict(self) -> dict:
+        """
+        Converte o histograma para a resposta de /status.
+
+        Returns:
+            dict: 'n', 'media' (segundos), 'p50', 'p95', 'p99' (limites estimados
+                  por quantile()) e 'intervalos' ({'<=limite': contagem, '+inf': contagem})
+        """
+        with self._lock:
+            counts, total = list(self.counts), self.total
+        n = sum(counts)
+        labels = [f"<={bound:g}" for bound in LATENCY_BUCKETS] + ['+inf']
+        quantiles = {f"p{int(q * 100)}": self.quantile(q) for q in (0.5, 0.95, 0.99)}
+        # JSON não tem infinito: latências acima do maior limite aparecem como '+inf'
+        quantiles = {name: value if value is None or math.isfinite(value) else '+inf'
+                     for name, value in quantiles.items()}
+        return {'n': n, 'media': total / n if n else None, **quantiles,
+                'intervalos': dict(zip(labels, counts))}
+
+
+class MetricsService:
+    """
+    Serviço de métricas por (projeto, revisão) sobre o ResultStore.
+
+    Resultados já gravados são servidos na hora; revisões ausentes são
+    analisadas em um pool de threads (cada análise usa workqueue.process_unit,
+    com `analysis_workers` processos). Pedidos simultâneos da mesma revisão
+    compartilham uma única análise.
+
+    Attributes:
+        results (store.ResultStore): Resultados servidos e gravados
+        clone_base (str): Diretório dos clones (<clone_base>/<owner>/<repo>)
+        analysis_workers (int): Processos usados na análise dos arquivos
+        chunk_size (int): Arquivos por unidade de trabalho
+    """
+
+    def __init__(self, output_dir: str = 'exports', clone_base: str = None, pool_size: int = 2,
+                 analysis_workers: int = None, chunk_size: int = workqueue.DEFAULT_CHUNK_SIZE):
+        """
+        Args:
+            output_dir: Diretório do ResultStore
+            clone_base: Diretório dos clones (padrão: utils.CLONE_BASE_PATH)
+            pool_size: Número de revisões analisadas ao mesmo tempo
+            analysis_workers: Processos por análise (None analisa no próprio thread)
+            chunk_size: Arquivos por unidade de trabalho
+        """
+        self.results = store.ResultStore(output_dir)
+        self.clone_base = clone_base or utils.CLONE_BASE_PATH
+        self.analysis_workers = analysis_workers
+        self.chunk_size = chunk_size
+        self._executor = ThreadPoolExecutor(max_workers=max(1, pool_size))
+        self._lock = threading.Lock()
+        self._inflight = {}  # (projeto, hash) -> Future
+        self._waiting = 0     # análises enviadas e ainda não iniciadas
+        self._running = 0
+        self._counters = {'acertos': 0, 'faltas': 0, 'coalescidas': 0, 'analisadas': 0, 'falhas': 0}
+        self.latencies = {name: LatencyHistogram() for name in ('cache', 'analise', 'status')}
+
+    def repo_path(self, project: str) -> str:
+        """
+        Retorna o clone de um projeto.
+
+        Args:
+            project: Nome do projeto ('owner/repo')
+
+        Returns:
+            str: <clone_base>/<owner>/<repo>
+        """
+        return os.path.join(self.clone_base, *project.split('/'))
+
+    def is_cached(self, project: str, revision: str) -> bool:
+        """
+        Verifica se todas as tabelas de uma revisão estão gravadas.
+
+        Args:
+            project: Nome do projeto
+            revision: Hash completo da revisão
+
+        Returns:
+            bool: True se a revisão pode ser servida sem análise
+        """
+        return all(self.results.has(project, revision, table) for table in workqueue.UNIT_TABLES)
+
+    def resolve(self, project: str, revision: str) -> str:
+        """
+        Resolve uma revisão para o hash completo.
+
+        Args:
+            project: Nome do projeto
+            revision: Hash, branch ou tag
+
+        Returns:
+            str: Hash completo. Um hash completo já gravado é aceito sem consultar o clone
+
+        Raises:
+            LookupError: Se o nome do projeto for inválido, o projeto não tiver
+                         clone ou a revisão não existir
+        """
+        # owner e repo viram caminhos no clone e no ResultStore: nada de '..' ou separadores
+        segments = project.split('/')
+        if len(segments) != 2 or not all(_PATH_SEGMENT.fullmatch(segment) and segment not in ('.', '..')
+                                         for segment in segments):
+            raise LookupError(f"Projeto inválido: {project}")
+        if _FULL_HASH.fullmatch(revision) and self.is_cached(project, revision):
+            return revision
+        repo_path = self.repo_path(project)
+        if not os.path.isdir(repo_path):
+            raise LookupError(f"Projeto sem clone: {project}")
+        try:
+            return workqueue.resolve_revision(repo_path, revision)
+        except RuntimeError as e:
+            raise LookupError(f"Revisão não encontrada: {revision}") from e
+
+    def _analyze(self, project: str, revision: str) -> str:
+        with self._lock:
+            self._waiting -= 1
+            self._running += 1
+        try:
+            units = workqueue.plan_units(project, self.repo_path(project), [revision],
+                                         chunk_size=self.chunk_size)
+            for unit in units:
+                workqueue.process_unit(unit, self.results, workers=self.analysis_workers)
+            # Cobre unidades já gravadas por outro processo antes desta análise
+            workqueue.merge_revision(self.results, units[0])
+            with self._lock:
+                self._counters['analisadas'] += 1
+            return revision
+        except Exception:
+            with self._lock:
+                self._counters['falhas'] += 1
+            raise
+        finally:
+            with self._lock:
+                self._running -= 1
+                self._inflight.pop((project, revision), None)
+
+    def submit(self, project: str, revision: str):
+        """
+        Garante que uma revisão esteja (ou venha a estar) gravada.
+
+        Args:
+            project: Nome do projeto
+            revision: Hash completo (ver resolve())
+
+        Returns:
+            concurrent.futures.Future: Concluído com o hash quando a revisão estiver
+            gravada, ou None se ela já estava gravada
+
+        Note:
+            Uma revisão já em análise não é enviada de novo: o pedido recebe o
+            Future da análise em andamento.
+        """
+        with self._lock:
+            future = self._inflight.get((project, revision))
+            if future is not None:
+                self._counters['coalescidas'] += 1
+                return future
+            if self.is_cached(project, revision):
+                self._counters['acertos'] += 1
+                return None
+            self._counters['faltas'] += 1
+            self._waiting += 1
+            future = self._executor.submit(self._analyze, project, revision)
+            self._inflight[(project, revision)] = future
+            return future
+
+    def table(self, project: str, revision: str, table: str = 'estatisticas') -> pa.Table:
+        """
+        Lê uma tabela de uma revisão gravada.
+
+        Args:
+            project: Nome do projeto
+            revision: Hash completo
+            table: Uma de SERVICE_TABLES
+
+        Returns:
+            pa.Table: A tabela; 'estatisticas' tem uma linha no formato de
+                      analytics.get_project_statistics()
+
+        Raises:
+            ValueError: Se a tabela não for servida
+        """
+        if table not in SERVICE_TABLES:
+            raise ValueError(f"Tabela inválida: {table} (use {', '.join(SERVICE_TABLES)})")
+        if table == 'estatisticas':
+            return pa.Table.from_pylist([self.statistics(project, revision)])
+        return self.results.read_table(project, revision, table)
+
+    def statistics(self, project: str, revision: str) -> dict:
+        """
+        Calcula as estatísticas de uma revisão gravada.
+
+        Args:
+            project: Nome do projeto
+            revision: Hash completo
+
+        Returns:
+            dict: Estatísticas no formato de analytics.get_project_statistics()
+        """
+        paths = {'arquivos': self.results.table_path(project, revision, 'arquivos')}
+        return evolution.revision_statistics(paths, revision)
+
+    def status(self) -> dict:
+        """
+        Resume o estado do serviço.
+
+        Returns:
+            dict: 'fila' (análises aguardando), 'em_andamento', os contadores
+                  de pedidos e os histogramas de latência por tipo de resposta
+        """
+        with self._lock:
+            status = {'fila': self._waiting, 'em_andamento': self._running, **self._counters}
+        status['latencias'] = {name: histogram.to_dict() for name, histogram in self.latencies.items()}
+        return status
+
+    def close(self) -> None:
+        """Encerra o pool de análise, aguardando as análises em andamento."""
+        self._executor.shutdown(wait=True)
+
+
+def encode_payload(data, fmt: str = 'json') -> bytes:
+    """
+    Serializa uma resposta do serviço.
+
+    Args:
+        data: pa.Table ou dict
+        fmt: Chave de PAYLOAD_FORMATS
+
+    Returns:
+        bytes: JSON (lista de linhas para tabelas) ou stream IPC do Arrow
+    """
+    if fmt == 'arrow':
+        table = data if isinstance(data, pa.Table) else pa.Table.from_pylist([data])
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+    if isinstance(data, pa.Table):
+        data = data.to_pylist()
+    return json.dumps(data, ensure_ascii=False, default=str).encode('utf-8')
+
+
+def _make_handler(service: MetricsService, timeout: float = None):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, code: int, data, fmt: str = 'json', latency: str = None):
+            body = encode_payload(data, fmt)
+            # Registrada antes do envio: quem recebe a resposta já a vê em /status
+            if latency is not None:
+                service.latencies[latency].observe(time.perf_counter() - self.start)
+            self.send_response(code)
+            self.send_header('Content-Type', PAYLOAD_FORMATS[fmt])
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            self.start = time.perf_counter()
+            url = urlsplit(self.path)
+            parts = [part for part in url.path.split('/') if part]
+            query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            if parts == ['status']:
+                self._send(200, service.status(), latency='status')
+                return
+            if len(parts) not in (4, 5) or parts[0] != 'metricas':
+                self._send(404, {'erro': 'Use /metricas/<owner>/<repo>/<revisao>[/<tabela>] ou /status'})
+                return
+            project, revision = f"{parts[1]}/{parts[2]}", parts[3]
+            table = parts[4] if len(parts) == 5 else 'estatisticas'
+            fmt = query.get('formato', 'json')
+            if fmt not in PAYLOAD_FORMATS or table not in SERVICE_TABLES:
+                self._send(400, {'erro': f"Use formato em {list(PAYLOAD_FORMATS)} e tabela em {list(SERVICE_TABLES)}"})
+                return
+            try:
+                revision = service.resolve(project, revision)
+            except LookupError as e:
+                self._send(404, {'erro': str(e)})
+                return
+
+            future = service.submit(project, revision)
+            if future is not None:
+                if query.get('esperar', '1') == '0' and not future.done():
+                    self._send(202, {'projeto': project, 'revisao': revision, 'situacao': 'em_andamento'})
+                    return
+                try:
+                    future.result(timeout=timeout)
+                except Exception as e:
+                    self._send(500, {'erro': f"Falha na análise de {project}@{revision}: {e}"})
+                    return
+            # Em JSON as estatísticas são um objeto, como em get_project_statistics()
+            data = (service.statistics(project, revision) if table == 'estatisticas'
+                    else service.table(project, revision, table))
+            self._send(200, data, fmt, latency='cache' if future is None else 'analise')
+
+    return Handler
+
+
+def serve(service: MetricsService, host: str = '127.0.0.1', port: int = 8765,
+          timeout: float = None) -> ThreadingHTTPServer:
+    """
+    Cria o servidor HTTP do serviço (um thread por conexão).
+
+    Rotas (GET):
+        /metricas/<owner>/<repo>/<revisao>[/<tabela>]?formato=json|arrow&esperar=1|0
+            Tabela de SERVICE_TABLES (padrão: 'estatisticas'). Com esperar=0,
+            uma revisão ainda não gravada responde 202 em vez de aguardar
+        /status
+            Fila de análise, contadores e histogramas de latência
+
+    Args:
+        service: MetricsService servido
+        host: Endereço (padrão: apenas local)
+        port: Porta (0 escolhe uma porta livre)
+        timeout: Espera máxima por uma análise, em segundos (None: sem limite)
+
+    Returns:
+        ThreadingHTTPServer: Servidor já associado à porta; chame serve_forever()
+    """
+    server = ThreadingHTTPServer((host, port), _make_handler(service, timeout))
+    server.daemon_threads = True
+    return server
@@ -0,0 +1,176 @@
+import os
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# Segmento anexado neste processo (workers analisam um lote por vez)
+_attached = {}
+
+
+class BlobRef:
+    """
+    Referência a um arquivo dentro de um SharedBlobBatch.
+
+    É o que vai para os processos workers no lugar do conteúdo: o nome do
+    segmento e o intervalo de bytes do arquivo.
+
+    Attributes:
+        segment (str): Nome do segmento de memória compartilhada
+        path (str): Caminho do arquivo (usado nos resultados)
+        start (int): Posição inicial do conteúdo no segmento
+        end (int): Posição final (exclusiva)
+    """
+
+    __slots__ = ('segment', 'path', 'start', 'end')
+
+    def __init__(self, segment: str, path: str, start: int, end: int):
+        self.segment = segment
+        self.path = path
+        self.start = start
+        self.end = end
+
+    def __repr__(self):
+        return f"BlobRef({self.path!r}, {self.n_bytes} bytes)"
+
+    def __getstate__(self):
+        return self.segment, self.path, self.start, self.end
+
+    def __setstate__(self, state):
+        self.segment, self.path, self.start, self.end = state
+
+    @property
+    def n_bytes(self) -> int:
+        """int: Tamanho do conteúdo em bytes."""
+        return self.end - self.start
+
+    def read(self, encoding: str = 'utf-8', errors: str = 'replace') -> str:
+        """
+        Decodifica o conteúdo direto do segmento compartilhado.
+
+        Args:
+            encoding: Codificação do arquivo
+            errors: Tratamento de bytes inválidos (como em bytes.decode)
+
+        Returns:
+            str: Conteúdo do arquivo
+        """
+        return str(_attach(self.segment).buf[self.start:self.end], encoding, errors)
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    # Mantém apenas o último segmento anexado: um worker processa um lote por vez
+    segment = _attached.get(name)
+    if segment is None:
+        _detach_all()
+        segment = _attached[name] = shared_memory.SharedMemory(name=name)
+    return segment
+
+
+def _detach_all() -> None:
+    while _attached:
+        _attached.popitem()[1].close()
+
+
+class SharedBlobBatch:
+    """
+    Lote de conteúdos de arquivos em um único segmento de memória compartilhada.
+
+    Os conteúdos ficam lado a lado no segmento; o índice de offsets localiza
+    cada arquivo. Os workers recebem apenas BlobRefs (nome do segmento e
+    intervalo) e decodificam a fatia do próprio segmento, sem que o texto de
+    cada arquivo seja serializado e copiado pelo pipe do pool.
+
+    Attributes:
+        paths (tuple): Caminhos dos arquivos, na ordem do segmento
+        offsets (np.ndarray): Posições iniciais (int64, len(paths) + 1); o
+                              arquivo i ocupa offsets[i]:offsets[i + 1]
+    """
+
+    def __init__(self, blobs: dict):
+        """
+        Args:
+            blobs: {caminho: bytes}, ex: utils.read_blobs()
+        """
+        self.paths = tuple(blobs)
+        sizes = np.fromiter((len(content) for content in blobs.values()), dtype=np.int64,
+                            count=len(self.paths))
+        self.offsets = np.zeros(len(self.paths) + 1, dtype=np.int64)
+        np.cumsum(sizes, out=self.offsets[1:])
+        # Segmentos não podem ter tamanho 0
+        self._segment = shared_memory.SharedMemory(create=True, size=max(int(self.offsets[-1]), 1))
+        buffer = self._segment.buf
+        for start, end, content in zip(self.offsets[:-1].tolist(), self.offsets[1:].tolist(),
+                                       blobs.values()):
+            buffer[start:end] = content
+
+    def __len__(self):
+        return len(self.paths)
+
+    @property
+    def name(self) -> str:
+        """str: Nome do segmento de memória compartilhada."""
+        return self._segment.name
+
+    def refs(self) -> list:
+        """
+        Cria as referências dos arquivos do lote.
+
+        Returns:
+            list: Um BlobRef por arquivo, na ordem de paths
+        """
+        starts, ends = self.offsets[:-1].tolist(), self.offsets[1:].tolist()
+        return [BlobRef(self.name, path, start, end) for path, start, end in zip(self.paths, starts, ends)]
+
+    def close(self) -> None:
+        """
+        Libera o segmento.
+
+        Note:
+            Deve ser chamado depois que os workers terminarem de ler o lote.
+            Usado como context manager, o lote chama close() ao sair.
+        """
+        attached = _attached.pop(self.name, None)
+        if attached is not None:
+            attached.close()  # anexado por nome neste processo (análise sem workers)
+        self._segment.close()
+        self._segment.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def source_of(item) -> tuple:
+    """
+    Obtém o caminho e o conteúdo já carregado de um item do pipeline de arquivos.
+
+    Args:
+        item: Caminho de arquivo (str) ou BlobRef
+
+    Returns:
+        tuple: (caminho, conteúdo) — conteúdo é None para caminhos, que são
+               lidos do disco pelo analisador
+    """
+    if isinstance(item, BlobRef):
+        return item.path, item.read()
+    return item, None
+
+
+def item_size(item) -> tuple:
+    """
+    Obtém o caminho e o tamanho de um item do pipeline de arquivos, sem ler o conteúdo.
+
+    Args:
+        item: Caminho de arquivo (str) ou BlobRef
+
+    Returns:
+        tuple: (caminho, tamanho em bytes); 0 se o arquivo não puder ser lido
+    """
+    if isinstance(item, BlobRef):
+        return item.path, item.n_bytes
+    try:
+        return item, os.path.getsize(item)
+    except OSError:
+        return item, 0
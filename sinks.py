@@ -0,0 +1,326 @@
+import os
+import csv
+import time
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import profiling
+
+# Schema das métricas por arquivo (get_code_metrics / get_lizard_metrics)
+FILE_METRICS_SCHEMA = pa.schema([
+    ('arquivo', pa.string()),
+    ('loc', pa.int64()),
+    ('lloc', pa.int64()),
+    ('sloc', pa.int64()),
+    ('comments', pa.int64()),
+    ('multi', pa.int64()),
+    ('blank', pa.int64()),
+    ('average_complexity', pa.float64()),
+    ('maintainability_index', pa.float64()),
+    ('language', pa.string()),
+    ('halstead_h1', pa.int64()),
+    ('halstead_h2', pa.int64()),
+    ('halstead_N1', pa.int64()),
+    ('halstead_N2', pa.int64()),
+    ('halstead_vocabulary', pa.int64()),
+    ('halstead_length', pa.int64()),
+    ('halstead_volume', pa.float64()),
+    ('halstead_difficulty', pa.float64()),
+    ('halstead_effort', pa.float64()),
+    ('halstead_time', pa.float64()),
+    ('halstead_bugs', pa.float64()),
+])
+
+# Schema das métricas C&K por classe
+CK_METRICS_SCHEMA = pa.schema([
+    ('arquivo', pa.string()),
+    ('classe', pa.string()),
+    ('WMC', pa.int64()),
+    ('DIT', pa.int64()),
+    ('NOC', pa.int64()),
+    ('RFC', pa.int64()),
+    ('CBO', pa.int64()),
+    ('LCOM', pa.int64()),
+])
+
+# Schema das métricas por função/método (~10-20x o número de arquivos)
+FUNCTION_METRICS_SCHEMA = pa.schema([
+    ('arquivo', pa.string()),
+    ('classe', pa.string()),
+    ('funcao', pa.string()),
+    ('tipo', pa.string()),
+    ('linha_inicio', pa.int64()),
+    ('linha_fim', pa.int64()),
+    ('loc', pa.int64()),
+    ('complexity', pa.int64()),
+    ('halstead_volume', pa.float64()),
+    ('halstead_effort', pa.float64()),
+])
+
+# Schema do churn por arquivo em uma janela de commits (ver churn.ChurnTable)
+CHURN_SCHEMA = pa.schema([
+    ('arquivo', pa.string()),
+    ('linhas_adicionadas', pa.int64()),
+    ('linhas_removidas', pa.int64()),
+    ('commits', pa.int64()),
+    ('autores', pa.int64()),
+])
+
+# Schema das issues abertas do repositório (issues.get_issues_df), gravadas com
+# cada revisão para montar as janelas de issues da evolução (ver evolution.py)
+ISSUES_SCHEMA = pa.schema([
+    ('number', pa.int64()),
+    ('created_at', pa.timestamp('us', tz='UTC')),
+])
+
+
+def file_metric_rows(records):
+    """
+    Converte registros de iter_file_metrics() em linhas planas.
+
+    Args:
+        records: Iterável de tuplas (caminho_arquivo, {métrica: valor})
+
+    Yields:
+        dict: Linha com a coluna 'arquivo' seguida das métricas
+    """
+    for arquivo, metricas in records:
+        row = {'arquivo': arquivo}
+        row.update(metricas)
+        yield row
+
+
+def split_function_rows(records, function_sink):
+    """
+    Separa registros de iter_file_metrics(with_functions=True): as linhas por
+    função vão para function_sink e os registros por arquivo seguem adiante.
+
+    Args:
+        records: Iterável de tuplas (caminho_arquivo, {métrica: valor}, [linha por função])
+        function_sink: Sink que recebe as linhas por função, já com a coluna 'arquivo'
+
+    Yields:
+        tuple: (caminho_arquivo, {métrica: valor}), como em iter_file_metrics()
+    """
+    for arquivo, metricas, funcoes in records:
+        for funcao in funcoes:
+            row = {'arquivo': arquivo}
+            row.update(funcao)
+            function_sink.write(row)
+        yield arquivo, metricas
+
+
+def rebase_paths(records, source_root: str, target_root: str):
+    """
+    Troca o prefixo do caminho (primeiro campo) de cada registro.
+
+    Permite analisar uma cópia da árvore (ex: um git worktree) e gravar os
+    caminhos como se a análise tivesse sido feita no clone principal.
+
+    Args:
+        records: Iterável de tuplas (caminho_arquivo, ...), como em
+                 iter_file_metrics() e iter_class_metrics()
+        source_root: Diretório analisado
+        target_root: Diretório que substitui source_root nos caminhos
+
+    Yields:
+        tuple: O registro com o caminho sob target_root
+    """
+    prefix = os.path.join(source_root, '')
+    for record in records:
+        arquivo = record[0]
+        if arquivo.startswith(prefix):
+            arquivo = os.path.join(target_root, arquivo[len(prefix):])
+        yield (arquivo, *record[1:])
+
+
+def class_metric_rows(records):
+    """
+    Converte registros de iter_class_metrics() em linhas planas, uma por classe.
+
+    Args:
+        records: Iterável de tuplas (caminho_arquivo, {classe: {métrica: valor}})
+
+    Yields:
+        dict: Linha com as colunas 'arquivo' e 'classe' seguidas das métricas
+    """
+    for arquivo, classes in records:
+        for classe, metricas in classes.items():
+            row = {'arquivo': arquivo, 'classe': classe}
+            row.update(metricas)
+            yield row
+
+
+class CSVSink:
+    """
+    Escreve linhas em um arquivo CSV à medida que chegam.
+
+    As colunas são definidas pela primeira linha (ou por fieldnames).
+    Pode ser usado como context manager.
+
+    Attributes:
+        path (str): Caminho do arquivo CSV
+        rows_written (int): Número de linhas escritas
+    """
+
+    def __init__(self, path: str, fieldnames: list = None):
+        """
+        Args:
+            path: Caminho do arquivo CSV (diretórios são criados se necessário)
+            fieldnames: Colunas do CSV; se None, usa as chaves da primeira linha
+        """
+        self.path = path
+        self.fieldnames = list(fieldnames) if fieldnames else None
+        self.rows_written = 0
+        self._handler = None
+        self._writer = None
+
+    def _open(self) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._handler = open(self.path, 'w', newline='', encoding='utf-8')
+        self._writer = csv.DictWriter(self._handler, fieldnames=self.fieldnames,
+                                      extrasaction='ignore')
+        self._writer.writeheader()
+
+    def write(self, row: dict) -> None:
+        """
+        Escreve uma linha no CSV.
+
+        Args:
+            row: Dicionário {coluna: valor}
+        """
+        if self._writer is None:
+            if self.fieldnames is None:
+                self.fieldnames = list(row)
+            self._open()
+        self._writer.writerow(row)
+        self.rows_written += 1
+
+    def close(self) -> None:
+        """
+        Fecha o arquivo. Se nenhuma linha foi escrita, cria um CSV apenas com
+        o cabeçalho (ou vazio, se as colunas forem desconhecidas).
+        """
+        if self._handler is None:
+            if self.fieldnames is None:
+                self.fieldnames = []
+            self._open()
+        self._handler.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class ParquetSink:
+    """
+    Escreve linhas em um arquivo Parquet em lotes (row groups).
+
+    Apenas um lote de batch_size linhas é mantido em memória.
+
+    Attributes:
+        path (str): Caminho do arquivo Parquet
+        rows_written (int): Número de linhas escritas
+    """
+
+    def __init__(self, path: str, schema: pa.Schema = None, batch_size: int = 5000):
+        """
+        Args:
+            path: Caminho do arquivo Parquet (diretórios são criados se necessário)
+            schema: Schema pyarrow; se None, é inferido do primeiro lote
+            batch_size: Número de linhas por row group
+        """
+        self.path = path
+        self.schema = schema
+        self.batch_size = batch_size
+        self.rows_written = 0
+        self._buffer = []
+        self._writer = None
+
+    def _flush(self) -> None:
+        if not self._buffer:
+            return
+        if self.schema is None:
+            table = pa.Table.from_pylist(self._buffer)
+            self.schema = table.schema
+        else:
+            table = pa.Table.from_pylist(self._buffer, schema=self.schema)
+        if self._writer is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._writer = pq.ParquetWriter(self.path, self.schema)
+        self._writer.write_table(table)
+        self.rows_written += len(self._buffer)
+        self._buffer = []
+
+    def write(self, row: dict) -> None:
+        """
+        Adiciona uma linha; o lote é gravado ao atingir batch_size.
+
+        Args:
+            row: Dicionário {coluna: valor}
+        """
+        self._buffer.append(row)
+        if len(self._buffer) >= self.batch_size:
+            self._flush()
+
+    def close(self) -> None:
+        """
+        Grava o lote pendente e fecha o arquivo. Sem linhas e com schema
+        conhecido, cria um Parquet vazio.
+        """
+        self._flush()
+        if self._writer is None and self.schema is not None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._writer = pq.ParquetWriter(self.path, self.schema)
+        if self._writer is not None:
+            self._writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def stream_to_sinks(records, *sinks, on_record=None) -> int:
+    """
+    Consome um iterável de registros repassando cada um a todos os sinks.
+
+    Args:
+        records: Iterável de registros (ex: linhas de file_metric_rows())
+        *sinks: Objetos com método write(registro)
+        on_record: Callback opcional chamado com o número de registros processados
+
+    Returns:
+        int: Número de registros consumidos
+
+    Note:
+        Com um profiling.RunProfile ativo, o tempo gasto nos sinks é somado
+        ao estágio 'export' (a produção dos registros é medida à parte).
+    """
+    profile = profiling.current()
+    count = 0
+    export_wall = export_cpu = 0.0
+    for record in records:
+        if profile is not None:
+            wall_start, cpu_start = time.perf_counter(), time.process_time()
+        for sink in sinks:
+            sink.write(record)
+        if profile is not None:
+            export_wall += time.perf_counter() - wall_start
+            export_cpu += time.process_time() - cpu_start
+        count += 1
+        if on_record is not None:
+            on_record(count)
+    if profile is not None:
+        profile.add_stage('export', export_wall, export_cpu)
+    return count
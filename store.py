@@ -0,0 +1,266 @@
+import os
+import uuid
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+import sinks
+
+# Subdiretório da revisão com as partes gravadas por unidades de trabalho (ver workqueue.py)
+PARTS_DIR = '_partes'
+
+
+def _write_atomic(data: pa.Table, path: str) -> None:
+    # Grava em um arquivo temporário no mesmo diretório e troca de uma vez:
+    # leitores (e outros processos ou hosts) nunca veem um Parquet pela metade
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary = f"{path}.{uuid.uuid4().hex}.tmp"
+    try:
+        pq.write_table(data, temporary)
+        os.replace(temporary, path)
+    finally:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+
+
+class ResultStore:
+    """
+    Armazena tabelas de resultados em Parquet, uma por projeto, revisão e tabela.
+
+    Layout: <root>/<projeto>/<revisao>/<tabela>.parquet
+
+    Attributes:
+        root (str): Diretório base
+    """
+
+    def __init__(self, root: str = "results"):
+        """
+        Args:
+            root: Diretório base dos resultados
+        """
+        self.root = root
+
+    def table_path(self, project: str, revision: str, table: str) -> str:
+        """
+        Retorna o caminho do arquivo Parquet de uma tabela.
+
+        Args:
+            project: Nome do projeto (ex: 'django/django')
+            revision: Hash da revisão
+            table: Nome da tabela (ex: 'funcoes')
+
+        Returns:
+            str: Caminho do arquivo
+        """
+        return os.path.join(self.root, project, revision, f"{table}.parquet")
+
+    def has(self, project: str, revision: str, table: str) -> bool:
+        """
+        Verifica se uma tabela já foi gravada.
+
+        Args:
+            project: Nome do projeto
+            revision: Hash da revisão
+            table: Nome da tabela
+
+        Returns:
+            bool: True se o arquivo existir
+        """
+        return os.path.exists(self.table_path(project, revision, table))
+
+    def sink(self, project: str, revision: str, table: str, schema: pa.Schema = None,
+             batch_size: int = 5000) -> sinks.ParquetSink:
+        """
+        Cria um sink que grava a tabela incrementalmente.
+
+        Args:
+            project: Nome do projeto
+            revision: Hash da revisão
+            table: Nome da tabela
+            schema: Schema pyarrow da tabela
+            batch_size: Número de linhas por row group
+
+        Returns:
+            sinks.ParquetSink: Sink para a tabela
+        """
+        return sinks.ParquetSink(self.table_path(project, revision, table), schema=schema,
+                                 batch_size=batch_size)
+
+    def write_table(self, project: str, revision: str, table: str, data: pa.Table) -> str:
+        """
+        Grava uma tabela já montada em memória (ex: churn.ChurnTable.to_arrow()).
+
+        Args:
+            project: Nome do projeto
+            revision: Hash da revisão
+            table: Nome da tabela
+            data: Tabela a gravar (substitui a existente)
+
+        Returns:
+            str: Caminho do arquivo gravado
+        """
+        path = self.table_path(project, revision, table)
+        _write_atomic(data, path)
+        return path
+
+    def part_path(self, project: str, revision: str, table: str, part: str) -> str:
+        """
+        Retorna o caminho de uma parte de tabela gravada por uma unidade de trabalho.
+
+        Args:
+            project: Nome do projeto
+            revision: Hash da revisão
+            table: Nome da tabela
+            part: Identificador da parte (ex: '00003')
+
+        Returns:
+            str: <root>/<projeto>/<revisao>/_partes/<tabela>/<parte>.parquet
+        """
+        return os.path.join(self.root, project, revision, PARTS_DIR, table, f"{part}.parquet")
+
+    def write_part(self, project: str, revision: str, table: str, part: str, data: pa.Table) -> bool:
+        """
+        Grava uma parte de tabela de forma idempotente.
+
+        Args:
+            project: Nome do projeto
+            revision: Hash da revisão
+            table: Nome da tabela
+            part: Identificador da parte
+            data: Linhas da parte
+
+        Returns:
+            bool: False se a parte já existia (nada é regravado)
+
+        Note:
+            A escrita é atômica; se dois workers gravarem a mesma parte, o
+            resultado é o de um deles, nunca uma mistura.
+        """
+        path = self.part_path(project, revision, table, part)
+        if os.path.exists(path):
+            return False
+        _write_atomic(data, path)
+        return True
+
+    def parts(self, project: str, revision: str, table: str) -> list:
+        """
+        Lista as partes gravadas de uma tabela.
+
+        Args:
+            project: Nome do projeto
+            revision: Hash da revisão
+            table: Nome da tabela
+
+        Returns:
+            list: Identificadores das partes, em ordem alfabética
+        """
+        parts_dir = os.path.dirname(self.part_path(project, revision, table, 'x'))
+        if not os.path.isdir(parts_dir):
+            return []
+        return sorted(name[:-len('.parquet')] for name in os.listdir(parts_dir)
+                      if name.endswith('.parquet'))
+
+    def merge_parts(self, project: str, revision: str, table: str, schema: pa.Schema = None) -> str:
+        """
+        Junta as partes de uma tabela na tabela da revisão.
+
+        Args:
+            project: Nome do projeto
+            revision: Hash da revisão
+            table: Nome da tabela
+            schema: Schema da tabela, usado se não houver partes
+
+        Returns:
+            str: Caminho da tabela gravada
+
+        Note:
+            As partes entram na ordem dos identificadores, de modo que juntar
+            de novo (ou em outro worker) produz a mesma tabela.
+        """
+        tables = [pq.read_table(self.part_path(project, revision, table, part))
+                  for part in self.parts(project, revision, table)]
+        if tables:
+            data = pa.concat_tables(tables, promote_options='default')
+        else:
+            data = (schema or pa.schema([])).empty_table()
+        return self.write_table(project, revision, table, data)
+
+    def read_table(self, project: str, revision: str, table: str, columns: list = None) -> pa.Table:
+        """
+        Lê uma tabela gravada.
+
+        Args:
+            project: Nome do projeto
+            revision: Hash da revisão
+            table: Nome da tabela
+            columns: Colunas a ler (padrão: todas)
+
+        Returns:
+            pa.Table: Tabela lida
+
+        Raises:
+            FileNotFoundError: Se a tabela não existir
+        """
+        return pq.read_table(self.table_path(project, revision, table), columns=columns)
+
+    def revisions(self, project: str) -> list:
+        """
+        Lista as revisões com resultados gravados para um projeto.
+
+        Args:
+            project: Nome do projeto
+
+        Returns:
+            list: Hashes das revisões, em ordem alfabética
+        """
+        project_dir = os.path.join(self.root, project)
+        if not os.path.isdir(project_dir):
+            return []
+        return sorted(entry for entry in os.listdir(project_dir)
+                      if os.path.isdir(os.path.join(project_dir, entry)))
+
+    def top_functions(self, project: str, revision: str, n: int = 20,
+                      by: str = 'complexity') -> pa.Table:
+        """
+        Retorna as n funções com maior valor de uma métrica em uma revisão.
+
+        Args:
+            project: Nome do projeto
+            revision: Hash da revisão
+            n: Número de funções
+            by: Coluna de ordenação (ex: 'complexity', 'halstead_effort', 'loc')
+
+        Returns:
+            pa.Table: Linhas da tabela 'funcoes' em ordem decrescente de `by`
+        """
+        return top_functions(self.read_table(project, revision, 'funcoes'), n=n, by=by)
+
+
+def top_functions(functions, n: int = 20, by: str = 'complexity') -> pa.Table:
+    """
+    Seleciona as n funções com maior valor de uma métrica.
+
+    Args:
+        functions: pa.Table no formato de sinks.FUNCTION_METRICS_SCHEMA ou
+                   caminho de um arquivo Parquet com essa tabela
+        n: Número de funções
+        by: Coluna de ordenação (ex: 'complexity', 'halstead_effort', 'loc')
+
+    Returns:
+        pa.Table: As n linhas com maior `by`, em ordem decrescente (nulos por último)
+
+    Note:
+        Usa uma seleção parcial (select_k), sem ordenar a tabela inteira.
+    """
+    if isinstance(functions, str):
+        functions = pq.read_table(functions)
+    if functions.num_rows == 0:
+        return functions
+    valid = functions.filter(pc.is_valid(functions[by]))
+    indices = pc.select_k_unstable(valid, k=min(n, valid.num_rows), sort_keys=[(by, 'descending')])
+    top = valid.take(indices)
+    if top.num_rows < n:
+        missing = functions.filter(pc.is_null(functions[by])).slice(0, n - top.num_rows)
+        top = pa.concat_tables([top, missing])
+    return top
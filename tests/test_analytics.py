@@ -1,4 +1,5 @@
 import pytest
+import ast
 import os
 import tempfile
 import shutil
@@ -6,14 +7,27 @@ from unittest.mock import patch, MagicMock
 import sys
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from radon.raw import Module
+
 from analytics import (
-    ClassInfo, get_project_metrics, get_ck_metrics,
-    get_project_statistics, analyze_ast_class,
-    calculate_wmc, calculate_dit, calculate_noc,
-    calculate_rfc, calculate_cbo, calculate_lcom
+    ClassInfo, CKAnalyzer, do_ck_analysis_file, get_project_metrics, get_ck_metrics,
+    get_project_statistics
 )
 
 
+def _analyze_classes(code):
+    """Run the C&K analyzer over a snippet and return its ClassInfo records."""
+    analyzer = CKAnalyzer()
+    analyzer.visit(ast.parse(code))
+    analyzer.build_hierarchy()
+    return analyzer.classes
+
+
+def _ck(code):
+    """C&K metrics of a snippet, as computed for a file."""
+    return do_ck_analysis_file('snippet.py', code=code)
+
+
 class TestClassInfo:
     def test_class_info_initialization(self):
         """Test ClassInfo initialization with proper defaults."""
@@ -24,7 +38,19 @@ class TestClassInfo:
         assert class_info.base_classes == []
         assert class_info.children == []
         assert class_info.calls == set()
-        assert class_info.called_by == set()
+        assert not hasattr(class_info, '__dict__')
+
+    def test_class_info_freeze(self):
+        """Test that freeze compacts containers into shared tuples."""
+        first = ClassInfo("First")
+        second = ClassInfo("Second")
+        first.methods = ['m', 'm']
+        first.calls = {'call'}
+        first.freeze()
+        second.freeze()
+        assert first.methods == ('m', 'm')
+        assert first.calls == ('call',)
+        assert second.attributes is second.children is first.attributes
 
 
 class TestProjectMetrics:
@@ -59,17 +85,15 @@ def standalone_function():
         self.setUp()
         try:
             with patch('analytics.raw.analyze') as mock_analyze:
-                mock_analyze.return_value = {
-                    'loc': 10,
-                    'lloc': 8,
-                    'sloc': 7,
-                    'comments': 2,
-                    'multi': 1
-                }
+                mock_analyze.return_value = Module(loc=10, lloc=8, sloc=7, comments=2, multi=1,
+                                                   blank=0, single_comments=2)
                 
                 result = get_project_metrics(self.temp_dir)
                 assert isinstance(result, dict)
-                assert 'sample.py' in result
+                sample = os.path.join(self.temp_dir, 'sample.py')
+                assert sample in result
+                assert result[sample]['loc'] == 10
+                assert result[sample]['comments'] == 2
         finally:
             self.tearDown()
     
@@ -94,86 +118,70 @@ def standalone_function():
 class TestCKMetricsCalculation:
     def test_calculate_wmc(self):
         """Test Weighted Methods per Class calculation."""
-        class_info = ClassInfo("TestClass")
-        class_info.methods = ['method1', 'method2', 'method3']
-        
-        wmc = calculate_wmc(class_info)
-        assert wmc == 3
+        metrics = _ck("class TestClass:\n    def method1(self): pass\n"
+                      "    def method2(self): pass\n    def method3(self): pass\n")
+        assert metrics['TestClass']['WMC'] == 3
     
     def test_calculate_dit_no_inheritance(self):
         """Test Depth of Inheritance Tree with no inheritance."""
-        class_info = ClassInfo("TestClass")
-        classes = {'TestClass': class_info}
-        
-        dit = calculate_dit(class_info, classes)
-        assert dit == 0
+        # A própria classe conta como o primeiro nível da árvore
+        metrics = _ck("class TestClass:\n    pass\n")
+        assert metrics['TestClass']['DIT'] == 1
     
     def test_calculate_dit_with_inheritance(self):
         """Test Depth of Inheritance Tree with inheritance."""
-        parent = ClassInfo("Parent")
-        child = ClassInfo("Child")
-        child.base_classes = ['Parent']
-        classes = {'Parent': parent, 'Child': child}
-        
-        dit = calculate_dit(child, classes)
-        assert dit == 1
+        metrics = _ck("class Parent:\n    pass\n\nclass Child(Parent):\n    pass\n")
+        assert metrics['Child']['DIT'] == metrics['Parent']['DIT'] + 1 == 2
     
     def test_calculate_noc(self):
         """Test Number of Children calculation."""
-        class_info = ClassInfo("TestClass")
-        class_info.children = ['Child1', 'Child2']
-        
-        noc = calculate_noc(class_info)
-        assert noc == 2
+        metrics = _ck("class TestClass:\n    pass\n\nclass Child1(TestClass):\n    pass\n\n"
+                      "class Child2(TestClass):\n    pass\n")
+        assert metrics['TestClass']['NOC'] == 2
+        assert metrics['Child1']['NOC'] == 0
     
     def test_calculate_rfc(self):
         """Test Response for a Class calculation."""
-        class_info = ClassInfo("TestClass")
-        class_info.methods = ['method1', 'method2']
-        class_info.calls = {'external_call1', 'external_call2', 'external_call3'}
-        
-        rfc = calculate_rfc(class_info)
-        assert rfc == 5  # 2 methods + 3 external calls
+        metrics = _ck("class TestClass:\n"
+                      "    def method1(self):\n        external_call1()\n        external_call2()\n"
+                      "    def method2(self):\n        external_call3()\n")
+        assert metrics['TestClass']['RFC'] == 5  # 2 methods + 3 external calls
     
     def test_calculate_cbo(self):
         """Test Coupling Between Objects calculation."""
-        class_info = ClassInfo("TestClass")
-        class_info.calls = {'Class1', 'Class2'}
-        class_info.called_by = {'Class3'}
-        
-        cbo = calculate_cbo(class_info)
-        assert cbo == 3  # 2 calls + 1 called_by
+        # CBO conta as chamadas a métodos definidos em outras classes
+        metrics = _ck("class Class1:\n    def load(self): pass\n\n"
+                      "class Class2:\n    def save(self): pass\n\n"
+                      "class TestClass:\n    def run(self, a, b):\n        a.load()\n        b.save()\n"
+                      "        self.run(a, b)\n        print(a)\n")
+        assert metrics['TestClass']['CBO'] == 2
+        assert metrics['Class1']['CBO'] == 0
     
     def test_calculate_lcom_no_methods(self):
         """Test LCOM calculation with no methods."""
-        class_info = ClassInfo("TestClass")
-        
-        lcom = calculate_lcom(class_info)
-        assert lcom == 0
+        metrics = _ck("class TestClass:\n    pass\n")
+        assert metrics['TestClass']['LCOM'] == 0
     
     def test_calculate_lcom_with_methods(self):
         """Test LCOM calculation with methods."""
-        class_info = ClassInfo("TestClass")
-        class_info.methods = ['method1', 'method2']
-        class_info.attributes = {'attr1', 'attr2'}
-        
-        # Mock method-attribute relationships
-        with patch('analytics.analyze_method_attribute_usage') as mock_usage:
-            mock_usage.return_value = {'method1': {'attr1'}, 'method2': {'attr2'}}
-            lcom = calculate_lcom(class_info)
-            assert isinstance(lcom, (int, float))
+        metrics = _ck("class TestClass:\n"
+                      "    def method1(self):\n        self.attr1 = 1\n"
+                      "    def method2(self):\n        self.attr2 = 2\n")
+        lcom = metrics['TestClass']['LCOM']
+        assert isinstance(lcom, (int, float))
+        assert lcom >= 0
 
 
 class TestProjectStatistics:
     def test_get_project_statistics_empty_metrics(self):
         """Test get_project_statistics with empty metrics."""
         result = get_project_statistics({}, "main")
-        expected_keys = ['total_files', 'total_loc', 'total_lloc', 'total_sloc', 
-                        'total_comments', 'mean_complexity', 'mean_maintainability']
+        expected_keys = ['n_files', 'total_loc', 'total_lloc', 'total_sloc',
+                        'total_comments', 'mean_complexity', 'mean_maintainability_index']
         
         for key in expected_keys:
             assert key in result
-        assert result['total_files'] == 0
+        assert result['n_files'] == 0
     
     def test_get_project_statistics_with_metrics(self):
         """Test get_project_statistics with valid metrics."""
@@ -183,28 +191,28 @@ class TestProjectStatistics:
                 'lloc': 80,
                 'sloc': 75,
                 'comments': 10,
-                'complexity': 5.0,
-                'maintainability': 70.5
+                'average_complexity': 5.0,
+                'maintainability_index': 70.5
             },
             'file2.py': {
                 'loc': 50,
                 'lloc': 40,
                 'sloc': 35,
                 'comments': 5,
-                'complexity': 3.0,
-                'maintainability': 80.0
+                'average_complexity': 3.0,
+                'maintainability_index': 80.0
             }
         }
         
         result = get_project_statistics(metrics_data, "main")
         
-        assert result['total_files'] == 2
+        assert result['n_files'] == 2
         assert result['total_loc'] == 150
         assert result['total_lloc'] == 120
         assert result['total_sloc'] == 110
         assert result['total_comments'] == 15
         assert result['mean_complexity'] == 4.0
-        assert result['mean_maintainability'] == 75.25
+        assert result['mean_maintainability_index'] == 75.25
 
 
 class TestASTAnalysis:
@@ -218,10 +226,7 @@ class SimpleClass:
     def method(self):
         return self.attr
 '''
-        import ast
-        tree = ast.parse(code)
-        
-        result = analyze_ast_class(tree.body[0], 'SimpleClass')
+        result = _analyze_classes(code)['SimpleClass']
         
         assert isinstance(result, ClassInfo)
         assert result.name == 'SimpleClass'
@@ -235,15 +240,292 @@ class ChildClass(ParentClass):
     def child_method(self):
         pass
 '''
-        import ast
-        tree = ast.parse(code)
-        
-        result = analyze_ast_class(tree.body[0], 'ChildClass')
+        result = _analyze_classes(code)['ChildClass']
         
         assert isinstance(result, ClassInfo)
         assert result.name == 'ChildClass'
         assert 'ParentClass' in result.base_classes
 
 
+class TestMultiLanguageMetrics:
+    def setUp(self):
+        """Create temporary project with Python, TypeScript and C sources."""
+        self.temp_dir = tempfile.mkdtemp()
+        with open(os.path.join(self.temp_dir, 'module.py'), 'w') as f:
+            f.write("def f(x):\n    return x if x else 0\n")
+        with open(os.path.join(self.temp_dir, 'app.ts'), 'w') as f:
+            f.write("// comment\nfunction g(x: number): number {\n\n  if (x > 1) { return 1; }\n  return 0;\n}\n")
+        with open(os.path.join(self.temp_dir, 'main.c'), 'w') as f:
+            f.write("int main() {\n    return 0;\n}\n")
+    
+    def tearDown(self):
+        """Clean up temporary directory."""
+        shutil.rmtree(self.temp_dir)
+    
+    def test_default_languages_only_python(self):
+        """Test that only Python files are analyzed by default."""
+        self.setUp()
+        try:
+            result = get_project_metrics(self.temp_dir)
+            assert [os.path.basename(p) for p in result] == ['module.py']
+            assert next(iter(result.values()))['language'] == 'python'
+        finally:
+            self.tearDown()
+    
+    def test_lizard_languages_share_schema(self):
+        """Test that lizard results use the same columns as radon results."""
+        self.setUp()
+        try:
+            result = get_project_metrics(self.temp_dir, languages=('python', 'typescript', 'c'))
+            by_name = {os.path.basename(p): m for p, m in result.items()}
+            assert set(by_name) == {'module.py', 'app.ts', 'main.c'}
+            assert set(by_name['app.ts']) == set(by_name['module.py'])
+            assert by_name['app.ts']['language'] == 'typescript'
+            assert by_name['app.ts']['average_complexity'] == 2
+            assert by_name['app.ts']['blank'] == 1
+            assert by_name['app.ts']['maintainability_index'] is None
+            assert by_name['main.c']['language'] == 'c'
+        finally:
+            self.tearDown()
+    
+    def test_parallel_pipeline_matches_sequential(self):
+        """Test that the process pool yields the same results."""
+        self.setUp()
+        try:
+            languages = ('python', 'typescript', 'c')
+            sequential = get_project_metrics(self.temp_dir, languages=languages)
+            parallel = get_project_metrics(self.temp_dir, languages=languages, workers=2)
+            assert parallel == sequential
+        finally:
+            self.tearDown()
+    
+    def test_statistics_ignore_missing_maintainability(self):
+        """Test that files without MI do not dilute the mean MI."""
+        report = {
+            'a.py': {'loc': 10, 'lloc': 8, 'sloc': 8, 'comments': 1, 'multi': 0, 'blank': 1,
+                     'average_complexity': 2.0, 'maintainability_index': 80.0},
+            'b.js': {'loc': 20, 'lloc': 15, 'sloc': 15, 'comments': 2, 'multi': 0, 'blank': 3,
+                     'average_complexity': 4.0, 'maintainability_index': None},
+        }
+        result = get_project_statistics(report, "main")
+        assert result['n_files'] == 2
+        assert result['mean_maintainability_index'] == 80.0
+        assert result['mean_complexity'] == 3.0
+
+
+class TestStreamingMetrics:
+    def setUp(self):
+        """Create temporary project with several Python files."""
+        self.temp_dir = tempfile.mkdtemp()
+        for i in range(5):
+            with open(os.path.join(self.temp_dir, f'mod{i}.py'), 'w') as f:
+                f.write(f"class C{i}:\n    def m(self):\n        return self.x\n")
+    
+    def tearDown(self):
+        """Clean up temporary directory."""
+        shutil.rmtree(self.temp_dir)
+    
+    def test_iter_file_metrics_is_lazy(self):
+        """Test that iter_file_metrics yields records one by one."""
+        self.setUp()
+        try:
+            from analytics import iter_file_metrics
+            iterator = iter_file_metrics(self.temp_dir)
+            path, metrics = next(iterator)
+            assert path.endswith('.py')
+            assert 'loc' in metrics
+            assert len(list(iterator)) == 4
+        finally:
+            self.tearDown()
+    
+    def test_iter_class_metrics_parallel(self):
+        """Test iter_class_metrics with a bounded process pool."""
+        self.setUp()
+        try:
+            from analytics import iter_class_metrics
+            records = dict(iter_class_metrics(self.temp_dir, workers=2))
+            assert records == get_ck_metrics(self.temp_dir)
+            assert len(records) == 5
+        finally:
+            self.tearDown()
+    
+    def test_statistics_accumulator_matches_batch(self):
+        """Test that streaming statistics match get_project_statistics."""
+        self.setUp()
+        try:
+            from analytics import iter_file_metrics, StatisticsAccumulator
+            accumulator = StatisticsAccumulator()
+            for _, metrics in iter_file_metrics(self.temp_dir):
+                accumulator.add(metrics)
+            expected = get_project_statistics(get_project_metrics(self.temp_dir), "main")
+            assert accumulator.statistics("main") == expected
+        finally:
+            self.tearDown()
+
+
+class TestFunctionMetrics:
+    def setUp(self):
+        """Create temporary project with functions and methods."""
+        self.temp_dir = tempfile.mkdtemp()
+        with open(os.path.join(self.temp_dir, 'mod.py'), 'w') as f:
+            f.write(
+                "def top(x):\n"
+                "    if x > 1 and x < 5:\n"
+                "        return x * 2\n"
+                "    return x\n"
+                "\n"
+                "class Outer:\n"
+                "    def run(self, y):\n"
+                "        for i in range(y):\n"
+                "            y += i\n"
+                "        return y\n"
+                "    class Inner:\n"
+                "        def run(self):\n"
+                "            return 1\n"
+            )
+        with open(os.path.join(self.temp_dir, 'app.js'), 'w') as f:
+            f.write("function add(a, b) {\n  if (a) { return a + b; }\n  return b;\n}\n")
+    
+    def tearDown(self):
+        """Clean up temporary directory."""
+        shutil.rmtree(self.temp_dir)
+    
+    def test_python_function_rows(self):
+        """Test per-function CC, Halstead and line ranges from the shared parse."""
+        self.setUp()
+        try:
+            from analytics import get_code_metrics
+            metrics, functions = get_code_metrics(os.path.join(self.temp_dir, 'mod.py'),
+                                                  with_functions=True)
+            assert metrics == get_code_metrics(os.path.join(self.temp_dir, 'mod.py'))
+            rows = {(f['classe'], f['funcao']): f for f in functions}
+            assert set(rows) == {(None, 'top'), ('Outer', 'run'), ('Outer.Inner', 'run')}
+            top = rows[(None, 'top')]
+            assert (top['linha_inicio'], top['linha_fim'], top['loc']) == (1, 4, 4)
+            assert top['complexity'] == 3
+            assert top['halstead_volume'] > 0
+            assert rows[('Outer', 'run')]['tipo'] == 'method'
+        finally:
+            self.tearDown()
+    
+    def test_iter_file_metrics_with_functions(self):
+        """Test that function rows travel with the file records, also for lizard languages."""
+        self.setUp()
+        try:
+            from analytics import iter_file_metrics
+            records = {path: (metrics, functions) for path, metrics, functions in iter_file_metrics(
+                self.temp_dir, languages=('python', 'javascript'), with_functions=True, workers=2)}
+            assert len(records[os.path.join(self.temp_dir, 'mod.py')][1]) == 3
+            js_functions = records[os.path.join(self.temp_dir, 'app.js')][1]
+            assert js_functions[0]['funcao'] == 'add'
+            assert js_functions[0]['complexity'] == 2
+            assert js_functions[0]['halstead_volume'] is None
+        finally:
+            self.tearDown()
+
+
+class TestHalsteadMetrics:
+    def setUp(self):
+        """Create temporary project with one Python and one JavaScript file."""
+        self.temp_dir = tempfile.mkdtemp()
+        with open(os.path.join(self.temp_dir, 'calc.py'), 'w') as f:
+            f.write("def area(w, h):\n    return w * h + 2 * (w - h)\n")
+        with open(os.path.join(self.temp_dir, 'app.js'), 'w') as f:
+            f.write("function add(a, b) { return a + b; }\n")
+    
+    def tearDown(self):
+        """Clean up temporary directory."""
+        shutil.rmtree(self.temp_dir)
+    
+    def test_file_halstead_totals(self):
+        """Test that file metrics expose radon's Halstead totals."""
+        self.setUp()
+        try:
+            import radon.metrics
+            from analytics import get_code_metrics, HALSTEAD_FIELDS
+            path = os.path.join(self.temp_dir, 'calc.py')
+            result = get_code_metrics(path)
+            with open(path) as f:
+                expected = radon.metrics.h_visit(f.read()).total
+            for column, field in HALSTEAD_FIELDS.items():
+                assert result[column] == getattr(expected, field)
+        finally:
+            self.tearDown()
+    
+    def test_project_halstead_statistics(self):
+        """Test Halstead totals and means in the project statistics."""
+        self.setUp()
+        try:
+            report = get_project_metrics(self.temp_dir, languages=('python', 'javascript'))
+            js = report[os.path.join(self.temp_dir, 'app.js')]
+            py = report[os.path.join(self.temp_dir, 'calc.py')]
+            assert js['halstead_volume'] is None
+            stats = get_project_statistics(report, "main")
+            assert stats['total_halstead_volume'] == py['halstead_volume']
+            assert stats['total_halstead_N1'] == py['halstead_N1']
+            assert stats['mean_halstead_difficulty'] == py['halstead_difficulty']
+            assert 'total_halstead_difficulty' not in stats
+        finally:
+            self.tearDown()
+
+
+class TestDistributionStatistics:
+    def _report(self):
+        base = {'comments': 0, 'multi': 0, 'blank': 0}
+        return {
+            'a.py': dict(base, loc=10, lloc=8, sloc=8, average_complexity=2.0, maintainability_index=70.0),
+            '__init__.py': dict(base, loc=0, lloc=0, sloc=0, average_complexity=None, maintainability_index=100.0),
+            'b.py': dict(base, loc=100, lloc=90, sloc=92, average_complexity=6.0, maintainability_index=20.0),
+        }
+    
+    def test_percentiles_and_spread(self):
+        """Test percentiles, std and extremes of a metric."""
+        stats = get_project_statistics(self._report(), "main")
+        assert stats['p50_loc'] == 10.0
+        assert stats['min_loc'] == 0.0
+        assert stats['max_loc'] == 100.0
+        assert stats['std_loc'] == pytest.approx(45.0, abs=0.1)
+        assert stats['p90_average_complexity'] == pytest.approx(5.6)
+        assert stats['p50_halstead_volume'] is None
+    
+    def test_sloc_weighted_mean(self):
+        """Test that empty files do not dominate the weighted mean."""
+        stats = get_project_statistics(self._report(), "main")
+        assert stats['mean_maintainability_index'] == pytest.approx(190 / 3)
+        assert stats['weighted_mean_maintainability_index'] == pytest.approx((70 * 8 + 20 * 92) / 100)
+    
+    def test_files_below_threshold(self):
+        """Test the list of files below the mean and below a fixed threshold."""
+        report = self._report()
+        stats = get_project_statistics(report, "main", include_files=True)
+        assert stats['files_below_threshold'] == ['b.py']
+        stats = get_project_statistics(report, "main", include_files=True, threshold=80)
+        assert stats['files_below_threshold'] == ['b.py', 'a.py']
+        assert stats['file_threshold'] == 80
+        assert 'files_below_threshold' not in get_project_statistics(report, "main")
+    
+    def test_accumulator_matches_report(self):
+        """Test that the accumulator produces the same distribution statistics."""
+        from analytics import StatisticsAccumulator
+        report = self._report()
+        accumulator = StatisticsAccumulator(keep_paths=True)
+        for path, stat in report.items():
+            accumulator.add(stat, path)
+        assert (accumulator.statistics("main", include_files=True)
+                == get_project_statistics(report, "main", include_files=True))
+    
+    def test_accumulator_keeps_paths_only_on_request(self):
+        """Test that paths are not stored unless the below-threshold list is requested."""
+        from analytics import StatisticsAccumulator
+        report = self._report()
+        accumulator = StatisticsAccumulator()
+        for path, stat in report.items():
+            accumulator.add(stat, path)
+        assert accumulator.paths is None
+        assert accumulator.statistics("main") == get_project_statistics(report, "main")
+        with pytest.raises(ValueError):
+            accumulator.statistics("main", include_files=True)
+
+
 if __name__ == '__main__':
     pytest.main([__file__])
\ No newline at end of file
@@ -0,0 +1,121 @@
+import pytest
+import os
+import json
+import tempfile
+import shutil
+import subprocess
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import suite
+from benchmarks.synthetic import generate_git_history, generate_issues_df
+
+
+def _results(size, timings):
+    return {
+        'meta': {'size': size},
+        'benchmarks': {name: {'min_seconds': seconds, 'median_seconds': seconds, 'repeat': 1}
+                       for name, seconds in timings.items()},
+    }
+
+
+class TestSyntheticHistory:
+    def test_history_is_deterministic(self):
+        """Test that two generated histories have the same commit hashes."""
+        temp_dir = tempfile.mkdtemp()
+        try:
+            first = generate_git_history(os.path.join(temp_dir, 'a'), n_files=6,
+                                         classes_per_file=1, methods_per_class=2, n_commits=4)
+            second = generate_git_history(os.path.join(temp_dir, 'b'), n_files=6,
+                                          classes_per_file=1, methods_per_class=2, n_commits=4)
+            assert len(first) == 4
+            assert first == second
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_history_churn_and_authors(self):
+        """Test the number of files changed per commit and the author rotation."""
+        temp_dir = tempfile.mkdtemp()
+        try:
+            repo = os.path.join(temp_dir, 'repo')
+            generate_git_history(repo, n_files=10, classes_per_file=1, methods_per_class=2,
+                                 n_commits=3, churn=0.2, n_authors=2)
+            changed = subprocess.run(['git', '-C', repo, 'show', '--name-only', '--format=', 'HEAD'],
+                                     capture_output=True, text=True, check=True).stdout.split()
+            authors = subprocess.run(['git', '-C', repo, 'log', '--format=%an'],
+                                     capture_output=True, text=True, check=True).stdout.splitlines()
+            assert len(changed) == 2
+            assert len(set(authors)) == 2
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_generate_issues_df(self):
+        """Test the synthetic issues DataFrame."""
+        df = generate_issues_df(50, n_repos=3)
+        assert list(df.columns) == ['repo', 'number', 'title', 'created_at']
+        assert len(df) == 50
+        assert df['repo'].nunique() <= 3
+
+
+class TestBaselineGates:
+    def test_regression_detected(self):
+        """Test that a slowdown above the threshold is flagged."""
+        baseline = {'threshold': 0.5, 'sizes': {'small': {'benchmarks': {
+            'get_ck_metrics': {'min_seconds': 1.0},
+            'export': {'min_seconds': 1.0},
+        }}}}
+        comparison = suite.compare_to_baseline(
+            _results('small', {'get_ck_metrics': 1.2, 'export': 1.8}), baseline)
+        status = {item['name']: item['regression'] for item in comparison}
+        assert status == {'get_ck_metrics': False, 'export': True}
+
+    def test_per_benchmark_threshold_and_noise_floor(self):
+        """Test per-benchmark thresholds and the absolute noise floor."""
+        baseline = {'threshold': 0.5, 'sizes': {'small': {'benchmarks': {
+            'get_ck_metrics': {'min_seconds': 1.0, 'threshold': 0.1},
+            'get_project_statistics': {'min_seconds': 0.0001},
+        }}}}
+        comparison = suite.compare_to_baseline(
+            _results('small', {'get_ck_metrics': 1.2, 'get_project_statistics': 0.001}), baseline)
+        status = {item['name']: item['regression'] for item in comparison}
+        assert status == {'get_ck_metrics': True, 'get_project_statistics': False}
+
+    def test_missing_size_has_no_comparison(self):
+        """Test that results without a matching baseline are not compared."""
+        assert suite.compare_to_baseline(_results('medium', {'export': 1.0}), {'sizes': {}}) == []
+        assert suite.compare_to_baseline(_results('medium', {'export': 1.0}), None) == []
+
+    def test_save_baseline_keeps_thresholds(self):
+        """Test that updating a baseline preserves configured thresholds."""
+        temp_dir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(temp_dir, 'baseline.json')
+            with open(path, 'w') as f:
+                json.dump({'threshold': 0.3, 'sizes': {'small': {'benchmarks': {
+                    'export': {'min_seconds': 1.0, 'threshold': 0.2}}}}}, f)
+            suite.save_baseline(_results('small', {'export': 2.0}), path)
+            baseline = suite.load_baseline(path)
+            assert baseline['threshold'] == 0.3
+            assert baseline['sizes']['small']['benchmarks']['export'] == {
+                'min_seconds': 2.0, 'threshold': 0.2}
+        finally:
+            shutil.rmtree(temp_dir)
+
+
+@pytest.mark.slow
+class TestBenchmarkSuite:
+    def test_run_tiny_suite(self):
+        """Test a full offline run of the suite on the smallest repository."""
+        results = suite.run_benchmarks('tiny', repeat=1)
+        assert set(results['benchmarks']) == set(suite.BENCHMARKS)
+        assert all(r['min_seconds'] >= 0 for r in results['benchmarks'].values())
+
+    def test_committed_baseline_covers_all_benchmarks(self):
+        """Test that the committed baseline has every benchmark."""
+        baseline = suite.load_baseline(suite.DEFAULT_BASELINE)
+        for size in ('tiny', 'small'):
+            assert set(baseline['sizes'][size]['benchmarks']) == set(suite.BENCHMARKS)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
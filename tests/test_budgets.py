@@ -0,0 +1,139 @@
+import pytest
+import os
+import tempfile
+import shutil
+import time
+import sys
+from unittest.mock import patch
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import analytics
+import budgets
+
+
+def _busy(file_path, with_functions=False):
+    deadline = time.process_time() + 5
+    while time.process_time() < deadline:
+        pass
+    return file_path, {}
+
+
+class TestFileBudget:
+    def test_invalid_action(self):
+        """Test that unknown actions are rejected."""
+        with pytest.raises(ValueError):
+            budgets.FileBudget(max_bytes=10, on_exceed='truncate')
+
+    def test_zero_disables_limits(self):
+        """Test that zero limits are treated as no limit."""
+        budget = budgets.FileBudget(max_bytes=0, cpu_seconds=0)
+        assert budget.max_bytes is None
+        assert budget.cpu_seconds is None
+
+    def test_cpu_limit_interrupts_block(self):
+        """Test that cpu_limit raises BudgetExceeded on a busy loop."""
+        start = time.process_time()
+        with pytest.raises(budgets.BudgetExceeded):
+            with budgets.cpu_limit(0.05):
+                _busy('x')
+        assert time.process_time() - start < 2
+
+    def test_cpu_limit_is_disarmed(self):
+        """Test that the timer does not fire after the block ends."""
+        with budgets.cpu_limit(0.05):
+            pass
+        deadline = time.process_time() + 0.2
+        while time.process_time() < deadline:
+            pass
+
+    def test_report_csv(self):
+        """Test the budget report export."""
+        temp_dir = tempfile.mkdtemp()
+        try:
+            budget = budgets.FileBudget(max_bytes=10)
+            report = budgets.BudgetReport()
+            report.write(budget.event('a.py', 20, 'metricas', 'tamanho', 'raw'))
+            path = report.save_csv(os.path.join(temp_dir, 'orcamento.csv'))
+            with open(path) as f:
+                lines = f.read().splitlines()
+            assert lines[0] == ','.join(budgets.BUDGET_REPORT_FIELDS)
+            assert lines[1] == 'a.py,20,metricas,tamanho,raw,10'
+            assert report.summary() == {'metricas/tamanho/raw': 1}
+        finally:
+            shutil.rmtree(temp_dir)
+
+
+class TestBudgetedAnalysis:
+    def setUp(self):
+        """Create a project with one oversized file."""
+        self.temp_dir = tempfile.mkdtemp()
+        with open(os.path.join(self.temp_dir, 'small.py'), 'w') as f:
+            f.write("def f(x):\n    return x\n")
+        with open(os.path.join(self.temp_dir, 'big.py'), 'w') as f:
+            f.write("\n".join(f"class C{i}:\n    def m(self):\n        return {i}" for i in range(200)))
+
+    def tearDown(self):
+        """Clean up temporary directory."""
+        shutil.rmtree(self.temp_dir)
+
+    def test_size_budget_degrades_to_raw(self):
+        """Test that oversized files keep only raw metrics."""
+        self.setUp()
+        try:
+            report = budgets.BudgetReport()
+            result = analytics.get_project_metrics(
+                self.temp_dir, budget=budgets.FileBudget(max_bytes=1000), budget_report=report)
+            big = result[os.path.join(self.temp_dir, 'big.py')]
+            assert big['loc'] == 600
+            assert big['average_complexity'] is None
+            assert big['maintainability_index'] is None
+            assert result[os.path.join(self.temp_dir, 'small.py')]['average_complexity'] == 1.0
+            assert report.summary() == {'metricas/tamanho/raw': 1}
+        finally:
+            self.tearDown()
+
+    def test_size_budget_skip(self):
+        """Test that oversized files can be skipped in both analyses."""
+        self.setUp()
+        try:
+            report = budgets.BudgetReport()
+            budget = budgets.FileBudget(max_bytes=1000, on_exceed='skip')
+            metrics = analytics.get_project_metrics(self.temp_dir, workers=2, budget=budget,
+                                                    budget_report=report)
+            ck = analytics.get_ck_metrics(self.temp_dir, budget=budget, budget_report=report)
+            assert list(metrics) == [os.path.join(self.temp_dir, 'small.py')]
+            assert list(ck) == [os.path.join(self.temp_dir, 'small.py')]
+            assert report.summary() == {'metricas/tamanho/skip': 1, 'ck/tamanho/skip': 1}
+        finally:
+            self.tearDown()
+
+    def test_cpu_budget_degrades_to_raw(self):
+        """Test that a file over the CPU budget falls back to raw metrics."""
+        self.setUp()
+        try:
+            path = os.path.join(self.temp_dir, 'small.py')
+            with patch('analytics.analyze_source_file', _busy):
+                file_path, metrics, event = analytics._budgeted_file_worker(
+                    budgets.FileBudget(cpu_seconds=0.05), path)
+            assert metrics['loc'] == 2
+            assert metrics['average_complexity'] is None
+            assert (event['motivo'], event['acao']) == ('cpu', 'raw')
+        finally:
+            self.tearDown()
+
+    def test_statistics_ignore_degraded_metrics(self):
+        """Test that raw-only files do not skew mean complexity."""
+        accumulator = analytics.StatisticsAccumulator()
+        accumulator.add({'loc': 10, 'lloc': 5, 'sloc': 8, 'comments': 1, 'multi': 0, 'blank': 1,
+                         'average_complexity': 3.0, 'maintainability_index': 50.0})
+        accumulator.add({'loc': 100, 'lloc': None, 'sloc': None, 'comments': None, 'multi': None,
+                         'blank': 4, 'average_complexity': None, 'maintainability_index': None})
+        stats = accumulator.statistics('rev')
+        assert stats['total_loc'] == 110
+        assert stats['total_sloc'] == 8
+        assert stats['n_files'] == 2
+        assert stats['mean_complexity'] == 3.0
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,139 @@
+import pytest
+import os
+import tempfile
+import shutil
+import sys
+from datetime import datetime, timedelta
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import churn
+import sinks
+from benchmarks.synthetic import _commit, _git, generate_git_history
+
+ALICE = ('Alice', 'alice@example.com')
+BOB = ('Bob', 'Bob@Example.com')
+
+
+class TestChurn:
+    def setUp(self):
+        """Create a repository with four commits by two authors."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.repo = os.path.join(self.temp_dir, 'repo')
+        os.makedirs(os.path.join(self.repo, 'pkg'))
+        _git(self.repo, 'init', '-q', '-b', 'master')
+        date = datetime(2024, 1, 1)
+        self.hashes = []
+
+        self._write('pkg/a.py', "a = 1\nb = 2\nc = 3\n")
+        self.hashes.append(_commit(self.repo, 'c1', date, ALICE))
+        self._write('pkg/a.py', "a = 1\nb = 20\nc = 3\n")
+        self._write('b.py', "x = 1\n")
+        self.hashes.append(_commit(self.repo, 'c2', date + timedelta(days=1), BOB))
+        with open(os.path.join(self.repo, 'logo.bin'), 'wb') as f:
+            f.write(b'\x00\x01\x02')
+        self.hashes.append(_commit(self.repo, 'c3', date + timedelta(days=2), ALICE))
+        self._write('pkg/a.py', "a = 1\n")
+        self.hashes.append(_commit(self.repo, 'c4', date + timedelta(days=3), BOB))
+
+    def _write(self, path, content):
+        with open(os.path.join(self.repo, path), 'w') as f:
+            f.write(content)
+
+    def tearDown(self):
+        """Clean up temporary directory."""
+        shutil.rmtree(self.temp_dir)
+
+    def test_full_history(self):
+        """Test added/deleted lines, commits and distinct authors per file."""
+        self.setUp()
+        try:
+            table = churn.compute_churn(self.repo)
+            assert table.n_commits == 4
+            assert table.n_authors == 2
+            assert table.get('pkg/a.py') == {'linhas_adicionadas': 4, 'linhas_removidas': 3,
+                                             'commits': 3, 'autores': 2}
+            assert table.get('b.py') == {'linhas_adicionadas': 1, 'linhas_removidas': 0,
+                                         'commits': 1, 'autores': 1}
+            assert table.get('logo.bin')['linhas_adicionadas'] == 0
+            assert 'missing.py' not in table
+        finally:
+            self.tearDown()
+
+    def test_revision_range(self):
+        """Test that the start revision is excluded from the range."""
+        self.setUp()
+        try:
+            table = churn.compute_churn(self.repo, end=self.hashes[2], start=self.hashes[0])
+            assert table.n_commits == 2
+            assert sorted(table.paths) == ['b.py', 'logo.bin', 'pkg/a.py']
+            assert table.get('pkg/a.py')['commits'] == 1
+        finally:
+            self.tearDown()
+
+    def test_windows_single_pass(self):
+        """Test the split of the history between consecutive markers."""
+        self.setUp()
+        try:
+            markers = [self.hashes[0], self.hashes[1], self.hashes[1], self.hashes[3]]
+            windows = churn.compute_window_churn(self.repo, markers)
+            assert [window.n_commits for window in windows] == [1, 0, 2]
+            assert sorted(windows[0].paths) == ['b.py', 'pkg/a.py']
+            assert windows[2].get('pkg/a.py') == {'linhas_adicionadas': 0, 'linhas_removidas': 2,
+                                                  'commits': 1, 'autores': 1}
+            assert 'logo.bin' in windows[2]
+        finally:
+            self.tearDown()
+
+    def test_without_lines(self):
+        """Test the name-only mode used on blobless partial clones."""
+        self.setUp()
+        try:
+            table = churn.compute_churn(self.repo, lines=False)
+            assert table.get('pkg/a.py') == {'linhas_adicionadas': 0, 'linhas_removidas': 0,
+                                             'commits': 3, 'autores': 2}
+            assert table.n_commits == 4
+        finally:
+            self.tearDown()
+
+    def test_windows_require_two_markers(self):
+        """Test that a single marker does not define a window."""
+        with pytest.raises(ValueError):
+            churn.compute_window_churn('.', ['abc'])
+
+    def test_arrow_join_key(self):
+        """Test the Arrow table uses the same paths as the file metrics table."""
+        self.setUp()
+        try:
+            table = churn.compute_churn(self.repo).to_arrow(root=self.repo)
+            assert table.schema == sinks.CHURN_SCHEMA
+            assert os.path.join(self.repo, 'pkg', 'a.py') in table.column('arquivo').to_pylist()
+            assert churn.ChurnTable().freeze().to_arrow().num_rows == 0
+        finally:
+            self.tearDown()
+
+    def test_git_error(self):
+        """Test that git failures are reported as RuntimeError."""
+        self.setUp()
+        try:
+            with pytest.raises(RuntimeError):
+                churn.compute_churn(self.repo, end='does-not-exist')
+        finally:
+            self.tearDown()
+
+    def test_synthetic_history(self):
+        """Test commit and author counts on the benchmark repository."""
+        temp_dir = tempfile.mkdtemp()
+        try:
+            history = generate_git_history(temp_dir, n_files=6, classes_per_file=1,
+                                           methods_per_class=1, n_commits=5, churn=0.5,
+                                           n_authors=2)
+            table = churn.compute_churn(temp_dir)
+            assert table.n_commits == len(history)
+            assert table.n_authors == 2
+            assert len(table) == len(_git(temp_dir, 'ls-files').splitlines())
+        finally:
+            shutil.rmtree(temp_dir)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
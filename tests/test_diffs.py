@@ -0,0 +1,81 @@
+import pytest
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pyarrow as pa
+
+import diffs
+import sinks
+
+
+def _files(root, rows):
+    return pa.Table.from_pylist(
+        [{'arquivo': f"{root}/{path}", 'loc': loc, 'average_complexity': cc,
+          'maintainability_index': mi, 'language': 'python'} for path, loc, cc, mi in rows],
+        schema=sinks.FILE_METRICS_SCHEMA)
+
+
+def _classes(rows):
+    return pa.Table.from_pylist(
+        [{'arquivo': path, 'classe': name, 'WMC': wmc, 'CBO': 1} for path, name, wmc in rows],
+        schema=sinks.CK_METRICS_SCHEMA)
+
+
+class TestDiffTables:
+    def test_file_diff_across_roots(self):
+        """Test classification and deltas with paths analyzed under different roots."""
+        before = _files('/clones/org/repo', [('a.py', 10, 2.0, 80.0), ('b.py', 5, 1.0, 90.0),
+                                             ('old.py', 3, 1.0, 100.0)])
+        after = _files('/tmp/worktrees/0', [('b.py', 5, 1.0, 90.0), ('a.py', 14, 3.5, 70.0),
+                                            ('new.py', 7, 1.0, 95.0)])
+        diff = diffs.diff_tables(before, after, 'arquivos', root_before='/clones/org/repo',
+                                 root_after='/tmp/worktrees/0')
+        assert diff['arquivo'].to_pylist() == ['a.py', 'b.py', 'new.py', 'old.py']
+        assert diff['status'].to_pylist() == ['alterado', 'inalterado', 'adicionado', 'removido']
+        assert diff['loc_delta'].to_pylist() == [4, 0, None, None]
+        assert diff['average_complexity_antes'].to_pylist() == [2.0, 1.0, None, 1.0]
+        assert diff['maintainability_index_depois'].to_pylist() == [70.0, 90.0, 95.0, None]
+        # Colunas não numéricas não são comparadas
+        assert 'language_delta' not in diff.column_names
+        assert diffs.summarize_diff(diff) == {'adicionado': 1, 'removido': 1, 'alterado': 1, 'inalterado': 1}
+
+    def test_null_metric_counts_as_change(self):
+        """Test that a metric appearing or disappearing marks the row as changed."""
+        before = _files('/r', [('a.py', 10, None, None)])
+        after = _files('/r', [('a.py', 10, 2.0, None)])
+        diff = diffs.diff_tables(before, after, 'arquivos', root_before='/r')
+        assert diff['status'].to_pylist() == ['alterado']
+
+    def test_class_diff_pairs_duplicates(self):
+        """Test that same-named classes in one file are paired by occurrence."""
+        before = _classes([('m.py', 'A', 1), ('m.py', 'A', 5), ('m.py', 'B', 2)])
+        after = _classes([('./m.py', 'A', 1), ('./m.py', 'A', 8)])
+        diff = diffs.diff_tables(before, after, 'classes')
+        assert diff.num_rows == 3
+        assert diff['status'].to_pylist() == ['inalterado', 'alterado', 'removido']
+        assert diff['WMC_delta'].to_pylist() == [0, 3, None]
+
+    def test_invalid_kind(self):
+        """Test that unknown tables are rejected."""
+        with pytest.raises(ValueError):
+            diffs.diff_tables(_classes([]), _classes([]), 'funcoes')
+
+
+class TestRankChanges:
+    def test_regressions_follow_metric_direction(self):
+        """Test that complexity increases and maintainability drops are regressions."""
+        before = _files('/r', [(f'f{i}.py', 10, 1.0, 80.0) for i in range(4)])
+        after = _files('/r', [('f0.py', 10, 4.0, 60.0), ('f1.py', 10, 0.5, 85.0),
+                              ('f2.py', 10, 2.0, 79.0), ('f3.py', 10, 1.0, 80.0)])
+        diff = diffs.diff_tables(before, after, 'arquivos', root_before='/r')
+
+        worse = diffs.rank_changes(diff, 'average_complexity', n=5)
+        assert worse['arquivo'].to_pylist() == ['f0.py', 'f2.py']
+        better = diffs.rank_changes(diff, 'average_complexity', n=5, regressions=False)
+        assert better['arquivo'].to_pylist() == ['f1.py']
+
+        worse_mi = diffs.rank_changes(diff, 'maintainability_index', n=1)
+        assert worse_mi['arquivo'].to_pylist() == ['f0.py']
+        assert diffs.rank_changes(diff, 'maintainability_index', regressions=False)['arquivo'].to_pylist() == ['f1.py']
+        assert diffs.rank_changes(diff, 'loc').num_rows == 0
@@ -0,0 +1,154 @@
+import pytest
+import os
+import tempfile
+import shutil
+import subprocess
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import discovery
+
+
+def _write(base, rel_path, content="x = 1\n"):
+    full_path = os.path.join(base, *rel_path.split('/'))
+    os.makedirs(os.path.dirname(full_path), exist_ok=True)
+    with open(full_path, 'w') as f:
+        f.write(content)
+
+
+class TestIterSourceFiles:
+    def setUp(self):
+        """Create a project tree with ignorable directories."""
+        self.temp_dir = tempfile.mkdtemp()
+        _write(self.temp_dir, 'pkg/module.py')
+        _write(self.temp_dir, 'pkg/migrations/0001_initial.py')
+        _write(self.temp_dir, 'tests/test_module.py')
+        _write(self.temp_dir, 'generated/table.py')
+        _write(self.temp_dir, '.venv/lib/site.py')
+        _write(self.temp_dir, 'node_modules/dep/index.py')
+        _write(self.temp_dir, 'build/lib/module.py')
+        _write(self.temp_dir, 'pkg/README.md', "# doc\n")
+        _write(self.temp_dir, '.gitignore', "generated/\n")
+
+    def tearDown(self):
+        """Clean up temporary directory."""
+        shutil.rmtree(self.temp_dir)
+
+    def _relative(self, paths):
+        return sorted(os.path.relpath(p, self.temp_dir).replace(os.sep, '/') for p in paths)
+
+    def test_default_exclusions_and_gitignore(self):
+        """Test that default directories and .gitignore entries are pruned."""
+        self.setUp()
+        try:
+            result = self._relative(discovery.iter_source_files(self.temp_dir))
+            assert result == ['pkg/migrations/0001_initial.py', 'pkg/module.py', 'tests/test_module.py']
+        finally:
+            self.tearDown()
+
+    def test_user_exclude_globs(self):
+        """Test user exclude globs for tests and migrations."""
+        self.setUp()
+        try:
+            result = self._relative(discovery.iter_source_files(
+                self.temp_dir, exclude=['tests/', '**/migrations/']))
+            assert result == ['pkg/module.py']
+        finally:
+            self.tearDown()
+
+    def test_user_include_globs(self):
+        """Test that include globs restrict the selected files."""
+        self.setUp()
+        try:
+            result = self._relative(discovery.iter_source_files(self.temp_dir, include=['tests/']))
+            assert result == ['tests/test_module.py']
+        finally:
+            self.tearDown()
+
+    def test_excluded_directories_are_not_descended(self):
+        """Test that pruned directories are never listed by os.walk."""
+        self.setUp()
+        try:
+            visited = []
+            original_walk = os.walk
+
+            def spy_walk(top, *args, **kwargs):
+                for current, dirnames, filenames in original_walk(top, *args, **kwargs):
+                    visited.append(os.path.relpath(current, self.temp_dir))
+                    yield current, dirnames, filenames
+
+            discovery.os.walk = spy_walk
+            try:
+                list(discovery.iter_source_files(self.temp_dir, exclude=['tests/']))
+            finally:
+                discovery.os.walk = original_walk
+
+            assert '.venv' not in visited
+            assert 'node_modules' not in visited
+            assert 'generated' not in visited
+            assert 'tests' not in visited
+        finally:
+            self.tearDown()
+
+    def test_ambiguous_names_pruned_only_at_root(self):
+        """Test that build/dist/env are pruned at the root but kept inside packages."""
+        self.setUp()
+        try:
+            _write(self.temp_dir, 'pkg/build/mod.py')
+            _write(self.temp_dir, 'pkg/env/settings.py')
+            _write(self.temp_dir, 'dist/pkg/module.py')
+            expected = ['pkg/build/mod.py', 'pkg/env/settings.py', 'pkg/module.py']
+            assert self._relative(discovery.iter_source_files(
+                self.temp_dir, exclude=['tests/', '**/migrations/'])) == expected
+
+            subprocess.run(['git', 'init', '-q', self.temp_dir], check=True)
+            assert self._relative(discovery.iter_source_files(
+                self.temp_dir, use_git=True, exclude=['tests/', '**/migrations/'])) == expected
+        finally:
+            self.tearDown()
+
+    def test_invalid_path(self):
+        """Test discovery on a nonexistent path."""
+        assert discovery.list_source_files("/nonexistent/path") == []
+
+    def test_git_ls_files_fast_path(self):
+        """Test discovery through git ls-files."""
+        self.setUp()
+        try:
+            subprocess.run(['git', 'init', '-q', self.temp_dir], check=True)
+            result = self._relative(discovery.iter_source_files(
+                self.temp_dir, use_git=True, exclude=['tests/']))
+            assert result == ['pkg/migrations/0001_initial.py', 'pkg/module.py']
+        finally:
+            self.tearDown()
+
+    def test_git_ls_files_fallback_outside_repo(self):
+        """Test that use_git falls back to os.walk outside a git repository."""
+        self.setUp()
+        try:
+            result = self._relative(discovery.iter_source_files(
+                self.temp_dir, use_git=True, exclude=['tests/', 'pkg/migrations/']))
+            assert result == ['pkg/module.py']
+        finally:
+            self.tearDown()
+
+    def test_list_revision_files_without_checkout(self):
+        """Test discovery from a revision tree, ignoring the working directory."""
+        self.setUp()
+        try:
+            subprocess.run(['git', 'init', '-q', self.temp_dir], check=True)
+            subprocess.run(['git', '-C', self.temp_dir, 'add', '-A'], check=True)
+            subprocess.run(['git', '-C', self.temp_dir, '-c', 'user.name=t', '-c', 'user.email=t@t',
+                            'commit', '-qm', 'init'], check=True)
+            _write(self.temp_dir, 'pkg/untracked.py')
+            os.remove(os.path.join(self.temp_dir, 'pkg', 'module.py'))
+            result = discovery.list_revision_files(self.temp_dir, 'HEAD', exclude=['tests/'])
+            assert result == ['pkg/migrations/0001_initial.py', 'pkg/module.py']
+            with pytest.raises(RuntimeError):
+                discovery.list_revision_files(self.temp_dir, 'no-such-revision')
+        finally:
+            self.tearDown()
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
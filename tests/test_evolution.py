@@ -0,0 +1,130 @@
+import pytest
+import os
+import tempfile
+import shutil
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+import evolution
+import sinks
+import store
+from benchmarks.synthetic import generate_git_history
+
+
+def _file_rows(n, scale):
+    return [{'arquivo': f'/repo/pkg/m{i}.py', 'loc': 10 * scale + i, 'lloc': 8, 'sloc': 9 * scale,
+             'comments': 1, 'multi': 0, 'blank': 1, 'average_complexity': float(scale + i),
+             'maintainability_index': 100.0 - 10 * scale, 'language': 'python'} for i in range(n)]
+
+
+def _class_rows(n, wmc):
+    return [{'arquivo': '/repo/pkg/m0.py', 'classe': f'C{i}', 'WMC': wmc + i, 'DIT': 1, 'NOC': 0,
+             'RFC': 2, 'CBO': 1, 'LCOM': 0} for i in range(n)]
+
+
+def _utc(date):
+    return datetime.strptime(date, '%Y-%m-%d %H:%M:%S').replace(tzinfo=timezone.utc)
+
+
+class TestLoadEvolution:
+    def setUp(self):
+        """Store results of three revisions (two in the ResultStore, one as legacy CSVs)."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.repo = os.path.join(self.temp_dir, 'repo')
+        self.output = os.path.join(self.temp_dir, 'exports')
+        self.history = generate_git_history(self.repo, n_files=2, classes_per_file=1,
+                                            methods_per_class=1, n_commits=4, churn=0.5)
+        self.project = 'org/repo'
+        results = store.ResultStore(self.output)
+        # Gravadas fora da ordem cronológica
+        for position, scale in ((3, 3), (1, 1)):
+            revision = self.history[position][0]
+            with results.sink(self.project, revision, 'arquivos', schema=sinks.FILE_METRICS_SCHEMA) as sink:
+                for row in _file_rows(4, scale):
+                    sink.write(row)
+            with results.sink(self.project, revision, 'classes', schema=sinks.CK_METRICS_SCHEMA) as sink:
+                for row in _class_rows(scale + 1, scale):
+                    sink.write(row)
+        created = [_utc(self.history[0][1]), _utc(self.history[2][1]), _utc(self.history[3][1])]
+        results.write_table(self.project, self.history[3][0], 'issues', pa.table(
+            {'number': [1, 2, 3], 'created_at': created}, schema=sinks.ISSUES_SCHEMA))
+        # Revisão exportada apenas nos CSVs (formato anterior ao ResultStore)
+        legacy = self.history[2][0]
+        prefix = os.path.join(self.output, f"{self.project}_{legacy[:8]}")
+        pd.DataFrame([{'revision_id': legacy, 'total_loc': 999, 'n_files': 7,
+                       'mean_maintainability_index': 55.0, 'mean_complexity': 2.5}]).to_csv(
+            f"{prefix}_estatisticas.csv", index=False)
+        pd.DataFrame(_class_rows(2, 10)).to_csv(f"{prefix}_ck_metricas.csv", index=False)
+
+    def tearDown(self):
+        """Clean up temporary directory."""
+        shutil.rmtree(self.temp_dir)
+
+    def test_series_from_stored_results(self):
+        """Test that stored results become one row per revision in commit-date order."""
+        self.setUp()
+        try:
+            assert evolution.stored_projects(self.output) == [self.project]
+            series = evolution.load_evolution(self.output, self.project, self.repo)
+            assert series['revisao'].tolist() == [self.history[i][0] for i in (1, 2, 3)]
+            assert series['data'].tolist() == [pd.Timestamp(self.history[i][1]) for i in (1, 2, 3)]
+            # Estatísticas recalculadas da tabela 'arquivos' ou lidas do CSV
+            assert series['n_files'].tolist() == [4, 7, 4]
+            assert series['total_sloc'].iloc[0] == 4 * 9
+            assert series['mean_maintainability_index'].tolist() == [90.0, 55.0, 70.0]
+            assert series['mean_complexity'].tolist() == [2.5, 2.5, 4.5]
+            # Resumo C&K da tabela 'classes' ou do CSV
+            assert series['total_classes'].tolist() == [2, 2, 4]
+            assert series['avg_wmc'].tolist() == [1.5, 10.5, 4.5]
+            # Issues criadas até cada revisão e desde a anterior
+            assert series['issues_acumuladas'].tolist() == [1, 2, 3]
+            assert series['issues_na_janela'].tolist() == [1, 1, 1]
+        finally:
+            self.tearDown()
+
+    def test_without_clone_dates_are_missing(self):
+        """Test that revisions keep their metrics when commit dates are unavailable."""
+        self.setUp()
+        try:
+            series = evolution.load_evolution(self.output, self.project)
+            assert len(series) == 3
+            assert series['data'].isna().all()
+            assert 'issues_acumuladas' not in series.columns
+            assert evolution.load_evolution(self.output, 'org/other').empty
+        finally:
+            self.tearDown()
+
+
+class TestDownsample:
+    def test_issue_windows(self):
+        """Test cumulative and per-window issue counts."""
+        cumulative, window = evolution.issue_windows(np.array([50, 5, 15, 25, 26]), np.array([10, 20, 30]))
+        assert cumulative.tolist() == [1, 2, 4]
+        assert window.tolist() == [1, 1, 2]
+
+    def test_lttb_keeps_endpoints_and_peaks(self):
+        """Test that LTTB keeps the first and last points and isolated peaks."""
+        x = np.arange(1000, dtype=float)
+        y = np.zeros(1000)
+        y[321], y[777] = 50.0, -40.0
+        keep = evolution.lttb_indices(x, y, 20)
+        assert len(keep) == 20
+        assert keep[0] == 0 and keep[-1] == 999
+        assert np.all(np.diff(keep) > 0)
+        assert 321 in keep and 777 in keep
+        assert evolution.lttb_indices(x[:5], y[:5], 20).tolist() == [0, 1, 2, 3, 4]
+
+    def test_downsample_per_project(self):
+        """Test that each project series is reduced independently."""
+        dates = pd.date_range('2020-01-01', periods=300, freq='D')
+        frame = pd.DataFrame({'projeto': ['a'] * 300 + ['b'] * 10,
+                              'data': list(dates) + list(dates[:10]),
+                              'mean_complexity': np.r_[np.sin(np.arange(300) / 10), np.arange(10)]})
+        reduced = evolution.downsample(frame, 'mean_complexity', max_points=50)
+        assert reduced.groupby('projeto').size().to_dict() == {'a': 50, 'b': 10}
@@ -0,0 +1,114 @@
+import pytest
+import os
+import tempfile
+import shutil
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pyarrow as pa
+
+import analytics
+import churn
+import hotspots
+import sinks
+from benchmarks.synthetic import generate_git_history
+
+
+def _file_metrics(rows):
+    return pa.Table.from_pylist(
+        [{'arquivo': path, 'sloc': sloc, 'average_complexity': cc, 'maintainability_index': mi}
+         for path, sloc, cc, mi in rows],
+        schema=sinks.FILE_METRICS_SCHEMA)
+
+
+def _churn(rows):
+    return pa.Table.from_pylist(
+        [{'arquivo': path, 'linhas_adicionadas': added, 'linhas_removidas': deleted,
+          'commits': commits, 'autores': 1} for path, added, deleted, commits in rows],
+        schema=sinks.CHURN_SCHEMA)
+
+
+class TestHotspots:
+    def setUp(self):
+        """Build a small metrics table and the churn of one window."""
+        self.metrics = _file_metrics([
+            ('/repo/app/core/a.py', 100, 10.0, 20.0),
+            ('/repo/app/core/b.py', 50, 2.0, 80.0),
+            ('/repo/app/web/c.py', 30, 4.0, 60.0),
+            ('/repo/main.js', 40, 3.0, None),
+            ('/repo/quiet.py', 10, 50.0, 5.0),
+        ])
+        self.churn = _churn([
+            ('/repo/app/core/a.py', 13, 2, 2),
+            ('/repo/app/core/b.py', 90, 10, 5),
+            ('/repo/app/web/c.py', 20, 5, 1),
+            ('/repo/main.js', 100, 0, 3),
+            ('/repo/gone.py', 5, 5, 1),
+        ])
+
+    def test_complexity_score(self):
+        """Test the churn × CC ranking and the inner join."""
+        self.setUp()
+        table = hotspots.compute_hotspots(self.metrics, self.churn, root='/repo')
+        assert table.column('arquivo').to_pylist() == [
+            '/repo/main.js', '/repo/app/core/b.py', '/repo/app/core/a.py', '/repo/app/web/c.py']
+        assert table.column('score').to_pylist() == [300.0, 200.0, 150.0, 100.0]
+        assert table.column('diretorio').to_pylist() == ['.', 'app/core', 'app/core', 'app/web']
+
+    def test_maintainability_score_nulls_last(self):
+        """Test churn × (100 − MI) with files without MI ranked last."""
+        self.setUp()
+        table = hotspots.compute_hotspots(self.metrics, self.churn, score='manutenibilidade',
+                                          churn_measure='commits')
+        assert table.column('arquivo').to_pylist()[-1] == '/repo/main.js'
+        assert table.column('score').to_pylist() == [160.0, 100.0, 40.0, None]
+
+    def test_custom_score(self):
+        """Test a callable score over the NumPy columns."""
+        self.setUp()
+        table = hotspots.compute_hotspots(self.metrics, self.churn,
+                                          score=lambda churn, cols: churn / cols['sloc'])
+        assert table.column('arquivo').to_pylist()[0] == '/repo/main.js'
+
+    def test_invalid_options(self):
+        """Test that unknown scores and churn measures are rejected."""
+        self.setUp()
+        with pytest.raises(ValueError):
+            hotspots.compute_hotspots(self.metrics, self.churn, score='idade')
+        with pytest.raises(ValueError):
+            hotspots.compute_hotspots(self.metrics, self.churn, churn_measure='bytes')
+
+    def test_directory_aggregation(self):
+        """Test the aggregation by directory, full and truncated."""
+        self.setUp()
+        table = hotspots.compute_hotspots(self.metrics, self.churn, root='/repo')
+        by_dir = hotspots.aggregate_by_directory(table)
+        assert by_dir.column_names == ['diretorio', 'arquivos', 'linhas_alteradas', 'commits',
+                                       'score', 'score_max']
+        assert by_dir.to_pylist()[0] == {'diretorio': 'app/core', 'arquivos': 2,
+                                         'linhas_alteradas': 115, 'commits': 7,
+                                         'score': 350.0, 'score_max': 200.0}
+        top_level = hotspots.aggregate_by_directory(table, depth=1)
+        assert top_level.column('diretorio').to_pylist() == ['app', '.']
+        assert top_level.column('score').to_pylist() == [450.0, 300.0]
+
+    def test_join_with_window_churn(self):
+        """Test the join between analytics file metrics and git churn."""
+        temp_dir = tempfile.mkdtemp()
+        try:
+            history = generate_git_history(temp_dir, n_files=6, classes_per_file=1,
+                                           methods_per_class=2, n_commits=4, churn=0.5)
+            window = churn.compute_window_churn(temp_dir, [history[0][0], history[-1][0]])[0]
+            metrics = pa.Table.from_pylist(
+                list(sinks.file_metric_rows(analytics.iter_file_metrics(temp_dir))),
+                schema=sinks.FILE_METRICS_SCHEMA)
+            table = hotspots.compute_hotspots(metrics, window.to_arrow(root=temp_dir), root=temp_dir)
+            changed = {os.path.join(temp_dir, path) for path in window.paths if path.endswith('.py')}
+            assert table.num_rows == len(changed) > 0
+            assert set(table.column('arquivo').to_pylist()) == changed
+        finally:
+            shutil.rmtree(temp_dir)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
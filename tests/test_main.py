@@ -111,6 +111,18 @@ class TestMainFunction:
             assert any("Métricas Chidamber & Kemerer:" in call for call in print_calls)
             assert any("Estatísticas do Projeto:" in call for call in print_calls)
     
+    @patch('main.scheduling.load_cost_model')
+    @patch('main.analyze_project')
+    @patch('sys.stdout.reconfigure')
+    def test_main_schedule(self, mock_reconfigure, mock_analyze, mock_model):
+        """Test that --schedule and --workers are forwarded to the analysis."""
+        mock_analyze.return_value = None
+        with patch('builtins.print'):
+            main.main(['--workers', '4', '--schedule'])
+        mock_model.assert_called_once_with('clones/django/django')
+        mock_analyze.assert_called_once_with('clones/django/django', 'django', workers=4,
+                                             cost_model=mock_model.return_value)
+
     @patch('main.analyze_project')
     @patch('sys.stdout.reconfigure')
     def test_main_analysis_failure(self, mock_reconfigure, mock_analyze):
@@ -125,6 +137,112 @@ class TestMainFunction:
             print_calls = [call.args[0] for call in mock_print.call_args_list]
             assert any("Falha na análise do projeto." in call for call in print_calls)
     
+    @patch('main.utils.checkout_git_revision')
+    @patch('main.resolve_release_markers')
+    @patch('main.analyze_project')
+    @patch('sys.stdout.reconfigure')
+    def test_main_release_markers(self, mock_reconfigure, mock_analyze, mock_markers, mock_checkout):
+        """Test that --releases analyzes each release marker after its checkout."""
+        mock_markers.return_value = [('v1.0', 'a' * 40), ('v1.1', 'b' * 40),
+                                     ('v2.0', 'c' * 40), ('v2.1', 'd' * 40)]
+        mock_analyze.return_value = {'statistics': {'total_loc': 100}}
+        
+        with patch('builtins.print') as mock_print:
+            main.main(['--releases', 'v1.1', 'v2.0', '--release-window', '1'])
+        
+        mock_markers.assert_called_once_with('clones/django/django', 'v1.1', 'v2.0', span=1)
+        assert [call.args[1] for call in mock_checkout.call_args_list] == [
+            'a' * 40, 'b' * 40, 'c' * 40, 'd' * 40]
+        assert mock_analyze.call_count == 4
+        print_calls = [call.args[0] for call in mock_print.call_args_list]
+        assert any("release v2.1" in str(call) for call in print_calls)
+
+    @patch('main.utils.get_project_checkout_version')
+    @patch('main.preview.iter_preview')
+    @patch('main.analyze_project')
+    @patch('sys.stdout.reconfigure')
+    def test_main_preview(self, mock_reconfigure, mock_analyze, mock_preview, mock_version):
+        """Test that --preview prints each refinement round without a full analysis."""
+        mock_version.return_value = 'main'
+        mock_preview.return_value = iter([
+            {'mean_maintainability_index': 61.0, 'mean_complexity': 2.5,
+             'amostragem': {'rodada': rodada, 'arquivos_analisados': n, 'arquivos_projeto': 900,
+                            'segundos': 1.0,
+                            'intervalos': {'mean_maintainability_index': [58.0, 64.0],
+                                           'mean_complexity': [2.0, 3.0]}}}
+            for rodada, n in ((1, 100), (2, 200))])
+
+        with patch('builtins.print') as mock_print:
+            main.main(['--preview', '100', '--preview-tolerance', '0.05'])
+
+        mock_analyze.assert_not_called()
+        mock_preview.assert_called_once_with('clones/django/django', 'main', sample_size=100,
+                                             tolerance=0.05, workers=None)
+        print_calls = [str(call.args[0]) for call in mock_print.call_args_list]
+        assert any(call.startswith("Rodada 2: 200 de 900") and "[58.000, 64.000]" in call
+                   for call in print_calls)
+
+    @patch('main.reports.generate_reports')
+    @patch('main.evolution.stored_projects')
+    @patch('main.analyze_project')
+    @patch('sys.stdout.reconfigure')
+    def test_main_reports(self, mock_reconfigure, mock_analyze, mock_projects, mock_generate):
+        """Test that --reports renders stored results without analyzing."""
+        mock_projects.return_value = ['django/django']
+        mock_generate.return_value = {'django/django': {'status': 'gerado', 'html': 'r/django__django.html',
+                                                        'pdf': None}}
+
+        with patch('builtins.print'):
+            main.main(['--reports', 'r', '--no-pdf', '--report-workers', '2'])
+
+        mock_analyze.assert_not_called()
+        mock_projects.assert_called_once_with('exports')
+        args, kwargs = mock_generate.call_args
+        assert args[0] == 'exports' and list(args[1]) == ['django/django'] and args[2] == 'r'
+        assert kwargs == {'workers': 2, 'pdf': False, 'force': False}
+
+    @patch('main.workqueue.run_workers')
+    @patch('main.workqueue.plan_units')
+    @patch('main.utils.get_git_revisions')
+    @patch('main.analyze_project')
+    @patch('sys.stdout.reconfigure')
+    def test_main_enqueue_and_work(self, mock_reconfigure, mock_analyze, mock_revisions, mock_plan,
+                                   mock_run, tmp_path):
+        """Test that --enqueue plans units of the cloned projects and --work consumes the spool."""
+        (tmp_path / 'clones' / 'django' / 'django').mkdir(parents=True)
+        mock_revisions.return_value = ['a' * 40, 'b' * 40]
+        mock_plan.return_value = []
+        mock_run.return_value = {'processada': 2, 'existente': 0, 'falha': 0}
+
+        with patch('main.utils.CLONE_BASE_PATH', str(tmp_path / 'clones')), patch('builtins.print'):
+            main.main(['--enqueue', '2', '--work', '--queue-dir', str(tmp_path / 'fila'),
+                       '--chunk-size', '50', '--worker-processes', '3'])
+
+        mock_analyze.assert_not_called()
+        mock_plan.assert_called_once_with('django/django', str(tmp_path / 'clones' / 'django' / 'django'),
+                                          ['a' * 40, 'b' * 40], chunk_size=50)
+        args, kwargs = mock_run.call_args
+        assert args[0].directory == str(tmp_path / 'fila') and args[1] == 'exports'
+        assert kwargs == {'processes': 3}
+
+    @patch('main.service.serve')
+    @patch('main.service.MetricsService')
+    @patch('main.analyze_project')
+    @patch('sys.stdout.reconfigure')
+    def test_main_serve(self, mock_reconfigure, mock_analyze, mock_service, mock_serve):
+        """Test that --serve starts the HTTP service over the exports directory."""
+        mock_serve.return_value.server_address = ('127.0.0.1', 9000)
+        mock_serve.return_value.serve_forever.side_effect = KeyboardInterrupt()
+
+        with patch('builtins.print'):
+            main.main(['--serve', '9000', '--service-pool', '3', '--worker-processes', '2'])
+
+        mock_analyze.assert_not_called()
+        mock_service.assert_called_once_with('exports', pool_size=3, analysis_workers=2,
+                                             chunk_size=main.workqueue.DEFAULT_CHUNK_SIZE)
+        mock_serve.assert_called_once_with(mock_service.return_value, '127.0.0.1', 9000)
+        mock_service.return_value.close.assert_called_once()
+
     @patch('main.analyze_project')
     @patch('sys.stdout.reconfigure')
     def test_main_with_exception(self, mock_reconfigure, mock_analyze):
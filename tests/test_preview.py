@@ -0,0 +1,143 @@
+import pytest
+import os
+import tempfile
+import shutil
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+import analytics
+import preview
+
+
+def _module(n_functions, branches):
+    lines = []
+    for i in range(n_functions):
+        lines.append(f"def f{i}(x):\n")
+        for j in range(branches):
+            lines.append(f"    if x > {j}:\n        x -= {i + j}\n")
+        lines.append("    return x\n\n")
+    return ''.join(lines)
+
+
+class TestStratifiedSample:
+    def test_directory_key(self):
+        """Test directory truncation used for stratification."""
+        assert preview.directory_key('src/pkg/models/bert/x.py') == 'src/pkg'
+        assert preview.directory_key('src/x.py') == 'src'
+        assert preview.directory_key('setup.py') == '.'
+        assert preview.directory_key('a/b/c.py', depth=1) == 'a'
+
+    def test_allocation_and_nested_draws(self):
+        """Test proportional allocation, weights and nested samples."""
+        temp_dir = tempfile.mkdtemp()
+        try:
+            paths = []
+            for directory, n_files in (('core', 40), ('tests', 20), ('tiny', 3)):
+                os.makedirs(os.path.join(temp_dir, directory))
+                for i in range(n_files):
+                    path = os.path.join(temp_dir, directory, f"m{i}.py")
+                    with open(path, 'w') as handler:
+                        handler.write('x = 1\n' * (i + 1))
+                    paths.append(path)
+            sample = preview.StratifiedSample(paths, temp_dir, size_classes=2, seed=7)
+            assert len(sample) == 63
+            # 'tiny' tem menos de MIN_DIRECTORY_FILES arquivos e entra no estrato '*'
+            assert {label[0] for label in sample.labels} == {'core', 'tests', '*'}
+            assert sample.population.sum() == 63
+
+            counts = sample.allocate(20)
+            assert counts.sum() >= 20 and (counts >= np.minimum(2, sample.population)).all()
+            indices, strata, weights = sample.draw(20)
+            assert len(set(indices.tolist())) == len(indices) == counts.sum()
+            assert weights.sum() == pytest.approx(63)
+
+            larger = sample.draw(40)[0]
+            assert set(indices.tolist()) <= set(larger.tolist())
+            assert sorted(sample.draw(100)[0].tolist()) == list(range(63))
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_bootstrap_census_has_no_width(self):
+        """Test that fully sampled strata are not resampled."""
+        values = np.array([[1.0], [3.0], [np.nan], [10.0]])
+        strata = np.array([0, 0, 0, 1])
+        weights = np.ones(4)
+        intervals = preview.bootstrap_intervals(values, strata, weights, np.array([True, True]))
+        assert intervals.tolist() == [[pytest.approx(14 / 3), pytest.approx(14 / 3)]]
+        low, high = preview.bootstrap_intervals(values, strata, weights, np.array([False, True]),
+                                                seed=1)[0]
+        assert low < 14 / 3 < high
+
+
+class TestPreview:
+    def setUp(self):
+        """Create a project whose complexity differs by directory and size."""
+        self.temp_dir = tempfile.mkdtemp()
+        for directory, branches in (('simples', 0), ('medio', 2), ('complexo', 6)):
+            os.makedirs(os.path.join(self.temp_dir, directory))
+            for i in range(30):
+                with open(os.path.join(self.temp_dir, directory, f"m{i}.py"), 'w') as handler:
+                    handler.write(_module(1 + i % 5, branches + i % 3))
+        self.full = analytics.get_project_statistics(analytics.get_project_metrics(self.temp_dir), 'rev')
+
+    def tearDown(self):
+        """Clean up temporary directory."""
+        shutil.rmtree(self.temp_dir)
+
+    def test_weighted_statistics(self):
+        """Test that sampling weights scale totals but not means."""
+        self.setUp()
+        try:
+            metrics = analytics.get_project_metrics(self.temp_dir)
+            values = np.array([[stat.get(metric) for metric in analytics.STATISTICS_METRICS]
+                               for stat in metrics.values()], dtype=np.float64)
+            assert analytics.compute_statistics(values, 'rev', weights=np.ones(len(values))) == self.full
+            doubled = analytics.compute_statistics(values, 'rev', weights=np.full(len(values), 2.0))
+            assert doubled['n_files'] == 180 and doubled['total_loc'] == 2 * self.full['total_loc']
+            assert doubled['mean_complexity'] == pytest.approx(self.full['mean_complexity'])
+        finally:
+            self.tearDown()
+
+    def test_single_round_estimates(self):
+        """Test the estimate schema and that the intervals cover the full analysis."""
+        self.setUp()
+        try:
+            estimate = preview.preview_statistics(self.temp_dir, 'rev', sample_size=30, seed=3)
+            sampling = estimate.pop('amostragem')
+            assert set(estimate) == set(self.full)
+            assert sampling['rodada'] == 1 and sampling['arquivos_projeto'] == 90
+            assert 30 <= sampling['arquivos_analisados'] < 90 and not sampling['completa']
+            assert estimate['n_files'] == 90
+            for key in preview.PREVIEW_ESTIMATES:
+                low, high = sampling['intervalos'][key]
+                assert low <= estimate[key] <= high
+                assert low <= self.full[key] <= high
+        finally:
+            self.tearDown()
+
+    def test_progressive_refinement(self):
+        """Test that rounds reuse the sample and end with the exact statistics."""
+        self.setUp()
+        try:
+            rounds = list(preview.iter_preview(self.temp_dir, 'rev', sample_size=20, tolerance=0.0,
+                                               seed=3))
+            analyzed = [estimate['amostragem']['arquivos_analisados'] for estimate in rounds]
+            assert analyzed == sorted(analyzed) and analyzed[-1] == 90
+            final = rounds[-1]
+            assert final['amostragem']['completa']
+            assert final['amostragem']['largura_relativa'] == {key: 0.0 for key in preview.PREVIEW_ESTIMATES}
+            for key in preview.PREVIEW_ESTIMATES:
+                assert final[key] == pytest.approx(self.full[key])
+
+            # Com tolerância folgada, a primeira rodada já basta
+            loose = list(preview.iter_preview(self.temp_dir, 'rev', sample_size=20, tolerance=10.0,
+                                              seed=3))
+            assert len(loose) == 1
+        finally:
+            self.tearDown()
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,139 @@
+import pytest
+import os
+import json
+import tempfile
+import shutil
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import profiling
+
+
+class TestRunProfile:
+    def test_stage_is_noop_without_profile(self):
+        """Test that stages outside an active profile record nothing."""
+        assert profiling.current() is None
+        with profiling.stage('parse'):
+            pass
+        assert profiling.current() is None
+
+    def test_stage_accumulation(self):
+        """Test that repeated stages accumulate calls and time."""
+        profile = profiling.RunProfile(name='teste')
+        with profile.activate():
+            assert profiling.current() is profile
+            for _ in range(3):
+                with profiling.stage('parse'):
+                    sum(range(1000))
+        assert profiling.current() is None
+        data = profile.to_dict()
+        assert data['stages']['parse']['calls'] == 3
+        assert data['stages']['parse']['wall_seconds'] >= 0
+
+    def test_stages_follow_pipeline_order(self):
+        """Test that the report lists stages in pipeline order."""
+        profile = profiling.RunProfile()
+        with profile.activate():
+            with profiling.stage('ck'):
+                pass
+            with profiling.stage('clone'):
+                pass
+        assert list(profile.to_dict()['stages']) == ['clone', 'ck']
+
+    def test_timed_iter(self):
+        """Test that timed_iter yields every item and records one call per item."""
+        profile = profiling.RunProfile()
+        with profile.activate():
+            items = list(profiling.timed_iter(iter(['a', 'b']), 'discover'))
+        assert items == ['a', 'b']
+        assert profile.stages['discover'].calls == 3
+
+    def test_profiled_call_and_record_timing(self):
+        """Test that worker timings are merged into the active profile."""
+        temp_dir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(temp_dir, 'mod.py')
+            with open(path, 'w') as f:
+                f.write("x = 1\n")
+
+            def analyze(file_path):
+                with profiling.stage('raw'):
+                    return file_path.upper()
+
+            result, timing = profiling.profiled_call(analyze, path)
+            assert result == path.upper()
+            assert timing[0] == path
+            assert timing[3] == 6
+            assert 'raw' in timing[4]
+
+            profile = profiling.RunProfile()
+            with profile.activate():
+                profiling.record_timing(timing)
+            assert profile.files[0][0] == path
+            assert profile.stages['raw'].calls == 1
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_slowest_files(self):
+        """Test the ranking of slowest files."""
+        profile = profiling.RunProfile()
+        profile.record_file('a.py', 0.1, 0.1, 10)
+        profile.record_file('b.py', 0.5, 0.4, 20)
+        profile.record_file('c.py', 0.3, 0.2, 30)
+        assert [f['path'] for f in profile.slowest_files(2)] == ['b.py', 'c.py']
+
+    def test_worker_utilization_and_latency(self):
+        """Test per-pool utilization, straggler tail and latency quantiles."""
+        profile = profiling.RunProfile()
+        pool = profile.start_pool(3)
+        # Worker 1 fica com o arquivo grande; o worker 3 não recebe arquivos
+        profile.record_file('grande.py', 8.0, 8.0, 800, worker=1, start=100.0, pool=pool)
+        profile.record_file('a.py', 1.0, 1.0, 100, worker=2, start=100.0, pool=pool)
+        profile.record_file('b.py', 1.0, 1.0, 100, worker=2, start=101.0, pool=pool)
+        [summary] = profile.worker_utilization()
+        assert summary['arquivos'] == 3 and summary['duracao_seconds'] == 8.0
+        assert summary['utilizacao'] == pytest.approx(10 / 24, abs=1e-4)
+        assert summary['cauda_seconds'] == 8.0
+        assert [worker['arquivos'] for worker in summary['por_worker']] == [1, 2]
+
+        latencies = profile.to_dict()['latencies']
+        assert latencies['max'] == 8.0 and latencies['p50'] == 1.0
+
+    def test_cache_hit_rate(self):
+        """Test cache hit/miss counters."""
+        profile = profiling.RunProfile()
+        with profile.activate():
+            profiling.record_cache('metricas', True)
+            profiling.record_cache('metricas', True)
+            profiling.record_cache('metricas', False)
+        caches = profile.to_dict()['caches']
+        assert caches['metricas']['hits'] == 2
+        assert caches['metricas']['misses'] == 1
+        assert caches['metricas']['hit_rate'] == pytest.approx(2 / 3)
+
+    def test_save_json_and_report(self):
+        """Test JSON export and the text report."""
+        temp_dir = tempfile.mkdtemp()
+        try:
+            profile = profiling.RunProfile(name='projeto', trace_memory=True)
+            with profile.activate():
+                with profiling.stage('mi'):
+                    [0] * 1000
+            profile.record_file('a.py', 0.2, 0.1, 10)
+            path = profile.save_json(os.path.join(temp_dir, 'perfil', 'run.json'))
+            with open(path) as f:
+                data = json.load(f)
+            assert data['name'] == 'projeto'
+            assert data['files']['count'] == 1
+            assert data['file_timings'][0]['path'] == 'a.py'
+            assert data['stages']['mi']['peak_memory_bytes'] > 0
+
+            report = profile.format_report()
+            assert 'mi' in report
+            assert 'a.py' in report
+        finally:
+            shutil.rmtree(temp_dir)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,98 @@
+import pytest
+import os
+import tempfile
+import shutil
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import datetime
+
+import profiling
+import releases
+from benchmarks.synthetic import generate_git_history, _git
+
+
+class TestParseSemver:
+    def test_versions(self):
+        """Test version parsing with prefixes, missing components and pre-releases."""
+        assert releases.parse_semver('v1.2.3') == (1, 2, 3, '')
+        assert releases.parse_semver('4.0') == (4, 0, 0, '')
+        assert releases.parse_semver('django-5.0rc1') == (5, 0, 0, 'rc1')
+        assert releases.parse_semver('1.0.0-beta.2') == (1, 0, 0, 'beta.2')
+        assert releases.parse_semver('v2.0.0+build.7') == (2, 0, 0, '')
+        assert releases.parse_semver('nightly') is None
+
+
+class TestReleaseIndex:
+    def setUp(self):
+        """Create a synthetic repository with lightweight and annotated tags."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.history = generate_git_history(self.temp_dir, n_files=3, classes_per_file=1,
+                                            methods_per_class=1, n_commits=8, churn=0.5)
+        env = dict(os.environ, GIT_COMMITTER_NAME='Dev', GIT_COMMITTER_EMAIL='dev@example.com')
+        tags = [('v1.0.0', 1, False), ('v1.1.0-rc1', 2, True), ('v1.1.0', 3, False),
+                ('v2.0.0b1', 4, True), ('v2.0.0', 5, True), ('v2.1.0', 7, False)]
+        for name, position, annotated in tags:
+            options = ['-a', '-m', name] if annotated else []
+            _git(self.temp_dir, 'tag', *options, name, self.history[position][0], env=env)
+        # Tags que não apontam para commits são ignoradas
+        tree = _git(self.temp_dir, 'rev-parse', 'HEAD^{tree}')
+        _git(self.temp_dir, 'tag', 'arvore', tree)
+
+    def tearDown(self):
+        """Clean up test environment."""
+        shutil.rmtree(self.temp_dir)
+
+    def test_peeled_chronological_index(self):
+        """Test that annotated tags are peeled and releases are ordered by commit date."""
+        self.setUp()
+        try:
+            index = releases.ReleaseIndex.from_git(self.temp_dir)
+            assert index.names == ['v1.0.0', 'v1.1.0-rc1', 'v1.1.0', 'v2.0.0b1', 'v2.0.0', 'v2.1.0']
+            assert 'arvore' not in index
+            assert index.commit('v2.0.0') == self.history[5][0]
+            assert index.prerelease.tolist() == [False, True, False, True, False, False]
+            assert index.date('v1.1.0') == datetime.strptime(self.history[3][1], '%Y-%m-%d %H:%M:%S')
+            assert index.latest_before(self.history[4][1]) == 'v2.0.0b1'
+            with pytest.raises(ValueError):
+                index.latest_before('2023-01-01')
+            with pytest.raises(KeyError):
+                index.commit('v9')
+        finally:
+            self.tearDown()
+
+    def test_relative_queries(self):
+        """Test "N releases before/after", with and without pre-releases."""
+        self.setUp()
+        try:
+            index = releases.ReleaseIndex.from_git(self.temp_dir)
+            assert index.shift('v1.1.0', -1) == 'v1.1.0-rc1'
+            assert index.shift('v1.1.0', -1, stable_only=True) == 'v1.0.0'
+            assert index.shift('v1.1.0', 1, stable_only=True) == 'v2.0.0'
+            assert index.shift('v2.0.0b1', 1, stable_only=True) == 'v2.0.0'
+            assert index.shift('v2.0.0b1', -1, stable_only=True) == 'v1.1.0'
+            assert index.shift('v2.1.0', 5) == 'v2.1.0'
+            assert index.markers('v1.1.0', 'v2.0.0', span=1, stable_only=True) == [
+                'v1.0.0', 'v1.1.0', 'v2.0.0', 'v2.1.0']
+        finally:
+            self.tearDown()
+
+    def test_cache_invalidation(self):
+        """Test that the stored index is reused until refs/tags changes."""
+        self.setUp()
+        try:
+            perfil = profiling.RunProfile(name='releases')
+            with perfil.activate():
+                releases.load_releases(self.temp_dir)
+                assert os.path.exists(releases.releases_path(self.temp_dir))
+                releases.load_releases(self.temp_dir)
+                _git(self.temp_dir, 'tag', 'v3.0.0', self.history[7][0])
+                index = releases.load_releases(self.temp_dir)
+            assert index.names[-1] == 'v3.0.0'
+            assert perfil.caches['releases'] == [1, 2]
+        finally:
+            self.tearDown()
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,95 @@
+import pytest
+import os
+import tempfile
+import shutil
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from unittest.mock import patch
+
+import pyarrow as pa
+
+import diffs
+import reports
+import sinks
+import store
+from benchmarks.synthetic import generate_git_history
+
+
+def _write_revision(results, project, revision, scale):
+    with results.sink(project, revision, 'arquivos', schema=sinks.FILE_METRICS_SCHEMA) as sink:
+        for i in range(3):
+            sink.write({'arquivo': f'/repo/m{i}.py', 'loc': 10 * scale, 'sloc': 8 * scale,
+                        'average_complexity': float(scale + i), 'maintainability_index': 90.0 - scale})
+    with results.sink(project, revision, 'classes', schema=sinks.CK_METRICS_SCHEMA) as sink:
+        sink.write({'arquivo': '/repo/m0.py', 'classe': 'A', 'WMC': scale, 'DIT': 1, 'NOC': 0,
+                    'RFC': 1, 'CBO': 1, 'LCOM': 0})
+
+
+class TestGenerateReports:
+    def setUp(self):
+        """Store results of two revisions for two projects."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.output = os.path.join(self.temp_dir, 'exports')
+        self.report_dir = os.path.join(self.temp_dir, 'reports')
+        self.repo = os.path.join(self.temp_dir, 'repo')
+        self.history = generate_git_history(self.repo, n_files=2, classes_per_file=1,
+                                            methods_per_class=1, n_commits=3, churn=0.5)
+        self.results = store.ResultStore(self.output)
+        for project in ('org/a', 'org/b'):
+            for position, scale in ((0, 1), (2, 3)):
+                _write_revision(self.results, project, self.history[position][0], scale)
+        old, new = self.history[0][0], self.history[2][0]
+        self.results.write_table('org/a', new, f"diff_arquivos_{old[:8]}", diffs.diff_tables(
+            self.results.read_table('org/a', old, 'arquivos'),
+            self.results.read_table('org/a', new, 'arquivos'), root_before='/repo'))
+        self.projects = {'org/a': self.repo, 'org/b': None}
+
+    def tearDown(self):
+        """Clean up temporary directory."""
+        shutil.rmtree(self.temp_dir)
+
+    def test_html_reports_and_manifest(self):
+        """Test that reports are rendered once and skipped while inputs are unchanged."""
+        self.setUp()
+        try:
+            with patch('reports.pdf_available', return_value=False):
+                first = reports.generate_reports(self.output, self.projects, self.report_dir, workers=2)
+                assert {project: item['status'] for project, item in first.items()} == \
+                    {'org/a': 'gerado', 'org/b': 'gerado'}
+                assert first['org/a']['pdf'] is None
+                with open(first['org/a']['html'], encoding='utf-8') as handler:
+                    content = handler.read()
+                assert 'Relatório de Código - org/a' in content
+                assert 'data:image/png;base64,' in content  # evolução com datas do clone
+                assert 'Maiores regressões (average_complexity)' in content
+                manifest = reports.load_manifest(self.report_dir)
+                assert set(manifest) == {'org/a', 'org/b'}
+
+                second = reports.generate_reports(self.output, self.projects, self.report_dir)
+                assert {item['status'] for item in second.values()} == {'inalterado'}
+
+                # Uma nova revisão exportada regera apenas o relatório do projeto
+                _write_revision(self.results, 'org/b', self.history[1][0], 2)
+                third = reports.generate_reports(self.output, self.projects, self.report_dir)
+                assert third['org/a']['status'] == 'inalterado'
+                assert third['org/b']['status'] == 'gerado'
+                assert reports.generate_reports(self.output, {'org/a': None}, self.report_dir,
+                                                force=True)['org/a']['status'] == 'gerado'
+        finally:
+            self.tearDown()
+
+    def test_inputs_hash_reuses_known_digests(self):
+        """Test that unchanged files are not read again and renamed roots keep the hash."""
+        self.setUp()
+        try:
+            paths = reports.report_inputs(self.output, 'org/a')
+            assert len(paths) == 5
+            digest, files = reports.inputs_hash(paths, root=self.output)
+            with patch('builtins.open', side_effect=AssertionError('arquivo relido')):
+                assert reports.inputs_hash(paths, files, root=self.output)[0] == digest
+            moved = os.path.join(self.temp_dir, 'moved')
+            shutil.copytree(self.output, moved)
+            assert reports.inputs_hash(reports.report_inputs(moved, 'org/a'), root=moved)[0] == digest
+        finally:
+            self.tearDown()
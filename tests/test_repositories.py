@@ -0,0 +1,109 @@
+import pytest
+import os
+import tempfile
+import shutil
+import subprocess
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import datetime
+from unittest.mock import patch
+
+import repositories
+import timeline
+from benchmarks.synthetic import generate_git_history, _git, _commit
+
+
+class TestRepositoryManager:
+    def setUp(self):
+        """Serve two synthetic repositories via file://."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.server = os.path.join(self.temp_dir, 'server')
+        self.clones = os.path.join(self.temp_dir, 'clones')
+        self.sources = {}
+        for name in ('alpha', 'beta'):
+            source = os.path.join(self.temp_dir, 'sources', name)
+            generate_git_history(source, n_files=3, classes_per_file=1, methods_per_class=1,
+                                 n_commits=3, churn=0.5)
+            bare = os.path.join(self.server, 'org', f'{name}.git')
+            subprocess.run(['git', 'clone', '-q', '--bare', source, bare], check=True)
+            self.sources[name] = source
+        self.repos = {'org': 'alpha'}
+        self.base_url = f"file://{self.server}"
+
+    def tearDown(self):
+        """Clean up test environment."""
+        shutil.rmtree(self.temp_dir)
+
+    def _manager(self, **options):
+        return repositories.RepositoryManager(base_url=self.base_url, **options)
+
+    def _push_commit(self, name):
+        source = self.sources[name]
+        with open(os.path.join(source, 'novo.py'), 'w') as f:
+            f.write('x = 1\n')
+        _git(source, 'add', '-A')
+        commit_hash = _commit(source, 'Novo', datetime(2024, 3, 1), ('Dev', 'dev@example.com'))
+        _git(source, 'push', '-q', os.path.join(self.server, 'org', f'{name}.git'), 'master')
+        return commit_hash
+
+    def test_clone_fetch_and_ttl(self):
+        """Test clone, TTL skip and forced fetch with timeline refresh."""
+        self.setUp()
+        try:
+            with patch('utils.CLONE_BASE_PATH', self.clones), patch('utils.save_current_revision_repo'):
+                manager = self._manager(ttl=3600)
+                assert manager.sync(self.repos) == {'org/alpha': 'clonado'}
+                path = manager.repo_path('org', 'alpha')
+                assert manager.last_fetch('org', 'alpha') is not None
+                assert os.path.exists(timeline.timeline_path(path, 'master'))
+
+                new_tip = self._push_commit('alpha')
+                assert manager.sync(self.repos) == {'org/alpha': 'recente'}
+                assert manager.sync(self.repos, force=True) == {'org/alpha': 'atualizado'}
+
+                index = timeline.CommitTimeline.load(timeline.timeline_path(path, 'master'))
+                assert index.tip == new_tip
+                assert index.commit_at('2024-03-02') == new_tip
+        finally:
+            self.tearDown()
+
+    def test_parallel_sync(self):
+        """Test several repositories synchronized concurrently, with errors isolated."""
+        self.setUp()
+        try:
+            repos = {'org': 'alpha', 'outro': 'missing'}
+            with patch('utils.CLONE_BASE_PATH', self.clones), patch('utils.save_current_revision_repo'):
+                manager = self._manager(max_workers=2, ttl=0)
+                # data.repos usa o dono como chave; o mesmo dono aparece uma vez
+                statuses = manager.sync(repos)
+                assert statuses == {'org/alpha': 'clonado', 'outro/missing': 'erro'}
+                assert manager.sync({'org': 'beta'}) == {'org/beta': 'clonado'}
+
+                # Com ttl=0 todo sync faz fetch, mesmo com o clone em HEAD destacado
+                path = manager.repo_path('org', 'alpha')
+                _git(path, 'checkout', '-q', '--detach', 'HEAD~1')
+                new_tip = self._push_commit('alpha')
+                assert manager.sync({'org': 'alpha'}) == {'org/alpha': 'atualizado'}
+                assert _git(path, 'rev-parse', 'master') == new_tip
+        finally:
+            self.tearDown()
+
+    def test_shallow_since_bounds_new_clones(self):
+        """Test that new clones only bring the history from shallow_since on."""
+        self.setUp()
+        try:
+            # Data do último commit: o clone raso traz apenas ele
+            newest = _git(self.sources['alpha'], 'log', '-1', '--format=%cI')
+            with patch('utils.CLONE_BASE_PATH', self.clones), patch('utils.save_current_revision_repo'):
+                manager = self._manager(shallow_since=newest)
+                assert manager.sync(self.repos) == {'org/alpha': 'clonado'}
+                path = manager.repo_path('org', 'alpha')
+                assert int(_git(path, 'rev-list', '--count', 'HEAD')) == 1
+                assert os.path.exists(timeline.timeline_path(path, 'master'))
+        finally:
+            self.tearDown()
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,103 @@
+import pytest
+import os
+import tempfile
+import shutil
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import analytics
+import profiling
+import scheduling
+from benchmarks.synthetic import generate_git_history
+
+
+class TestCostModel:
+    def setUp(self):
+        """Create files of increasing size."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.paths = []
+        for i, n_lines in enumerate([5, 40, 20, 80]):
+            path = os.path.join(self.temp_dir, f"mod_{i}.py")
+            with open(path, 'w') as handler:
+                handler.writelines(f"x_{j} = {j}\n" for j in range(n_lines))
+            self.paths.append(path)
+
+    def tearDown(self):
+        """Clean up temporary directory."""
+        shutil.rmtree(self.temp_dir)
+
+    def test_order_by_size_and_history(self):
+        """Test largest-first ordering, with measured timings overriding the size estimate."""
+        self.setUp()
+        try:
+            model = scheduling.CostModel(self.temp_dir)
+            assert model.seconds_per_byte == scheduling.DEFAULT_SECONDS_PER_BYTE
+            assert model.order(iter(self.paths)) == [self.paths[i] for i in (3, 1, 2, 0)]
+
+            # O menor arquivo foi o mais lento na execução anterior
+            sizes = [os.path.getsize(path) for path in self.paths]
+            model.observe((self.paths[0], 2.0, 1.9, sizes[0]))
+            model.observe((self.paths[0], 1.0, 0.9, sizes[0]))
+            for path, size in zip(self.paths[1:], sizes[1:]):
+                model.observe((path, 0.01, 0.01, size))
+            # Os tempos da execução atual só entram no histórico ao gravar
+            assert model.order(self.paths)[0] == self.paths[3]
+            model.save()
+            assert model.history['mod_0.py'] == (3.0, sizes[0])
+            assert model.estimate(self.paths[0]) == pytest.approx(3.0)
+            assert model.order(self.paths) == [self.paths[i] for i in (0, 1, 2, 3)]
+            # Arquivos novos usam o custo médio por byte do histórico
+            new_path = os.path.join(self.temp_dir, 'novo.py')
+            with open(new_path, 'w') as handler:
+                handler.write('y = 1\n' * 10)
+            assert model.estimate(new_path) == pytest.approx(60 * 3.03 / sum(sizes))
+        finally:
+            self.tearDown()
+
+    def test_history_is_persisted_in_the_clone(self):
+        """Test that timings observed by the pipeline are saved and reloaded from the git index dir."""
+        self.setUp()
+        try:
+            repo = os.path.join(self.temp_dir, 'repo')
+            generate_git_history(repo, n_files=4, classes_per_file=1, methods_per_class=2,
+                                 n_commits=1, churn=0.5)
+            model = scheduling.load_cost_model(repo)
+            assert len(model) == 0 and model.path == scheduling.timings_path(repo)
+
+            records = dict(analytics.iter_file_metrics(repo, workers=2, cost_model=model))
+            assert len(records) == 4
+            model.save()
+            loaded = scheduling.load_cost_model(repo)
+            assert sorted(loaded.history) == sorted(
+                os.path.relpath(path, repo).replace(os.sep, '/') for path in records)
+            assert all(seconds > 0 for seconds, _ in loaded.history.values())
+
+            # Fora de um repositório git o modelo não é persistido
+            plain = scheduling.load_cost_model(self.temp_dir)
+            assert plain.path is None and plain.save() is None
+        finally:
+            self.tearDown()
+
+    def test_profile_reports_utilization_and_tail(self):
+        """Test that scheduled runs report worker utilization and latency quantiles."""
+        self.setUp()
+        try:
+            profile = profiling.RunProfile()
+            model = scheduling.CostModel(self.temp_dir)
+            with profile.activate():
+                records = list(analytics.iter_file_metrics(self.temp_dir, cost_model=model))
+            # Sequencial: os arquivos são analisados do maior para o menor
+            assert [path for path, _ in records] == [self.paths[i] for i in (3, 1, 2, 0)]
+
+            data = profile.to_dict(include_files=False)
+            assert data['latencies']['max'] >= data['latencies']['p50'] > 0
+            [pool] = data['workers']
+            assert pool['workers'] == 1 and pool['arquivos'] == 4
+            assert 0 < pool['utilizacao'] <= 1
+            assert 'utilização' in profile.format_report()
+        finally:
+            self.tearDown()
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,142 @@
+import pytest
+import os
+import json
+import tempfile
+import shutil
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from unittest.mock import patch
+
+import pyarrow as pa
+
+import service
+import workqueue
+from benchmarks.synthetic import generate_git_history
+
+
+class TestLatencyHistogram:
+    def test_buckets_and_quantiles(self):
+        """Test bucket counts and quantile estimates."""
+        histogram = service.LatencyHistogram()
+        assert histogram.quantile(0.5) is None
+        for seconds in (0.001, 0.002, 0.03, 0.2, 1000.0):
+            histogram.observe(seconds)
+        data = histogram.to_dict()
+        assert data['n'] == 5
+        assert data['intervalos']['<=0.005'] == 2 and data['intervalos']['+inf'] == 1
+        assert data['p50'] == 0.05 and data['p99'] == '+inf'
+        json.dumps(data)
+
+
+class TestMetricsService:
+    def setUp(self):
+        """Serve a synthetic clone on a free local port."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.history = generate_git_history(os.path.join(self.temp_dir, 'clones', 'org', 'repo'),
+                                            n_files=6, classes_per_file=1, methods_per_class=2,
+                                            n_commits=2, churn=0.5)
+        self.service = service.MetricsService(os.path.join(self.temp_dir, 'exports'),
+                                              clone_base=os.path.join(self.temp_dir, 'clones'))
+        self.server = service.serve(self.service, port=0)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def tearDown(self):
+        """Stop the server and clean up."""
+        self.server.shutdown()
+        self.server.server_close()
+        self.service.close()
+        shutil.rmtree(self.temp_dir)
+
+    def _get(self, path):
+        try:
+            with urllib.request.urlopen(self.base + path) as response:
+                return response.status, response.headers['Content-Type'], response.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.headers['Content-Type'], e.read()
+
+    def test_concurrent_requests_are_coalesced(self):
+        """Test that identical concurrent misses share one analysis and later hits use the store."""
+        self.setUp()
+        try:
+            release = threading.Event()
+            original = workqueue.process_unit
+
+            def slow_unit(*args, **kwargs):
+                release.wait(10)
+                return original(*args, **kwargs)
+
+            responses = []
+            with patch('service.workqueue.process_unit', side_effect=slow_unit) as mock_unit:
+                threads = [threading.Thread(target=lambda: responses.append(self._get('/metricas/org/repo/HEAD')))
+                           for _ in range(4)]
+                for thread in threads:
+                    thread.start()
+                # Sem esperar, a revisão em análise responde 202
+                status, _, body = self._get('/metricas/org/repo/HEAD?esperar=0')
+                assert status == 202 and json.loads(body)['situacao'] == 'em_andamento'
+                current = self.service.status()
+                assert current['fila'] + current['em_andamento'] == 1
+                # Libera a análise só depois que os quatro pedidos chegaram
+                deadline = time.monotonic() + 10
+                while self.service.status()['coalescidas'] < 4 and time.monotonic() < deadline:
+                    time.sleep(0.01)
+                release.set()
+                for thread in threads:
+                    thread.join()
+                assert mock_unit.call_count == 1
+
+            assert [status for status, _, _ in responses] == [200] * 4
+            statistics = json.loads(responses[0][2])
+            assert statistics['revision_id'] == self.history[-1][0] and statistics['n_files'] == 6
+
+            status, content_type, body = self._get(f"/metricas/org/repo/{self.history[-1][0]}/classes?formato=arrow")
+            assert status == 200 and content_type == service.PAYLOAD_FORMATS['arrow']
+            assert pa.ipc.open_stream(body).read_all().num_rows == 6
+
+            status, _, body = self._get('/status')
+            report = json.loads(body)
+            assert status == 200
+            assert (report['faltas'], report['coalescidas'], report['acertos'], report['analisadas']) == (1, 4, 1, 1)
+            assert report['fila'] == 0 and report['latencias']['analise']['n'] == 4
+            assert report['latencias']['cache']['n'] == 1
+        finally:
+            self.tearDown()
+
+    def test_errors(self):
+        """Test unknown projects, revisions, tables and formats."""
+        self.setUp()
+        try:
+            assert self._get('/metricas/org/outro/HEAD')[0] == 404
+            assert self._get('/metricas/org/repo/no-such-tag')[0] == 404
+            assert self._get('/metricas/org/repo/HEAD/issues')[0] == 400
+            assert self._get('/metricas/org/repo/HEAD?formato=xml')[0] == 400
+            assert self._get('/outra')[0] == 404
+        finally:
+            self.tearDown()
+
+    def test_rejects_paths_outside_clone_base(self):
+        """Test that '..' in owner or repo never reaches the clone or the store."""
+        self.setUp()
+        try:
+            # Um clone válido fora de clone_base, alcançável por clones/../fora
+            shutil.copytree(os.path.join(self.temp_dir, 'clones', 'org', 'repo'),
+                            os.path.join(self.temp_dir, 'fora'))
+            before = sorted(os.listdir(self.temp_dir))
+            with patch('service.workqueue.process_unit') as mock_unit:
+                for path in ('/metricas/../fora/HEAD', '/metricas/org/../HEAD', '/metricas/./repo/HEAD',
+                             '/metricas/o%2Frg/repo/HEAD'):
+                    assert self._get(path)[0] == 404
+                assert mock_unit.call_count == 0
+            assert sorted(os.listdir(self.temp_dir)) == before
+        finally:
+            self.tearDown()
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
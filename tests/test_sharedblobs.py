@@ -0,0 +1,95 @@
+import pytest
+import os
+import pickle
+import tempfile
+import shutil
+import sys
+from multiprocessing import shared_memory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import analytics
+import budgets
+import sharedblobs
+
+
+class TestSharedBlobBatch:
+    def test_offsets_and_refs(self):
+        """Test that each ref decodes its own slice of the segment."""
+        blobs = {'a.py': b'x = 1\n', 'vazio.py': b'', 'b.py': 'nome = "ação"\n'.encode('utf-8')}
+        with sharedblobs.SharedBlobBatch(blobs) as batch:
+            assert len(batch) == 3
+            assert batch.offsets.tolist() == [0, 6, 6, 6 + len(blobs['b.py'])]
+            refs = batch.refs()
+            assert [ref.path for ref in refs] == list(blobs)
+            assert [ref.read() for ref in refs] == [content.decode('utf-8') for content in blobs.values()]
+            ref = pickle.loads(pickle.dumps(refs[2]))
+            assert (ref.segment, ref.n_bytes) == (batch.name, len(blobs['b.py']))
+            assert sharedblobs.source_of(ref) == ('b.py', 'nome = "ação"\n')
+            assert sharedblobs.item_size(ref) == ('b.py', len(blobs['b.py']))
+            name = batch.name
+        with pytest.raises(FileNotFoundError):
+            shared_memory.SharedMemory(name=name)
+
+    def test_empty_batch(self):
+        """Test that a batch without files still creates and releases a segment."""
+        with sharedblobs.SharedBlobBatch({}) as batch:
+            assert batch.refs() == [] and batch.offsets.tolist() == [0]
+
+
+class TestBlobMetrics:
+    def setUp(self):
+        """Create a few Python files on disk to compare against."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.blobs = {}
+        for i in range(6):
+            code = (f"class Model{i}:\n"
+                    f"    def run(self, x):\n"
+                    f"        if x > {i}:\n"
+                    f"            return x * {i}\n"
+                    f"        return self.run(x + 1)\n")
+            path = os.path.join(self.temp_dir, f"module_{i}.py")
+            with open(path, 'w') as handler:
+                handler.write(code)
+            self.blobs[path] = code.encode('utf-8')
+        self.blobs[os.path.join(self.temp_dir, 'LEIAME.md')] = b'# texto'
+
+    def tearDown(self):
+        """Clean up temporary directory."""
+        shutil.rmtree(self.temp_dir)
+
+    @pytest.mark.parametrize('workers', [None, 2])
+    def test_matches_path_analysis(self, workers):
+        """Test that shared-memory analysis yields the same records as reading the files."""
+        self.setUp()
+        try:
+            expected = dict(analytics.iter_file_metrics(self.temp_dir))
+            assert dict(analytics.iter_blob_metrics(self.blobs, workers=workers)) == expected
+
+            records = list(analytics.iter_blob_metrics(self.blobs, workers=workers, with_functions=True))
+            assert len(records) == 6 and all(len(functions) == 1 for _, _, functions in records)
+
+            expected = dict(analytics.iter_class_metrics(self.temp_dir))
+            assert dict(analytics.iter_blob_class_metrics(self.blobs, workers=workers)) == expected
+        finally:
+            self.tearDown()
+
+    def test_budget_uses_blob_size(self):
+        """Test that size budgets use the in-memory size and report the real path."""
+        self.setUp()
+        try:
+            report = budgets.BudgetReport()
+            blobs = {path: content + b'#' * 100 if path.endswith('module_0.py') else content
+                     for path, content in self.blobs.items()}
+            budget = budgets.FileBudget(max_bytes=150)
+            records = dict(analytics.iter_blob_metrics(blobs, budget=budget, budget_report=report))
+            degraded = os.path.join(self.temp_dir, 'module_0.py')
+            assert len(records) == 6 and 'mi' not in records[degraded]
+            assert report.summary() == {'metricas/tamanho/raw': 1}
+            assert report.events[0]['arquivo'] == degraded
+            assert report.events[0]['bytes'] == len(blobs[degraded])
+        finally:
+            self.tearDown()
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,124 @@
+import pytest
+import os
+import tempfile
+import shutil
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+import sinks
+
+
+def _file_records():
+    yield '/repo/a.py', {'loc': 10, 'lloc': 8, 'sloc': 8, 'comments': 1, 'multi': 0, 'blank': 1,
+                         'average_complexity': 2.0, 'maintainability_index': 80.0, 'language': 'python'}
+    yield '/repo/b.ts', {'loc': 20, 'lloc': 15, 'sloc': 15, 'comments': 2, 'multi': 0, 'blank': 3,
+                         'average_complexity': 4.0, 'maintainability_index': None, 'language': 'typescript'}
+
+
+class TestRowConversion:
+    def test_file_metric_rows(self):
+        """Test flattening of file metric records."""
+        rows = list(sinks.file_metric_rows(_file_records()))
+        assert [row['arquivo'] for row in rows] == ['/repo/a.py', '/repo/b.ts']
+        assert list(rows[0])[0] == 'arquivo'
+
+    def test_class_metric_rows(self):
+        """Test flattening of C&K records into one row per class."""
+        records = [('/repo/a.py', {'A': {'WMC': 1}, 'B': {'WMC': 2}})]
+        rows = list(sinks.class_metric_rows(records))
+        assert rows == [{'arquivo': '/repo/a.py', 'classe': 'A', 'WMC': 1},
+                        {'arquivo': '/repo/a.py', 'classe': 'B', 'WMC': 2}]
+
+    def test_split_function_rows(self):
+        """Test that function rows go to their sink while file records pass through."""
+        collected = []
+
+        class ListSink:
+            def write(self, row):
+                collected.append(row)
+
+        records = [('/repo/a.py', {'loc': 3}, [{'funcao': 'f', 'complexity': 2}]),
+                   ('/repo/b.py', {'loc': 1}, [])]
+        files = list(sinks.split_function_rows(records, ListSink()))
+        assert files == [('/repo/a.py', {'loc': 3}), ('/repo/b.py', {'loc': 1})]
+        assert collected == [{'arquivo': '/repo/a.py', 'funcao': 'f', 'complexity': 2}]
+
+    def test_rebase_paths(self):
+        """Test that worktree paths are rewritten under the main clone."""
+        records = [('/wt/0/a.py', {'loc': 1}, []), ('/wt/0/pkg/b.py', {'loc': 2}, []),
+                   ('/other/c.py', {'loc': 3}, [])]
+        rebased = list(sinks.rebase_paths(records, '/wt/0', '/repo'))
+        assert [record[0] for record in rebased] == ['/repo/a.py', '/repo/pkg/b.py', '/other/c.py']
+        assert rebased[1][1:] == ({'loc': 2}, [])
+
+
+class TestSinks:
+    def setUp(self):
+        """Create temporary output directory."""
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Clean up temporary directory."""
+        shutil.rmtree(self.temp_dir)
+
+    def test_csv_sink_streams_rows(self):
+        """Test that CSVSink writes every row with a fixed header."""
+        self.setUp()
+        try:
+            path = os.path.join(self.temp_dir, 'nested', 'metricas.csv')
+            with sinks.CSVSink(path, fieldnames=sinks.FILE_METRICS_SCHEMA.names) as sink:
+                count = sinks.stream_to_sinks(sinks.file_metric_rows(_file_records()), sink)
+            df = pd.read_csv(path)
+            assert count == 2
+            assert list(df.columns) == sinks.FILE_METRICS_SCHEMA.names
+            assert df['language'].tolist() == ['python', 'typescript']
+        finally:
+            self.tearDown()
+
+    def test_csv_sink_empty_keeps_header(self):
+        """Test that an empty stream still produces a CSV header."""
+        self.setUp()
+        try:
+            path = os.path.join(self.temp_dir, 'vazio.csv')
+            with sinks.CSVSink(path, fieldnames=sinks.CK_METRICS_SCHEMA.names):
+                pass
+            assert list(pd.read_csv(path).columns) == sinks.CK_METRICS_SCHEMA.names
+        finally:
+            self.tearDown()
+
+    def test_parquet_sink_batches(self):
+        """Test that ParquetSink writes row groups of batch_size rows."""
+        self.setUp()
+        try:
+            path = os.path.join(self.temp_dir, 'metricas.parquet')
+            with sinks.ParquetSink(path, schema=sinks.FILE_METRICS_SCHEMA, batch_size=1) as sink:
+                sinks.stream_to_sinks(sinks.file_metric_rows(_file_records()), sink)
+            parquet_file = pq.ParquetFile(path)
+            assert parquet_file.metadata.num_row_groups == 2
+            table = parquet_file.read()
+            assert table.column('maintainability_index').to_pylist() == [80.0, None]
+        finally:
+            self.tearDown()
+
+    def test_stream_to_multiple_sinks_with_progress(self):
+        """Test fan-out to several sinks and the progress callback."""
+        class ListSink:
+            def __init__(self):
+                self.rows = []
+
+            def write(self, row):
+                self.rows.append(row)
+
+        first, second = ListSink(), ListSink()
+        progress = []
+        sinks.stream_to_sinks(sinks.file_metric_rows(_file_records()), first, second,
+                              on_record=progress.append)
+        assert len(first.rows) == len(second.rows) == 2
+        assert progress == [1, 2]
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
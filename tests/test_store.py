@@ -0,0 +1,104 @@
+import pytest
+import os
+import tempfile
+import shutil
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pyarrow as pa
+
+import sinks
+import store
+
+
+def _function_row(name, complexity, effort):
+    return {'arquivo': '/repo/a.py', 'classe': None, 'funcao': name, 'tipo': 'function',
+            'linha_inicio': 1, 'linha_fim': 2, 'loc': 2, 'complexity': complexity,
+            'halstead_volume': None if effort is None else effort / 10,
+            'halstead_effort': effort}
+
+
+class TestResultStore:
+    def setUp(self):
+        """Create a store with one revision of function metrics."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.store = store.ResultStore(self.temp_dir)
+        with self.store.sink('org/repo', 'abc123', 'funcoes',
+                             schema=sinks.FUNCTION_METRICS_SCHEMA, batch_size=2) as sink:
+            for i, (complexity, effort) in enumerate([(3, 10.0), (9, None), (1, 50.0), (5, 20.0)]):
+                sink.write(_function_row(f"f{i}", complexity, effort))
+
+    def tearDown(self):
+        """Clean up temporary directory."""
+        shutil.rmtree(self.temp_dir)
+
+    def test_layout_and_revisions(self):
+        """Test the project/revision/table layout."""
+        self.setUp()
+        try:
+            assert self.store.has('org/repo', 'abc123', 'funcoes')
+            assert not self.store.has('org/repo', 'abc123', 'classes')
+            assert self.store.revisions('org/repo') == ['abc123']
+            assert self.store.revisions('org/other') == []
+            table = self.store.read_table('org/repo', 'abc123', 'funcoes', columns=['funcao'])
+            assert table.column_names == ['funcao']
+            assert table.num_rows == 4
+        finally:
+            self.tearDown()
+
+    def test_top_functions_by_complexity(self):
+        """Test top-N query by cyclomatic complexity."""
+        self.setUp()
+        try:
+            top = self.store.top_functions('org/repo', 'abc123', n=2)
+            assert top.column('funcao').to_pylist() == ['f1', 'f3']
+        finally:
+            self.tearDown()
+
+    def test_top_functions_nulls_last(self):
+        """Test that functions without the metric come after the ranked ones."""
+        self.setUp()
+        try:
+            path = self.store.table_path('org/repo', 'abc123', 'funcoes')
+            top = store.top_functions(path, n=4, by='halstead_effort')
+            assert top.column('funcao').to_pylist() == ['f2', 'f3', 'f0', 'f1']
+        finally:
+            self.tearDown()
+
+    def test_write_table(self):
+        """Test writing an in-memory table next to the streamed ones."""
+        self.setUp()
+        try:
+            table = pa.table({'arquivo': ['a.py'], 'commits': [3]})
+            self.store.write_table('org/repo', 'abc123', 'churn', table)
+            assert self.store.read_table('org/repo', 'abc123', 'churn').equals(table)
+        finally:
+            self.tearDown()
+
+    def test_parts_are_idempotent_and_merged_in_order(self):
+        """Test that parts are written once and merged by identifier."""
+        self.setUp()
+        try:
+            assert self.store.write_part('org/repo', 'abc123', 'churn', '00001', pa.table({'commits': [2]}))
+            assert self.store.write_part('org/repo', 'abc123', 'churn', '00000', pa.table({'commits': [1]}))
+            assert not self.store.write_part('org/repo', 'abc123', 'churn', '00000', pa.table({'commits': [9]}))
+            assert self.store.parts('org/repo', 'abc123', 'churn') == ['00000', '00001']
+            self.store.merge_parts('org/repo', 'abc123', 'churn')
+            assert self.store.read_table('org/repo', 'abc123', 'churn')['commits'].to_pylist() == [1, 2]
+            # As partes não aparecem como revisão nem deixam temporários
+            assert self.store.revisions('org/repo') == ['abc123']
+            assert not [name for _, _, names in os.walk(self.temp_dir) for name in names
+                        if name.endswith('.tmp')]
+            empty = self.store.merge_parts('org/repo', 'abc123', 'classes', schema=sinks.CK_METRICS_SCHEMA)
+            assert self.store.read_table('org/repo', 'abc123', 'classes').num_rows == 0 and empty
+        finally:
+            self.tearDown()
+
+    def test_top_functions_empty_table(self):
+        """Test top-N query on an empty table."""
+        empty = sinks.FUNCTION_METRICS_SCHEMA.empty_table()
+        assert store.top_functions(empty, n=5).num_rows == 0
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,68 @@
+import pytest
+import os
+import tempfile
+import shutil
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import datetime
+
+import profiling
+import timeline
+import utils
+from benchmarks.synthetic import generate_git_history, generate_module_source, _git, _commit
+
+
+class TestCommitTimeline:
+    def setUp(self):
+        """Create a synthetic repository with one commit per day."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.history = generate_git_history(self.temp_dir, n_files=4, classes_per_file=1,
+                                            methods_per_class=2, n_commits=8, churn=0.5)
+
+    def tearDown(self):
+        """Clean up test environment."""
+        shutil.rmtree(self.temp_dir)
+
+    def test_matches_git_rev_list(self):
+        """Test that commit_at() resolves the same commit as get_commit_hash_by_date()."""
+        self.setUp()
+        try:
+            index = timeline.CommitTimeline.from_git(self.temp_dir, 'master')
+            assert len(index) == len(self.history)
+            assert index.tip == self.history[-1][0]
+            for date in ['2024-01-01', '2024-01-03 12:00:00', '2024-01-05', '2024-01-08',
+                         '2030-01-01', datetime(2024, 1, 4, 23, 59)]:
+                expected = utils.get_commit_hash_by_date(self.temp_dir, date, branch='master')
+                assert index.commit_at(date) == expected
+            with pytest.raises(ValueError):
+                index.commit_at('2023-12-31')
+        finally:
+            self.tearDown()
+
+    def test_cache_invalidation(self):
+        """Test that the stored index is reused until the branch moves."""
+        self.setUp()
+        try:
+            perfil = profiling.RunProfile(name='timeline')
+            with perfil.activate():
+                first = timeline.load_timeline(self.temp_dir, 'master')
+                assert os.path.exists(timeline.timeline_path(self.temp_dir, 'master'))
+                again = timeline.load_timeline(self.temp_dir, 'master')
+                assert again.tip == first.tip
+
+                with open(os.path.join(self.temp_dir, 'extra.py'), 'w') as f:
+                    f.write(generate_module_source(99, 1, 1))
+                _git(self.temp_dir, 'add', '-A')
+                new_tip = _commit(self.temp_dir, 'Extra', datetime(2024, 2, 1),
+                                  ('Dev', 'dev@example.com'))
+                updated = timeline.load_timeline(self.temp_dir, 'master')
+            assert updated.tip == new_tip
+            assert updated.commit_at('2024-02-02') == new_tip
+            assert perfil.caches['timeline'] == [1, 2]
+        finally:
+            self.tearDown()
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -2,6 +2,7 @@ import pytest
 import os
 import tempfile
 import shutil
+import subprocess
 from unittest.mock import patch, MagicMock
 from datetime import datetime
 import sys
@@ -57,6 +58,81 @@ class TestRepositoryCloning:
             self.tearDown()
 
 
+class TestPartialClone:
+    def setUp(self):
+        """Serve a synthetic repository via file:// with partial clone support."""
+        from benchmarks.synthetic import generate_git_history
+        self.temp_dir = tempfile.mkdtemp()
+        source = os.path.join(self.temp_dir, 'source')
+        self.history = generate_git_history(source, n_files=10, classes_per_file=1,
+                                            methods_per_class=2, n_commits=6, churn=0.3)
+        bare = os.path.join(self.temp_dir, 'server', 'org', 'repo.git')
+        self._git(self.temp_dir, 'clone', '-q', '--bare', source, bare)
+        self._git(bare, 'config', 'uploadpack.allowFilter', 'true')
+        self._git(bare, 'config', 'uploadpack.allowAnySHA1InWant', 'true')
+        self.base_url = f"file://{os.path.join(self.temp_dir, 'server')}"
+        self.clones = os.path.join(self.temp_dir, 'clones')
+        self.repo = os.path.join(self.clones, 'org', 'repo')
+
+    def tearDown(self):
+        """Clean up test environment."""
+        shutil.rmtree(self.temp_dir)
+
+    def _git(self, path, *args):
+        return subprocess.run(['git', '-C', path, *args], capture_output=True, text=True,
+                              check=True).stdout
+
+    def _missing(self, revisions):
+        listed = self._git(self.repo, 'rev-list', '--objects', '--no-walk', '--missing=print',
+                           *revisions)
+        return [line for line in listed.splitlines() if line.startswith('?')]
+
+    def _clone(self, **options):
+        with patch('utils.CLONE_BASE_PATH', self.clones), patch('utils.save_current_revision_repo'):
+            return utils.clone_repo({'org': 'repo'}, base_url=self.base_url, **options)
+
+    def test_blobless_clone_and_prefetch(self):
+        """Test that only the blobs of the analyzed revisions are fetched."""
+        self.setUp()
+        try:
+            assert self._clone(partial=True)
+            assert utils.is_partial_clone(self.repo)
+            markers = [self.history[0][0], self.history[-1][0]]
+            assert self._missing(markers)
+
+            assert utils.prefetch_blobs(self.repo, markers) > 0
+            assert self._missing(markers) == []
+            assert self._missing([self.history[2][0]])
+
+            # Sem acesso ao servidor, o checkout dos marcos não pode buscar nada
+            self._git(self.repo, 'remote', 'set-url', 'origin', 'file:///nonexistent')
+            with patch('utils.save_current_revision_repo'):
+                assert utils.checkout_git_revision(self.repo, markers[0])
+            assert utils.prefetch_blobs(self.repo, markers) == 0
+        finally:
+            self.tearDown()
+
+    def test_shallow_since_earliest_marker(self):
+        """Test that the history is bounded by --shallow-since."""
+        self.setUp()
+        try:
+            assert self._clone(partial=True, shallow_since=self.history[3][1])
+            count = int(self._git(self.repo, 'rev-list', '--count', 'HEAD'))
+            assert count == len(self.history) - 3
+        finally:
+            self.tearDown()
+
+    def test_full_clone_is_not_partial(self):
+        """Test that prefetch is a no-op on regular clones."""
+        self.setUp()
+        try:
+            assert self._clone()
+            assert not utils.is_partial_clone(self.repo)
+            assert utils.prefetch_blobs(self.repo, [self.history[0][0]]) == 0
+        finally:
+            self.tearDown()
+
+
 class TestRepositoryListing:
     def setUp(self):
         """Set up test directory structure."""
@@ -135,7 +211,9 @@ class TestGitOperations:
         try:
             revisions = utils.get_git_revisions(self.temp_dir)
             if revisions:
-                result = utils.checkout_git_revision(self.temp_dir, revisions[0])
+                # A revisão atual é gravada em <BASE_DIR>/current: mantém o arquivo no diretório temporário
+                with patch('utils.BASE_DIR', self.temp_dir):
+                    result = utils.checkout_git_revision(self.temp_dir, revisions[0])
                 assert result is True
         finally:
             self.tearDown()
@@ -144,7 +222,8 @@ class TestGitOperations:
         """Test checking out invalid git revision."""
         self.setUp()
         try:
-            result = utils.checkout_git_revision(self.temp_dir, "invalid_hash")
+            with patch('utils.BASE_DIR', self.temp_dir):
+                result = utils.checkout_git_revision(self.temp_dir, "invalid_hash")
             assert result is False
         finally:
             self.tearDown()
@@ -198,11 +277,13 @@ class TestRevisionManagement:
         """Test saving current revision to config file."""
         self.setUp()
         try:
-            utils.save_current_revision_repo(self.temp_dir, "abc123")
+            with patch('utils.BASE_DIR', self.temp_dir):
+                utils.save_current_revision_repo(self.temp_dir, "abc123")
             
             # Check if config file was created
-            config_files = [f for f in os.listdir(self.temp_dir) if f.endswith('.ciconf')]
-            assert len(config_files) >= 0  # May or may not create file depending on implementation
+            config_files = [f for f in os.listdir(os.path.join(self.temp_dir, 'current'))
+                            if f.endswith('.ciconf')]
+            assert config_files == [f"{os.path.basename(self.temp_dir)}.ciconf"]
         finally:
             self.tearDown()
     
@@ -0,0 +1,88 @@
+import pytest
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pyarrow as pa
+
+import sinks
+import views
+
+
+def _files():
+    rows = [('/repo/app/core/a.py', 100, 10.0, 20.0),
+            ('/repo/app/core/b.py', 50, 2.0, 80.0),
+            ('/repo/app/web/c.py', 30, 4.0, 60.0),
+            ('/repo/main.js', 40, 3.0, None),
+            ('/repo/setup.py', 10, 1.0, 90.0)]
+    return pa.Table.from_pylist(
+        [{'arquivo': path, 'loc': sloc + 5, 'sloc': sloc, 'average_complexity': cc,
+          'maintainability_index': mi} for path, sloc, cc, mi in rows],
+        schema=sinks.FILE_METRICS_SCHEMA)
+
+
+def _classes():
+    rows = [('/repo/app/core/a.py', 'A', 10, 3), ('/repo/app/core/a.py', 'B', 4, 1),
+            ('/repo/app/web/c.py', 'C', 7, 5)]
+    return pa.Table.from_pylist(
+        [{'arquivo': path, 'classe': name, 'WMC': wmc, 'DIT': 1, 'NOC': 0, 'RFC': wmc,
+          'CBO': cbo, 'LCOM': 0} for path, name, wmc, cbo in rows],
+        schema=sinks.CK_METRICS_SCHEMA)
+
+
+class TestDirectoryAggregation:
+    def test_directory_column(self):
+        """Test directories relative to the root, with truncation."""
+        paths = pa.chunked_array([['/repo/app/core/a.py', '/repo/main.js', 'other/x.py']])
+        assert views.directory_column(paths, root='/repo').to_pylist() == ['app/core', '.', 'other']
+        assert views.directory_column(paths, root='/repo', depth=1).to_pylist() == ['app', '.', 'other']
+
+    def test_file_aggregation(self):
+        """Test the per-directory view of the file metrics table."""
+        table = views.aggregate_by_directory(_files(), 'arquivos', root='/repo')
+        assert table.column('diretorio').to_pylist() == ['.', 'app/core', 'app/web']
+        core = table.to_pylist()[1]
+        assert core['arquivos'] == 2
+        assert core['sloc'] == 150
+        assert core['average_complexity'] == 6.0
+        assert core['min_maintainability_index'] == 20.0
+        # Nulos (MI de main.js) não entram na média
+        assert table.to_pylist()[0]['maintainability_index'] == 90.0
+
+    def test_class_aggregation(self):
+        """Test the per-directory view of the C&K table, truncated to one level."""
+        table = views.aggregate_by_directory(_classes(), 'classes', root='/repo', depth=1)
+        assert table.to_pylist() == [{'diretorio': 'app', 'classes': 3, 'WMC': 7.0, 'max_WMC': 10,
+                                      'DIT': 1.0, 'CBO': 3.0, 'max_CBO': 5, 'RFC': 7.0, 'LCOM': 0.0}]
+        with pytest.raises(ValueError):
+            views.aggregate_by_directory(_classes(), 'funcoes')
+
+
+class TestQueryTable:
+    def test_paging(self):
+        """Test that only the requested page is returned, clamped to the last page."""
+        page, total, pages = views.query_table(_files(), page=1, page_size=2)
+        assert (total, pages) == (5, 3)
+        assert page.column('arquivo').to_pylist() == ['/repo/app/web/c.py', '/repo/main.js']
+        last, _, _ = views.query_table(_files(), page=10, page_size=2)
+        assert last.column('arquivo').to_pylist() == ['/repo/setup.py']
+
+    def test_filter_and_sort(self):
+        """Test text search, numeric ranges and sorting with nulls last."""
+        page, total, _ = views.query_table(_files(), search='CORE', sort_by='sloc', descending=True)
+        assert total == 2
+        assert page.column('sloc').to_pylist() == [100, 50]
+        page, total, _ = views.query_table(_files(), ranges={'average_complexity': (2.0, 5.0)},
+                                           sort_by='sloc', descending=False)
+        assert page.column('sloc').to_pylist() == [30, 40, 50]
+        page, _, _ = views.query_table(_files(), sort_by='maintainability_index')
+        assert page.column('maintainability_index').to_pylist()[-1] is None
+
+    def test_empty_result(self):
+        """Test a filter that matches nothing."""
+        page, total, pages = views.query_table(_classes(), search='inexistente')
+        assert (page.num_rows, total, pages) == (0, 0, 1)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,125 @@
+import pytest
+import os
+import tempfile
+import shutil
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import analytics
+import sinks
+import store
+import workqueue
+from benchmarks.synthetic import generate_git_history
+
+
+class TestWorkQueues:
+    def setUp(self):
+        """Create a synthetic repository and plan its work units."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.repo = os.path.join(self.temp_dir, 'repo')
+        self.history = generate_git_history(self.repo, n_files=12, classes_per_file=1,
+                                            methods_per_class=2, n_commits=3, churn=0.5)
+        self.revisions = [commit for commit, _ in self.history]
+        self.units = workqueue.plan_units('org/repo', self.repo, self.revisions + ['HEAD'], chunk_size=5)
+
+    def tearDown(self):
+        """Clean up temporary directory."""
+        shutil.rmtree(self.temp_dir)
+
+    def _expected(self):
+        # HEAD está na última revisão do histórico sintético
+        records = analytics.iter_file_metrics(self.repo, workers=1)
+        return sorted(sinks.file_metric_rows(records), key=lambda row: row['arquivo'])
+
+    def test_plan_units(self):
+        """Test chunking per revision, with HEAD resolved to a hash already planned."""
+        self.setUp()
+        try:
+            assert len(self.units) == 9
+            assert [unit.revision for unit in self.units[::3]] == self.revisions
+            assert [len(unit.files) for unit in self.units[:3]] == [5, 5, 2]
+            assert {unit.n_chunks for unit in self.units} == {3}
+            assert len({unit.unit_id for unit in self.units}) == 9
+            unit = self.units[4]
+            assert workqueue.WorkUnit.from_dict(unit.to_dict()).to_dict() == unit.to_dict()
+        finally:
+            self.tearDown()
+
+    @pytest.mark.parametrize('spec', ['local', 'processos', 'spool'])
+    def test_workers_merge_into_store(self, spec):
+        """Test that several workers produce the same tables as a direct analysis."""
+        self.setUp()
+        try:
+            output = os.path.join(self.temp_dir, 'exports')
+            fila = workqueue.open_queue(os.path.join(self.temp_dir, 'fila') if spec == 'spool' else spec)
+            counts = workqueue.run_workers(fila, output, self.units, processes=3, idle_timeout=0.3)
+            assert counts == {'processada': 9, 'existente': 0, 'falha': 0}
+
+            results = store.ResultStore(output)
+            assert results.revisions('org/repo') == sorted(self.revisions)
+            table = results.read_table('org/repo', self.revisions[-1], 'arquivos')
+            assert table.to_pylist() == [
+                {name: row.get(name) for name in sinks.FILE_METRICS_SCHEMA.names} for row in self._expected()]
+            assert results.read_table('org/repo', self.revisions[-1], 'classes').num_rows == 12
+            assert results.read_table('org/repo', self.revisions[-1], 'funcoes').num_rows > 12
+        finally:
+            self.tearDown()
+
+    def test_reprocessing_is_idempotent(self):
+        """Test that units already written are not analyzed or duplicated again."""
+        self.setUp()
+        try:
+            output = os.path.join(self.temp_dir, 'exports')
+            workqueue.run_workers(workqueue.LocalQueue(), output, self.units[:3], processes=2, idle_timeout=0.1)
+            results = store.ResultStore(output)
+            before = results.read_table('org/repo', self.revisions[0], 'arquivos')
+            counts = workqueue.run_workers(workqueue.LocalQueue(), output, self.units[:3], processes=2,
+                                           idle_timeout=0.1)
+            assert counts == {'processada': 0, 'existente': 3, 'falha': 0}
+            assert results.read_table('org/repo', self.revisions[0], 'arquivos').equals(before)
+        finally:
+            self.tearDown()
+
+    def test_spool_claims_failures_and_requeue(self):
+        """Test spool reservations, failure records and stale claim recovery."""
+        self.setUp()
+        try:
+            fila = workqueue.SpoolQueue(os.path.join(self.temp_dir, 'fila'), poll_interval=0.01)
+            broken = workqueue.WorkUnit('org/repo', self.repo, 'f' * 40, 0, 1, ['pkg_0/module_0.py'])
+            fila.put_many([self.units[0], self.units[0], broken])
+            assert fila.counts()['pendentes'] == 2
+
+            claimed = fila.get(timeout=0)
+            assert claimed.unit_id in {broken.unit_id, self.units[0].unit_id}
+            assert fila.counts()['em_andamento'] == 1
+            assert fila.requeue_stale(max_age=-1) == 1
+            assert fila.counts()['pendentes'] == 2
+
+            counts = workqueue.run_worker(fila, os.path.join(self.temp_dir, 'exports'), idle_timeout=0)
+            assert counts == {'processada': 1, 'existente': 0, 'falha': 1}
+            assert fila.counts() == {'pendentes': 0, 'em_andamento': 0, 'concluidas': 1, 'falhas': 1}
+            # Unidades concluídas não voltam à fila
+            fila.put(self.units[0])
+            assert fila.get(timeout=0) is None
+        finally:
+            self.tearDown()
+
+    def test_spool_task_done_after_requeue(self):
+        """Test that finishing a unit whose claim was requeued does not raise."""
+        self.setUp()
+        try:
+            fila = workqueue.SpoolQueue(os.path.join(self.temp_dir, 'fila'), poll_interval=0.01)
+            fila.put_many(self.units[:2])
+            first, second = fila.get(timeout=0), fila.get(timeout=0)
+            # Análises mais longas que max_age: as reservas voltam para pendentes
+            assert fila.requeue_stale(max_age=-1) == 2
+            fila.task_done(first)
+            fila.task_done(second, error='falhou')
+            assert fila.counts() == {'pendentes': 1, 'em_andamento': 0, 'concluidas': 1, 'falhas': 0}
+            assert fila.get(timeout=0).unit_id == second.unit_id
+        finally:
+            self.tearDown()
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
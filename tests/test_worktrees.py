@@ -0,0 +1,109 @@
+import pytest
+import os
+import tempfile
+import shutil
+import subprocess
+import sys
+import threading
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import analytics
+import profiling
+import sinks
+import worktrees
+from benchmarks.synthetic import generate_git_history
+
+
+class TestWorktreePool:
+    def setUp(self):
+        """Create a synthetic repository with several revisions."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.history = generate_git_history(self.temp_dir, n_files=6, classes_per_file=1,
+                                            methods_per_class=2, n_commits=6, churn=0.5)
+        self.revisions = [self.history[i][0] for i in (0, 2, 3, 5)]
+
+    def tearDown(self):
+        """Clean up test environment."""
+        shutil.rmtree(self.temp_dir)
+
+    def _head(self, path):
+        return subprocess.run(['git', '-C', path, 'rev-parse', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+
+    def _metrics(self, path, root=None):
+        records = analytics.iter_file_metrics(path, workers=1)
+        if root:
+            records = sinks.rebase_paths(records, path, root)
+        return sorted(sinks.file_metric_rows(records), key=lambda row: row['arquivo'])
+
+    def test_parallel_map_matches_sequential(self):
+        """Test that each revision is analyzed in its own worktree, as in a checkout."""
+        self.setUp()
+        try:
+            main_head = self._head(self.temp_dir)
+            with worktrees.WorktreePool(self.temp_dir, size=4) as pool:
+                results = pool.map(lambda revision, path: (self._head(path),
+                                                           self._metrics(path, self.temp_dir)),
+                                   self.revisions)
+            assert [head for head, _ in results] == self.revisions
+            # O clone principal não é tocado
+            assert self._head(self.temp_dir) == main_head
+
+            for revision, (_, metrics) in zip(self.revisions, results):
+                subprocess.run(['git', '-C', self.temp_dir, 'checkout', '-q', revision], check=True)
+                assert metrics == self._metrics(self.temp_dir)
+            assert subprocess.run(['git', '-C', self.temp_dir, 'worktree', 'list'], capture_output=True,
+                                  text=True).stdout.count('\n') == 1
+        finally:
+            self.tearDown()
+
+    def test_lease_limits_and_reuse(self):
+        """Test that leases block at the pool size and worktrees are recycled."""
+        self.setUp()
+        try:
+            pool = worktrees.WorktreePool(self.temp_dir, size=2)
+            active, peak, lock = [0], [0], threading.Lock()
+
+            def task(revision, path):
+                with lock:
+                    active[0] += 1
+                    peak[0] = max(peak[0], active[0])
+                time.sleep(0.05)
+                with lock:
+                    active[0] -= 1
+                return path
+
+            perfil = profiling.RunProfile(name='worktrees')
+            with perfil.activate():
+                paths = pool.map(task, self.revisions)
+            assert peak[0] == 2
+            assert len(set(paths)) == 2
+            assert perfil.stages['checkout'].calls == 4
+
+            # Um novo pool reaproveita os worktrees deixados no disco
+            reopened = worktrees.WorktreePool(self.temp_dir, size=2)
+            with reopened.lease(self.revisions[-1]) as path:
+                assert path in paths
+                assert self._head(path) == self.revisions[-1]
+            reopened.close()
+            assert not any(os.path.exists(path) for path in paths)
+        finally:
+            self.tearDown()
+
+    def test_invalid_revision(self):
+        """Test that a failed checkout is raised and the worktree is recreated."""
+        self.setUp()
+        try:
+            with worktrees.WorktreePool(self.temp_dir, size=1) as pool:
+                with pytest.raises(RuntimeError):
+                    with pool.lease('0' * 40):
+                        pass
+                with pool.lease(self.revisions[1]) as path:
+                    assert self._head(path) == self.revisions[1]
+        finally:
+            self.tearDown()
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,251 @@
+import datetime
+import os
+import subprocess
+from typing import Union
+
+import numpy as np
+
+import profiling
+
+# Subdiretório do diretório git (.git) onde ficam os índices da ferramenta
+INDEX_DIR = 'code_insights'
+
+
+def _git(repo_path: str, *args) -> str:
+    try:
+        proc = subprocess.run(['git', '-C', repo_path, *args], stdout=subprocess.PIPE,
+                              stderr=subprocess.PIPE, text=True, check=True)
+    except subprocess.CalledProcessError as e:
+        raise RuntimeError(f"Erro ao executar Git: {e.stderr.strip()}") from e
+    return proc.stdout
+
+
+def index_dir(repo_path: str) -> str:
+    """
+    Retorna o diretório dos índices da ferramenta dentro do diretório git do clone.
+
+    Args:
+        repo_path: Caminho do repositório (ou de um worktree dele)
+
+    Returns:
+        str: <git-common-dir>/code_insights (criado se necessário)
+
+    Note:
+        Os índices ficam dentro de .git para não aparecerem como repositórios em
+        utils.listar_repos_clonados() e serem removidos junto com o clone.
+    """
+    common_dir = _git(repo_path, 'rev-parse', '--git-common-dir').strip()
+    path = os.path.join(repo_path, common_dir, INDEX_DIR)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def to_timestamp(date: Union[str, datetime.date, datetime.datetime]) -> int:
+    """
+    Converte uma data para timestamp Unix.
+
+    Args:
+        date: datetime, date ou string ISO ('2025-06-19', '2025-06-19 14:30:00').
+              Datas sem hora são tratadas como 00:00:00; datas sem fuso, como
+              horário local (mesma interpretação do git).
+
+    Returns:
+        int: Segundos desde a época
+    """
+    if isinstance(date, str):
+        date = datetime.datetime.fromisoformat(date.strip())
+    elif not isinstance(date, datetime.datetime):
+        date = datetime.datetime.combine(date, datetime.time.min)
+    return int(date.timestamp())
+
+
+class CommitTimeline:
+    """
+    Índice dos commits de um branch por data de commit.
+
+    Permite resolver marcos temporais (commit vigente em uma data) sem
+    chamar o git a cada consulta.
+
+    Attributes:
+        branch (str): Branch indexado
+        tip (str): Hash do topo do branch quando o índice foi gerado
+        hashes (np.ndarray): Hashes na ordem de `git rev-list` (mais recente primeiro)
+        timestamps (np.ndarray): Datas de commit (int64), na mesma ordem
+    """
+
+    def __init__(self, branch: str, tip: str, hashes: np.ndarray, timestamps: np.ndarray):
+        self.branch = branch
+        self.tip = tip
+        self.hashes = hashes
+        self.timestamps = timestamps
+        # Mínimo acumulado das datas na ordem do rev-list: o primeiro commit com
+        # data <= t é o primeiro índice em que o mínimo acumulado fica <= t
+        self._running_min = np.minimum.accumulate(timestamps) if len(timestamps) else timestamps
+
+    def __len__(self):
+        return len(self.hashes)
+
+    @classmethod
+    def from_git(cls, repo_path: str, branch: str = 'master') -> 'CommitTimeline':
+        """
+        Gera o índice com uma única chamada a `git rev-list`.
+
+        Args:
+            repo_path: Caminho do repositório
+            branch: Branch (ou revisão) indexado
+
+        Returns:
+            CommitTimeline: Índice do branch
+
+        Raises:
+            RuntimeError: Se o comando Git falhar
+        """
+        output = _git(repo_path, 'rev-list', '--format=%H %ct', '--no-commit-header', branch, '--')
+        fields = output.split()
+        hashes = np.array(fields[0::2], dtype='S40')
+        timestamps = np.array(fields[1::2], dtype=np.int64)
+        tip = hashes[0].decode() if len(hashes) else ''
+        return cls(branch, tip, hashes, timestamps)
+
+    def commit_at(self, date: Union[str, datetime.date, datetime.datetime]) -> str:
+        """
+        Retorna o último commit com data de commit anterior ou igual à data.
+
+        Args:
+            date: Data do marco (ver to_timestamp)
+
+        Returns:
+            str: Hash do commit
+
+        Raises:
+            ValueError: Se não houver commit até a data
+
+        Note:
+            Equivale a `git rev-list -1 --before=<data> <branch>` (ver
+            utils.get_commit_hash_by_date), com busca binária no índice.
+        """
+        moment = to_timestamp(date)
+        # _running_min é não crescente; busca o primeiro índice com valor <= moment
+        position = np.searchsorted(-self._running_min, -moment, side='left')
+        if position >= len(self.hashes):
+            raise ValueError(f"Nenhum commit encontrado até {date} em {self.branch}")
+        return self.hashes[position].decode()
+
+    def save(self, path: str) -> str:
+        """
+        Grava o índice em um arquivo .npz.
+
+        Args:
+            path: Caminho do arquivo
+
+        Returns:
+            str: Caminho do arquivo gravado
+        """
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary = f"{path}.tmp.npz"
+        np.savez(temporary, branch=self.branch, tip=self.tip, hashes=self.hashes,
+                 timestamps=self.timestamps)
+        os.replace(temporary, path)
+        return path
+
+    @classmethod
+    def load(cls, path: str) -> 'CommitTimeline':
+        """
+        Carrega um índice gravado por save().
+
+        Args:
+            path: Caminho do arquivo
+
+        Returns:
+            CommitTimeline: Índice carregado
+
+        Raises:
+            FileNotFoundError: Se o arquivo não existir
+        """
+        with np.load(path) as data:
+            return cls(str(data['branch']), str(data['tip']), data['hashes'], data['timestamps'])
+
+
+def timeline_path(repo_path: str, branch: str = 'master') -> str:
+    """
+    Retorna o caminho do índice de um branch.
+
+    Args:
+        repo_path: Caminho do repositório
+        branch: Nome do branch
+
+    Returns:
+        str: <git-common-dir>/code_insights/timeline-<branch>.npz
+    """
+    return os.path.join(index_dir(repo_path), f"timeline-{branch.replace('/', '__')}.npz")
+
+
+def update_timeline(repo_path: str, branch: str = 'master') -> CommitTimeline:
+    """
+    Regera e grava o índice de um branch (ex: após um fetch).
+
+    Args:
+        repo_path: Caminho do repositório
+        branch: Branch indexado
+
+    Returns:
+        CommitTimeline: Índice atualizado
+
+    Raises:
+        RuntimeError: Se o comando Git falhar
+    """
+    timeline = CommitTimeline.from_git(repo_path, branch)
+    timeline.save(timeline_path(repo_path, branch))
+    return timeline
+
+
+def load_timeline(repo_path: str, branch: str = 'master') -> CommitTimeline:
+    """
+    Carrega o índice de um branch, regerando-o se o branch tiver mudado.
+
+    Args:
+        repo_path: Caminho do repositório
+        branch: Branch indexado
+
+    Returns:
+        CommitTimeline: Índice do branch
+
+    Raises:
+        RuntimeError: Se o comando Git falhar
+
+    Note:
+        A validade do índice é conferida com um `git rev-parse` do branch;
+        acertos e falhas são registrados no perfil ativo (cache 'timeline').
+    """
+    path = timeline_path(repo_path, branch)
+    tip = _git(repo_path, 'rev-parse', '--verify', f'{branch}^{{commit}}').strip()
+    if os.path.exists(path):
+        timeline = CommitTimeline.load(path)
+        if timeline.tip == tip:
+            profiling.record_cache('timeline', True)
+            return timeline
+    profiling.record_cache('timeline', False)
+    return update_timeline(repo_path, branch)
+
+
+def commit_timestamps(repo_path: str, revisions: list) -> dict:
+    """
+    Obtém as datas de commit de várias revisões com uma única chamada ao git.
+
+    Args:
+        repo_path: Caminho do repositório
+        revisions: Hashes (completos ou abreviados) das revisões
+
+    Returns:
+        dict: {revisão: timestamp Unix}; revisões desconhecidas no clone são omitidas
+
+    Raises:
+        RuntimeError: Se o comando Git falhar
+    """
+    if not revisions:
+        return {}
+    output = _git(repo_path, 'log', '--no-walk=unsorted', '--ignore-missing',
+                  '--format=%H %ct', *revisions)
+    dates = dict(line.split() for line in output.splitlines())
+    return {revision: int(dates[full]) for revision in revisions
+            for full in dates if full.startswith(revision)}
@@ -7,28 +7,55 @@ from decouple import config
 from pathlib import Path
 from typing import Union
 
+import profiling
+
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 CLONE_BASE_PATH = config('CLONE_REPOS_BASE')
 
-def clone_repo(repos_to_clone: dict) -> bool:
+def clone_repo(repos_to_clone: dict, partial: bool = False, depth: int = None,
+               shallow_since: Union[str, datetime] = None,
+               base_url: str = "https://github.com") -> bool:
     """
     Clona repositórios do GitHub.
     
     Args:
         repos_to_clone: Dict com formato {"owner": "repo_name"}
+        partial: Se True, faz um clone parcial sem blobs (--filter=blob:none e
+                 --no-checkout); o conteúdo dos arquivos é buscado apenas para as
+                 revisões analisadas (ver prefetch_blobs)
+        depth: Limita o histórico aos últimos `depth` commits (--depth)
+        shallow_since: Limita o histórico aos commits a partir desta data
+                       (--shallow-since), ex: o marco temporal mais antigo
+        base_url: Endereço base dos repositórios (ex: 'file:///srv/git' em testes)
         
     Returns:
         bool: True se todos os repos foram clonados com sucesso
+        
+    Note:
+        O clone parcial exige suporte a filtros no servidor (GitHub suporta;
+        em um repositório servido via file:// use uploadpack.allowFilter).
+        Sem suporte, o git ignora o filtro e faz um clone completo.
     """
     success = True
     
+    clone_options = {}
+    if partial:
+        clone_options.update({'filter': 'blob:none', 'no_checkout': True})
+    if depth:
+        clone_options['depth'] = depth
+    if shallow_since:
+        if isinstance(shallow_since, datetime):
+            shallow_since = shallow_since.strftime("%Y-%m-%d %H:%M:%S")
+        clone_options['shallow_since'] = str(shallow_since)
+    
     for owner, repo_name in repos_to_clone.items():
         try:
-            github_endpoint = f"https://github.com/{owner}/{repo_name}.git"
+            github_endpoint = f"{base_url}/{owner}/{repo_name}.git"
             clone_path = os.path.join(CLONE_BASE_PATH, owner, repo_name)
             
             print(f"Clonando {github_endpoint} para {clone_path}")
-            Repo.clone_from(github_endpoint, clone_path)
+            with profiling.stage('clone'):
+                Repo.clone_from(github_endpoint, clone_path, **clone_options)
             
             # Salva a revisão atual
             revisions = get_git_revisions(clone_path)
@@ -43,6 +70,109 @@ def clone_repo(repos_to_clone: dict) -> bool:
             
     return success
 
+def is_partial_clone(repo_path: str) -> bool:
+    """
+    Verifica se o repositório é um clone parcial (remote promisor).
+    
+    Args:
+        repo_path: Caminho para o repositório git local
+        
+    Returns:
+        bool: True se algum remote for promisor (clone com --filter)
+    """
+    result = subprocess.run(['git', '-C', repo_path, 'config', '--get-regexp', r'^remote\..*\.promisor$'],
+                            capture_output=True, text=True)
+    return any(line.split()[-1] == 'true' for line in result.stdout.splitlines())
+
+def prefetch_blobs(repo_path: str, revisions: list, remote: str = 'origin') -> int:
+    """
+    Busca de uma vez os blobs ausentes das revisões que serão analisadas.
+    
+    Em um clone parcial, cada checkout buscaria seus blobs sob demanda; aqui
+    os blobs de todas as revisões são pedidos ao servidor em um único fetch.
+    
+    Args:
+        repo_path: Caminho para o repositório git local
+        revisions: Revisões (hashes) cujos arquivos serão lidos
+        remote: Remote promisor do clone parcial
+        
+    Returns:
+        int: Número de blobs buscados (0 se o repositório não for um clone parcial)
+        
+    Raises:
+        RuntimeError: Se um comando Git falhar
+        
+    Note:
+        Usa 'git rev-list --objects --missing=print', que lista os objetos
+        ausentes sem disparar a busca sob demanda, e 'git fetch --stdin' com os
+        mesmos parâmetros que o git usa internamente para objetos de promisor.
+    """
+    if not revisions or not is_partial_clone(repo_path):
+        return 0
+    
+    try:
+        with profiling.stage('clone'):
+            listed = subprocess.run(
+                ['git', '-C', repo_path, 'rev-list', '--objects', '--no-walk', '--missing=print',
+                 *dict.fromkeys(revisions), '--'],
+                stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=True)
+            missing = list(dict.fromkeys(line[1:] for line in listed.stdout.splitlines()
+                                         if line.startswith('?')))
+            if missing:
+                subprocess.run(
+                    ['git', '-C', repo_path, '-c', 'fetch.negotiationAlgorithm=noop', 'fetch', remote,
+                     '--no-tags', '--no-write-fetch-head', '--recurse-submodules=no',
+                     '--filter=blob:none', '--stdin'],
+                    input='\n'.join(missing) + '\n',
+                    stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=True)
+    except subprocess.CalledProcessError as e:
+        raise RuntimeError(f"Erro ao executar Git: {e.stderr.strip()}") from e
+    return len(missing)
+
+def read_blobs(repo_path: str, revision: str, paths: list) -> dict:
+    """
+    Lê o conteúdo de arquivos de uma revisão direto do banco de objetos, sem checkout.
+    
+    Args:
+        repo_path: Caminho para o repositório git local
+        revision: Hash, branch ou tag
+        paths: Caminhos relativos (separador '/') dos arquivos
+        
+    Returns:
+        dict: {caminho: bytes}, na ordem de `paths`; caminhos inexistentes na
+              revisão (ou que não são arquivos) ficam de fora
+        
+    Raises:
+        RuntimeError: Se o comando Git falhar
+        
+    Note:
+        Usa um único 'git cat-file --batch' para todos os caminhos. Em clones
+        parciais, chame prefetch_blobs() antes para evitar buscas sob demanda.
+    """
+    if not paths:
+        return {}
+    request = ''.join(f"{revision}:{path}\n" for path in paths).encode('utf-8', errors='surrogateescape')
+    try:
+        with profiling.stage('checkout'):
+            output = subprocess.run(['git', '-C', repo_path, 'cat-file', '--batch'], input=request,
+                                    stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True).stdout
+    except subprocess.CalledProcessError as e:
+        raise RuntimeError(f"Erro ao executar Git: {e.stderr.decode(errors='replace').strip()}") from e
+    
+    blobs = {}
+    position = 0
+    for path in paths:
+        end = output.index(b'\n', position)
+        header = output[position:end].split()
+        position = end + 1
+        if len(header) != 3:
+            continue  # '<objeto> missing' ou '<objeto> ambiguous'
+        size = int(header[2])
+        if header[1] == b'blob':
+            blobs[path] = output[position:position + size]
+        position += size + 1
+    return blobs
+
 def listar_repos_clonados() -> list:
     """
     Lista todos os repositórios clonados no diretório base.
@@ -93,17 +223,10 @@ def get_git_revisions(repo_path: str, n: int = 100) -> list:
         list: Lista de hashes de commit, ou lista vazia em caso de erro
     """
     try:
-        # Change to repository directory
-        original_dir = os.getcwd()
-        os.chdir(repo_path)
-        
-        # Get commit hashes
-        result = subprocess.run(['git', 'log', f'-{n}', '--pretty=format:%H'],
+        # git -C em vez de os.chdir: seguro para chamadas em threads concorrentes
+        result = subprocess.run(['git', '-C', repo_path, 'log', f'-{n}', '--pretty=format:%H'],
                               capture_output=True,
                               text=True)
-                              
-        # Change back to original directory
-        os.chdir(original_dir)
         
         if result.returncode == 0:
             return result.stdout.split('\n')
@@ -127,17 +250,11 @@ def checkout_git_revision(repo_path: str, revision: str) -> bool:
         bool: True se o checkout foi bem-sucedido, False caso contrário
     """
     try:
-        # Change to repository directory
-        original_dir = os.getcwd()
-        os.chdir(repo_path)
-                
-        # Run git checkout command
-        result = subprocess.run(['git', 'checkout', revision], 
-                              capture_output=True,
-                              text=True)
-        
-        # Change back to original directory
-        os.chdir(original_dir)
+        # Run git checkout command (git -C: não altera o diretório do processo)
+        with profiling.stage('checkout'):
+            result = subprocess.run(['git', '-C', repo_path, 'checkout', revision], 
+                                  capture_output=True,
+                                  text=True)
         
         if result.returncode == 0:
             save_current_revision_repo(repo_path, revision)
@@ -290,13 +407,14 @@ def get_commit_hash_by_date(
         branch
     ]
     try:
-        proc = subprocess.run(
-            cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            check=True
-        )
+        with profiling.stage('resolve'):
+            proc = subprocess.run(
+                cmd,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                check=True
+            )
     except subprocess.CalledProcessError as e:
         raise RuntimeError(f"Erro ao executar Git: {e.stderr.strip()}") from e
 
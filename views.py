@@ -0,0 +1,152 @@
+import os
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# Agregações por diretório de cada tabela do ResultStore:
+# coluna de saída -> (coluna de entrada, função do group_by do Arrow)
+DIRECTORY_AGGREGATIONS = {
+    'arquivos': {
+        'arquivos': ('arquivo', 'count'),
+        'loc': ('loc', 'sum'),
+        'sloc': ('sloc', 'sum'),
+        'average_complexity': ('average_complexity', 'mean'),
+        'max_complexity': ('average_complexity', 'max'),
+        'maintainability_index': ('maintainability_index', 'mean'),
+        'min_maintainability_index': ('maintainability_index', 'min'),
+    },
+    'classes': {
+        'classes': ('classe', 'count'),
+        'WMC': ('WMC', 'mean'),
+        'max_WMC': ('WMC', 'max'),
+        'DIT': ('DIT', 'mean'),
+        'CBO': ('CBO', 'mean'),
+        'max_CBO': ('CBO', 'max'),
+        'RFC': ('RFC', 'mean'),
+        'LCOM': ('LCOM', 'mean'),
+    },
+}
+
+# Colunas de texto pesquisadas por padrão em query_table()
+SEARCH_COLUMNS = ('arquivo', 'classe', 'funcao', 'diretorio')
+
+
+def directory_column(paths, root: str = None, depth: int = None) -> pa.ChunkedArray:
+    """
+    Calcula o diretório de cada caminho de arquivo.
+
+    Args:
+        paths: Coluna (pa.Array/ChunkedArray) de caminhos de arquivo
+        root: Raiz do projeto, removida do início dos caminhos
+        depth: Número de níveis de diretório mantidos (None = diretório completo)
+
+    Returns:
+        pa.ChunkedArray: Diretórios relativos à raiz ('.' para arquivos na raiz)
+    """
+    if root:
+        prefix = os.path.join(root, '')
+        paths = pc.if_else(pc.starts_with(paths, prefix),
+                           pc.utf8_slice_codeunits(paths, len(prefix)), paths)
+    directories = pc.replace_substring_regex(paths, r'/?[^/]*$', '')
+    directories = pc.if_else(pc.equal(directories, ''), '.', directories)
+    return truncate_directories(directories, depth)
+
+
+def truncate_directories(directories, depth: int = None) -> pa.ChunkedArray:
+    """
+    Mantém apenas os primeiros níveis de uma coluna de diretórios.
+
+    Args:
+        directories: Coluna de diretórios relativos (ex: 'django/db/models')
+        depth: Número de níveis mantidos (None = diretório completo)
+
+    Returns:
+        pa.ChunkedArray: Diretórios truncados (ex: depth=2 -> 'django/db')
+    """
+    if not depth:
+        return directories
+    return pc.replace_substring_regex(directories, rf'^((?:[^/]+/){{{depth - 1}}}[^/]+)/.*$', r'\1')
+
+
+def aggregate_by_directory(table: pa.Table, kind: str = 'arquivos', root: str = None,
+                           depth: int = None) -> pa.Table:
+    """
+    Agrega uma tabela de resultados por diretório (pacote).
+
+    Args:
+        table: Tabela 'arquivos' (sinks.FILE_METRICS_SCHEMA) ou 'classes'
+               (sinks.CK_METRICS_SCHEMA)
+        kind: Tipo da tabela (chave de DIRECTORY_AGGREGATIONS)
+        root: Raiz do projeto, removida dos caminhos
+        depth: Número de níveis de diretório mantidos (None = diretório completo)
+
+    Returns:
+        pa.Table: Coluna 'diretorio' seguida das agregações de
+                  DIRECTORY_AGGREGATIONS[kind], em ordem alfabética de diretório
+
+    Raises:
+        ValueError: Se kind for desconhecido
+    """
+    if kind not in DIRECTORY_AGGREGATIONS:
+        raise ValueError(f"Tabela inválida: {kind} (use {', '.join(DIRECTORY_AGGREGATIONS)})")
+    aggregations = DIRECTORY_AGGREGATIONS[kind]
+    source_columns = list(dict.fromkeys(column for column, _ in aggregations.values()))
+    grouped = table.select(source_columns).append_column(
+        'diretorio', directory_column(table['arquivo'], root, depth))
+    result = grouped.group_by('diretorio').aggregate(
+        [(column, function) for column, function in aggregations.values()])
+    # group_by nomeia as colunas como <coluna>_<função>
+    renamed = {f"{column}_{function}": name for name, (column, function) in aggregations.items()}
+    result = result.rename_columns([renamed.get(name, name) for name in result.column_names])
+    result = result.select(['diretorio', *aggregations])
+    return result.take(pc.sort_indices(result, sort_keys=[('diretorio', 'ascending')]))
+
+
+def query_table(table: pa.Table, search: str = None, search_columns: tuple = SEARCH_COLUMNS,
+                ranges: dict = None, sort_by: str = None, descending: bool = False,
+                page: int = 0, page_size: int = 50) -> tuple:
+    """
+    Filtra, ordena e pagina uma tabela sem convertê-la inteira para pandas.
+
+    Args:
+        table: Tabela de resultados
+        search: Texto procurado (sem diferenciar maiúsculas) nas colunas de texto
+        search_columns: Colunas pesquisadas (as ausentes na tabela são ignoradas)
+        ranges: Filtros numéricos {coluna: (mínimo, máximo)}; None em um dos
+                lados deixa o intervalo aberto
+        sort_by: Coluna de ordenação (None mantém a ordem da tabela)
+        descending: Ordem decrescente
+        page: Página (a partir de 0); limitada à última página
+        page_size: Linhas por página
+
+    Returns:
+        tuple: (página como pa.Table, total de linhas após os filtros, número de páginas)
+
+    Note:
+        Filtros e ordenação são feitos pelo Arrow sobre as colunas; apenas as
+        linhas da página são materializadas (take/slice), de modo que só a
+        fatia visível precisa ser serializada para o navegador.
+    """
+    mask = None
+    if search:
+        columns = [name for name in search_columns if name in table.column_names]
+        for name in columns:
+            found = pc.fill_null(pc.match_substring(table[name], search, ignore_case=True), False)
+            mask = found if mask is None else pc.or_(mask, found)
+    for name, (low, high) in (ranges or {}).items():
+        for bound, compare in ((low, pc.greater_equal), (high, pc.less_equal)):
+            if bound is not None:
+                valid = pc.fill_null(compare(table[name], bound), False)
+                mask = valid if mask is None else pc.and_(mask, valid)
+    if mask is not None:
+        table = table.filter(mask)
+
+    total = table.num_rows
+    pages = max(1, -(-total // page_size))
+    page = min(max(page, 0), pages - 1)
+    start = page * page_size
+    if sort_by:
+        # Ordenação estável (nulos por último): páginas consecutivas não repetem linhas
+        indices = pc.sort_indices(table, sort_keys=[(sort_by, 'descending' if descending else 'ascending')])
+        return table.take(indices.slice(start, page_size)), total, pages
+    return table.slice(start, page_size), total, pages
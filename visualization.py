@@ -1,5 +1,8 @@
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
 import seaborn as sns
 import matplotlib.pyplot as plt 
 import streamlit as st
@@ -10,6 +13,21 @@ import datetime
 
 import analytics
 import issues
+import sinks
+import profiling
+import budgets
+import store
+import churn
+import diffs
+import evolution
+import hotspots
+import releases
+import reports
+import repositories
+import timeline
+import views
+import worktrees
+from data import repos
 
 import pdfkit
 import tempfile
@@ -94,7 +112,9 @@ def ck_metrics_to_dataframe(data: dict) -> pd.DataFrame:
     
     return df
 
-def exportar_dados_csv(hash_revision: str, repo_dir: str, project_name: str, output_dir: str = "exports") -> dict:
+def exportar_dados_csv(hash_revision: str, repo_dir: str, project_name: str, output_dir: str = "exports",
+                       filtros: dict = None, linguagens: tuple = ('python',),
+                       progresso=None, worktree: str = None) -> dict:
     """
     Exporta todos os dados de métricas para arquivos CSV.
     
@@ -103,6 +123,14 @@ def exportar_dados_csv(hash_revision: str, repo_dir: str, project_name: str, out
         repo_dir: Caminho para o diretório do repositório
         project_name: Nome do projeto
         output_dir: Diretório de saída para os arquivos CSV
+        filtros: Opções de descoberta e execução repassadas ao analytics
+                 (include, exclude, use_git, workers, budget)
+        linguagens: Linguagens incluídas nas métricas por arquivo
+        progresso: Callback opcional chamado com o número de arquivos já
+                   analisados durante a exportação
+        worktree: Árvore de trabalho já na revisão (ex: emprestada por
+                  worktrees.WorktreePool). Se informada, é analisada no lugar de
+                  repo_dir, sem checkout, e os caminhos são gravados sob repo_dir
         
     Returns:
         dict: Dicionário com os caminhos dos arquivos CSV gerados
@@ -110,22 +138,28 @@ def exportar_dados_csv(hash_revision: str, repo_dir: str, project_name: str, out
     Side Effects:
         - Cria automaticamente o diretório de saída e todos os subdiretórios necessários
         - Gera arquivos CSV com métricas do projeto (issues, métricas por arquivo, estatísticas, C&K)
-        - Faz checkout da revisão git especificada
+          e o relatório de arquivos que atingiram o orçamento (filtros['budget'])
+        - Grava as métricas por arquivo, por função e por classe em <output_dir>/<projeto>/<hash>/
+          (arquivos.parquet, funcoes.parquet e classes.parquet, ver store.ResultStore), além
+          das datas de criação das issues abertas (issues.parquet, usado por evolution.py)
+        - Faz checkout da revisão git especificada (apenas sem worktree)
         
     Note:
         A função agora garante a criação segura de diretórios aninhados, evitando erros
         de "diretório não existe" durante a exportação de arquivos CSV.
+        As métricas são analisadas em uma única passada e gravadas à medida que
+        cada arquivo termina (iter_file_metrics / iter_class_metrics), sem manter
+        o relatório completo da revisão em memória.
     """
     import os
     
     # Cria diretório de saída e todos os subdiretórios necessários
     os.makedirs(output_dir, exist_ok=True)
     
-    # Obtém os dados das métricas
-    utils.checkout_git_revision(repo_dir, hash_revision)
-    raw_halstead_report = analytics.get_project_metrics(repo_dir)
-    ck_report = analytics.get_ck_metrics(repo_dir)
-    statistics = analytics.get_project_statistics(raw_halstead_report, hash_revision)
+    if worktree is None:
+        utils.checkout_git_revision(repo_dir, hash_revision)
+        worktree = repo_dir
+    filtros = filtros or {}
     
     repo_org = repo_dir.split("/")[1] if len(repo_dir.split("/")) > 1 else "unknown"
     repo_name = repo_dir.split("/")[2] if len(repo_dir.split("/")) > 2 else project_name
@@ -134,6 +168,7 @@ def exportar_dados_csv(hash_revision: str, repo_dir: str, project_name: str, out
     base_filename = f"{project_name}_{hash_revision[:8]}"
     
     arquivos_gerados = {}
+    resultados = store.ResultStore(output_dir)
     
     try:
         # Exporta métricas de issues
@@ -145,15 +180,37 @@ def exportar_dados_csv(hash_revision: str, repo_dir: str, project_name: str, out
         metrics_df.to_csv(issues_path, index=False, encoding='utf-8')
         arquivos_gerados['issues'] = issues_path
         
+        # Datas de criação das issues, para as janelas de issues da evolução
+        colunas_issues = issues_df.reindex(columns=sinks.ISSUES_SCHEMA.names)
+        arquivos_gerados['issues_abertas'] = resultados.write_table(
+            project_name, hash_revision, 'issues',
+            pa.Table.from_pandas(colunas_issues, schema=sinks.ISSUES_SCHEMA, preserve_index=False))
+        
     except Exception as e:
         print(f"Erro ao exportar métricas de issues: {e}")
         arquivos_gerados['issues'] = None
     
-    # Exporta métricas por arquivo
+    # Exporta métricas por arquivo, acumulando as estatísticas na mesma passada
     projeto_path = os.path.join(output_dir, f"{base_filename}_metricas_arquivo.csv")
-    os.makedirs(os.path.dirname(projeto_path), exist_ok=True)
-    projeto_to_dataframe(raw_halstead_report).to_csv(projeto_path, index=False, encoding='utf-8')
+    accumulator = analytics.StatisticsAccumulator()
+    budget_report = budgets.BudgetReport()
+    # Métricas por função saem do mesmo parse e são gravadas em Parquet por revisão
+    with sinks.CSVSink(projeto_path, fieldnames=sinks.FILE_METRICS_SCHEMA.names) as projeto_sink, \
+            resultados.sink(project_name, hash_revision, 'arquivos',
+                            schema=sinks.FILE_METRICS_SCHEMA) as arquivos_sink, \
+            resultados.sink(project_name, hash_revision, 'funcoes',
+                            schema=sinks.FUNCTION_METRICS_SCHEMA) as funcoes_sink:
+        file_records = analytics.iter_file_metrics(worktree, languages=linguagens,
+                                                   budget_report=budget_report,
+                                                   with_functions=True, **filtros)
+        file_records = sinks.rebase_paths(file_records, worktree, repo_dir)
+        file_records = sinks.split_function_rows(file_records, funcoes_sink)
+        sinks.stream_to_sinks(sinks.file_metric_rows(file_records), projeto_sink, arquivos_sink,
+                              accumulator, on_record=progresso)
+    statistics = accumulator.statistics(hash_revision)
     arquivos_gerados['metricas_arquivo'] = projeto_path
+    arquivos_gerados['arquivos'] = resultados.table_path(project_name, hash_revision, 'arquivos')
+    arquivos_gerados['funcoes'] = resultados.table_path(project_name, hash_revision, 'funcoes')
     
     # Exporta estatísticas do projeto
     stats_path = os.path.join(output_dir, f"{base_filename}_estatisticas.csv")
@@ -163,12 +220,203 @@ def exportar_dados_csv(hash_revision: str, repo_dir: str, project_name: str, out
     
     # Exporta métricas C&K
     ck_path = os.path.join(output_dir, f"{base_filename}_ck_metricas.csv")
-    os.makedirs(os.path.dirname(ck_path), exist_ok=True)
-    ck_metrics_to_dataframe(ck_report).to_csv(ck_path, index=False, encoding='utf-8')
+    with sinks.CSVSink(ck_path, fieldnames=sinks.CK_METRICS_SCHEMA.names) as ck_sink, \
+            resultados.sink(project_name, hash_revision, 'classes',
+                            schema=sinks.CK_METRICS_SCHEMA) as classes_sink:
+        class_records = analytics.iter_class_metrics(worktree, budget_report=budget_report, **filtros)
+        class_records = sinks.rebase_paths(class_records, worktree, repo_dir)
+        sinks.stream_to_sinks(sinks.class_metric_rows(class_records), ck_sink, classes_sink)
     arquivos_gerados['ck_metricas'] = ck_path
+    arquivos_gerados['classes'] = resultados.table_path(project_name, hash_revision, 'classes')
+    
+    # Exporta o relatório dos arquivos que atingiram o orçamento (apenas o cabeçalho se nenhum)
+    orcamento_path = os.path.join(output_dir, f"{base_filename}_orcamento.csv")
+    arquivos_gerados['orcamento'] = budget_report.save_csv(orcamento_path)
     
     return arquivos_gerados
 
+def localizar_exportacao(hash_revision: str, project_name: str, output_dir: str = "exports") -> dict:
+    """
+    Localiza os arquivos de uma revisão já exportada por exportar_dados_csv().
+    
+    Args:
+        hash_revision: Hash da revisão do git
+        project_name: Nome do projeto
+        output_dir: Diretório de saída usado na exportação
+        
+    Returns:
+        dict: Caminhos no formato retornado por exportar_dados_csv(), ou None se
+              algum arquivo obrigatório (métricas por arquivo, estatísticas, C&K
+              e as tabelas do ResultStore) não existir
+        
+    Note:
+        Não faz checkout nem análise: permite reaproveitar os resultados gravados
+        de uma revisão em vez de analisá-la novamente.
+    """
+    base_filename = os.path.join(output_dir, f"{project_name}_{hash_revision[:8]}")
+    resultados = store.ResultStore(output_dir)
+    arquivos = {
+        'metricas_arquivo': f"{base_filename}_metricas_arquivo.csv",
+        'arquivos': resultados.table_path(project_name, hash_revision, 'arquivos'),
+        'funcoes': resultados.table_path(project_name, hash_revision, 'funcoes'),
+        'estatisticas': f"{base_filename}_estatisticas.csv",
+        'ck_metricas': f"{base_filename}_ck_metricas.csv",
+        'classes': resultados.table_path(project_name, hash_revision, 'classes'),
+    }
+    if not all(os.path.exists(caminho) for caminho in arquivos.values()):
+        return None
+    opcionais = {
+        'issues': f"{base_filename}_issues.csv",
+        'issues_abertas': resultados.table_path(project_name, hash_revision, 'issues'),
+        'orcamento': f"{base_filename}_orcamento.csv",
+    }
+    arquivos.update({tipo: caminho if os.path.exists(caminho) else None
+                     for tipo, caminho in opcionais.items()})
+    return arquivos
+
+@st.cache_data(show_spinner=False)
+def carregar_evolucao(projeto: str, repo_dir: str, assinatura: tuple, output_dir: str = "exports") -> pd.DataFrame:
+    """
+    Carrega a série de evolução de um projeto a partir dos resultados gravados.
+    
+    Args:
+        projeto: Nome do projeto
+        repo_dir: Clone do projeto (usado apenas para as datas de commit)
+        assinatura: Arquivos gravados e datas de modificação; invalida o cache
+                    quando uma revisão é exportada novamente
+        output_dir: Diretório de saída de exportar_dados_csv()
+        
+    Returns:
+        pd.DataFrame: Série de evolution.load_evolution()
+    """
+    return evolution.load_evolution(output_dir, projeto, repo_dir)
+
+def exibir_evolucao(projetos: list, output_dir: str = "exports") -> None:
+    """
+    Exibe os gráficos de evolução dos projetos a partir dos resultados já gravados.
+    
+    Args:
+        projetos: Projetos exibidos (ex: 'django/django')
+        output_dir: Diretório de saída de exportar_dados_csv()
+        
+    Note:
+        Nenhuma revisão é analisada nem tem checkout: apenas as revisões já
+        exportadas entram nas séries. Séries longas são reduzidas com
+        evolution.downsample() antes de irem para o navegador.
+    """
+    series = []
+    for projeto in projetos:
+        gravados = evolution.stored_revisions(output_dir, projeto)
+        assinatura = tuple(sorted((caminho, os.path.getmtime(caminho))
+                                  for caminhos in gravados.values() for caminho in caminhos.values()))
+        series.append(carregar_evolucao(projeto, os.path.join(utils.CLONE_BASE_PATH, projeto),
+                                        assinatura, output_dir))
+    series = [serie for serie in series if not serie.empty]
+    if not series:
+        st.info("Nenhum resultado gravado para os projetos selecionados.")
+        return
+    dados = pd.concat(series, ignore_index=True)
+    
+    metricas = [metrica for metrica in evolution.EVOLUTION_METRICS if metrica in dados.columns]
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        selecionadas = st.multiselect("Métricas:", metricas, default=metricas[:2],
+                                      format_func=evolution.EVOLUTION_METRICS.get, key="evolucao_metricas")
+    with col2:
+        max_pontos = st.number_input("Pontos por série:", min_value=10, value=500, step=50,
+                                     key="evolucao_pontos")
+    
+    sem_data = dados['data'].isna().sum()
+    if sem_data:
+        st.caption(f"{sem_data} revisões sem data de commit (clone ausente) não aparecem nos gráficos.")
+    for metrica in selecionadas:
+        reduzida = evolution.downsample(dados, metrica, max_points=int(max_pontos))
+        st.write(f"**{evolution.EVOLUTION_METRICS[metrica]}** ({len(reduzida)} de "
+                 f"{dados[metrica].notna().sum()} revisões)")
+        st.line_chart(reduzida, x='data', y=metrica, color='projeto')
+    
+    with st.expander("Dados da evolução"):
+        st.dataframe(dados, hide_index=True)
+
+def exportar_hotspots(hash_revision: str, repo_dir: str, project_name: str,
+                      janela: churn.ChurnTable, output_dir: str = "exports",
+                      score: str = 'complexidade', churn_measure: str = 'linhas_alteradas') -> dict:
+    """
+    Exporta os hotspots (churn × complexidade) da janela que termina na revisão.
+    
+    Args:
+        hash_revision: Hash da revisão que fecha a janela
+        repo_dir: Caminho para o diretório do repositório
+        project_name: Nome do projeto
+        janela: Churn da janela (ver churn.compute_window_churn)
+        output_dir: Diretório de saída dos arquivos
+        score: Score de hotspots (ver hotspots.HOTSPOT_SCORES)
+        churn_measure: Medida de churn do score (ver hotspots.CHURN_MEASURES)
+        
+    Returns:
+        dict: Caminhos dos CSVs gerados ('hotspots' e 'hotspots_diretorios')
+        
+    Side Effects:
+        - Grava o churn da janela em <output_dir>/<projeto>/<hash>/churn.parquet
+        - Gera os CSVs de hotspots por arquivo e por diretório
+        
+    Note:
+        Deve ser chamada após exportar_dados_csv() para a mesma revisão: as
+        métricas por arquivo são lidas da tabela arquivos.parquet, sem nova análise.
+    """
+    resultados = store.ResultStore(output_dir)
+    resultados.write_table(project_name, hash_revision, 'churn', janela.to_arrow(root=repo_dir))
+    
+    metricas = resultados.read_table(project_name, hash_revision, 'arquivos')
+    tabela = hotspots.compute_hotspots(metricas, resultados.read_table(project_name, hash_revision, 'churn'),
+                                       score=score, churn_measure=churn_measure, root=repo_dir)
+    
+    base_filename = os.path.join(output_dir, f"{project_name}_{hash_revision[:8]}")
+    hotspots_path = f"{base_filename}_hotspots.csv"
+    diretorios_path = f"{base_filename}_hotspots_diretorios.csv"
+    tabela.to_pandas().to_csv(hotspots_path, index=False, encoding='utf-8')
+    hotspots.aggregate_by_directory(tabela).to_pandas().to_csv(diretorios_path, index=False,
+                                                               encoding='utf-8')
+    return {'hotspots': hotspots_path, 'hotspots_diretorios': diretorios_path}
+
+def exportar_comparacao(hash_antes: str, hash_depois: str, repo_dir: str, project_name: str,
+                        output_dir: str = "exports") -> dict:
+    """
+    Exporta as diferenças entre duas revisões já exportadas (ex: MT1 e MT2).
+    
+    Args:
+        hash_antes: Hash da revisão antiga
+        hash_depois: Hash da revisão nova
+        repo_dir: Caminho para o diretório do repositório (removido dos caminhos)
+        project_name: Nome do projeto
+        output_dir: Diretório de saída dos arquivos
+        
+    Returns:
+        dict: Caminhos gerados para cada tabela comparada: 'arquivos' e 'classes'
+              (Parquet) e 'arquivos_csv' e 'classes_csv'
+        
+    Side Effects:
+        - Grava diff_<tabela>_<hash_antes[:8]>.parquet em <output_dir>/<projeto>/<hash_depois>/
+        - Gera <projeto>_<antes>_<depois>_diff_<tabela>.csv
+        
+    Note:
+        Deve ser chamada após exportar_dados_csv() para as duas revisões: as
+        tabelas 'arquivos' e 'classes' são lidas do ResultStore e comparadas com
+        diffs.diff_tables(), sem nova análise.
+    """
+    resultados = store.ResultStore(output_dir)
+    base_filename = os.path.join(output_dir, f"{project_name}_{hash_antes[:8]}_{hash_depois[:8]}")
+    gerados = {}
+    for tabela in diffs.DIFF_KEYS:
+        diferencas = diffs.diff_tables(resultados.read_table(project_name, hash_antes, tabela),
+                                       resultados.read_table(project_name, hash_depois, tabela),
+                                       kind=tabela, root_before=repo_dir)
+        gerados[tabela] = resultados.write_table(project_name, hash_depois,
+                                                 f"diff_{tabela}_{hash_antes[:8]}", diferencas)
+        gerados[f"{tabela}_csv"] = f"{base_filename}_diff_{tabela}.csv"
+        diferencas.to_pandas().to_csv(gerados[f"{tabela}_csv"], index=False, encoding='utf-8')
+    return gerados
+
 def criar_csv_agregado(dados_por_hash: list, project_name: str, output_dir: str = "exports") -> str:
     """
     Cria um CSV agregado com métricas de evolução temporal do projeto.
@@ -218,6 +466,17 @@ def criar_csv_agregado(dados_por_hash: list, project_name: str, output_dir: str
                 'mean_maintainability_index': stats.get('mean_maintainability_index', 0.0),
                 'mean_complexity': stats.get('mean_complexity', 0.0)
             })
+            # Métricas de Halstead do projeto (totais e médias por arquivo)
+            linha_agregada.update({
+                coluna: valor for coluna, valor in stats.items()
+                if coluna.startswith(('total_halstead_', 'mean_halstead_'))
+            })
+            # Distribuição e médias ponderadas por SLOC das métricas principais
+            linha_agregada.update({
+                f'{estatistica}_{metrica}': stats.get(f'{estatistica}_{metrica}')
+                for metrica in ('sloc', 'average_complexity', 'maintainability_index')
+                for estatistica in ('p50', 'p90', 'p99', 'std', 'weighted_mean')
+            })
         
         # Adiciona métricas de issues (se disponível)
         if 'issues_metrics' in dados:
@@ -230,7 +489,9 @@ def criar_csv_agregado(dados_por_hash: list, project_name: str, output_dir: str
                 })
         
         # Adiciona resumo de métricas C&K
-        if 'ck_metrics' in dados:
+        if 'ck_resumo' in dados:
+            linha_agregada.update(dados['ck_resumo'])
+        elif 'ck_metrics' in dados:
             ck_metrics = dados['ck_metrics']
             if not ck_metrics.empty:
                 linha_agregada.update({
@@ -258,7 +519,8 @@ def criar_csv_agregado(dados_por_hash: list, project_name: str, output_dir: str
     
     return arquivo_agregado
 
-def coletar_dados_para_agregacao(hash_revision: str, repo_dir: str, project_name: str) -> dict:
+def coletar_dados_para_agregacao(hash_revision: str, repo_dir: str, project_name: str,
+                                 filtros: dict = None, linguagens: tuple = ('python',)) -> dict:
     """
     Coleta todos os dados de métricas para um hash específico.
     
@@ -266,14 +528,17 @@ def coletar_dados_para_agregacao(hash_revision: str, repo_dir: str, project_name
         hash_revision: Hash da revisão do git para análise
         repo_dir: Caminho para o diretório do repositório
         project_name: Nome do projeto
+        filtros: Opções de descoberta e execução repassadas ao analytics
+        linguagens: Linguagens incluídas nas métricas por arquivo
         
     Returns:
         dict: Dicionário com todos os dados coletados para o hash
     """
     # Faz checkout e obtém métricas
     utils.checkout_git_revision(repo_dir, hash_revision)
-    raw_halstead_report = analytics.get_project_metrics(repo_dir)
-    ck_report = analytics.get_ck_metrics(repo_dir)
+    filtros = filtros or {}
+    raw_halstead_report = analytics.get_project_metrics(repo_dir, languages=linguagens, **filtros)
+    ck_report = analytics.get_ck_metrics(repo_dir, **filtros)
     statistics = analytics.get_project_statistics(raw_halstead_report, hash_revision)
     
     repo_org = repo_dir.split("/")[1] if len(repo_dir.split("/")) > 1 else "unknown"
@@ -294,7 +559,189 @@ def coletar_dados_para_agregacao(hash_revision: str, repo_dir: str, project_name
     
     return dados_coletados
 
-def gerar_tabelas(hash_revision: str, repo_dir: str, project_name: str) -> None:
+def resumir_ck_csv(ck_path: str, chunksize: int = 50000) -> dict:
+    """
+    Calcula o resumo de métricas C&K usado no CSV agregado lendo o CSV em blocos.
+    
+    Args:
+        ck_path: Caminho do CSV de métricas C&K gerado por exportar_dados_csv()
+        chunksize: Número de linhas lidas por bloco
+        
+    Returns:
+        dict: total_classes e médias avg_wmc, avg_dit, avg_noc, avg_rfc, avg_cbo, avg_lcom
+        
+    Note:
+        Apenas as somas parciais ficam em memória, independentemente do número de classes.
+    """
+    colunas = ['WMC', 'DIT', 'NOC', 'RFC', 'CBO', 'LCOM']
+    somas = dict.fromkeys(colunas, 0.0)
+    total_classes = 0
+    
+    try:
+        for bloco in pd.read_csv(ck_path, usecols=colunas, chunksize=chunksize):
+            total_classes += len(bloco)
+            for coluna in colunas:
+                somas[coluna] += bloco[coluna].sum()
+    except (pd.errors.EmptyDataError, ValueError):
+        pass
+    
+    resumo = {'total_classes': total_classes}
+    for coluna in colunas:
+        resumo[f"avg_{coluna.lower()}"] = somas[coluna] / total_classes if total_classes else 0.0
+    return resumo
+
+def carregar_dados_para_agregacao(arquivos_csv: dict) -> dict:
+    """
+    Monta os dados de um hash para o CSV agregado a partir dos CSVs já exportados.
+    
+    Args:
+        arquivos_csv: Dicionário retornado por exportar_dados_csv()
+        
+    Returns:
+        dict: Dicionário no formato esperado por criar_csv_agregado(), com
+              'estatisticas', 'ck_resumo' e 'issues_metrics'
+              
+    Note:
+        Não refaz checkout nem análise; apenas resumos pequenos são mantidos,
+        de forma que várias revisões podem ser agregadas sem acumular tabelas.
+    """
+    dados = {
+        'estatisticas': pd.read_csv(arquivos_csv['estatisticas']).iloc[0].to_dict(),
+        'ck_resumo': resumir_ck_csv(arquivos_csv['ck_metricas']),
+    }
+    
+    issues_path = arquivos_csv.get('issues')
+    if issues_path and os.path.exists(issues_path):
+        dados['issues_metrics'] = pd.read_csv(issues_path)
+    else:
+        dados['issues_metrics'] = pd.DataFrame()
+    
+    return dados
+
+def criar_callback_progresso(placeholder, rotulo: str, intervalo: int = 100):
+    """
+    Cria um callback de progresso que atualiza um placeholder do Streamlit.
+    
+    Args:
+        placeholder: Elemento retornado por st.empty()
+        rotulo: Texto exibido antes da contagem
+        intervalo: Atualiza a tela a cada `intervalo` arquivos, evitando uma
+                   mensagem pelo websocket por arquivo
+        
+    Returns:
+        callable: Função que recebe o número de arquivos analisados
+    """
+    def callback(n_arquivos: int) -> None:
+        if n_arquivos % intervalo == 0:
+            placeholder.write(f"{rotulo}: {n_arquivos} arquivos analisados")
+    return callback
+
+def exibir_perfil_execucao(perfil: profiling.RunProfile, caminho_json: str) -> None:
+    """
+    Salva o perfil da execução em JSON e exibe o resumo no Streamlit.
+
+    Args:
+        perfil: Perfil coletado durante a análise
+        caminho_json: Caminho do arquivo JSON de saída
+
+    Side Effects:
+        - Cria o arquivo JSON (e diretórios, se necessário)
+        - Exibe tabelas de estágios e dos arquivos mais lentos
+    """
+    try:
+        perfil.save_json(caminho_json)
+    except OSError as e:
+        st.warning(f"Erro ao salvar perfil de execução: {e}")
+
+    dados = perfil.to_dict(include_files=False)
+    with st.expander("Perfil de execução"):
+        estagios_df = pd.DataFrame.from_dict(dados['stages'], orient='index')
+        estagios_df.index.name = 'estagio'
+        st.write("Tempo por estágio")
+        st.dataframe(estagios_df)
+        st.write("Arquivos mais lentos")
+        st.dataframe(pd.DataFrame(dados['slowest_files']))
+        if dados['caches']:
+            st.write("Caches")
+            st.dataframe(pd.DataFrame.from_dict(dados['caches'], orient='index'))
+        st.write(f"Perfil salvo em: `{caminho_json}`")
+
+@st.cache_resource(max_entries=64, show_spinner=False)
+def carregar_tabela(caminho: str, modificado: float) -> pa.Table:
+    """
+    Lê uma tabela Parquet de resultados, mantida em cache entre as reexecuções do script.
+    
+    Args:
+        caminho: Caminho do arquivo Parquet (ver store.ResultStore)
+        modificado: Data de modificação do arquivo; faz parte da chave do cache,
+                    de modo que uma tabela regravada é lida novamente
+        
+    Returns:
+        pa.Table: Tabela lida
+    """
+    return pq.read_table(caminho)
+
+def exibir_tabela_paginada(tabela: pa.Table, chave: str, tipo: str = None, raiz: str = None,
+                           tamanho_pagina: int = 50) -> None:
+    """
+    Exibe uma tabela grande com agregação, filtro, ordenação e paginação no servidor.
+    
+    Args:
+        tabela: Tabela de resultados (ex: carregar_tabela())
+        chave: Prefixo único das chaves dos widgets (ex: tabela e hash)
+        tipo: Tipo da tabela em views.DIRECTORY_AGGREGATIONS; se informado, a
+              visualização padrão é a agregação por diretório
+        raiz: Raiz do projeto, removida dos caminhos na agregação
+        tamanho_pagina: Linhas por página
+        
+    Side Effects:
+        - Exibe os controles e a página atual no Streamlit
+        
+    Note:
+        Filtro, ordenação e agregação são feitos em Arrow (views.query_table);
+        apenas as linhas da página são convertidas para pandas e enviadas ao navegador.
+    """
+    visao = 'linhas'
+    if tipo and tabela.num_rows:
+        visao = st.radio("Visualização:", ['diretorio', 'linhas'], horizontal=True, key=f"{chave}_visao",
+                         format_func=lambda v: {'diretorio': 'Por diretório', 'linhas': 'Por linha'}[v])
+    if visao == 'diretorio':
+        profundidade = st.number_input("Níveis de diretório (0 = completo):", min_value=0, max_value=10,
+                                       value=2, key=f"{chave}_profundidade")
+        tabela = views.aggregate_by_directory(tabela, tipo, root=raiz, depth=profundidade or None)
+    
+    colunas = st.columns(4)
+    busca = colunas[0].text_input("Filtrar:", key=f"{chave}_busca")
+    ordenar_por = colunas[1].selectbox("Ordenar por:", [None] + tabela.column_names, key=f"{chave}_ordem",
+                                       format_func=lambda c: '(original)' if c is None else c)
+    decrescente = colunas[2].checkbox("Decrescente", value=True, key=f"{chave}_decrescente")
+    pagina = colunas[3].number_input("Página:", min_value=1, value=1, key=f"{chave}_pagina")
+    
+    fatia, total, paginas = views.query_table(tabela, search=busca or None, sort_by=ordenar_por,
+                                              descending=decrescente, page=pagina - 1,
+                                              page_size=tamanho_pagina)
+    st.dataframe(fatia.to_pandas())
+    st.caption(f"{total} linha(s) - página {min(pagina, paginas)} de {paginas}")
+
+def carregar_tabela_exportada(arquivos_csv: dict, tabela: str, chave_csv: str) -> pa.Table:
+    """
+    Carrega uma tabela exportada por exportar_dados_csv(), preferindo o Parquet.
+    
+    Args:
+        arquivos_csv: Dicionário retornado por exportar_dados_csv()
+        tabela: Chave da tabela Parquet (ex: 'arquivos', 'classes')
+        chave_csv: Chave do CSV equivalente, usado em exportações sem o Parquet
+        
+    Returns:
+        pa.Table: Tabela carregada
+    """
+    caminho = arquivos_csv.get(tabela)
+    if caminho and os.path.exists(caminho):
+        return carregar_tabela(caminho, os.path.getmtime(caminho))
+    return pa.Table.from_pandas(pd.read_csv(arquivos_csv[chave_csv]), preserve_index=False)
+
+def gerar_tabelas(hash_revision: str, repo_dir: str, project_name: str, filtros: dict = None,
+                  linguagens: tuple = ('python',), arquivos_csv: dict = None, chave: str = None) -> None:
     """
     Gera tabelas de métricas no Streamlit.
     
@@ -303,21 +750,43 @@ def gerar_tabelas(hash_revision: str, repo_dir: str, project_name: str) -> None:
     2. Métricas Raw/Halstead por arquivo
     3. Estatísticas gerais do projeto
     4. Métricas Chidamber & Kemerer
+    5. Funções mais complexas e hotspots (churn × complexidade), quando exportados
     
     Args:
         hash_revision: Hash da revisão do git para análise
         repo_dir: Caminho para o diretório do repositório
         project_name: Nome do projeto para exibição
+        filtros: Opções de descoberta e execução repassadas ao analytics
+        linguagens: Linguagens incluídas nas métricas por arquivo
+        arquivos_csv: Dicionário retornado por exportar_dados_csv(). Se informado,
+                      as tabelas são lidas dos resultados exportados (Parquet ou
+                      CSV), sem novo checkout nem nova análise
+        chave: Identificador único da exibição, usado nas chaves dos widgets
+               (padrão: hash_revision)
         
     Side Effects:
-        - Faz checkout da revisão especificada
+        - Faz checkout da revisão especificada (apenas sem arquivos_csv)
         - Exibe tabelas e gráficos no Streamlit
         - Pode exibir mensagens de erro em caso de falha
+        
+    Note:
+        As métricas por arquivo e C&K são exibidas agregadas por diretório, com
+        filtro, ordenação e paginação no servidor (ver exibir_tabela_paginada).
     """
-    utils.checkout_git_revision(repo_dir, hash_revision)
-    raw_halstead_report = analytics.get_project_metrics(repo_dir)
-    ck_report = analytics.get_ck_metrics(repo_dir)
-    statistics = analytics.get_project_statistics(raw_halstead_report, hash_revision)
+    chave = chave or hash_revision
+    if arquivos_csv:
+        projeto_tabela = carregar_tabela_exportada(arquivos_csv, 'arquivos', 'metricas_arquivo')
+        estatisticas_df = pd.read_csv(arquivos_csv['estatisticas'])
+        ck_tabela = carregar_tabela_exportada(arquivos_csv, 'classes', 'ck_metricas')
+    else:
+        utils.checkout_git_revision(repo_dir, hash_revision)
+        filtros = filtros or {}
+        raw_halstead_report = analytics.get_project_metrics(repo_dir, languages=linguagens, **filtros)
+        ck_report = analytics.get_ck_metrics(repo_dir, **filtros)
+        statistics = analytics.get_project_statistics(raw_halstead_report, hash_revision)
+        projeto_tabela = pa.Table.from_pandas(projeto_to_dataframe(raw_halstead_report), preserve_index=False)
+        estatisticas_df = relatorio_estatistico_to_dataframe(statistics)
+        ck_tabela = pa.Table.from_pandas(ck_metrics_to_dataframe(ck_report), preserve_index=False)
     
     repo_org = repo_dir.split("/")[1]
     repo_name = repo_dir.split("/")[2]
@@ -326,11 +795,14 @@ def gerar_tabelas(hash_revision: str, repo_dir: str, project_name: str) -> None:
     st.write(f"Hash: {hash_revision}")   
     
     try:
-        issues_df = issues.get_issues_df({
-            repo_org: repo_name      
-        })
-        
-        metrics_df = issues.compute_issue_metrics(issues_df)
+        if arquivos_csv and arquivos_csv.get('issues'):
+            metrics_df = pd.read_csv(arquivos_csv['issues'])
+        else:
+            issues_df = issues.get_issues_df({
+                repo_org: repo_name      
+            })
+            
+            metrics_df = issues.compute_issue_metrics(issues_df)
     
         st.header("1. Dados do Projeto - Issues")
         st.dataframe(metrics_df)      
@@ -341,16 +813,86 @@ def gerar_tabelas(hash_revision: str, repo_dir: str, project_name: str) -> None:
             st.error(f"Falha ao obter métricas de Issues: {e_issues}")
     
     st.header(f"2. Dados do Projeto (Métricas por Arquivo) - Hash {hash_revision}")
-    st.dataframe(projeto_to_dataframe(raw_halstead_report))
+    exibir_tabela_paginada(projeto_tabela, f"arquivos_{chave}",
+                           tipo='arquivos' if 'arquivo' in projeto_tabela.column_names else None,
+                           raiz=repo_dir)
     
     st.header(f"3. Relatório Estatístico do Projeto - Hash {hash_revision}")
-    st.dataframe(relatorio_estatistico_to_dataframe(statistics))
+    st.dataframe(estatisticas_df)
     
     st.header(f"4. Métricas de Chidamber & Kemerer - Hash {hash_revision}")
-    st.dataframe(ck_metrics_to_dataframe(ck_report)) 
+    exibir_tabela_paginada(ck_tabela, f"classes_{chave}",
+                           tipo='classes' if 'classe' in ck_tabela.column_names else None,
+                           raiz=repo_dir)
+    
+    if arquivos_csv and arquivos_csv.get('funcoes'):
+        st.header(f"5. Funções Mais Complexas - Hash {hash_revision}")
+        st.dataframe(store.top_functions(arquivos_csv['funcoes'], n=20).to_pandas())
+    
+    if arquivos_csv and arquivos_csv.get('hotspots'):
+        st.header(f"6. Hotspots (Churn × Complexidade) - Janela até {hash_revision[:8]}")
+        st.dataframe(pd.read_csv(arquivos_csv['hotspots']).head(20))
+        st.write("Por diretório:")
+        st.dataframe(pd.read_csv(arquivos_csv['hotspots_diretorios']))
+    
+    if arquivos_csv and arquivos_csv.get('orcamento'):
+        orcamento_df = pd.read_csv(arquivos_csv['orcamento'])
+        if not orcamento_df.empty:
+            st.warning(f"{len(orcamento_df)} arquivo(s) atingiram o orçamento por arquivo "
+                       f"(degradados para métricas raw ou ignorados)")
+            st.dataframe(orcamento_df)
     
     st.divider()
     
+def exibir_comparacao(comparacao: dict, hash_antes: str, hash_depois: str, chave: str = "comparacao") -> None:
+    """
+    Exibe as diferenças entre duas revisões exportadas por exportar_comparacao().
+    
+    Args:
+        comparacao: Dicionário retornado por exportar_comparacao()
+        hash_antes: Hash da revisão antiga
+        hash_depois: Hash da revisão nova
+        chave: Prefixo único das chaves dos widgets
+        
+    Side Effects:
+        - Exibe, para arquivos e classes, a contagem de linhas adicionadas,
+          removidas e alteradas, as maiores regressões e melhorias da métrica
+          escolhida e a tabela completa de diferenças (paginada)
+    """
+    st.header(f"Comparação entre {hash_antes[:8]} e {hash_depois[:8]}")
+    for tabela, titulo in (('arquivos', 'Métricas por arquivo'), ('classes', 'Métricas C&K')):
+        diferencas = carregar_tabela(comparacao[tabela], os.path.getmtime(comparacao[tabela]))
+        st.subheader(titulo)
+        
+        contagem = diffs.summarize_diff(diferencas)
+        for coluna, situacao in zip(st.columns(len(contagem)), contagem):
+            coluna.metric(situacao.capitalize(), contagem[situacao])
+        
+        metricas = [nome[:-len(diffs.DELTA_SUFFIX)] for nome in diferencas.column_names
+                    if nome.endswith(diffs.DELTA_SUFFIX)]
+        if metricas:
+            metrica = st.selectbox("Métrica:", metricas, key=f"{chave}_{tabela}_metrica",
+                                   index=metricas.index('average_complexity')
+                                   if 'average_complexity' in metricas else 0)
+            colunas_ranking = [*diffs.DIFF_KEYS[tabela], f"{metrica}{diffs.BEFORE_SUFFIX}",
+                               f"{metrica}{diffs.AFTER_SUFFIX}", f"{metrica}{diffs.DELTA_SUFFIX}"]
+            col1, col2 = st.columns(2)
+            col1.write("Maiores regressões")
+            col1.dataframe(diffs.rank_changes(diferencas, metrica, n=10).select(colunas_ranking).to_pandas(),
+                           hide_index=True)
+            col2.write("Maiores melhorias")
+            col2.dataframe(diffs.rank_changes(diferencas, metrica, n=10, regressions=False)
+                           .select(colunas_ranking).to_pandas(), hide_index=True)
+        
+        situacoes = st.multiselect("Situações:", list(diffs.DIFF_STATUSES),
+                                   default=['adicionado', 'removido', 'alterado'],
+                                   key=f"{chave}_{tabela}_situacoes")
+        exibir_tabela_paginada(diferencas.filter(pc.is_in(diferencas['status'], pa.array(situacoes, pa.string()))),
+                               f"{chave}_{tabela}")
+        st.caption(f"CSV: `{comparacao[f'{tabela}_csv']}`")
+    
+    st.divider()
+
 def plot_timeline_with_spans(marcos: list, nome_projeto: str) -> tuple:
     """
     Gera um gráfico de linha do tempo com marcos temporais e períodos sombreados.
@@ -411,6 +953,11 @@ def plot_timeline_with_spans(marcos: list, nome_projeto: str) -> tuple:
     
     return fig, ax
 
+# Marcos temporais padrão (por data) e janela padrão em meses
+MARCO_1_PADRAO = datetime.date(2021, 11, 30)
+MARCO_2_PADRAO = datetime.date(2023, 11, 30)
+JANELA_PADRAO_MESES = 8
+
 st.sidebar.write("code_insights - Configurações")
 st.sidebar.divider()
 
@@ -418,13 +965,28 @@ st.sidebar.divider()
 st.sidebar.write("1. Obtenção do Repositório")
 author = st.sidebar.text_input("GitHub - Autor do repositório")
 name = st.sidebar.text_input("GitHub - Nome do repositório")
+clone_parcial = st.sidebar.checkbox("Clone parcial (sem blobs; conteúdo buscado só para os marcos)",
+                                    value=False)
+# Histórico raso: os commits anteriores ao marco temporal mais antigo não são baixados
+historico_desde = None
+if st.sidebar.checkbox("Limitar o histórico ao marco temporal mais antigo (--shallow-since)"):
+    historico_desde = st.sidebar.date_input(
+        "Histórico a partir de (não posterior ao marco temporal mais antigo):", format="DD/MM/YYYY",
+        value=MARCO_1_PADRAO - datetime.timedelta(days=30*JANELA_PADRAO_MESES))
 obter_repo = st.sidebar.button("Obter repositório!")
 
 if obter_repo and author and name:
     repo = {
         f"{author}": f"{name}" 
     }
-    utils.clone_repo(repo)
+    utils.clone_repo(repo, partial=clone_parcial, shallow_since=historico_desde)
+
+# Atualiza (fetch) em paralelo todos os repositórios configurados em data.repos
+atualizar_repos = st.sidebar.button("Atualizar repositórios")
+if atualizar_repos:
+    gerenciador = repositories.RepositoryManager(partial=clone_parcial, shallow_since=historico_desde)
+    situacoes = gerenciador.sync(repos)
+    st.sidebar.write(situacoes)
 
 st.sidebar.divider()
 
@@ -439,23 +1001,101 @@ raw_halstead = st.sidebar.checkbox("Métricas de Halstead e Raw")
 ck = st.sidebar.checkbox("Métricas de Chidamber & Kemerer")
 issues_check = st.sidebar.checkbox("Issues via GitHub API v4")
 
-#repo_start_date = ['2024-12-25', '2024-12-24', '2024-12-23', '2024-12-22', '2024-12-21', '2024-12-20']
-#repo_start = st.sidebar.selectbox("Selecione a data de início da análise:", repo_start_date)
-repo_start = st.sidebar.date_input("Selecione o marco temporal 1 da análise:", format="DD/MM/YYYY", value=datetime.date(2021, 11, 30))
+# Filtros de descoberta de arquivos (globs no formato .gitignore)
+excluir_globs = st.sidebar.text_input("Excluir caminhos (globs separados por vírgula):", value="")
+usar_git_ls_files = st.sidebar.checkbox("Descobrir arquivos via git ls-files", value=True)
+linguagens_selecionadas = st.sidebar.multiselect("Linguagens analisadas:",
+                                                 list(analytics.LANGUAGE_EXTENSIONS),
+                                                 default=['python'])
+
+# Orçamento por arquivo: evita que arquivos gerados ou minificados dominem a execução
+limite_kb = st.sidebar.number_input("Tamanho máximo por arquivo (KB, 0 = sem limite):",
+                                    min_value=0, value=2048, step=256)
+limite_cpu = st.sidebar.number_input("Tempo de CPU máximo por arquivo (s, 0 = sem limite):",
+                                     min_value=0.0, value=30.0, step=5.0)
+acao_orcamento = st.sidebar.selectbox("Arquivos acima do orçamento:", ['raw', 'skip'],
+                                      format_func=lambda a: {'raw': 'Apenas métricas raw',
+                                                             'skip': 'Ignorar'}[a])
+filtros_descoberta = {
+    'exclude': [g.strip() for g in excluir_globs.split(',') if g.strip()],
+    'use_git': usar_git_ls_files,
+    'workers': os.cpu_count(),
+    'budget': budgets.FileBudget(max_bytes=limite_kb * 1024, cpu_seconds=limite_cpu,
+                                 on_exceed=acao_orcamento),
+}
+
+# Cada marco é analisado em um git worktree próprio, ao mesmo tempo que os demais
+analise_paralela = st.sidebar.checkbox("Analisar os marcos em paralelo (git worktrees)", value=True)
+
+# Revisões com todos os resultados já gravados não são analisadas novamente
+reaproveitar_exportados = st.sidebar.checkbox("Reaproveitar revisões já exportadas", value=True)
 
-#repo_end_date = ['2024-12-25', '2024-12-24', '2024-12-23', '2024-12-22', '2024-12-21', '2024-12-20']
-#repo_end = st.sidebar.selectbox("Selecione a data de fim da análise:", repo_end_date)
-repo_end = st.sidebar.date_input("Selecione o marco temporal 2 da análise:", format="DD/MM/YYYY", value=datetime.date(2023, 11, 30))
+criterio_hotspot = st.sidebar.selectbox(
+    "Score de hotspots (churn × ...):", list(hotspots.HOTSPOT_SCORES),
+    format_func=lambda s: {'complexidade': 'Complexidade ciclomática',
+                           'manutenibilidade': '100 − Índice de manutenibilidade',
+                           'tamanho': 'SLOC'}.get(s, s))
 
-#st.sidebar.write("⭐ indicam releases do repositório")
+# Índice das tags do repositório (regerado só quando as tags mudam)
+indice_releases = releases.load_releases(repo_dir)
+tipo_marco = st.sidebar.radio("Marcos temporais por:", ['data', 'release'] if len(indice_releases) else ['data'],
+                              format_func=lambda t: {'data': 'Data', 'release': 'Release (tag)'}[t],
+                              horizontal=True)
+releases_marcos = None
 
-window_span = st.sidebar.slider("Selecione o tamanho da janela de análise (em meses):", 0, 24, value=8)
-SPAN = datetime.timedelta(days=30*window_span)
-marcos_temporais = [repo_start-SPAN, repo_start, repo_end, repo_end+SPAN]
+if tipo_marco == 'release':
+    nomes_releases = indice_releases.names[::-1]  # mais recente primeiro
+    release_1 = st.sidebar.selectbox("Selecione a release do marco temporal 1:", nomes_releases,
+                                     index=min(1, len(nomes_releases) - 1))
+    release_2 = st.sidebar.selectbox("Selecione a release do marco temporal 2:", nomes_releases, index=0)
+    release_1, release_2 = sorted([release_1, release_2], key=indice_releases.position)
+    apenas_estaveis = st.sidebar.checkbox("Ignorar pré-lançamentos (rc, beta, ...) na janela", value=True)
+    janela_releases = st.sidebar.slider("Selecione o tamanho da janela de análise (em releases):", 1, 10, value=1)
+    releases_marcos = indice_releases.markers(release_1, release_2, janela_releases, apenas_estaveis)
+    marcos_temporais = [indice_releases.date(nome).date() for nome in releases_marcos]
+else:
+    #repo_start_date = ['2024-12-25', '2024-12-24', '2024-12-23', '2024-12-22', '2024-12-21', '2024-12-20']
+    #repo_start = st.sidebar.selectbox("Selecione a data de início da análise:", repo_start_date)
+    repo_start = st.sidebar.date_input("Selecione o marco temporal 1 da análise:", format="DD/MM/YYYY", value=MARCO_1_PADRAO)
+
+    #repo_end_date = ['2024-12-25', '2024-12-24', '2024-12-23', '2024-12-22', '2024-12-21', '2024-12-20']
+    #repo_end = st.sidebar.selectbox("Selecione a data de fim da análise:", repo_end_date)
+    repo_end = st.sidebar.date_input("Selecione o marco temporal 2 da análise:", format="DD/MM/YYYY", value=MARCO_2_PADRAO)
+
+    st.sidebar.write("⭐ indicam releases do repositório")
+
+    window_span = st.sidebar.slider("Selecione o tamanho da janela de análise (em meses):", 0, 24, value=JANELA_PADRAO_MESES)
+    SPAN = datetime.timedelta(days=30*window_span)
+    marcos_temporais = [repo_start-SPAN, repo_start, repo_end, repo_end+SPAN]
+
+if historico_desde is not None and min(marcos_temporais) < historico_desde:
+    st.sidebar.warning(f"O marco temporal mais antigo ({min(marcos_temporais)}) é anterior ao início do "
+                       f"histórico limitado ({historico_desde}); clone novamente a partir dessa data.")
 
 rodar_analise = st.sidebar.button("Analisar!")
 
-#baixar = st.sidebar.button("Baixar PDF", on_click=salvar_pdf)
+# Relatórios HTML/PDF de todos os projetos com resultados gravados, sem nova análise;
+# os relatórios cujas entradas não mudaram são reaproveitados (manifesto em reports/)
+if st.sidebar.button("Gerar relatórios (HTML/PDF)"):
+    projetos_relatorio = {projeto: os.path.join(utils.CLONE_BASE_PATH, projeto)
+                          for projeto in evolution.stored_projects("exports")}
+    with st.spinner(f"Gerando relatórios de {len(projetos_relatorio)} projeto(s)..."):
+        relatorios = reports.generate_reports("exports", projetos_relatorio, "reports")
+    for projeto, relatorio in relatorios.items():
+        st.sidebar.write(f"{projeto}: {relatorio['status']}" +
+                         (f" ({relatorio['erro']})" if relatorio.get('erro') else ""))
+    if not reports.pdf_available():
+        st.sidebar.caption("wkhtmltopdf não encontrado: relatórios gerados apenas em HTML")
+
+relatorio_html, relatorio_pdf = reports.report_paths("reports", repos_locais)
+if os.path.exists(relatorio_html):
+    with open(relatorio_html, 'rb') as arquivo_relatorio:
+        st.sidebar.download_button("Baixar relatório (HTML)", arquivo_relatorio.read(),
+                                   file_name=os.path.basename(relatorio_html), mime='text/html')
+if os.path.exists(relatorio_pdf):
+    with open(relatorio_pdf, 'rb') as arquivo_relatorio:
+        st.sidebar.download_button("Baixar PDF", arquivo_relatorio.read(),
+                                   file_name=os.path.basename(relatorio_pdf), mime='application/pdf')
 
 # st.sidebar.divider() 
 
@@ -464,16 +1104,38 @@ rodar_analise = st.sidebar.button("Analisar!")
 # if prompt:
 #     st.sidebar.write(prompt)
     
+# Índice de commits do branch (regerado só quando o branch muda)
+linha_do_tempo = timeline.load_timeline(repo_dir, repo_branch)
+
+# Commit -> tag, para destacar os marcos que caem exatamente em uma release
+releases_por_commit = {commit.decode(): nome for nome, commit in zip(indice_releases.names,
+                                                                    indice_releases.commits)}
+
 i=0
 hashes_utilizaveis = []
 for mt in marcos_temporais:
     i=i+1
-    st.write(f"Marco {i}: {mt} - {utils.get_commit_hash_by_date(repo_dir, mt, branch=repo_branch)}")
-    hashes_utilizaveis.append(utils.get_commit_hash_by_date(repo_dir, mt, branch=repo_branch))
+    if releases_marcos:
+        hash_marco = indice_releases.commit(releases_marcos[i - 1])
+    else:
+        hash_marco = linha_do_tempo.commit_at(mt)
+    release_marco = releases_por_commit.get(hash_marco)
+    st.write(f"Marco {i}: {mt} - {hash_marco}" + (f" ⭐ {release_marco}" if release_marco else ""))
+    hashes_utilizaveis.append(hash_marco)
 
 fig, ax = plot_timeline_with_spans(marcos_temporais, repos_locais)
 st.pyplot(fig)
 
+# Evolução a partir dos resultados já gravados, sem checkout nem análise
+with st.expander("Evolução dos projetos (resultados gravados)"):
+    projetos_gravados = evolution.stored_projects("exports")
+    projetos_evolucao = st.multiselect(
+        "Projetos:", projetos_gravados,
+        default=[repos_locais] if repos_locais in projetos_gravados else projetos_gravados[:1],
+        key="evolucao_projetos")
+    if projetos_evolucao:
+        exibir_evolucao(projetos_evolucao)
+
 if rodar_analise:
     st.title(f"Análise de Código - Projeto: {repos_locais}")
     now = datetime.datetime.now()
@@ -481,42 +1143,132 @@ if rodar_analise:
     todos_arquivos_csv = []
     dados_para_agregacao = []
     
-    for hash in hashes_utilizaveis:
-        gerar_tabelas(hash, repo_dir, repos_locais)
+    perfil = profiling.RunProfile(name=repos_locais, trace_memory=True)
+    with perfil.activate():
+        # Revisões já exportadas são reaproveitadas, sem checkout nem análise
+        exportados = {}
+        if reaproveitar_exportados:
+            for hash_gravado in dict.fromkeys(hashes_utilizaveis):
+                arquivos_gravados = localizar_exportacao(hash_gravado, repos_locais)
+                if arquivos_gravados:
+                    exportados[hash_gravado] = arquivos_gravados
+        revisoes = [h for h in dict.fromkeys(hashes_utilizaveis) if h not in exportados]
         
-        # Exporta dados para CSV
+        # Em clones parciais, busca de uma vez os blobs de todos os marcos a analisar
         try:
-            arquivos_csv = exportar_dados_csv(hash, repo_dir, repos_locais)
-            todos_arquivos_csv.append({
-                'hash': hash,
-                'arquivos': arquivos_csv
-            })
-            st.success(f"Dados do hash {hash[:8]} exportados para CSV")
-        except Exception as e:
-            st.error(f"Erro ao exportar CSV para hash {hash[:8]}: {e}")
+            utils.prefetch_blobs(repo_dir, revisoes)
+        except RuntimeError as e:
+            st.warning(f"Falha ao buscar os arquivos dos marcos antecipadamente: {e}")
         
-        # Coleta dados para CSV agregado
+        # Churn de todas as janelas entre marcos em uma única passada pelo histórico
         try:
-            dados_hash = coletar_dados_para_agregacao(hash, repo_dir, repos_locais)
-            dados_para_agregacao.append({
-                'hash': hash,
-                'dados': dados_hash
-            })
-        except Exception as e:
-            st.warning(f"Erro ao coletar dados para agregação do hash {hash[:8]}: {e}")
+            # Em clones parciais, contar linhas exigiria buscar todos os blobs do
+            # histórico; o churn passa a ser medido em commits
+            clone_sem_blobs = utils.is_partial_clone(repo_dir)
+            janelas_churn = churn.compute_window_churn(repo_dir, hashes_utilizaveis,
+                                                       lines=not clone_sem_blobs)
+        except (RuntimeError, ValueError) as e:
+            st.warning(f"Churn indisponível, hotspots não serão gerados: {e}")
+            janelas_churn = []
+        
+        # Análise das revisões distintas em paralelo, uma por worktree; os workers
+        # de análise de arquivos são divididos entre as revisões
+        if analise_paralela and revisoes:
+            pool_worktrees = worktrees.WorktreePool(repo_dir, size=len(revisoes))
+            filtros_paralelos = dict(filtros_descoberta,
+                                     workers=max(1, (os.cpu_count() or 1) // pool_worktrees.size))
+            
+            def exportar_no_worktree(hash_revisao, caminho):
+                try:
+                    return exportar_dados_csv(hash_revisao, repo_dir, repos_locais,
+                                              filtros=filtros_paralelos,
+                                              linguagens=linguagens_selecionadas, worktree=caminho)
+                except Exception as e:
+                    return e
+            
+            with st.spinner(f"Analisando {len(revisoes)} revisões em paralelo..."):
+                try:
+                    exportados.update(zip(revisoes, pool_worktrees.map(exportar_no_worktree, revisoes)))
+                except RuntimeError as e:
+                    st.warning(f"Worktrees indisponíveis, análise sequencial: {e}")
+        
+        for indice, hash in enumerate(hashes_utilizaveis):
+            # Uma única passada de análise por revisão: os registros são gravados
+            # nos CSVs à medida que cada arquivo termina
+            progresso_placeholder = st.empty()
+            try:
+                if hash in exportados:
+                    if isinstance(exportados[hash], Exception):
+                        raise exportados[hash]
+                    arquivos_csv = dict(exportados[hash])
+                else:
+                    arquivos_csv = exportar_dados_csv(
+                        hash, repo_dir, repos_locais, filtros=filtros_descoberta,
+                        linguagens=linguagens_selecionadas,
+                        progresso=criar_callback_progresso(progresso_placeholder, f"Hash {hash[:8]}"))
+                # A janela i termina no marco i + 1 (o primeiro marco não fecha janela)
+                if 0 < indice <= len(janelas_churn):
+                    arquivos_csv.update(exportar_hotspots(
+                        hash, repo_dir, repos_locais, janelas_churn[indice - 1],
+                        score=criterio_hotspot,
+                        churn_measure='commits' if clone_sem_blobs else 'linhas_alteradas'))
+                todos_arquivos_csv.append({
+                    'hash': hash,
+                    'indice': indice,
+                    'arquivos': arquivos_csv
+                })
+                st.success(f"Dados do hash {hash[:8]} exportados para CSV")
+            except Exception as e:
+                st.error(f"Erro ao exportar CSV para hash {hash[:8]}: {e}")
+                continue
+            finally:
+                progresso_placeholder.empty()
+        
+            gerar_tabelas(hash, repo_dir, repos_locais, filtros_descoberta, linguagens_selecionadas,
+                          arquivos_csv=arquivos_csv, chave=f"{indice}_{hash}")
+        
+            # Coleta apenas os resumos da revisão para o CSV agregado
+            try:
+                dados_hash = carregar_dados_para_agregacao(arquivos_csv)
+                dados_para_agregacao.append({
+                    'hash': hash,
+                    'dados': dados_hash
+                })
+            except Exception as e:
+                st.warning(f"Erro ao coletar dados para agregação do hash {hash[:8]}: {e}")
     
-    # Gera CSV agregado com evolução temporal
-    if dados_para_agregacao:
-        try:
-            arquivo_agregado = criar_csv_agregado(dados_para_agregacao, repos_locais)
-            st.success(f"CSV agregado de evolução temporal gerado: `{arquivo_agregado}`")
-        except Exception as e:
-            st.error(f"Erro ao gerar CSV agregado: {e}")
+        # Gera CSV agregado com evolução temporal
+        if dados_para_agregacao:
+            try:
+                arquivo_agregado = criar_csv_agregado(dados_para_agregacao, repos_locais)
+                st.success(f"CSV agregado de evolução temporal gerado: `{arquivo_agregado}`")
+            except Exception as e:
+                st.error(f"Erro ao gerar CSV agregado: {e}")
+        
+        # Diferenças entre os marcos temporais 1 e 2, a partir das tabelas já gravadas
+        comparacao = None
+        hashes_exportados = {item['indice']: item['hash'] for item in todos_arquivos_csv}
+        marcos_comparados = (hashes_exportados.get(1), hashes_exportados.get(2))
+        if all(marcos_comparados):
+            try:
+                comparacao = exportar_comparacao(*marcos_comparados, repo_dir, repos_locais)
+                exibir_comparacao(comparacao, *marcos_comparados)
+            except Exception as e:
+                st.error(f"Erro ao comparar os marcos temporais 1 e 2: {e}")
+                comparacao = None
     
     end = datetime.datetime.now()
     elapsed = end - now
     st.write(f"Time elapsed: {elapsed.seconds} segundos")
     
+    exibir_perfil_execucao(perfil, os.path.join("exports", f"{repos_locais}_perfil_execucao.json"))
+    
+    # Guarda os resultados para reexibir as tabelas quando um controle (filtro,
+    # página...) reexecutar o script, sem repetir a análise
+    st.session_state['ultima_analise'] = {'projeto': repos_locais, 'repo_dir': repo_dir,
+                                          'itens': todos_arquivos_csv, 'comparacao': comparacao,
+                                          'marcos_comparados': marcos_comparados}
+    
     # Exibe resumo dos arquivos CSV gerados
     if todos_arquivos_csv:
         st.header("Arquivos CSV Gerados")
@@ -526,4 +1278,14 @@ if rodar_analise:
                 if caminho:
                     st.write(f"  - {tipo}: `{caminho}`")
                 else:
-                    st.write(f"  - {tipo}: ❌ Erro na geração")
\ No newline at end of file
+                    st.write(f"  - {tipo}: ❌ Erro na geração")
+
+elif st.session_state.get('ultima_analise'):
+    # Reexecução causada por um controle das tabelas: exibe os resultados já exportados
+    ultima_analise = st.session_state['ultima_analise']
+    st.title(f"Análise de Código - Projeto: {ultima_analise['projeto']}")
+    for item in ultima_analise['itens']:
+        gerar_tabelas(item['hash'], ultima_analise['repo_dir'], ultima_analise['projeto'],
+                      arquivos_csv=item['arquivos'], chave=f"{item['indice']}_{item['hash']}")
+    if ultima_analise.get('comparacao'):
+        exibir_comparacao(ultima_analise['comparacao'], *ultima_analise['marcos_comparados'])
@@ -0,0 +1,615 @@
+import contextvars
+import json
+import multiprocessing
+import os
+import queue
+import subprocess
+import threading
+import time
+import uuid
+
+import pyarrow as pa
+
+import analytics
+import discovery
+import sinks
+import store
+import utils
+
+# Tabelas gravadas por cada unidade de trabalho e seus schemas
+UNIT_TABLES = {
+    'arquivos': sinks.FILE_METRICS_SCHEMA,
+    'funcoes': sinks.FUNCTION_METRICS_SCHEMA,
+    'classes': sinks.CK_METRICS_SCHEMA,
+}
+
+# Número padrão de arquivos por unidade de trabalho
+DEFAULT_CHUNK_SIZE = 200
+
+# Subdiretórios de um SpoolQueue, um por situação da unidade
+SPOOL_STATES = ('pendentes', 'em_andamento', 'concluidas', 'falhas')
+
+
+class WorkUnit:
+    """
+    Unidade de trabalho: um bloco de arquivos de uma revisão de um projeto.
+
+    Attributes:
+        project (str): Nome do projeto (ex: 'django/django')
+        repo_path (str): Caminho do clone; os caminhos gravados ficam sob ele
+        revision (str): Hash completo da revisão
+        chunk (int): Posição do bloco na revisão (0, 1, ...)
+        n_chunks (int): Número de blocos da revisão
+        files (tuple): Caminhos relativos (separador '/') dos arquivos do bloco
+        languages (tuple): Linguagens analisadas (chaves de analytics.LANGUAGE_EXTENSIONS)
+    """
+
+    __slots__ = ('project', 'repo_path', 'revision', 'chunk', 'n_chunks', 'files', 'languages')
+
+    def __init__(self, project: str, repo_path: str, revision: str, chunk: int, n_chunks: int,
+                 files, languages=('python',)):
+        self.project = project
+        self.repo_path = repo_path
+        self.revision = revision
+        self.chunk = chunk
+        self.n_chunks = n_chunks
+        self.files = tuple(files)
+        self.languages = tuple(languages)
+
+    def __repr__(self):
+        return (f"WorkUnit({self.project!r}, {self.revision[:8]}, {self.chunk + 1}/{self.n_chunks}, "
+                f"{len(self.files)} arquivos)")
+
+    @property
+    def part(self) -> str:
+        """str: Identificador da parte gravada no ResultStore (ex: '00003')."""
+        return f"{self.chunk:05d}"
+
+    @property
+    def unit_id(self) -> str:
+        """str: Identificador único da unidade, usado como nome de arquivo."""
+        return f"{self.project.replace('/', '__')}-{self.revision}-{self.part}"
+
+    def to_dict(self) -> dict:
+        """
+        Converte a unidade em um dicionário serializável em JSON.
+
+        Returns:
+            dict: Atributos da unidade (listas no lugar de tuplas)
+        """
+        return {name: list(value) if isinstance(value, tuple) else value
+                for name, value in ((name, getattr(self, name)) for name in self.__slots__)}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'WorkUnit':
+        """
+        Reconstrói uma unidade gravada por to_dict().
+
+        Args:
+            data: Dicionário com os atributos
+
+        Returns:
+            WorkUnit: Unidade reconstruída
+        """
+        return cls(**{name: data[name] for name in cls.__slots__})
+
+
+def resolve_revision(repo_path: str, revision: str) -> str:
+    """
+    Resolve uma revisão para o hash completo do commit.
+
+    Args:
+        repo_path: Caminho do clone
+        revision: Hash (completo ou abreviado), branch ou tag
+
+    Returns:
+        str: Hash completo do commit
+
+    Raises:
+        RuntimeError: Se a revisão não existir no clone
+    """
+    try:
+        proc = subprocess.run(['git', '-C', repo_path, 'rev-parse', '--verify', f"{revision}^{{commit}}"],
+                              stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=True)
+    except subprocess.CalledProcessError as e:
+        raise RuntimeError(f"Erro ao executar Git: {e.stderr.strip()}") from e
+    return proc.stdout.strip()
+
+
+def plan_units(project: str, repo_path: str, revisions: list, chunk_size: int = DEFAULT_CHUNK_SIZE,
+               languages: tuple = ('python',), include: list = None, exclude: list = None) -> list:
+    """
+    Divide as revisões de um projeto em unidades de trabalho.
+
+    Args:
+        project: Nome do projeto (ex: 'django/django')
+        repo_path: Caminho do clone
+        revisions: Revisões a analisar (hashes, branches ou tags)
+        chunk_size: Número máximo de arquivos por unidade
+        languages: Linguagens analisadas
+        include: Globs (formato .gitignore) de arquivos a incluir
+        exclude: Globs (formato .gitignore) de arquivos/diretórios a excluir
+
+    Returns:
+        list: WorkUnits, revisão a revisão e bloco a bloco. Uma revisão sem
+              arquivos gera uma unidade vazia, para que suas tabelas sejam gravadas
+
+    Raises:
+        RuntimeError: Se uma revisão não existir no clone
+
+    Note:
+        Os arquivos são listados da árvore de cada revisão (discovery.list_revision_files),
+        sem checkout. Revisões repetidas entram uma única vez.
+    """
+    extensions = tuple(ext for language in languages for ext in analytics.LANGUAGE_EXTENSIONS[language])
+    chunk_size = max(1, chunk_size)
+    units = []
+    for revision in dict.fromkeys(resolve_revision(repo_path, revision) for revision in revisions):
+        files = discovery.list_revision_files(repo_path, revision, extensions=extensions,
+                                              include=include, exclude=exclude)
+        chunks = [files[start:start + chunk_size] for start in range(0, len(files), chunk_size)] or [[]]
+        units.extend(WorkUnit(project, repo_path, revision, index, len(chunks), chunk, languages)
+                     for index, chunk in enumerate(chunks))
+    return units
+
+
+class _RowBuffer:
+    # Sink em memória para as linhas de uma unidade (limitadas a um bloco de arquivos)
+    def __init__(self):
+        self.rows = []
+
+    def write(self, row):
+        self.rows.append(row)
+
+    def to_arrow(self, schema: pa.Schema) -> pa.Table:
+        return pa.Table.from_pylist(self.rows, schema=schema)
+
+
+def _read_unit(unit: WorkUnit) -> dict:
+    # Lê os arquivos do bloco a partir dos blobs da revisão (sem checkout)
+    blobs = utils.read_blobs(unit.repo_path, unit.revision, list(unit.files))
+    if len(blobs) != len(unit.files):
+        missing = next(path for path in unit.files if path not in blobs)
+        raise RuntimeError(f"Arquivo {missing} não encontrado na revisão {unit.revision}")
+    return {os.path.join(unit.repo_path, *path.split('/')): content for path, content in blobs.items()}
+
+
+def revision_complete(results: store.ResultStore, unit: WorkUnit) -> bool:
+    """
+    Verifica se todas as partes da revisão de uma unidade já foram gravadas.
+
+    Args:
+        results: ResultStore compartilhado
+        unit: Qualquer unidade da revisão
+
+    Returns:
+        bool: True se cada tabela de UNIT_TABLES tem n_chunks partes
+    """
+    return all(len(results.parts(unit.project, unit.revision, table)) >= unit.n_chunks
+               for table in UNIT_TABLES)
+
+
+def merge_revision(results: store.ResultStore, unit: WorkUnit) -> dict:
+    """
+    Junta as partes da revisão de uma unidade nas tabelas da revisão.
+
+    Args:
+        results: ResultStore compartilhado
+        unit: Qualquer unidade da revisão
+
+    Returns:
+        dict: {tabela: caminho gravado}
+    """
+    return {table: results.merge_parts(unit.project, unit.revision, table, schema=schema)
+            for table, schema in UNIT_TABLES.items()}
+
+
+def process_unit(unit: WorkUnit, results: store.ResultStore, workers: int = None,
+                 budget=None) -> str:
+    """
+    Analisa os arquivos de uma unidade e grava suas partes no ResultStore.
+
+    Args:
+        unit: Unidade de trabalho
+        results: ResultStore compartilhado pelos workers
+        workers: Processos usados na análise dos arquivos do bloco
+        budget: budgets.FileBudget opcional
+
+    Returns:
+        str: 'processada', ou 'existente' se as partes da unidade já estavam gravadas
+
+    Raises:
+        RuntimeError: Se os arquivos não puderem ser lidos do repositório
+
+    Note:
+        A escrita é idempotente (store.ResultStore.write_part): reprocessar uma
+        unidade, ou processá-la em dois workers, não duplica linhas. O worker que
+        grava a última parte de uma revisão junta as partes nas tabelas
+        'arquivos', 'funcoes' e 'classes', com os caminhos sob unit.repo_path.
+        Os conteúdos chegam aos processos de análise por memória compartilhada
+        (analytics.iter_blob_metrics), sem checkout nem arquivos temporários.
+    """
+    if all(os.path.exists(results.part_path(unit.project, unit.revision, table, unit.part))
+           for table in UNIT_TABLES):
+        status = 'existente'
+    else:
+        buffers = {table: _RowBuffer() for table in UNIT_TABLES}
+        blobs = _read_unit(unit)
+        options = {'workers': workers, 'budget': budget}
+        file_records = analytics.iter_blob_metrics(blobs, languages=unit.languages,
+                                                   with_functions=True, **options)
+        file_records = sinks.split_function_rows(file_records, buffers['funcoes'])
+        sinks.stream_to_sinks(sinks.file_metric_rows(file_records), buffers['arquivos'])
+        if 'python' in unit.languages:
+            class_records = analytics.iter_blob_class_metrics(blobs, **options)
+            sinks.stream_to_sinks(sinks.class_metric_rows(class_records), buffers['classes'])
+        # A ordem dos registros depende da conclusão dos workers: ordena por arquivo
+        for table, schema in UNIT_TABLES.items():
+            data = buffers[table].to_arrow(schema)
+            if data.num_rows:
+                data = data.sort_by('arquivo')
+            results.write_part(unit.project, unit.revision, table, unit.part, data)
+        status = 'processada'
+    if revision_complete(results, unit):
+        merge_revision(results, unit)
+    return status
+
+
+class WorkQueue:
+    """
+    Interface das filas de unidades de trabalho.
+
+    Attributes:
+        shared (bool): True se workers em outros processos podem consumir a fila
+    """
+
+    shared = False
+
+    def put(self, unit: WorkUnit) -> None:
+        """
+        Enfileira uma unidade.
+
+        Args:
+            unit: Unidade de trabalho
+        """
+        raise NotImplementedError
+
+    def put_many(self, units) -> int:
+        """
+        Enfileira várias unidades.
+
+        Args:
+            units: Iterável de WorkUnits
+
+        Returns:
+            int: Número de unidades enfileiradas
+        """
+        count = 0
+        for unit in units:
+            self.put(unit)
+            count += 1
+        return count
+
+    def get(self, timeout: float = None) -> WorkUnit:
+        """
+        Retira a próxima unidade.
+
+        Args:
+            timeout: Segundos de espera por uma unidade (None espera indefinidamente)
+
+        Returns:
+            WorkUnit: A unidade, ou None se a fila continuar vazia após o timeout
+        """
+        raise NotImplementedError
+
+    def task_done(self, unit: WorkUnit, error: str = None) -> None:
+        """
+        Informa o fim do processamento de uma unidade retirada com get().
+
+        Args:
+            unit: Unidade processada
+            error: Mensagem de erro, se o processamento falhou
+        """
+
+    def close(self) -> None:
+        """Libera os recursos da fila."""
+
+
+class LocalQueue(WorkQueue):
+    """
+    Fila em memória, para workers em threads do processo atual.
+    """
+
+    def __init__(self):
+        self._queue = queue.Queue()
+
+    def put(self, unit: WorkUnit) -> None:
+        self._queue.put(unit)
+
+    def get(self, timeout: float = None) -> WorkUnit:
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class ProcessQueue(WorkQueue):
+    """
+    Fila de multiprocessing, para workers em processos da mesma máquina.
+
+    Note:
+        A fila deve ser repassada aos processos na criação (ex: nos args de
+        multiprocessing.Process), como toda multiprocessing.Queue.
+    """
+
+    shared = True
+
+    def __init__(self, context=None):
+        """
+        Args:
+            context: Contexto de multiprocessing (padrão: o contexto padrão)
+        """
+        self._queue = (context or multiprocessing.get_context()).Queue()
+
+    def put(self, unit: WorkUnit) -> None:
+        self._queue.put(unit)
+
+    def get(self, timeout: float = None) -> WorkUnit:
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self) -> None:
+        self._queue.close()
+
+
+class SpoolQueue(WorkQueue):
+    """
+    Fila em um diretório (spool), que workers de outros hosts podem consumir.
+
+    Cada unidade é um arquivo JSON em <directory>/pendentes. Um worker a reserva
+    movendo o arquivo para em_andamento (os.rename é atômico: só um worker
+    consegue) e, ao terminar, para concluidas ou falhas. Com o diretório em um
+    sistema de arquivos compartilhado (o mesmo do ResultStore), basta apontar
+    os workers de cada host para ele.
+
+    Attributes:
+        directory (str): Diretório do spool
+        poll_interval (float): Intervalo, em segundos, entre buscas em pendentes
+    """
+
+    shared = True
+
+    def __init__(self, directory: str, poll_interval: float = 0.2):
+        """
+        Args:
+            directory: Diretório do spool (criado se não existir)
+            poll_interval: Intervalo entre buscas por unidades pendentes
+        """
+        self.directory = directory
+        self.poll_interval = poll_interval
+        for state in SPOOL_STATES:
+            os.makedirs(os.path.join(directory, state), exist_ok=True)
+
+    def _path(self, state: str, unit_id: str) -> str:
+        return os.path.join(self.directory, state, f"{unit_id}.json")
+
+    def put(self, unit: WorkUnit) -> None:
+        """
+        Enfileira uma unidade; unidades já concluídas ou na fila são ignoradas.
+
+        Args:
+            unit: Unidade de trabalho
+        """
+        if any(os.path.exists(self._path(state, unit.unit_id)) for state in SPOOL_STATES[:3]):
+            return
+        temporary = os.path.join(self.directory, f".{unit.unit_id}.{uuid.uuid4().hex}.tmp")
+        with open(temporary, 'w', encoding='utf-8') as handler:
+            json.dump(unit.to_dict(), handler)
+        os.replace(temporary, self._path('pendentes', unit.unit_id))
+
+    def get(self, timeout: float = None) -> WorkUnit:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            for name in sorted(os.listdir(os.path.join(self.directory, 'pendentes'))):
+                unit_id = name[:-len('.json')]
+                claimed = self._path('em_andamento', unit_id)
+                try:
+                    os.rename(self._path('pendentes', unit_id), claimed)
+                except OSError:
+                    continue  # reservada por outro worker
+                os.utime(claimed)  # marca o início, usado por requeue_stale()
+                with open(claimed, encoding='utf-8') as handler:
+                    return WorkUnit.from_dict(json.load(handler))
+            if deadline is not None and time.monotonic() >= deadline:
+                return None
+            time.sleep(self.poll_interval)
+
+    def task_done(self, unit: WorkUnit, error: str = None) -> None:
+        # A reserva pode ter sido devolvida por requeue_stale() durante uma análise longa
+        claimed = self._path('em_andamento', unit.unit_id)
+        if error is None:
+            try:
+                os.replace(claimed, self._path('concluidas', unit.unit_id))
+            except FileNotFoundError:
+                # Os resultados já estão no ResultStore: conclui a cópia devolvida à fila
+                # (se outro worker já a reservou, ele a encontrará como 'existente')
+                try:
+                    os.replace(self._path('pendentes', unit.unit_id), self._path('concluidas', unit.unit_id))
+                except FileNotFoundError:
+                    pass
+            return
+        failed = self._path('falhas', unit.unit_id)
+        try:
+            os.replace(claimed, failed)
+        except FileNotFoundError:
+            return  # de volta à fila: a próxima tentativa registra o resultado
+        data = unit.to_dict()
+        data['erro'] = error
+        with open(failed, 'w', encoding='utf-8') as handler:
+            json.dump(data, handler)
+
+    def requeue_stale(self, max_age: float) -> int:
+        """
+        Devolve à fila as unidades reservadas há mais de max_age segundos
+        (ex: de um worker que caiu).
+
+        Args:
+            max_age: Idade máxima de uma reserva, em segundos
+
+        Returns:
+            int: Número de unidades devolvidas
+        """
+        count = 0
+        now = time.time()
+        running = os.path.join(self.directory, 'em_andamento')
+        for name in os.listdir(running):
+            path = os.path.join(running, name)
+            try:
+                if now - os.path.getmtime(path) > max_age:
+                    os.rename(path, os.path.join(self.directory, 'pendentes', name))
+                    count += 1
+            except OSError:
+                continue  # concluída ou devolvida por outro processo
+        return count
+
+    def counts(self) -> dict:
+        """
+        Conta as unidades de cada situação.
+
+        Returns:
+            dict: {situação: número de unidades}, com as chaves de SPOOL_STATES
+        """
+        return {state: sum(1 for name in os.listdir(os.path.join(self.directory, state))
+                           if name.endswith('.json'))
+                for state in SPOOL_STATES}
+
+
+def open_queue(spec: str = 'local') -> WorkQueue:
+    """
+    Cria uma fila a partir de uma descrição curta.
+
+    Args:
+        spec: 'local' (LocalQueue), 'processos' (ProcessQueue) ou o diretório
+              de um SpoolQueue
+
+    Returns:
+        WorkQueue: A fila
+    """
+    if spec == 'local':
+        return LocalQueue()
+    if spec == 'processos':
+        return ProcessQueue()
+    return SpoolQueue(spec)
+
+
+def run_worker(work_queue: WorkQueue, results_root: str, workers: int = None, budget=None,
+               idle_timeout: float = 1.0) -> dict:
+    """
+    Consome unidades de uma fila até ela ficar vazia.
+
+    Args:
+        work_queue: Fila de unidades
+        results_root: Diretório do ResultStore compartilhado
+        workers: Processos usados na análise de cada unidade
+        budget: budgets.FileBudget opcional
+        idle_timeout: Segundos sem novas unidades após os quais o worker termina
+
+    Returns:
+        dict: Contagem de unidades 'processada', 'existente' e 'falha'
+
+    Note:
+        Uma falha é reportada e registrada na fila (task_done com o erro) sem
+        interromper o worker.
+    """
+    results = store.ResultStore(results_root)
+    counts = {'processada': 0, 'existente': 0, 'falha': 0}
+    while True:
+        unit = work_queue.get(timeout=idle_timeout)
+        if unit is None:
+            return counts
+        try:
+            counts[process_unit(unit, results, workers=workers, budget=budget)] += 1
+        except Exception as e:
+            print(f"Erro na unidade {unit.unit_id}: {e}")
+            counts['falha'] += 1
+            work_queue.task_done(unit, error=str(e))
+        else:
+            work_queue.task_done(unit)
+
+
+def _worker_process(work_queue, results_root, workers, budget, idle_timeout, counts_queue):
+    counts_queue.put(run_worker(work_queue, results_root, workers=workers, budget=budget,
+                                idle_timeout=idle_timeout))
+
+
+def _collect_counts(counts_queue, pool: list) -> list:
+    # Lê as contagens antes do join (um processo só termina depois de entregá-las);
+    # um processo que morreu sem entregar não bloqueia a coleta
+    partials = []
+    while len(partials) < len(pool):
+        try:
+            partials.append(counts_queue.get(timeout=1.0))
+        except queue.Empty:
+            if not any(process.is_alive() for process in pool):
+                break
+    return partials
+
+
+def run_workers(work_queue: WorkQueue, results_root: str, units: list = None, processes: int = 4,
+                workers: int = None, budget=None, idle_timeout: float = 1.0) -> dict:
+    """
+    Enfileira unidades e as processa com vários workers locais.
+
+    Args:
+        work_queue: Fila de unidades. Com uma fila compartilhada (ProcessQueue,
+                    SpoolQueue) cada worker é um processo; com LocalQueue, uma thread
+        results_root: Diretório do ResultStore compartilhado
+        units: Unidades a enfileirar antes de iniciar os workers (opcional)
+        processes: Número de workers
+        workers: Processos usados por cada worker na análise de uma unidade
+        budget: budgets.FileBudget opcional
+        idle_timeout: Segundos sem novas unidades após os quais cada worker termina
+
+    Returns:
+        dict: Soma das contagens de run_worker() de todos os workers
+
+    Note:
+        Ao final, as revisões de `units` com todas as partes gravadas são
+        juntadas de novo, o que cobre workers que terminaram juntos.
+    """
+    units = list(units or ())
+    work_queue.put_many(units)
+    processes = max(1, processes)
+    args = (work_queue, results_root, workers, budget, idle_timeout)
+    if work_queue.shared:
+        counts_queue = multiprocessing.get_context().Queue()
+        pool = [multiprocessing.Process(target=_worker_process, args=args + (counts_queue,))
+                for _ in range(processes)]
+        for process in pool:
+            process.start()
+        partials = _collect_counts(counts_queue, pool)
+        for process in pool:
+            process.join()
+    else:
+        counts_queue = queue.Queue()
+        # Cada thread copia o contexto atual (ex: o perfil ativo de profiling)
+        threads = [threading.Thread(target=contextvars.copy_context().run,
+                                    args=(_worker_process, *args, counts_queue))
+                   for _ in range(processes)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        partials = [counts_queue.get() for _ in threads]
+
+    counts = {'processada': 0, 'existente': 0, 'falha': 0}
+    for partial in partials:
+        for status, value in partial.items():
+            counts[status] += value
+    results = store.ResultStore(results_root)
+    for unit in {(unit.project, unit.revision): unit for unit in units}.values():
+        if revision_complete(results, unit):
+            merge_revision(results, unit)
+    return counts
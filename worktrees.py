@@ -0,0 +1,200 @@
+import contextvars
+import os
+import shutil
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import profiling
+import timeline
+
+
+def _git(path: str, *args) -> str:
+    try:
+        proc = subprocess.run(['git', '-C', path, *args], stdout=subprocess.PIPE,
+                              stderr=subprocess.PIPE, text=True, check=True)
+    except subprocess.CalledProcessError as e:
+        raise RuntimeError(f"Erro ao executar Git: {e.stderr.strip()}") from e
+    return proc.stdout
+
+
+class WorktreePool:
+    """
+    Conjunto de `git worktree`s de um repositório, emprestados um por revisão.
+
+    Cada worktree tem a própria árvore de trabalho e o próprio HEAD, de modo
+    que várias revisões podem ser analisadas ao mesmo tempo sem disputar o
+    checkout do clone principal. Os worktrees são criados sob demanda (até
+    `size`) e reaproveitados entre tarefas: ao emprestar, o pool prefere o
+    worktree livre cuja revisão atual está mais próxima da pedida, o que
+    reduz o checkout aos arquivos alterados entre as duas.
+
+    Attributes:
+        repo_path (str): Caminho do clone principal
+        size (int): Número máximo de worktrees
+        root (str): Diretório dos worktrees (padrão: <git-common-dir>/code_insights/worktrees)
+    """
+
+    def __init__(self, repo_path: str, size: int = 4, root: str = None):
+        """
+        Args:
+            repo_path: Caminho do clone principal
+            size: Número máximo de worktrees (e de revisões analisadas ao mesmo tempo)
+            root: Diretório dos worktrees; o padrão fica dentro de .git, fora da
+                  descoberta de arquivos do clone principal
+        """
+        self.repo_path = repo_path
+        self.size = max(1, size)
+        self.root = os.path.abspath(root or os.path.join(timeline.index_dir(repo_path), 'worktrees'))
+        self._lock = threading.Condition()
+        # `git worktree add/prune` alteram .git/worktrees e não suportam chamadas concorrentes
+        self._admin = threading.Lock()
+        self._idle = {}       # caminho -> hash atual
+        self._paths = set()   # worktrees do pool (livres ou emprestados)
+        self._adopt()
+
+    def _adopt(self) -> None:
+        # Reaproveita os worktrees deixados por execuções anteriores no mesmo diretório
+        listing = _git(self.repo_path, 'worktree', 'list', '--porcelain')
+        for entry in listing.split('\n\n'):
+            fields = dict(line.split(' ', 1) for line in entry.splitlines() if ' ' in line)
+            path = fields.get('worktree')
+            if (path and os.path.dirname(os.path.realpath(path)) == os.path.realpath(self.root)
+                    and os.path.isdir(path) and len(self._paths) < self.size):
+                path = os.path.join(self.root, os.path.basename(path))
+                self._paths.add(path)
+                self._idle[path] = fields.get('HEAD')
+
+    def _revision_distance(self, current: str, revision: str) -> float:
+        # Número de commits entre as duas revisões (aproxima o custo do checkout)
+        try:
+            return int(_git(self.repo_path, 'rev-list', '--count', f'{current}...{revision}'))
+        except (RuntimeError, ValueError):
+            return float('inf')
+
+    def _acquire(self, revision: str) -> tuple:
+        with self._lock:
+            while not self._idle and len(self._paths) >= self.size:
+                self._lock.wait()
+            if not self._idle:
+                path = next(os.path.join(self.root, str(i)) for i in range(self.size)
+                            if os.path.join(self.root, str(i)) not in self._paths)
+                self._paths.add(path)
+                return path, None
+            candidates = dict(self._idle)
+        # Escolhe fora do lock (consulta o git); outra thread pode ter levado o escolhido
+        ranked = sorted(candidates, key=lambda path: (candidates[path] != revision,
+                                                      self._revision_distance(candidates[path], revision)))
+        with self._lock:
+            for path in ranked:
+                if path in self._idle:
+                    return path, self._idle.pop(path)
+        return self._acquire(revision)
+
+    def _release(self, path: str, current: str) -> None:
+        with self._lock:
+            self._idle[path] = current
+            self._lock.notify()
+
+    def _prepare(self, path: str, current: str, revision: str) -> str:
+        with profiling.stage('checkout'):
+            if current is None:
+                with self._admin:
+                    if os.path.exists(path):
+                        # Resto de uma execução anterior (ou descartado após falha): recria
+                        shutil.rmtree(path)
+                        _git(self.repo_path, 'worktree', 'prune')
+                    os.makedirs(self.root, exist_ok=True)
+                    _git(self.repo_path, 'worktree', 'add', '--quiet', '--detach', '--force', path, revision)
+            elif current != revision:
+                _git(path, 'checkout', '--quiet', '--detach', '--force', revision)
+        return _git(path, 'rev-parse', 'HEAD').strip()
+
+    @contextmanager
+    def lease(self, revision: str):
+        """
+        Empresta um worktree já na revisão pedida.
+
+        Bloqueia enquanto todos os `size` worktrees estiverem em uso.
+
+        Args:
+            revision: Hash, branch ou tag
+
+        Yields:
+            str: Caminho do worktree (não deve ser alterado pelo chamador)
+
+        Raises:
+            RuntimeError: Se o checkout da revisão falhar
+        """
+        path, current = self._acquire(revision)
+        try:
+            current = self._prepare(path, current, revision)
+        except RuntimeError:
+            # Worktree em estado desconhecido: será recriado no próximo empréstimo
+            self._discard(path)
+            raise
+        try:
+            yield path
+        finally:
+            self._release(path, current)
+
+    def _discard(self, path: str) -> None:
+        with self._admin:
+            subprocess.run(['git', '-C', self.repo_path, 'worktree', 'remove', '--force', path],
+                           capture_output=True)
+        shutil.rmtree(path, ignore_errors=True)
+        self._release(path, None)
+
+    def map(self, func, revisions: list) -> list:
+        """
+        Executa func(revisão, caminho_do_worktree) para cada revisão, em paralelo.
+
+        Args:
+            func: Função chamada com o worktree emprestado já na revisão
+            revisions: Revisões a analisar
+
+        Returns:
+            list: Resultados de func, na ordem de `revisions`
+
+        Raises:
+            Exception: A primeira exceção levantada por func ou pelo checkout
+
+        Note:
+            Cada tarefa roda em uma thread com uma cópia do contexto atual, de
+            modo que o perfil ativo (profiling.RunProfile) continua registrando
+            os estágios. Revisões repetidas são executadas uma vez por ocorrência.
+        """
+        def task(revision):
+            with self.lease(revision) as path:
+                return func(revision, path)
+
+        with ThreadPoolExecutor(max_workers=self.size) as executor:
+            futures = [executor.submit(contextvars.copy_context().run, task, revision)
+                       for revision in revisions]
+            return [future.result() for future in futures]
+
+    def close(self) -> None:
+        """
+        Remove os worktrees criados pelo pool.
+
+        Note:
+            Deve ser chamado sem empréstimos ativos. Sem close(), os worktrees
+            ficam no disco e são reaproveitados pelo próximo pool do mesmo
+            repositório. Usado como context manager, o pool chama close() ao sair.
+        """
+        with self._lock:
+            paths = list(self._idle)
+            self._idle.clear()
+            self._paths.difference_update(paths)
+        for path in paths:
+            subprocess.run(['git', '-C', self.repo_path, 'worktree', 'remove', '--force', path],
+                           capture_output=True)
+            shutil.rmtree(path, ignore_errors=True)
+        subprocess.run(['git', '-C', self.repo_path, 'worktree', 'prune'], capture_output=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()